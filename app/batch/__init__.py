@@ -0,0 +1,135 @@
+# app/batch/__init__.py
+
+import logging
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Iterable, Iterator, List, Tuple
+from app.calculation import Calculation, ExpressionCalculation
+from app.calculator import invalid_count_error, parse_operand
+from app.operations.registry import OPERATIONS
+
+# Initialize the logger for this module
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 10000
+
+
+def available_cpus() -> int:
+    """Return the number of CPUs this process may run on."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # pragma: no cover - not available on macOS or Windows
+        return os.cpu_count() or 1
+
+
+def evaluate_row(text: str):
+    """
+    Evaluate one "command operand..." row, also accepting commas as separators.
+
+    Operands are read and counted as at the prompt, so whole numbers and fractions
+    stay exact and powmod takes three.
+
+    Args:
+        text (str): The stripped row text.
+
+    Returns:
+        tuple: The command, the operands (None if they could not be read), and the
+        result or an error message.
+    """
+    command, *words = text.replace(",", " ").split()
+    operation = OPERATIONS.get(command)
+    if operation is None:
+        return command, None, "Error: Unknown command."
+    if len(words) != operation.arity:
+        return command, None, invalid_count_error(operation.arity)
+    try:
+        operands = tuple(map(parse_operand, words))
+    except ValueError:
+        return command, None, "Error: Invalid input."
+    try:
+        return command, operands, operation.calculate(*operands)
+    except Exception as e:  # As at the prompt, a row that fails gets its error and the job carries on
+        return command, operands, f"Error: {str(e)}"
+
+
+def evaluate_chunk(rows: List[Tuple[int, str]]) -> List[tuple]:
+    """
+    Evaluate a chunk of rows; this runs in a worker process.
+
+    Args:
+        rows (list): (line number, row text) pairs.
+
+    Returns:
+        list: (line number, row text, command, operands, output) for every row, in order.
+    """
+    return [(line_number, text, *evaluate_row(text)) for line_number, text in rows]
+
+
+def _chunks(lines: Iterable[str], chunk_size: int) -> Iterator[List[Tuple[int, str]]]:
+    """Group the non-blank, non-comment lines into lists of (line number, text)."""
+    numbered = ((line_number, line.strip()) for line_number, line in enumerate(lines, 1))
+    rows = ((line_number, text) for line_number, text in numbered if text and not text.startswith("#"))
+    return iter(lambda: list(islice(rows, chunk_size)), [])
+
+
+def run_batch_job(lines: Iterable[str], workers: int = 1, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                  history=None) -> Iterator[tuple]:
+    """
+    Evaluate rows of "command operand..." in chunks across worker processes, yielding results in input order.
+
+    Only operation commands are accepted. A bad row gets an error result and the job
+    carries on. At most two chunks per worker are in flight, so memory stays bounded
+    however large the input is.
+
+    Args:
+        lines (Iterable[str]): The input rows; blank lines and lines starting with # are skipped.
+        workers (int): The number of worker processes. 1 evaluates in this process, 0 uses every available CPU.
+        chunk_size (int): The number of rows sent to a worker at a time.
+        history (History, optional): A history that each successful calculation is added to, in input order.
+
+    Yields:
+        tuple: (line number, row text, command, operands, output), where output is the result or an error message.
+
+    Raises:
+        ValueError: If workers is negative or chunk_size is not positive.
+    """
+    if workers < 0 or chunk_size < 1:
+        raise ValueError("Workers must be at least 0 and chunk size at least 1.")
+    workers = workers or available_cpus()
+    chunks = _chunks(lines, chunk_size)
+    logger.info("Batch job started with %d workers and chunks of %d rows.", workers, chunk_size)
+    results = map(evaluate_chunk, chunks) if workers == 1 else _run_in_pool(chunks, workers)
+    for chunk_results in results:
+        for row in chunk_results:
+            if history is not None and not isinstance(row[4], str):
+                history.add_calculation(_calculation(*row[2:]))
+            yield row
+
+
+def _calculation(command: str, operands: tuple, result):
+    """Build the history entry for one row, as the calculator records the same command."""
+    operation = OPERATIONS[command]
+    if operation.arity == 2:
+        calculation = Calculation(operation, *operands)
+    else:  # Recorded with the command as typed, which keeps the operands a Calculation has no room for
+        calculation = ExpressionCalculation(operation, operands[0], operands[1],
+                                            " ".join(map(str, (command, *operands))))
+    calculation.set_result(result)
+    return calculation
+
+
+def _run_in_pool(chunks: Iterator[list], workers: int) -> Iterator[list]:
+    """Evaluate chunks in a process pool, yielding each chunk's results in submission order."""
+    pool = ProcessPoolExecutor(max_workers=workers)
+    pending = deque()
+    try:
+        for chunk in chunks:
+            pending.append(pool.submit(evaluate_chunk, chunk))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,178 @@
+# app/cache/__init__.py
+
+import math
+import threading
+import time
+from collections import OrderedDict
+from fractions import Fraction
+from typing import Callable, Hashable, Tuple
+
+# Returned by ResultCache.get when there is no usable entry, since None can be a cached value
+MISSING = object()
+
+# Results larger than this are not cached, so a full cache of exact powers stays around 64 MiB
+MAX_RESULT_BYTES = 64 * 1024
+
+
+def cache_key(command: str, operand1, operand2, *more) -> Tuple:
+    """
+    Build the cache key for one operation command and its operands.
+
+    The operand types are part of the key because 2 and 2.0 compare equal but give
+    results of different types, and the sign of a float zero is kept because -0.0
+    and 0.0 compare equal but can give different results.
+
+    Args:
+        command (str): The operation command, such as 'power'.
+        operand1: The first operand.
+        operand2: The second operand.
+        *more: Any further operands, such as the modulus of powmod.
+
+    Returns:
+        tuple: A hashable key.
+    """
+    if more:
+        return (command, _operand_key(operand1), _operand_key(operand2), *map(_operand_key, more))
+    return (command, _operand_key(operand1), _operand_key(operand2))
+
+
+def _operand_key(value) -> Tuple:
+    """Return the key part for one operand: its type, its value, and the sign of a float zero."""
+    if type(value) is float and value == 0:
+        return (float, value, math.copysign(1.0, value))
+    return (type(value), value)
+
+
+def result_bytes(result) -> int:
+    """Return the approximate size of an exact result's digits in bytes; other results count as 0."""
+    if type(result) is int:
+        return result.bit_length() // 8
+    if isinstance(result, Fraction):
+        return (result.numerator.bit_length() + result.denominator.bit_length()) // 8
+    return 0
+
+
+class ResultCache:
+    """Thread-safe LRU cache of operation results with an optional time to live."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 0, clock: Callable[[], float] = time.monotonic,
+                 max_result_bytes: int = MAX_RESULT_BYTES):
+        """
+        Initialize an empty cache.
+
+        Args:
+            maxsize (int): The most entries kept before the least recently used is evicted. 0 disables the cache.
+            ttl (float): Seconds an entry stays valid, or 0 to keep entries until evicted.
+            clock (Callable[[], float]): The time source used for the TTL.
+            max_result_bytes (int): Exact results larger than this are not cached, so the
+                memory held is bounded by maxsize times this rather than by the largest results.
+
+        Raises:
+            ValueError: If maxsize or ttl is negative.
+        """
+        if maxsize < 0 or ttl < 0:
+            raise ValueError("Cache size and TTL must not be negative.")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self.max_result_bytes = max_result_bytes
+        self._entries = OrderedDict()  # Key -> (result, time stored), least recently used first
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Return True if the cache stores results."""
+        return self.maxsize > 0
+
+    def __len__(self) -> int:
+        """Return the number of cached results."""
+        return len(self._entries)
+
+    def get(self, key: Hashable):
+        """
+        Look up a result, marking it as most recently used.
+
+        Args:
+            key (Hashable): The key from cache_key.
+
+        Returns:
+            The cached result, or MISSING if there is none or it has expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return MISSING
+            result, stored_at = entry
+            if self.ttl and self._clock() - stored_at >= self.ttl:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key: Hashable, result):
+        """
+        Store a result, evicting the least recently used entry if the cache is full.
+
+        A result larger than max_result_bytes is not stored.
+
+        Args:
+            key (Hashable): The key from cache_key.
+            result: The result to cache.
+        """
+        if not self.maxsize or result_bytes(result) > self.max_result_bytes:
+            return
+        with self._lock:
+            self._entries[key] = (result, self._clock() if self.ttl else 0)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Remove every cached result and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def stats(self) -> dict:
+        """
+        Return the cache counters.
+
+        Returns:
+            dict: The size, maxsize, ttl, hits, misses, evictions, expirations and hit rate.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def describe(self) -> str:
+        """
+        Summarize the cache in one line for the REPL.
+
+        Returns:
+            str: The cache size and counters.
+        """
+        if not self.enabled:
+            return "Result cache is disabled."
+        stats = self.stats()
+        ttl = f", TTL {stats['ttl']:g} s" if stats["ttl"] else ""
+        return (f"Result cache: {stats['size']} of {stats['maxsize']} entries{ttl}, {stats['hits']} hits, "
+                f"{stats['misses']} misses, {stats['evictions']} evictions, "
+                f"{stats['expirations']} expirations ({stats['hit_rate']:.1%} hit rate).")
@@ -1,9 +1,38 @@
+import math
 from typing import Union
 from app.operations import Operation
 
+
+def format_result(value) -> str:
+    """
+    Return a result or operand as text.
+
+    Python refuses to write an int of more than sys.get_int_max_str_digits() digits
+    (4300 by default) in decimal, since that takes quadratic time. Such a number, or a
+    Fraction made of such ints, is written to seven significant digits instead, such
+    as 1.312703e+1431363.
+
+    Args:
+        value (int, float or Fraction): The number.
+
+    Returns:
+        str: The number as str writes it, or its approximation.
+    """
+    try:
+        return str(value)
+    except ValueError:
+        magnitude = abs(value)
+        exponent = math.log10(magnitude.numerator) - math.log10(magnitude.denominator)
+        whole = math.floor(exponent)
+        return f"{'-' if value < 0 else ''}{10 ** (exponent - whole):.6f}e{whole:+d}"
+
+
 class Calculation:
     """Class to represent a single calculation with an operation and two operands."""
 
+    # Fixed slots instead of a per-instance __dict__ keep each record small
+    __slots__ = ("operation", "operand1", "operand2", "result")
+
     def __init__(self, operation: Operation, operand1: Union[int, float], operand2: Union[int, float]):
         """
         Initialize a calculation with an operation and two operands.
@@ -39,4 +68,70 @@ class Calculation:
         Returns:
             str: A formatted string showing the operands, operation, and result (if calculated).
         """
-        return f"{self.operand1} {self.operation.__class__.__name__.lower()} {self.operand2} = {self.result if self.result is not None else 'Not calculated'}"
+        return f"{format_result(self.operand1)} {self.operation.__class__.__name__.lower()} {format_result(self.operand2)} = {format_result(self.result) if self.result is not None else 'Not calculated'}"
+
+
+class CalculationBatch:
+    """Class to represent one block of calculations that share an operation."""
+
+    __slots__ = ("operation", "operand1", "operand2", "result")
+
+    def __init__(self, operation: Operation, operand1, operand2, result):
+        """
+        Initialize a batch from whole arrays of operands and results.
+
+        Args:
+            operation (Operation): The Operation instance applied to every pair.
+            operand1 (np.ndarray): The first operands.
+            operand2 (np.ndarray): The second operands.
+            result (np.ndarray): The results, NaN where no result was defined.
+        """
+        self.operation = operation
+        self.operand1 = operand1
+        self.operand2 = operand2
+        self.result = result
+
+    def __len__(self) -> int:
+        """Return the number of calculations in the batch."""
+        return len(self.result)
+
+    def __repr__(self) -> str:
+        """
+        Provide a short string representation of the batch without listing every entry.
+
+        Returns:
+            str: A summary with the operation name and the number of calculations.
+        """
+        return f"batch of {len(self)} {self.operation.__class__.__name__.lower()} calculations"
+
+
+class ExpressionCalculation(Calculation):
+    """A calculation produced by evaluating an infix expression, recorded with its source text.
+
+    The operation and operands are those of the last step of the expression, so the
+    record is also a valid Calculation; the text describes the whole expression.
+    """
+
+    __slots__ = ("expression",)
+
+    def __init__(self, operation: Operation, operand1: Union[int, float], operand2: Union[int, float], expression: str):
+        """
+        Initialize an expression calculation.
+
+        Args:
+            operation (Operation): The operation of the last step of the expression.
+            operand1 (Union[int, float]): The first operand of that step.
+            operand2 (Union[int, float]): The second operand of that step.
+            expression (str): The expression text, such as "3 + 4 * 2 ^ 2".
+        """
+        super().__init__(operation, operand1, operand2)
+        self.expression = expression
+
+    def __repr__(self) -> str:
+        """
+        Provide a string representation showing the expression and its result.
+
+        Returns:
+            str: The expression text followed by its result (if calculated).
+        """
+        return f"{self.expression} = {format_result(self.result) if self.result is not None else 'Not calculated'}"
@@ -1,44 +1,191 @@
 import logging
-from app.logger_config import setup_logging
-from app.operations.addition import Addition
-from app.operations.subtraction import Subtraction
-from app.operations.multiplication import Multiplication
-from app.operations.division import Division
-from app.operations.power import Power
-from app.operations.modulus import Modulus
+import os
+import re
+import time
+from fractions import Fraction
+import numpy as np
+from app.cache import MISSING, ResultCache, cache_key
+from app.config import load_config
+from app.expression import compile_expression
+from app.metrics import METRICS
+from app.profiling import ALLOCATION_TRACER, PROFILER
+from app.operations.registry import OPERATIONS
 from app.history import History
-from app.calculation import Calculation
+from app.calculation import Calculation, CalculationBatch, ExpressionCalculation
+from app.operations import Operation
+
+
+def split_command(text):
+    """Split a command line into the command and the words after it.
+
+    A line that does not start with a letter, such as '3 + 4 * 2', is an expression
+    and is passed whole to the eval command.
+
+    Args:
+        text (str): The stripped command line.
+
+    Returns:
+        list: The command followed by its words.
+    """
+    if not text[:1].isalpha():
+        return ["eval", text]
+    return text.split()
+
+
+def parse_operand(word):
+    """Convert one typed operand to a number, keeping integers exact.
+
+    Whole numbers such as '12' become ints of any size, fractions such as '3/4'
+    become Fractions, and anything else, such as '0.5' or '1e3', becomes a float.
+    Operations on ints and Fractions give exact results, so a power of big integers
+    neither overflows nor rounds.
+
+    Args:
+        word (str): The operand as typed.
+
+    Returns:
+        int, Fraction or float: The operand.
+
+    Raises:
+        ValueError: If the word is not a number.
+    """
+    if _INTEGER.match(word):
+        return int(word)
+    if "/" in word:
+        try:
+            return Fraction(word)
+        except ZeroDivisionError as e:
+            raise ValueError(f"Invalid fraction {word!r}.") from e
+    return float(word)
+
+
+def parse_arguments(calculator, command, words):
+    """Convert the words after a command into its arguments.
+
+    Operands of operation commands (and of unknown commands) are converted with
+    parse_operand; other commands, such as 'cache clear', get their words as typed.
+
+    Args:
+        calculator (Calculator): The calculator whose commands are looked up.
+        command (str): The command word.
+        words (list): The remaining words of the command line.
+
+    Returns:
+        list: The arguments to pass to execute_command.
+
+    Raises:
+        ValueError: If an operand is not a number.
+    """
+    if command in calculator.commands and not isinstance(calculator.commands[command], Operation):
+        return list(words)
+    return list(map(parse_operand, words))
+
+
+# Operations described one by one in the help text; any other registered operation is listed by name
+_DOCUMENTED_OPERATIONS = ('add', 'subtract', 'multiply', 'divide', 'power', 'modulus', 'powmod')
+
+_INTEGER = re.compile(r"^[+-]?\d+$")
+
+# Operand counts as words, for the error message when a command gets the wrong number
+_COUNTS = {2: "two", 3: "three"}
+
+# Commands that are not operations and take their words as they were typed
+_WORD_COMMANDS = frozenset(('checkpoint', 'rollback', 'history', 'query', 'stats', 'map',
+                            'cache', 'metrics', 'profile', 'trace-mem'))
+
+
+def invalid_count_error(arity):
+    """Return the error message for an operation command given the wrong number of operands.
+
+    Args:
+        arity (int): The number of operands the operation takes.
+
+    Returns:
+        str: The error message.
+    """
+    return f"Error: Invalid number of arguments. Please provide {_COUNTS.get(arity)} numbers."
+
+
+_QUERY_TERM = re.compile(r"^(result|operand)(>=|<=|>|<|=)(.+)$")
+
+
+def default_cache():
+    """Build a result cache from CALCULATOR_CACHE_SIZE (default 1024, 0 disables) and
+    CALCULATOR_CACHE_TTL (seconds, default 0 for no expiry).
+
+    Returns:
+        ResultCache: The new, empty cache.
+    """
+    load_config()
+    return ResultCache(int(os.getenv("CALCULATOR_CACHE_SIZE", "1024")),
+                       float(os.getenv("CALCULATOR_CACHE_TTL", "0")))
+
+
+def _narrow(comparison, value, low, high):
+    """Return the result bounds narrowed by one 'result' term, such as '>=' and 10."""
+    if comparison in ('>=', '>', '='):
+        low = max(low, np.nextafter(value, np.inf) if comparison == '>' else value)
+    if comparison in ('<=', '<', '='):
+        high = min(high, np.nextafter(value, -np.inf) if comparison == '<' else value)
+    return low, high
+
+
+def _manage_capture(capture, command, action):
+    """Run the start, stop or status action of a profiling command."""
+    if action is None:
+        return capture.status()
+    if action == 'start':
+        return capture.start()
+    if action == 'stop':
+        return capture.stop()
+    return f"Error: Unknown {command} action '{action}'. Use '{command}', '{command} start' or '{command} stop'."
 
-# Set up logging configuration
-setup_logging()
 
 class Calculator:
     """A simple calculator class to perform basic arithmetic operations with history tracking."""
 
-    def __init__(self):
-        """Initialize the Calculator with command mappings and history."""
-        self.history = History()  # Initialize history attribute here
+    def __init__(self, cache: ResultCache = None, history: History = None):
+        """Initialize the Calculator with command mappings, history and a result cache.
+
+        Args:
+            cache (ResultCache, optional): The result cache to use. By default one is built
+                by default_cache.
+            history (History, optional): The history to record calculations in. By default
+                one is kept in the history file.
+        """
+        load_config()
+        self.history = history if history is not None else History()  # Initialize history attribute here
+        self.cache = cache if cache is not None else default_cache()
         self.commands = {
-            'add': Addition(),
-            'subtract': Subtraction(),
-            'multiply': Multiplication(),
-            'divide': Division(),
-            'power': Power(),  # Add Power operation to commands
-            'modulus': Modulus(),  # Add Modulus operation to commands
+            **OPERATIONS,  # Shared operation singletons loaded so far; plugin operations are added on first use
             'help': self.show_help,
             'exit': self.exit_calculator,
             'quit': self.exit_calculator,
             'undo': self.history.undo,
+            'redo': self.history.redo,
+            'checkpoint': self.history.checkpoint,
+            'rollback': self.history.rollback,
             'clear': self.history.clear,
             'save': self.history.save,
             'load': self.history.load,
-            'history': self.history.get_history
+            'history': self.show_history,
+            'query': self.query_history,
+            'stats': self.show_stats,
+            'map': self.map_history,
+            'cache': self.manage_cache,
+            'metrics': self.show_metrics,
+            'profile': self.manage_profile,
+            'trace-mem': self.manage_trace_mem,
+            'eval': self.evaluate
         }
         logging.info("Calculator initialized with available commands and history tracking.")
 
     def execute_command(self, command, *args):
         """Execute the command associated with the user input.
 
+        The time each command takes is recorded in METRICS, under 'unknown' for a
+        command that does not exist.
+
         Args:
             command (str): The command to execute (e.g., 'add', 'subtract').
             *args: Variable length argument list for the operation's operands.
@@ -46,32 +193,341 @@ class Calculator:
         Returns:
             str or float: The result of the operation, or an error message if an error occurs.
         """
+        started = time.perf_counter()
+        result = self._execute(command, args)
+        METRICS.observe("calculator_command_seconds", command if command in self.commands else "unknown",
+                        time.perf_counter() - started)
+        return result
+
+    def _execute(self, command, args):
+        """Execute one command for execute_command, counting failures in METRICS."""
+        self.operation(command)  # Adds a plugin operation the first time it is used
         if command in self.commands:
             try:
-                logging.info(f"Executing command: {command} with arguments: {args}")
+                logging.info("Executing command: %s with arguments: %s", command, args)
                 
-                if command in ['exit', 'quit', 'undo', 'clear', 'help', 'save', 'load', 'history']:
+                if command in ['exit', 'quit', 'clear', 'help', 'save', 'load']:
                     result = self.commands[command]()
                     return result
 
-                # Create a Calculation instance, perform the operation, and add to history
+                if command in ['undo', 'redo']:
+                    if len(args) > 1 or not all(str(arg).isdigit() and int(arg) > 0 for arg in args):
+                        return "Error: The number of steps must be a positive whole number."
+                    return self.commands[command](*(int(arg) for arg in args))
+
+                if command in _WORD_COMMANDS:
+                    return self.commands[command](*args)
+
+                if command == 'eval':
+                    return self.evaluate(" ".join(str(arg) for arg in args))
+
+                # Create a Calculation instance, perform the operation (or reuse a cached result), and add to history
                 operation = self.commands[command]
-                calculation = Calculation(operation, *args)
-                result = calculation.execute()
+                arity = operation.arity
+                if len(args) != arity:
+                    METRICS.count_error(command, "InvalidArgumentCount")
+                    logging.error("Invalid number of arguments provided for command.")
+                    return invalid_count_error(arity)
+                if arity == 2:
+                    calculation = Calculation(operation, *args)
+                else:  # Recorded with the command as typed, which keeps the operands a Calculation has no room for
+                    calculation = ExpressionCalculation(operation, args[0], args[1],
+                                                        " ".join(map(str, (command, *args))))
+                key = cache_key(command, *args)
+                result = self.cache.get(key)
+                if result is MISSING:
+                    started = time.perf_counter()
+                    result = calculation.execute() if arity == 2 else operation.calculate(*args)
+                    METRICS.observe("calculator_operation_seconds", command, time.perf_counter() - started)
+                    self.cache.put(key, result)
+                calculation.set_result(result)
                 self.history.add_calculation(calculation)
-                logging.info(f"Calculation executed: {calculation}, Result: {result}")
+                logging.info("Calculation executed: %s", calculation)  # Its text ends with the result
                 return result
 
-            except TypeError:
-                logging.error("Invalid number of arguments provided for command.")
-                return "Error: Invalid number of arguments. Please provide two numbers."
             except Exception as e:
+                METRICS.count_error(command, type(e).__name__)
                 logging.error(f"An error occurred: {str(e)}")
                 return f"Error: {str(e)}"
         else:
-            logging.warning(f"Unknown command attempted: {command}")
+            METRICS.count_error("unknown", "UnknownCommand")
+            logging.warning("Unknown command attempted: %s", command)
+            return "Error: Unknown command."
+
+    def operation(self, command):
+        """Return the operation for a command, loading a plugin operation on first use.
+
+        Args:
+            command (str): The command word, such as 'add'.
+
+        Returns:
+            Operation or None: The operation, or None if the command is not an operation.
+        """
+        if command not in self.commands:
+            operation = OPERATIONS.get(command)
+            if operation is not None:
+                self.commands[command] = operation
+        handler = self.commands.get(command)
+        return handler if isinstance(handler, Operation) else None
+
+    def execute_line(self, text):
+        """Parse and execute one command line as typed, such as 'add 1 2' or '3 + 4 * 2'.
+
+        Args:
+            text (str): The stripped, non-empty command line.
+
+        Returns:
+            str, int, float or Sequence: The command output, as from execute_command.
+        """
+        parts = split_command(text)
+        try:
+            args = parse_arguments(self, parts[0], parts[1:])
+        except ValueError:
+            logging.warning("Invalid input - could not parse arguments as numbers: %s", text)
+            return "Error: Invalid input."
+        return self.execute_command(parts[0], *args)
+
+    def execute_batch(self, command, a_array, b_array):
+        """Execute an operation command on whole arrays of operands at once.
+
+        The batch is validated, computed and logged once, and recorded in history
+        as a single block instead of one Calculation per operand pair.
+
+        Args:
+            command (str): The operation command to execute (e.g., 'add', 'divide').
+            a_array (array-like): The first operands.
+            b_array (array-like): The second operands, or a single number for every first operand.
+
+        Returns:
+            np.ndarray or str: The float64 results (NaN where an operation has no result,
+            such as division by zero), or an error message if an error occurs.
+        """
+        if command not in self.commands:
+            logging.warning("Unknown command attempted: %s", command)
             return "Error: Unknown command."
 
+        operation = self.commands[command]
+        if not isinstance(operation, Operation):
+            logging.warning("Non-operation command attempted as a batch: %s", command)
+            return f"Error: {command} is not an operation command."
+
+        try:
+            result = np.ravel(operation.calculate_batch(a_array, b_array))
+        except (TypeError, ValueError) as e:
+            logging.error(f"An error occurred in batch {command}: {str(e)}")
+            return f"Error: {str(e)}"
+
+        # Keep private float64 copies so later changes to the caller's arrays do not leak into history
+        a, b = (np.array(x, dtype=np.float64).ravel() for x in np.broadcast_arrays(a_array, b_array))
+        self.history.add_batch(CalculationBatch(operation, a, b, result))
+        invalid = int(np.count_nonzero(np.isnan(result)))
+        logging.info("Batch executed: %s on %d operand pairs, %d without a result.", command, len(result), invalid)
+        return result
+
+    def evaluate(self, expression):
+        """Evaluate an infix expression such as '3 + 4 * 2 ^ 2' and record it in history.
+
+        The expression is compiled once and the compiled form is reused for the same
+        text, so repeated formulas skip parsing. It is recorded as one history entry
+        with its text.
+
+        Args:
+            expression (str): The expression, using + - * / % ^, parentheses and unary minus.
+
+        Returns:
+            int, float or str: The result, or an error message if the expression is invalid or fails.
+        """
+        try:
+            calculation = compile_expression(expression).evaluate()
+        except (TypeError, ValueError) as e:
+            logging.error(f"Error evaluating expression {expression!r}: {str(e)}")
+            return f"Error: {str(e)}"
+        self.history.add_calculation(calculation)
+        logging.info("Expression evaluated: %s", calculation)
+        return calculation.result
+
+    def manage_cache(self, action=None):
+        """Show the result cache counters, or clear the cache.
+
+        Args:
+            action (str, optional): 'clear' to empty the cache and reset its counters.
+
+        Returns:
+            str: A summary of the cache, or a confirmation or error message.
+        """
+        if action is None:
+            return self.cache.describe()
+        if action == 'clear':
+            self.cache.clear()
+            logging.info("Result cache cleared.")
+            return "Result cache cleared."
+        return f"Error: Unknown cache action '{action}'. Use 'cache' or 'cache clear'."
+
+    def show_metrics(self, action=None):
+        """Show the per-command latency and error metrics, print them in Prometheus format, or reset them.
+
+        Args:
+            action (str, optional): 'prometheus' for the text exposition format, or 'reset'
+                to forget every observation.
+
+        Returns:
+            str: The metrics, or a confirmation or error message.
+        """
+        if action is None:
+            return METRICS.describe()
+        if action == 'prometheus':
+            return METRICS.prometheus().rstrip("\n")
+        if action == 'reset':
+            METRICS.reset()
+            logging.info("Metrics reset.")
+            return "Metrics reset."
+        return f"Error: Unknown metrics action '{action}'. Use 'metrics', 'metrics prometheus' or 'metrics reset'."
+
+    def manage_profile(self, action=None):
+        """Show whether cProfile is running, or start it or stop it and write a .prof file.
+
+        Args:
+            action (str, optional): 'start' or 'stop'.
+
+        Returns:
+            str: The status, a confirmation with the file written, or an error message.
+        """
+        return _manage_capture(PROFILER, 'profile', action)
+
+    def manage_trace_mem(self, action=None):
+        """Show whether tracemalloc is running, or start it or stop it and write the top allocation sites.
+
+        Args:
+            action (str, optional): 'start' or 'stop'.
+
+        Returns:
+            str: The status, a confirmation with the file written, or an error message.
+        """
+        return _manage_capture(ALLOCATION_TRACER, 'trace-mem', action)
+
+    def show_history(self, view=None, *positions):
+        """Return the whole history, its last entries, a page of it or a range of it.
+
+        Args:
+            view (str, optional): 'tail' with a count, 'page' with an offset and a limit,
+                or 'range' with the first and last entry numbers, counting from 1.
+            *positions: The numbers for the view, as typed.
+
+        Returns:
+            HistoryView or str: The selected entries, or an error message.
+        """
+        expected = {None: 0, 'tail': 1, 'page': 2, 'range': 2}
+        if view not in expected or len(positions) != expected[view]:
+            return ("Error: Use 'history', 'history tail <count>', 'history page <offset> <limit>' "
+                    "or 'history range <first> <last>'.")
+        if not all(str(position).isdigit() for position in positions):
+            return "Error: History positions must be whole numbers."
+        numbers = [int(position) for position in positions]
+        if view == 'tail':
+            return self.history.get_history(-numbers[0]) if numbers[0] else self.history.get_history(0, 0)
+        if view == 'page':
+            return self.history.get_history(numbers[0], numbers[0] + numbers[1])
+        if view == 'range':
+            return self.history.get_history(max(numbers[0] - 1, 0), numbers[1])
+        return self.history.get_history()
+
+    def query_history(self, *terms):
+        """Return the history entries that match every term, such as 'add result>=10 operand=2'.
+
+        Args:
+            *terms: An operation name, result bounds ('result>=x', 'result<=x',
+                'result>x', 'result<x' or 'result=x') and 'operand=x', as typed.
+
+        Returns:
+            RowsView or str: The matching entries, or an error message.
+        """
+        usage = ("Error: Use 'query [operation] [result>=<x>] [result<=<x>] [operand=<x>]', "
+                 "for example 'query add result>=10'.")
+        if not terms:
+            return usage
+        operation, low, high, operand = None, -np.inf, np.inf, None
+        for term in terms:
+            match = _QUERY_TERM.match(str(term))
+            if match is None:
+                if operation is not None or self.operation(term) is None:
+                    return usage
+                operation = self.operation(term)
+                continue
+            field, comparison, text = match.groups()
+            try:
+                value = float(text)
+            except ValueError:
+                return usage
+            if field == 'operand':
+                if comparison != '=' or operand is not None:
+                    return usage
+                operand = value
+                continue
+            low, high = _narrow(comparison, value, low, high)
+        return self.history.query(operation, None if low == -np.inf else low, None if high == np.inf else high,
+                                  operand)
+
+    def map_history(self, command=None, operand=None, *terms):
+        """Apply an operation to every result in history, or to those within bounds, and record
+        the outputs as one batch, such as 'map multiply 2 result>=10'.
+
+        Args:
+            command (str): The operation command, such as 'multiply'.
+            operand (str): The second operand for every result, as typed.
+            *terms: Result bounds ('result>=x', 'result<=x', 'result>x', 'result<x' or 'result=x'), as typed.
+
+        Returns:
+            str: The number of entries added, or an error message.
+        """
+        usage = "Error: Use 'map <operation> <operand> [result>=<x>] [result<=<x>]', for example 'map multiply 2'."
+        operation = None if command is None else self.operation(command)
+        if operation is None or operand is None:
+            return usage
+        low, high = -np.inf, np.inf
+        try:
+            value = float(parse_operand(operand))
+            for term in terms:
+                match = _QUERY_TERM.match(str(term))
+                if match is None or match.group(1) != 'result':
+                    return usage
+                low, high = _narrow(match.group(2), float(match.group(3)), low, high)
+        except (ValueError, OverflowError):
+            return usage
+        where = None if low == -np.inf and high == np.inf else (lambda results: (results >= low) & (results <= high))
+        try:
+            batch = self.history.apply(operation, value, where)
+        except (TypeError, ValueError) as e:
+            logging.error(f"An error occurred in map {command}: {str(e)}")
+            return f"Error: {str(e)}"
+        if not len(batch):
+            return "No results to map."
+        invalid = int(np.count_nonzero(np.isnan(batch.result)))
+        logging.info("Mapped %s %g over %d results, %d without a result.", command, value, len(batch), invalid)
+        return f"Added {len(batch)} {command} results to history" + (f", {invalid} without one." if invalid else ".")
+
+    def show_stats(self, operation=None):
+        """Return the count, sum, mean, extremes and approximate percentiles of the results,
+        overall and for each operation, or for one operation.
+
+        Args:
+            operation (str, optional): The operation command, such as 'add'.
+
+        Returns:
+            str: One line per summary, or an error message.
+        """
+        if operation is None:
+            chosen = [("all", None)] + list(OPERATIONS.items())
+        elif self.operation(operation) is not None:
+            chosen = [(operation, self.operation(operation))]
+        else:
+            return f"Error: Unknown operation '{operation}'. Use 'stats' or 'stats <operation>'."
+        lines = []
+        for name, command in chosen:
+            summary = self.history.stats(command)
+            if summary["count"]:
+                lines.append(f"{name}: " + ", ".join(f"{key} {value:g}" for key, value in summary.items()))
+        return "\n".join(lines) if lines else "No results in history."
+
     def show_help(self):
         """Display available commands in a readable format.
 
@@ -79,6 +535,8 @@ class Calculator:
             str: A formatted string of available commands for the user.
         """
         logging.info("Displaying help information.")
+        others = "".join(f"- {name}: Operation from app.operations or a plugin\n" for name in OPERATIONS.names()
+                         if name not in _DOCUMENTED_OPERATIONS)
         help_text = (
             "Available commands:\n"
             "\n"
@@ -89,16 +547,45 @@ class Calculator:
             "- divide: Divide the first number by the second\n"
             "- power: Raise the first number to the power of the second\n"
             "- modulus: Find the remainder when the first number is divided by the second\n"
+            "- powmod: Raise the first number to the power of the second, modulo the third\n"
+            f"{others}"
+            "  Whole numbers such as 12 stay exact, 3/4 is a fraction and 0.5 is a float\n"
             "\n"
             "History Commands:\n"
-            "- undo: Undo the last calculation\n"
+            "- undo [n]: Undo the last calculation, or the last n entries\n"
+            "- redo [n]: Redo the last undone entry, or the last n\n"
+            "- checkpoint [name]: Name the current history, or list the checkpoints\n"
+            "- rollback <name>: Return the history to a checkpoint\n"
             "- clear: Clear the calculation history\n"
             "- history: Read the calculation history\n"
+            "- history tail <count>: Read the last entries\n"
+            "- history page <offset> <limit>: Read <limit> entries after skipping <offset>\n"
+            "- history range <first> <last>: Read entries <first> to <last>, counting from 1\n"
+            "- query [operation] [result>=x] [result<=x] [operand=x]: Find matching entries\n"
+            "- stats [operation]: Show the count, sum, mean, min, max and p50/p95/p99 of results\n"
+            "- map <operation> <operand> [result>=x] [result<=x]: Apply an operation to the results as one batch\n"
             "\n"
             "File Commands:\n"
             "- save: Save the current history to a file\n"
             "- load: Load history from a file\n"
             "\n"
+            "Expression Commands:\n"
+            "- eval <expression>: Evaluate an expression such as 3 + 4 * 2 ^ 2\n"
+            "  (a line that does not start with a letter is evaluated as an expression)\n"
+            "\n"
+            "Cache Commands:\n"
+            "- cache: Show result cache statistics\n"
+            "- cache clear: Clear the result cache\n"
+            "\n"
+            "Metrics Commands:\n"
+            "- metrics: Show calls, errors and latency percentiles per command\n"
+            "- metrics prometheus: Show the metrics in Prometheus text format\n"
+            "- metrics reset: Forget the metrics collected so far\n"
+            "\n"
+            "Profiling Commands:\n"
+            "- profile [start|stop]: Profile the commands with cProfile and write a .prof file\n"
+            "- trace-mem [start|stop]: Trace allocations with tracemalloc and write the top sites\n"
+            "\n"
             "General Commands:\n"
             "- help: Display this help message\n"
             "- exit/quit: Exit the calculator"
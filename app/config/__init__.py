@@ -0,0 +1,24 @@
+# app/config/__init__.py
+
+import os
+
+_loaded = False
+
+
+def load_config():
+    """Load environment variables from the .env file, once per process.
+
+    Every module that reads settings calls this before os.getenv, so the file is
+    parsed on first use and later calls return immediately.
+    """
+    global _loaded  # pylint: disable=global-statement
+    if _loaded:
+        return
+    from dotenv import load_dotenv  # pylint: disable=import-outside-toplevel
+    load_dotenv()
+    _loaded = True
+
+
+def env_flag(name: str) -> bool:
+    """Return True if an environment variable is set to a true value such as 1, true or yes."""
+    return os.getenv(name, "").strip().lower() in ("1", "true", "yes", "on")
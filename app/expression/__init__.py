@@ -0,0 +1,197 @@
+# app/expression/__init__.py
+
+import re
+from functools import lru_cache
+from typing import List, Tuple, Union
+from app.calculation import ExpressionCalculation
+from app.operations import Operation
+from app.operations.registry import OPERATIONS
+
+# Most compiled expressions kept, keyed by source text
+COMPILED_CACHE_SIZE = 512
+
+# Binary operators by symbol, with their precedence; ^ is right-associative and binds tightest
+BINARY_OPERATORS = {
+    '+': (OPERATIONS['add'], 1),
+    '-': (OPERATIONS['subtract'], 1),
+    '*': (OPERATIONS['multiply'], 2),
+    '/': (OPERATIONS['divide'], 2),
+    '%': (OPERATIONS['modulus'], 2),
+    '^': (OPERATIONS['power'], 4),
+}
+_UNARY_PRECEDENCE = 3  # Unary minus binds looser than ^, so -2 ^ 2 is -4
+
+_TOKEN = re.compile(r"\s*(?:(\d+\.?\d*(?:[eE][+-]?\d+)?|\.\d+(?:[eE][+-]?\d+)?)|(\S))")
+
+
+class ExpressionError(ValueError):
+    """Raised when an expression cannot be parsed."""
+
+
+def tokenize(source: str) -> List[Tuple[str, Union[int, float, str], int]]:
+    """
+    Split an expression into tokens.
+
+    Args:
+        source (str): The expression text.
+
+    Returns:
+        list: (kind, value, position) tuples, where kind is "number" or "symbol".
+
+    Raises:
+        ExpressionError: If the text contains a character that is not part of an expression.
+    """
+    tokens = []
+    position = 0
+    source = source.rstrip()
+    while position < len(source):
+        match = _TOKEN.match(source, position)
+        number, symbol = match.groups()
+        if number is not None:
+            value = float(number) if any(char in number for char in ".eE") else int(number)
+            tokens.append(("number", value, match.start(1)))
+        elif symbol in BINARY_OPERATORS or symbol in "()":
+            tokens.append(("symbol", symbol, match.start(2)))
+        else:
+            raise ExpressionError(f"Unexpected character '{symbol}' at position {match.start(2) + 1}.")
+        position = match.end()
+    return tokens
+
+
+class CompiledExpression:
+    """An expression parsed once into a postfix program of numbers and operations."""
+
+    __slots__ = ("source", "program")
+
+    def __init__(self, source: str, program: tuple):
+        """
+        Initialize a compiled expression.
+
+        Args:
+            source (str): The expression text.
+            program (tuple): Numbers and Operation instances in postfix order.
+        """
+        self.source = source
+        self.program = program
+
+    def evaluate(self) -> ExpressionCalculation:
+        """
+        Run the program with the operations' scalar calculate methods.
+
+        Returns:
+            ExpressionCalculation: The last step of the expression with its result and the source text.
+
+        Raises:
+            ValueError: If an operation fails, such as a division by zero.
+        """
+        stack = []
+        for step in self.program:
+            if isinstance(step, Operation):
+                operand2 = stack.pop()
+                operand1 = stack.pop()
+                stack.append(step.calculate(operand1, operand2))
+                operation = step  # The last operation run is the root of the expression
+            else:
+                stack.append(step)
+        calculation = ExpressionCalculation(operation, operand1, operand2, self.source)
+        calculation.set_result(stack[0])
+        return calculation
+
+
+class _Parser:
+    """Precedence-climbing parser that emits a postfix program."""
+
+    def __init__(self, source: str):
+        self.source = source
+        self.tokens = tokenize(source)
+        self.index = 0
+        self.program = []
+
+    def peek(self):
+        """Return the next token, or None at the end."""
+        return self.tokens[self.index] if self.index < len(self.tokens) else None
+
+    def parse(self) -> tuple:
+        """Parse the whole expression and return its program."""
+        if not self.tokens:
+            raise ExpressionError("Empty expression.")
+        self.expression(0)
+        token = self.peek()
+        if token is not None:
+            raise ExpressionError(f"Unexpected '{token[1]}' at position {token[2] + 1}.")
+        if not any(isinstance(step, Operation) for step in self.program):
+            raise ExpressionError("Expression has no operation to calculate.")
+        return tuple(self.program)
+
+    def expression(self, min_precedence: int):
+        """Parse operands joined by binary operators of at least min_precedence."""
+        self.unary()
+        while True:
+            token = self.peek()
+            if token is None or token[0] != "symbol" or token[1] not in BINARY_OPERATORS:
+                return
+            operation, precedence = BINARY_OPERATORS[token[1]]
+            if precedence < min_precedence:
+                return
+            self.index += 1
+            self.expression(precedence if token[1] == '^' else precedence + 1)
+            self.program.append(operation)
+
+    def unary(self):
+        """Parse an operand with any leading unary minus signs."""
+        token = self.peek()
+        if token is not None and token[1] == '-' and token[0] == "symbol":
+            self.index += 1
+            following = self.peek()
+            if following is not None and following[0] == "number" and not self._followed_by_power():
+                self.index += 1
+                self.program.append(-following[1])  # Fold -literal into a negative number
+                return
+            self.program.append(-1)
+            self.expression(_UNARY_PRECEDENCE)
+            self.program.append(OPERATIONS['multiply'])
+            return
+        self.atom()
+
+    def _followed_by_power(self) -> bool:
+        """Return True if the number after a unary minus is the base of a ^, as in -2 ^ 2."""
+        after = self.tokens[self.index + 1] if self.index + 1 < len(self.tokens) else None
+        return after is not None and after[1] == '^'
+
+    def atom(self):
+        """Parse a number or a parenthesized expression."""
+        token = self.peek()
+        if token is None:
+            raise ExpressionError("Unexpected end of expression.")
+        kind, value, position = token
+        self.index += 1
+        if kind == "number":
+            self.program.append(value)
+        elif value == '(':
+            self.expression(0)
+            closing = self.peek()
+            if closing is None or closing[1] != ')':
+                raise ExpressionError(f"Missing ')' for '(' at position {position + 1}.")
+            self.index += 1
+        else:
+            raise ExpressionError(f"Unexpected '{value}' at position {position + 1}.")
+
+
+@lru_cache(maxsize=COMPILED_CACHE_SIZE)
+def compile_expression(source: str) -> CompiledExpression:
+    """
+    Parse an expression into a CompiledExpression, reusing the result for repeated source text.
+
+    Supports + - * / % and ^ with the usual precedence (^ is right-associative),
+    parentheses and unary minus.
+
+    Args:
+        source (str): The expression text, such as "3 + 4 * 2 ^ 2".
+
+    Returns:
+        CompiledExpression: The compiled expression.
+
+    Raises:
+        ExpressionError: If the expression cannot be parsed.
+    """
+    return CompiledExpression(source.strip(), _Parser(source).parse())
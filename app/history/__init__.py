@@ -1,40 +1,231 @@
+import json
 import logging
-import pandas as pd
+import numpy as np
 import os
-from typing import List
-from app.calculation import Calculation
-from app.operations.addition import Addition
-from app.operations.subtraction import Subtraction
-from app.operations.multiplication import Multiplication
-from app.operations.division import Division
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
+import threading
+import time
+from app.calculation import Calculation, CalculationBatch, ExpressionCalculation
+from app.config import env_flag, load_config
+from app.history.binary import open_binary, read_binary_lsn, write_binary
+from app.history.columnar import MAX_KINDS, ColumnarStore, HistoryFileError, HistoryView, RowsView
+from app.history.journal import (ADD, BASE_LSN_PREFIX, BATCH, CLEAR, UNDO, Journal, format_number, parse_number,
+                                 read_base_lsn)
+from app.metrics import METRICS
+from app.operations import Operation
+from app.operations.registry import OPERATIONS_BY_NAME
 
 # Initialize the logger for this module
 logger = logging.getLogger(__name__)
 
-# Global operation map to map operation names to the corresponding operation objects
-operation_map = {
-    "Addition": Addition(),
-    "Subtraction": Subtraction(),
-    "Multiplication": Multiplication(),
-    "Division": Division()
-}
+# Global operation map to map operation names to the shared operation objects
+operation_map = OPERATIONS_BY_NAME
+
+# Column order of CSV history files
+CSV_COLUMNS = ["operand1", "operation", "operand2", "result"]
+
+# Reply to save and load on a history that is not persistent, such as a server session's
+IN_MEMORY_ERROR = "Error: This history is kept in memory only and cannot be saved or loaded."
+
+
+def _describe_lines(lines, limit: int = 10) -> str:
+    """Return a readable list of line numbers, shortened after the first few."""
+    shown = ", ".join(str(line) for line in lines[:limit])
+    return f"{shown} and {len(lines) - limit} more" if len(lines) > limit else shown
+
+
+def _approximate(value):
+    """Return the nearest float to an exact value, or None if there is none, as for a complex value."""
+    try:
+        return None if value is None or type(value) is complex else float(value)
+    except OverflowError:
+        return None
+
+
+def read_csv_store(filename: str, allow_empty: bool = False) -> ColumnarStore:
+    """
+    Read a CSV history file into a new ColumnarStore.
+
+    Columns are parsed and validated as a whole, and every invalid row is reported at once.
+
+    Args:
+        filename (str): The CSV file to read.
+        allow_empty (bool): Accept a file with a header and no rows.
+
+    Returns:
+        ColumnarStore: The calculations in the file.
+
+    Raises:
+        HistoryFileError: If the file is empty or holds invalid data. The problem is logged first.
+    """
+    import pandas as pd  # pylint: disable=import-outside-toplevel  # Loaded only when a CSV is read
+    try:
+        # A compacted file starts with a "# lsn=" line; round_trip reads every float back to the same bits
+        df = pd.read_csv(filename, comment="#", float_precision="round_trip")
+    except pd.errors.EmptyDataError:
+        df = None
+
+    # Check if the file is empty
+    if df is None or (df.empty and not allow_empty):
+        logger.error(f"{filename} is empty or corrupted.")
+        raise HistoryFileError(f"{filename} is empty or corrupted.")
+
+    # Parse and validate whole columns at once
+    columns = {name: pd.to_numeric(df[name], errors="coerce").to_numpy(dtype=np.float64)
+               for name in ("operand1", "operand2", "result")}
+    bad_rows = np.zeros(len(df), dtype=bool)
+    for name, values in columns.items():
+        bad_rows |= np.isnan(values) & df[name].notna().to_numpy()
+    kinds = 0
+    if "kinds" in df.columns:  # Only written when some values were ints or missing results
+        flags = pd.to_numeric(df["kinds"], errors="coerce").to_numpy(dtype=np.float64)
+        valid = (flags >= 0) & (flags <= MAX_KINDS) & (flags == np.floor(flags))
+        bad_rows |= ~valid
+        kinds = np.where(valid, flags, 0).astype(np.uint8)
+    exact = {}
+    if "exact" in df.columns:  # Only written when some values do not fit in a float64 column
+        texts = df["exact"]
+        for row in np.flatnonzero(texts.notna().to_numpy()):
+            try:
+                operand1, operand2, result = (parse_number(text) for text in str(texts[row]).split(" "))
+            except (ValueError, ZeroDivisionError):
+                bad_rows[row] = True
+                continue
+            exact[int(row)] = (operand1, operand2, result)
+
+    # Map operation names to store codes in one pass over the distinct names
+    names = df["operation"]
+    bad_rows |= names.isna().to_numpy()
+    name_codes, uniques = pd.factorize(names)
+    unknown = [name for name in uniques if name not in operation_map]
+    if unknown:
+        for name in unknown:
+            logger.error(f"Operation {name} not recognized during load.")
+        raise HistoryFileError(f"Operation{'s' if len(unknown) > 1 else ''} {', '.join(map(str, unknown))} not recognized.")
+
+    if bad_rows.any():
+        lines = _describe_lines(np.flatnonzero(bad_rows) + 2)  # Line 1 is the header
+        logger.error(f"Error processing rows at lines {lines}: invalid numeric data.")
+        raise HistoryFileError(f"Invalid data in {filename} at lines {lines}.")
+
+    store = ColumnarStore(max(len(df), 16))
+    code_table = np.array([store.code_for(operation_map[name]) for name in uniques], dtype=np.uint8)
+    store.extend(code_table[name_codes], columns["operand1"], columns["operand2"], columns["result"], kinds)
+    if exact:
+        store.set_exact_values(exact)
+    if "expression" in df.columns:  # Only written when some rows came from an expression
+        texts = df["expression"]
+        store.set_expressions({int(row): texts[row] for row in np.flatnonzero(texts.notna().to_numpy())})
+    return store
+
+
+def csv_frame(store: ColumnarStore) -> "pd.DataFrame":
+    """Build the CSV layout of a store as a DataFrame."""
+    import pandas as pd  # pylint: disable=import-outside-toplevel  # Loaded only when a CSV is written
+    exact = store.exact_values()
+    columns = {}
+    for position, name in enumerate(("operand1", "operand2", "result")):
+        column = store.export_column(name)
+        if exact:  # A readable approximation here; the exact value goes in the exact column
+            column = column.astype(object)
+            for row, values in exact.items():
+                column[row] = _approximate(values[position])
+        columns[name] = column
+    frame = pd.DataFrame({
+        "operand1": columns["operand1"],
+        "operation": store.operation_names(),
+        "operand2": columns["operand2"],
+        "result": columns["result"]
+    })
+    kinds = store.kinds[:store.size]
+    if kinds.any():
+        frame["kinds"] = kinds
+    if exact:
+        frame["exact"] = pd.Series({row: " ".join(map(format_number, values)) for row, values in exact.items()},
+                                   dtype=object)
+    expressions = store.expressions()
+    if expressions:
+        frame["expression"] = pd.Series(expressions, dtype=object)
+    return frame
+
+
+def write_csv_store(store: ColumnarStore, filename: str, lsn: int = 0):
+    """
+    Write a store to a CSV history file.
+
+    Args:
+        store (ColumnarStore): The calculations to write.
+        filename (str): The CSV file.
+        lsn (int): The last journal LSN included, written as a leading "# lsn=" line when set.
+    """
+    with open(filename, "w", encoding="utf-8", newline="") as base:
+        if lsn:
+            base.write(f"{BASE_LSN_PREFIX}{lsn}\n")
+        csv_frame(store).to_csv(base, index=False)
+
 
 class History:
-    """Class to keep track of calculation history with undo, clear, save, and load functionality."""
+    """Class to keep track of calculation history with undo, clear, save, and load functionality.
+
+    A History may be shared by many threads. Changes to the in-memory history are
+    serialized by a lock that is held only for the change itself, while save, compact
+    and load take a second lock so that slow file work never blocks appends.
+    """
 
-    def __init__(self):
-        """Initialize an empty list to store calculation history and ensure the history file exists."""
-        self._history: List[Calculation] = []
+    def __init__(self, persistent: bool = True):
+        """
+        Initialize an empty columnar store for calculation history and ensure the history file exists.
+
+        With HISTORY_JOURNAL enabled, save appends only the changes since the last save to
+        a journal next to the history file, and the history is replayed from both files here.
+
+        Args:
+            persistent (bool): Keep the history in the history file. A history that is not
+                persistent lives in memory only: no file or journal is touched, and save and
+                load return an error.
+        """
+        load_config()
+        self._store = ColumnarStore()
         self.filename = os.getenv("HISTORY_FILENAME", "default.csv")  # Load filename from .env or default
+        self.format = os.getenv("HISTORY_FORMAT", "csv").strip().lower()  # csv or binary
+        self.checkpoint_path = f"{self.filename}.checkpoints"
+        if self.format not in ("csv", "binary"):
+            raise ValueError(f"Unknown history format {self.format!r}. Expected csv or binary.")
+        self.persistent = persistent
+        self.journal = (Journal(self.filename, os.getenv("HISTORY_JOURNAL_FSYNC", "never"))
+                        if persistent and env_flag("HISTORY_JOURNAL") else None)
+        self.compact_bytes = int(os.getenv("HISTORY_JOURNAL_COMPACT_BYTES", str(64 * 1024 * 1024)))  # 0 disables
+        self._lsn = 0  # Sequence number of the last journal record
+        self._pending = []  # Journal records not yet saved
+        self._compaction = None
+        self._redo = []  # (swap label or None, undone entry or (store, prefixes)), most recent last
+        self._swaps = []  # (replaced store, size after the swap, label, its prefixes) for each clear, load or rollback
+        self._checkpoints = {}  # Name -> snapshot
+        self._prefixes = {}  # Name -> snapshot of the checkpoints whose rows are still the leading rows of the history
+        self._prefix_rows = 0  # At least the size of the largest of those checkpoints
+        self._rollback_prefixes = {}  # Checkpoint name -> the prefixes of the history at the checkpoint
+        self._saved_checkpoints = None  # Sizes last written to the checkpoint file, or None if unknown
+        self._rebase = False  # True when the journal cannot express the changes, so save rewrites the base file
+        self._lock = threading.Lock()  # Guards the store and the journal bookkeeping
+        self._io_lock = threading.RLock()  # Serializes save, compact and load
         
         # Create the history file if it doesn't exist
-        if not os.path.exists(self.filename):
-            pd.DataFrame(columns=["operand1", "operation", "operand2", "result"]).to_csv(self.filename, index=False)
-            logger.info(f"History file {self.filename} created.")
+        if persistent and not os.path.exists(self.filename):
+            if self.format == "binary":
+                write_binary(ColumnarStore(), self.filename)
+            else:
+                with open(self.filename, "w", encoding="utf-8") as history_file:
+                    history_file.write(",".join(CSV_COLUMNS) + "\n")
+            logger.info("History file %s created.", self.filename)
+
+        if self.journal:
+            self.journal.repair()
+            self.load()
+            self._swaps.clear()  # The history read at startup is the starting point, not an undoable load
+
+    def _record(self, kind: str, *fields):
+        """Queue one journal record for the next save when journal mode is enabled."""
+        self._lsn += 1
+        self._pending.append(",".join((str(self._lsn), kind, *fields)) + "\n")
 
     def add_calculation(self, calculation: Calculation):
         """
@@ -43,114 +234,549 @@ class History:
         Args:
             calculation (Calculation): A Calculation object to add to history.
         """
-        self._history.append(calculation)
-        logger.info(f"Added calculation to history: {calculation}")
+        with self._lock:
+            self._redo.clear()
+            self._append(calculation)
+        logger.info("Added calculation to history: %s", calculation)
+
+    def _append(self, calculation: Calculation):
+        """Store one calculation and queue its journal record; the caller holds the lock."""
+        self._drop_overwritten_prefixes()
+        self._store.append(calculation)
+        if self.journal:
+            self._journal_entry(calculation)
+
+    def _journal_entry(self, entry):
+        """Queue the journal records for one added calculation or batch; the caller holds the lock."""
+        if isinstance(entry, CalculationBatch):
+            self._lsn += 1
+            prefix = f"{self._lsn},{BATCH},{entry.operation.__class__.__name__},"
+            self._pending.extend(f"{prefix}{a!r},{b!r},{r!r}\n" for a, b, r in zip(
+                np.ravel(entry.operand1).tolist(), np.ravel(entry.operand2).tolist(),
+                np.ravel(entry.result).tolist()))
+        else:
+            self._record(ADD, entry.operation.__class__.__name__, format_number(entry.operand1),
+                         format_number(entry.operand2), format_number(entry.result),
+                         *((entry.expression,) if isinstance(entry, ExpressionCalculation) else ()))
+
+    def add_batch(self, batch: CalculationBatch):
+        """
+        Add a whole CalculationBatch to the history as a single block.
 
-    def undo(self) -> str:
+        The batch is copied into the history columns in one pass. Undo removes the block
+        as a whole, while get_history and save see one row per calculation in it.
+
+        Args:
+            batch (CalculationBatch): The batch of calculations to add to history.
         """
-        Undo the last calculation.
+        with self._lock:
+            self._redo.clear()
+            self._drop_overwritten_prefixes()
+            self._store.append_batch(batch.operation, np.ravel(batch.operand1), np.ravel(batch.operand2),
+                                     np.ravel(batch.result))
+            if self.journal:
+                self._journal_entry(batch)
+        logger.info("Added %s to history.", batch)
+
+    def apply(self, operation: Operation, operand, where=None) -> CalculationBatch:
+        """
+        Apply one operation to every stored result and add the outputs as a single batch.
+
+        Each selected result becomes the first operand and `operand` the second, and the
+        whole column is calculated in one call to the operation's calculate_batch, so
+        entries without a defined output are NaN instead of raising. Entries without a
+        result are skipped, results kept exactly are used as their nearest float, and
+        complex results and those too large for any float are skipped too. The new entries are one undo
+        step, as with add_batch.
+
+        Args:
+            operation (Operation): The operation to apply, such as OPERATIONS['multiply'].
+            operand (float): The second operand for every entry.
+            where (callable, optional): Takes the float64 results and returns a boolean
+                mask of the entries to use, such as `lambda results: results > 0`.
 
         Returns:
-            str: Information about the undone calculation or a message if no history is present.
+            CalculationBatch: The calculations added, which is empty when no entry was selected.
+
+        Raises:
+            TypeError: If the operand is not a number or the operation needs more operands.
+            ValueError: If the mask does not match the results.
+        """
+        with self._lock:
+            results = self._store.result_values()
+            selected = ~np.isnan(results)
+            if where is not None:
+                mask = np.asarray(where(results), dtype=bool)
+                if mask.shape != results.shape:
+                    raise ValueError(f"The filter returned a mask of shape {mask.shape} for {len(results)} results.")
+                selected &= mask
+            operand1 = results[selected]  # Indexing copies, so later changes to the history do not reach it
+        output = np.ravel(operation.calculate_batch(operand1, operand))
+        batch = CalculationBatch(operation, operand1, np.full(len(output), operand, dtype=np.float64), output)
+        if len(batch):
+            self.add_batch(batch)
+        else:
+            logger.info("No results to apply %s to.", operation.__class__.__name__.lower())
+        return batch
+
+
+    def _swap(self, store: ColumnarStore, label: str, prefixes: dict):
+        """
+        Replace the whole history in one step, keeping the old one so the swap can be undone.
+
+        The caller holds the lock and passes the checkpoints that are a prefix of the new history.
         """
-        if not self._history:
-            logger.warning("Attempted to undo with no history.")
-            return "No history to undo."
+        self._swaps.append((self._store, store.size, label, self._prefixes))
+        self._store = store
+        self._set_prefixes(prefixes)
+
+    def _set_prefixes(self, prefixes: dict):
+        """Replace the checkpoints known to be a prefix of the history; the caller holds the lock."""
+        self._prefixes = prefixes
+        self._prefix_rows = max((checkpoint.size for checkpoint in prefixes.values()), default=0)
 
-        last_calculation = self._history.pop()
-        logger.info(f"Undone calculation: {last_calculation}")
-        return f"Undone: {last_calculation}"
+    def _drop_overwritten_prefixes(self):
+        """Forget the checkpoints past the end of the history before new rows replace their undone rows."""
+        if self._store.size < self._prefix_rows:
+            self._prefixes = {name: checkpoint for name, checkpoint in self._prefixes.items()
+                              if checkpoint.size <= self._store.size}
+            self._prefix_rows = self._store.size
+
+    def _describe(self, done: list, action: str, verb: str, nothing: str) -> str:
+        """Return the message for an undo or redo of some entries; action is the command and verb its past tense."""
+        if not done:
+            logger.warning("Attempted to %s with nothing to %s.", action, action)
+            return nothing
+        logger.info("%s %d history entries.", verb, len(done))
+        return f"{verb}: {done[0]}" if len(done) == 1 else f"{verb} {len(done)} entries."
+
+    def undo(self, steps: int = 1) -> str:
+        """
+        Undo the last calculations, batches, clears, loads or rollbacks.
+
+        Each step takes constant time: undone rows are only dropped from the end of the
+        columns, and a clear, load or rollback is undone by swapping the previous history back in.
+
+        Args:
+            steps (int): The number of entries to undo.
+
+        Returns:
+            str: Information about the undone entry, the number of entries undone, or a
+            message if no history is present.
+
+        Raises:
+            ValueError: If steps is less than 1.
+        """
+        if steps < 1:
+            raise ValueError("The number of steps must be at least 1.")
+        undone = []
+        with self._lock:
+            while len(undone) < steps:
+                if self._swaps and self._store.size == self._swaps[-1][1]:
+                    previous, _, label, prefixes = self._swaps.pop()
+                    self._redo.append((label, (self._store, self._prefixes)))
+                    self._store = previous
+                    self._set_prefixes(prefixes)
+                    self._rebase = bool(self.journal)
+                    undone.append(label)
+                elif self._store.size:
+                    entry = self._store.pop()
+                    if self.journal:
+                        self._record(UNDO, str(len(entry) if isinstance(entry, CalculationBatch) else 1))
+                    self._redo.append((None, entry))
+                    undone.append(entry)
+                else:
+                    break
+        return self._describe(undone, "undo", "Undone", "No history to undo.")
+
+    def redo(self, steps: int = 1) -> str:
+        """
+        Redo entries undone since the last new calculation, clear, load or rollback.
+
+        Each step takes constant time: an undone row is still in the columns, so redo
+        only extends the history over it again.
+
+        Args:
+            steps (int): The number of entries to redo.
+
+        Returns:
+            str: Information about the redone entry, the number of entries redone, or a
+            message if there is nothing to redo.
+
+        Raises:
+            ValueError: If steps is less than 1.
+        """
+        if steps < 1:
+            raise ValueError("The number of steps must be at least 1.")
+        redone = []
+        with self._lock:
+            while self._redo and len(redone) < steps:
+                label, entry = self._redo.pop()
+                if label is not None:
+                    store, prefixes = entry
+                    self._swap(store, label, prefixes)
+                    self._rebase = bool(self.journal)
+                    redone.append(label)
+                    continue
+                self._store.restore(entry)  # Nothing was added since the undo, so the rows are still in place
+                if self.journal:
+                    self._journal_entry(entry)
+                redone.append(entry)
+        return self._describe(redone, "redo", "Redone", "Nothing to redo.")
 
     def clear(self) -> str:
         """
         Clear the entire history of calculations.
 
+        The cleared history is replaced by a new, empty one in a single step, so
+        snapshots taken earlier keep their entries and undo can bring it back.
+
         Returns:
             str: Confirmation message that history has been cleared.
         """
-        self._history.clear()
+        with self._lock:
+            self._redo.clear()
+            self._swap(ColumnarStore(), "clear", {name: checkpoint for name, checkpoint in self._checkpoints.items()
+                                                  if not checkpoint.size})
+            if self.journal:
+                self._record(CLEAR)
         logger.info("Cleared calculation history.")
         return "History cleared."
 
+    def checkpoint(self, name: str = None) -> str:
+        """
+        Name the current state of the history so it can be rolled back to later.
+
+        A checkpoint is a snapshot, so taking one copies nothing. Checkpoints whose
+        entries are still at the start of the history when it is saved are saved with it.
+
+        Args:
+            name (str, optional): The checkpoint name. Without a name the checkpoints are listed.
+
+        Returns:
+            str: Confirmation message, or the list of checkpoints.
+        """
+        with self._lock:
+            if name is None:
+                if not self._checkpoints:
+                    return "No checkpoints."
+                return "Checkpoints: " + ", ".join(f"{checkpoint_name} ({snapshot.size} entries)"
+                                                   for checkpoint_name, snapshot in self._checkpoints.items())
+            size = self._store.size
+            self._checkpoints[name] = checkpoint = self._store.snapshot()
+            self._prefixes = {**self._prefixes, name: checkpoint}  # Never changed in place, so swaps can keep them
+            self._prefix_rows = max(self._prefix_rows, size)
+            self._rollback_prefixes[name] = {other: snapshot for other, snapshot in self._prefixes.items()
+                                              if snapshot.size <= size}
+        logger.info("Checkpoint %s set at %d entries.", name, size)
+        return f"Checkpoint {name} set at {size} entries."
+
+    def rollback(self, name: str) -> str:
+        """
+        Return the history to a checkpoint. The rollback itself can be undone.
+
+        Args:
+            name (str): The checkpoint name.
+
+        Returns:
+            str: Confirmation message, or an error message if there is no such checkpoint.
+        """
+        with self._lock:
+            checkpoint = self._checkpoints.get(name)
+            if checkpoint is None:
+                logger.warning("Rollback to unknown checkpoint %s.", name)
+                return f"Error: Unknown checkpoint {name!r}."
+            self._redo.clear()
+            # A fresh snapshot, so the checkpoint stays unchanged
+            self._swap(checkpoint.snapshot(), f"rollback to {name}", self._rollback_prefixes[name])
+            self._rebase = bool(self.journal)
+        logger.info("History rolled back to checkpoint %s.", name)
+        return f"Rolled back to checkpoint {name} ({checkpoint.size} entries)."
+
     def save(self) -> str:
         """
         Save the history to a CSV file.
 
+        In journal mode only the records added since the last save are appended, and
+        a background compaction starts once the journal passes HISTORY_JOURNAL_COMPACT_BYTES,
+        or right away after an undone clear, load or rollback, which no journal record can express.
+        Checkpoints are saved next to the history file.
+
         Returns:
             str: Confirmation message that history has been saved.
         """
-        history_data = [{
-            "operand1": calc.operand1,
-            "operation": calc.operation.__class__.__name__,
-            "operand2": calc.operand2,
-            "result": calc.result
-        } for calc in self._history]
+        started = time.perf_counter()
+        try:
+            return self._save()
+        finally:
+            METRICS.observe("calculator_history_seconds", "save", time.perf_counter() - started)
 
-        df = pd.DataFrame(history_data)
-        df.to_csv(self.filename, index=False)
-        logger.info(f"History saved to {self.filename}.")
+    def _save(self) -> str:
+        """Save the history for save, which times it."""
+        if not self.persistent:
+            return IN_MEMORY_ERROR
+        with self._io_lock:
+            with self._lock:
+                # The journal needs no snapshot; the whole file is written from one without holding up appends
+                snapshot = None if self.journal else self._store.snapshot()
+                sizes = {name: checkpoint.size for name, checkpoint in self._prefixes.items()
+                         if self._checkpoints.get(name) is checkpoint and checkpoint.size <= self._store.size}
+            self._save_checkpoints(sizes)
+            if self.journal:
+                with self._lock:
+                    pending, self._pending = self._pending, []
+                if pending:
+                    self.journal.append(pending)
+                if self._rebase or 0 < self.compact_bytes <= self.journal.size:
+                    self.compact()
+                logger.info("History journal saved to %s.", self.journal.path)
+                return f"History saved to {self.filename}."
+
+            if self.format == "binary":
+                write_binary(snapshot, self.filename)
+            else:
+                csv_frame(snapshot).to_csv(self.filename, index=False)
+        logger.info("History saved to %s.", self.filename)
         return f"History saved to {self.filename}."
 
+    def compact(self, wait: bool = False) -> str:
+        """
+        Fold the journal into the base history file.
+
+        The journal is moved aside and a fresh one started right away. The base file is
+        then rewritten from a snapshot in a background thread.
+
+        Args:
+            wait (bool): Block until the background compaction has finished.
+
+        Returns:
+            str: Message indicating the result of the compaction.
+        """
+        if not self.journal:
+            return "Error: History journal is not enabled."
+        with self._io_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+                lsn, snapshot = self._lsn, self._store.snapshot()
+                self._rebase = False
+            if pending:
+                self.journal.append(pending)
+            self.wait_for_compaction()
+
+            self.journal.rotate()
+            self._compaction = threading.Thread(target=self._run_compaction, args=(lsn, snapshot),
+                                                name="history-compaction")
+            self._compaction.start()
+            if wait:
+                self.wait_for_compaction()
+        return f"History compaction of {self.filename} started."
+
+    def _save_checkpoints(self, sizes: dict):
+        """Write the sizes of the checkpoints still at the start of the history, unless the file already has them."""
+        if sizes == self._saved_checkpoints:
+            return
+        if sizes or os.path.exists(self.checkpoint_path):
+            temporary_path = f"{self.checkpoint_path}.tmp"
+            with open(temporary_path, "w", encoding="utf-8") as checkpoint_file:
+                json.dump(sizes, checkpoint_file)
+            os.replace(temporary_path, self.checkpoint_path)
+        self._saved_checkpoints = sizes
+
+    def _load_checkpoints(self, store: ColumnarStore) -> dict:
+        """Read the saved checkpoints as snapshots of a freshly loaded store."""
+        try:
+            with open(self.checkpoint_path, encoding="utf-8") as checkpoint_file:
+                sizes = json.load(checkpoint_file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable checkpoint file %s: %s", self.checkpoint_path, e)
+            return {}
+        return {name: store.snapshot(size) for name, size in sizes.items() if size <= store.size}
+
+    def _run_compaction(self, lsn: int, snapshot: ColumnarStore):
+        """Write the compacted base file; runs in the background compaction thread."""
+        write = write_binary if self.format == "binary" else write_csv_store
+        try:
+            self.journal.finish_compaction(self.filename, lambda path: write(snapshot, path, lsn))
+            logger.info("History journal compacted into %s up to record %d.", self.filename, lsn)
+        except OSError as e:
+            # The moved-aside journal segment is kept, so nothing is lost and the next load replays it
+            logger.error(f"History compaction failed: {str(e)}")
+
+    def wait_for_compaction(self):
+        """Block until a running background compaction has finished."""
+        if self._compaction:
+            self._compaction.join()
+            self._compaction = None
+
+    def _replay(self, store: ColumnarStore, after_lsn: int) -> int:
+        """Apply the journal records newer than after_lsn to a store and return the last LSN."""
+        lsn = after_lsn
+        batch_lsn, batch_name, batch_rows = None, None, []
+        for record_lsn, kind, fields in self.journal.records(after_lsn):
+            if batch_rows and (kind != BATCH or record_lsn != batch_lsn):
+                store.append_batch(operation_map[batch_name], *np.array(batch_rows, dtype=np.float64).T)
+                batch_rows = []
+            if kind == ADD:
+                name, operand1, operand2, result, *expression = fields  # Expression entries carry their text
+                if expression:
+                    calculation = ExpressionCalculation(operation_map[name], parse_number(operand1),
+                                                        parse_number(operand2), expression[0])
+                else:
+                    calculation = Calculation(operation_map[name], parse_number(operand1), parse_number(operand2))
+                calculation.set_result(parse_number(result))
+                store.append(calculation)
+            elif kind == BATCH:
+                batch_lsn, batch_name = record_lsn, fields[0]
+                batch_rows.append([float(value) for value in fields[1:]])
+            elif kind == UNDO and fields:
+                store.remove_last(int(fields[0]))  # A compacted base does not keep batch boundaries
+            elif kind == UNDO and store.size:
+                store.pop()  # Journals written before undo records carried a row count
+            elif kind == CLEAR:
+                store.clear()
+            lsn = record_lsn
+        if batch_rows:
+            store.append_batch(operation_map[batch_name], *np.array(batch_rows, dtype=np.float64).T)
+        return lsn
+
+    def _read_base(self) -> ColumnarStore:
+        """Read the base history file in the configured format."""
+        if self.format == "binary":
+            return open_binary(self.filename)
+        return read_csv_store(self.filename, allow_empty=bool(self.journal))
+
+    def _read_base_lsn(self) -> int:
+        """Return the last journal LSN folded into the base history file."""
+        return read_binary_lsn(self.filename) if self.format == "binary" else read_base_lsn(self.filename)
+
     def load(self) -> str:
         """
-        Load the history from the hardcoded 'history.csv' file
-        and add each calculation to the Calculator's history.
+        Load the history from the history file, replacing the current history.
+
+        Columns are parsed and validated as a whole, and every invalid row is
+        reported at once. A binary history file is memory-mapped instead of parsed.
+        The current history is left unchanged if the file is invalid.
+        In journal mode the journal is replayed on top of the file, and changes that
+        were never saved are discarded. The load can be undone, and saved checkpoints
+        are restored.
 
         Returns:
             str: Message indicating the result of the load operation.
         """
-        if not os.path.exists(self.filename):
-            logger.error(f"File {self.filename} not found during load operation.")
-            return f"Error: {self.filename} not found."
+        started = time.perf_counter()
+        message = self._load()
+        METRICS.observe("calculator_history_seconds", "load", time.perf_counter() - started)
+        return message
 
-        try:
-            df = pd.read_csv(self.filename)
-
-            # Check if the file is empty
-            if df.empty:
-                logger.error(f"{self.filename} is empty or corrupted.")
-                return f"Error: {self.filename} is empty or corrupted."
-
-            # Clear existing history before loading the new one
-            self._history.clear()
-
-            for _, row in df.iterrows():
-                try:
-                    operand1 = float(row["operand1"])
-                    operation_name = row["operation"]
-                    operand2 = float(row["operand2"])
-                    result = float(row["result"])
-
-                    operation = operation_map.get(operation_name, None)
-
-                    if operation:
-                        calculation = Calculation(operation, operand1, operand2)
-                        calculation.set_result(result)
-                        self.add_calculation(calculation)
-                    else:
-                        logger.error(f"Operation {operation_name} not recognized during load.")
-                        return f"Error: Operation {operation_name} not recognized."
-
-                except ValueError as e:
-                    logger.error(f"Error processing row: {e}")
-                    return f"Error: Invalid data in {self.filename}."
-
-        except pd.errors.EmptyDataError:
-            logger.error(f"{self.filename} is empty or corrupted.")
-            return f"Error: {self.filename} is empty or corrupted."
-        except Exception as e:
-            logger.error(f"An error occurred while loading history: {str(e)}")
-            return f"Error: {str(e)}"
-
-        logger.info(f"History loaded from {self.filename}.")
+    def _load(self) -> str:
+        """Load the history for load, which times it and counts its failures."""
+        if not self.persistent:
+            return IN_MEMORY_ERROR
+        with self._io_lock:
+            self.wait_for_compaction()
+            if not os.path.exists(self.filename):
+                METRICS.count_error("load", "FileNotFoundError")
+                logger.error(f"File {self.filename} not found during load operation.")
+                return f"Error: {self.filename} not found."
+
+            try:
+                store = self._read_base()
+                lsn = self._replay(store, self._read_base_lsn()) if self.journal else self._lsn
+                checkpoints = self._load_checkpoints(store)
+                with self._lock:
+                    earlier = dict(self._checkpoints)
+                # Loading reads every row anyway, so the earlier checkpoints are checked against the loaded ones here
+                prefixes = {name: checkpoint for name, checkpoint in earlier.items()
+                            if name not in checkpoints and store.starts_with(checkpoint)}
+                prefixes.update(checkpoints)
+
+                # Replace the existing history in one step, and only once the whole file is known to be valid
+                with self._lock:
+                    self._redo.clear()
+                    self._swap(store, "load", prefixes)
+                    self._checkpoints.update(checkpoints)
+                    self._rollback_prefixes.update(
+                        (name, {other: snapshot for other, snapshot in checkpoints.items()
+                                if snapshot.size <= checkpoint.size})
+                        for name, checkpoint in checkpoints.items())
+                    self._saved_checkpoints = None  # The file may hold checkpoints the loaded history is too short for
+                    self._lsn = lsn
+                    self._pending = []
+
+            except HistoryFileError as e:
+                METRICS.count_error("load", "HistoryFileError")
+                return f"Error: {str(e)}"  # Already logged where the problem was found
+            except Exception as e:
+                METRICS.count_error("load", type(e).__name__)
+                logger.error(f"An error occurred while loading history: {str(e)}")
+                return f"Error: {str(e)}"
+
+        logger.info("History loaded from %s.", self.filename)
         return f"History loaded from {self.filename}."
 
-    def get_history(self) -> List[Calculation]:
+    def get_history(self, start: int = None, stop: int = None) -> HistoryView:
         """
-        Retrieve the entire calculation history.
+        Retrieve the calculation history, or a slice of it.
+
+        Taking the snapshot and slicing it are both constant time, so reading the last
+        few entries costs the same however long the history is.
+
+        Args:
+            start (int, optional): The first position, as in a slice; negative counts from the end.
+            stop (int, optional): The position after the last one, as in a slice.
 
         Returns:
-            List[Calculation]: The history list of calculations.
+            HistoryView: A lazy sequence of the calculations at the time of the call.
+            Calculation objects are only built for the entries that are accessed, and
+            later changes to the history do not show up in it.
         """
         logger.info("Retrieving calculation history.")
-        return self._history
+        with self._lock:
+            view = self._store.snapshot().view()
+        return view if start is None and stop is None else view[start:stop]
+
+    def stats(self, operation: Operation = None) -> dict:
+        """
+        Summarize the results in the history, or those of one operation.
+
+        The aggregates are kept up to date as entries are added, undone and redone,
+        with compensated sums and a mergeable quantile sketch, so this takes the same
+        time however long the history is. After a clear, load or rollback they are
+        rebuilt in one vectorized pass on the next call.
+
+        Args:
+            operation (Operation, optional): Only calculations of this operation.
+
+        Returns:
+            dict: count, sum, mean, min, max and approximate p50, p95 and p99 of the
+            results. Everything but count and sum is None when there are no results.
+        """
+        logger.info("Summarizing calculation history.")
+        with self._lock:
+            return self._store.statistics(operation)
+
+    def query(self, operation: Operation = None, min_result=None, max_result=None, operand=None) -> RowsView:
+        """
+        Find the calculations that match every given condition.
+
+        The history keeps the rows of each operation and a sorted index on the results
+        up to date as entries are added and undone, so a query takes time proportional
+        to the rows it could match rather than to the length of the history.
+
+        Args:
+            operation (Operation, optional): Only calculations of this operation.
+            min_result (float, optional): Only calculations whose result is at least this.
+            max_result (float, optional): Only calculations whose result is at most this.
+            operand (float, optional): Only calculations with this value as either operand.
+
+        Returns:
+            RowsView: A lazy sequence of the matching calculations, in history order, at
+            the time of the call.
+        """
+        logger.info("Querying calculation history.")
+        with self._lock:
+            rows = self._store.select(operation, min_result, max_result, operand)
+            snapshot = self._store.snapshot()
+        return RowsView(snapshot, rows)
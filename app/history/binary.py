@@ -0,0 +1,133 @@
+# app/history/binary.py
+
+import json
+import logging
+import os
+import struct
+import numpy as np
+from app.history.columnar import ColumnarStore, HistoryFileError
+from app.history.journal import format_number, parse_number
+from app.operations.registry import OPERATIONS_BY_NAME
+
+# Initialize the logger for this module
+logger = logging.getLogger(__name__)
+
+MAGIC = b"CALCHIST"
+VERSION = 2  # Version 1 files hold only the exact-value table in their JSON trailer
+
+# magic, version, length of the operation names, rows, journal LSN, length of the JSON trailer
+_HEADER = struct.Struct("<8sIIQQQ")
+
+# Column order and dtypes after the header; each column is contiguous so it can be mapped directly
+_COLUMNS = (("operand1", "<f8"), ("operand2", "<f8"), ("result", "<f8"), ("codes", "u1"), ("kinds", "u1"))
+
+
+def _align(offset: int) -> int:
+    """Round an offset up to the next multiple of 8 so float64 columns stay aligned."""
+    return (offset + 7) & ~7
+
+
+def write_binary(store: ColumnarStore, path: str, lsn: int = 0):
+    """
+    Write a store to a binary history file.
+
+    The file is a fixed header, the operation names, one contiguous column per field,
+    and a small JSON trailer with the values a float64 column cannot hold and the text
+    of rows recorded from an expression. It is written
+    to a temporary file first and moved into place, so a memory-mapped reader of the
+    old file is not disturbed.
+
+    Args:
+        store (ColumnarStore): The calculations to write.
+        path (str): The binary history file.
+        lsn (int): The last journal LSN included, for journal mode.
+    """
+    rows = store.size
+    names = "\n".join(operation.__class__.__name__ for operation in store.operations).encode("utf-8")
+    trailer = json.dumps({
+        "exact": {str(row): [format_number(value) for value in values] for row, values in store.exact_values().items()},
+        "expressions": {str(row): text for row, text in store.expressions().items()},
+    }).encode("utf-8")
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "wb") as binary:
+        binary.write(_HEADER.pack(MAGIC, VERSION, len(names), rows, lsn, len(trailer)))
+        binary.write(names)
+        binary.write(b"\0" * (_align(_HEADER.size + len(names)) - _HEADER.size - len(names)))
+        for name, dtype in _COLUMNS:
+            getattr(store, name)[:rows].astype(dtype, copy=False).tofile(binary)
+        binary.write(trailer)
+    os.replace(temporary_path, path)
+
+
+def _read_header(path: str):
+    """Read and check the header of a binary history file."""
+    with open(path, "rb") as binary:
+        header = binary.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            raise ValueError("file is too short")
+        magic, version, names_length, rows, lsn, trailer_length = _HEADER.unpack(header)
+        if magic != MAGIC:
+            raise ValueError("not a binary history file")
+        if version not in (1, VERSION):
+            raise ValueError(f"unsupported version {version}")
+        names = binary.read(names_length).decode("utf-8")
+    return (names.split("\n") if names else []), rows, lsn, version, trailer_length, _align(_HEADER.size + names_length)
+
+
+def read_binary_lsn(path: str) -> int:
+    """
+    Return the journal LSN recorded in a binary history file header.
+
+    Args:
+        path (str): The binary history file.
+
+    Returns:
+        int: The last journal LSN already folded into the file.
+    """
+    return _read_header(path)[2]
+
+
+def open_binary(path: str) -> ColumnarStore:
+    """
+    Open a binary history file as a store backed by a read-only memory map.
+
+    Opening takes constant time whatever the file size: columns are views into the
+    mapping and are only copied if the history is later appended to.
+
+    Args:
+        path (str): The binary history file.
+
+    Returns:
+        ColumnarStore: The calculations in the file.
+
+    Raises:
+        HistoryFileError: If the file is not a valid binary history file. The problem is logged first.
+    """
+    try:
+        names, rows, _, version, trailer_length, offset = _read_header(path)
+        unknown = [name for name in names if name not in OPERATIONS_BY_NAME]
+        if unknown:
+            raise ValueError(f"operation {', '.join(unknown)} not recognized")
+        columns = {}
+        if rows:
+            mapped = np.memmap(path, dtype=np.uint8, mode="r")
+            if len(mapped) < offset + rows * 26 + trailer_length:  # 3 float64 and 2 uint8 columns
+                raise ValueError("file is truncated")
+            for name, dtype in _COLUMNS:
+                width = np.dtype(dtype).itemsize * rows
+                columns[name] = mapped[offset:offset + width].view(dtype)
+                offset += width
+            trailer = json.loads(bytes(mapped[offset:offset + trailer_length]).decode("utf-8") or "{}")
+        else:
+            columns = {name: np.empty(0, dtype=dtype) for name, dtype in _COLUMNS}
+            trailer = {}
+        if version == 1:
+            trailer = {"exact": trailer}
+        exact = {int(row): tuple(parse_number(value) for value in values)
+                 for row, values in trailer.get("exact", {}).items()}
+        expressions = {int(row): text for row, text in trailer.get("expressions", {}).items()}
+    except (OSError, ValueError) as e:
+        logger.error(f"{path} is empty or corrupted: {str(e)}")
+        raise HistoryFileError(f"{path} is empty or corrupted.") from e
+    return ColumnarStore.from_columns([OPERATIONS_BY_NAME[name] for name in names], rows, exact=exact,
+                                      expressions=expressions, **columns)
@@ -0,0 +1,689 @@
+# app/history/columnar.py
+
+import math
+import weakref
+from collections.abc import Sequence
+from typing import Union
+import numpy as np
+from app.calculation import Calculation, CalculationBatch, ExpressionCalculation
+from app.history.index import OperationBuckets, SortedIndex
+from app.history.stats import HistoryStats
+from app.operations import Operation
+
+# Bit flags in the kinds column that remember which values were ints, so a stored
+# calculation comes back exactly as it went in (5 stays 5 rather than becoming 5.0)
+OPERAND1_INT = 1
+OPERAND2_INT = 2
+RESULT_INT = 4
+RESULT_NONE = 8
+MAX_KINDS = OPERAND1_INT | OPERAND2_INT | RESULT_INT | RESULT_NONE
+
+# Ints beyond this magnitude do not fit exactly in a float64 column
+_MAX_EXACT_INT = 2 ** 53
+
+_INITIAL_CAPACITY = 16
+
+
+class HistoryFileError(ValueError):
+    """Raised when a history file cannot be read. The problem has already been logged."""
+
+
+def _as_float(value) -> float:
+    """Convert a result to a float for statistics, or NaN for None, complex values and values too large for a float."""
+    try:
+        return math.nan if value is None or type(value) is complex else float(value)
+    except OverflowError:
+        return math.nan
+
+
+def _is_exact(value) -> bool:
+    """Return True if the value round-trips through a float64 column unchanged."""
+    value_type = type(value)
+    return value_type is float or (value_type in (int, bool) and -_MAX_EXACT_INT <= value <= _MAX_EXACT_INT)
+
+
+class ColumnarStore:
+    """Array-backed storage for calculations with one contiguous column per field."""
+
+    def __init__(self, capacity: int = _INITIAL_CAPACITY):
+        """
+        Initialize empty columns.
+
+        Args:
+            capacity (int): The number of rows to allocate up front.
+        """
+        self.operations = []  # Operation instance for each code
+        self._codes_by_type = {}
+        self._reset(capacity)
+
+    def _reset(self, capacity: int):
+        """Allocate fresh, empty columns."""
+        self.size = 0
+        self.operand1 = np.empty(capacity, dtype=np.float64)
+        self.operand2 = np.empty(capacity, dtype=np.float64)
+        self.result = np.empty(capacity, dtype=np.float64)
+        self.codes = np.empty(capacity, dtype=np.uint8)
+        self.kinds = np.empty(capacity, dtype=np.uint8)
+        self._exact = {}  # Row -> (operand1, operand2, result) for values a float64 cannot hold
+        self._expressions = {}  # Row -> expression text for rows recorded from an expression
+        self._blocks = []  # (start, end) of every batch still stored, so undo removes it whole
+        self._shared_rows = 0  # Leading rows a snapshot may still read; rewriting them copies the columns first
+        self._snapshots = weakref.WeakSet()  # Live snapshots of the current columns, so released ones stop counting
+        self._shared_tables = False  # True while a snapshot shares the side tables
+        self._buckets = None  # OperationBuckets, built by the first query and then kept up to date
+        self._result_index = None  # SortedIndex on the result column, built with the buckets
+        self._stats = None  # HistoryStats, built by the first statistics call and then kept up to date
+
+    @classmethod
+    def from_columns(cls, operations, size, operand1, operand2, result, codes, kinds, exact=None,
+                     expressions=None) -> "ColumnarStore":
+        """
+        Build a store around existing column arrays without copying them.
+
+        Read-only columns, such as memory-mapped ones, are copied only when the
+        store is first appended to.
+
+        Args:
+            operations (list): The Operation instance for each code used in codes.
+            size (int): The number of rows in use.
+            operand1, operand2, result (np.ndarray): The float64 value columns.
+            codes, kinds (np.ndarray): The uint8 operation code and kinds columns.
+            exact (dict, optional): Row -> (operand1, operand2, result) for values a float64 cannot hold.
+            expressions (dict, optional): Row -> expression text for rows recorded from an expression.
+
+        Returns:
+            ColumnarStore: The new store.
+        """
+        store = cls(capacity=0)
+        for operation in operations:
+            store.code_for(operation)
+        store.size = size
+        store.operand1, store.operand2, store.result, store.codes, store.kinds = operand1, operand2, result, codes, kinds
+        store._exact = dict(exact or {})
+        store._expressions = dict(expressions or {})
+        return store
+
+    def copy(self) -> "ColumnarStore":
+        """Return an independent copy of the stored rows."""
+        return ColumnarStore.from_columns(
+            list(self.operations), self.size, self.operand1[:self.size].copy(), self.operand2[:self.size].copy(),
+            self.result[:self.size].copy(), self.codes[:self.size].copy(), self.kinds[:self.size].copy(), self._exact,
+            self._expressions)
+
+    def snapshot(self, rows: Union[int, None] = None) -> "ColumnarStore":
+        """
+        Return a read-only store of the current rows that later changes to this one do not affect.
+
+        Taking a snapshot of every row copies nothing. The columns and side tables are
+        shared, and this store copies them the first time it would change something the
+        snapshot can see: a row rewritten after an undo, or a side-table entry.
+
+        Args:
+            rows (int, optional): Keep only this many leading rows. By default every row is kept.
+
+        Returns:
+            ColumnarStore: The snapshot.
+        """
+        rows = self.size if rows is None else min(rows, self.size)
+        snapshot = ColumnarStore(capacity=0)
+        snapshot.operations = list(self.operations)
+        snapshot._codes_by_type = dict(self._codes_by_type)
+        snapshot.size = rows
+        for name in ("operand1", "operand2", "result", "codes", "kinds"):
+            column = getattr(self, name)[:rows]
+            column.flags.writeable = False  # Appending to the snapshot copies instead of writing into shared memory
+            setattr(snapshot, name, column)
+        snapshot._blocks = [block for block in self._blocks if block[1] <= rows]
+        if rows == self.size:
+            snapshot._exact, snapshot._expressions = self._exact, self._expressions
+            snapshot._shared_tables = self._shared_tables = True
+        else:
+            snapshot._exact = {row: values for row, values in self._exact.items() if row < rows}
+            snapshot._expressions = {row: text for row, text in self._expressions.items() if row < rows}
+        self._shared_rows = max(self._shared_rows, rows)
+        self._snapshots.add(snapshot)
+        return snapshot
+
+    def starts_with(self, other: "ColumnarStore") -> bool:
+        """
+        Return True if the first rows of this store hold exactly the rows of another store.
+
+        Args:
+            other (ColumnarStore): The store that may be a prefix of this one.
+
+        Returns:
+            bool: Whether every row of other is also, unchanged, a leading row of this store.
+        """
+        rows = other.size
+        if rows > self.size:
+            return False
+        if not rows:
+            return True
+        # Each store numbers its operations itself, so compare operation types through the codes
+        translate = np.array([self._codes_by_type.get(type(operation), -1) for operation in other.operations])
+        return (np.array_equal(translate[other.codes[:rows]], self.codes[:rows])
+                and all(np.array_equal(getattr(other, name)[:rows], getattr(self, name)[:rows], equal_nan=True)
+                        for name in ("operand1", "operand2", "result", "kinds"))
+                and other._exact == {row: values for row, values in self._exact.items() if row < rows}
+                and other._expressions == {row: text for row, text in self._expressions.items() if row < rows})
+
+    def _own_side_tables(self):
+        """Copy the side tables before changing them if a snapshot shares them."""
+        if self._shared_tables:
+            self._exact, self._expressions = dict(self._exact), dict(self._expressions)
+            self._shared_tables = False
+
+    def exact_values(self) -> dict:
+        """Return row -> (operand1, operand2, result) for the values kept outside the float64 columns."""
+        return dict(self._exact)
+
+    def expressions(self) -> dict:
+        """Return row -> expression text for the rows recorded from an expression."""
+        return dict(self._expressions)
+
+    def set_exact_values(self, exact: dict):
+        """
+        Keep exact values for existing rows, such as rows just read from a file.
+
+        The float64 columns of those rows are set to NaN, as append leaves them.
+
+        Args:
+            exact (dict): Row -> (operand1, operand2, result).
+        """
+        self._own_side_tables()
+        self._exact.update(exact)
+        rows = np.fromiter(exact, dtype=np.int64, count=len(exact))
+        self.operand1[rows] = self.operand2[rows] = self.result[rows] = np.nan
+
+    def set_expressions(self, expressions: dict):
+        """
+        Attach expression text to existing rows, such as rows just read from a file.
+
+        Args:
+            expressions (dict): Row -> expression text.
+        """
+        self._own_side_tables()
+        self._expressions.update(expressions)
+
+    def __len__(self) -> int:
+        """Return the number of stored calculations."""
+        return self.size
+
+    @property
+    def nbytes(self) -> int:
+        """Return the number of bytes allocated by the columns."""
+        return sum(column.nbytes for column in (self.operand1, self.operand2, self.result, self.codes, self.kinds))
+
+    def code_for(self, operation: Operation) -> int:
+        """
+        Return the uint8 code for an operation, assigning the next free code the first time it is seen.
+
+        Args:
+            operation (Operation): The operation to encode.
+
+        Returns:
+            int: The operation code.
+        """
+        code = self._codes_by_type.get(type(operation))
+        if code is None:
+            code = len(self.operations)
+            if code > np.iinfo(np.uint8).max:
+                raise ValueError("Too many distinct operations for the history store.")
+            self._codes_by_type[type(operation)] = code
+            self.operations.append(operation)
+        return code
+
+    def _reserve(self, extra: int):
+        """Grow every column geometrically so at least `extra` more rows fit."""
+        needed = self.size + extra
+        capacity = len(self.result)
+        if self.size < self._shared_rows:
+            # Snapshots released since they were taken no longer read their rows
+            self._shared_rows = max((snapshot.size for snapshot in self._snapshots), default=0)
+        if needed <= capacity and self.result.flags.writeable and self.size >= self._shared_rows:
+            return
+        # Read-only columns, and columns a live snapshot still reads past this row, are copied even with room left
+        capacity = max(capacity, _INITIAL_CAPACITY)
+        self._shared_rows = 0
+        self._snapshots = weakref.WeakSet()
+        while capacity < needed:
+            capacity *= 2
+        for name in ("operand1", "operand2", "result", "codes", "kinds"):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def append(self, calculation: Calculation):
+        """
+        Append one calculation as a new row.
+
+        Args:
+            calculation (Calculation): The calculation to store.
+        """
+        self._reserve(1)
+        row = self.size
+        operand1, operand2, result = calculation.operand1, calculation.operand2, calculation.result
+        kinds = 0
+        if type(operand1) in (int, bool):
+            kinds |= OPERAND1_INT
+        if type(operand2) in (int, bool):
+            kinds |= OPERAND2_INT
+        if result is None:
+            kinds |= RESULT_NONE
+        elif type(result) in (int, bool):
+            kinds |= RESULT_INT
+        if _is_exact(operand1) and _is_exact(operand2) and (result is None or _is_exact(result)):
+            self.operand1[row] = operand1
+            self.operand2[row] = operand2
+            self.result[row] = np.nan if result is None else result
+        else:
+            self._own_side_tables()
+            self._exact[row] = (operand1, operand2, result)
+            self.operand1[row] = self.operand2[row] = self.result[row] = np.nan
+        if isinstance(calculation, ExpressionCalculation):
+            self._own_side_tables()
+            self._expressions[row] = calculation.expression
+        code = self.code_for(calculation.operation)
+        self.codes[row] = code
+        self.kinds[row] = kinds
+        self.size = row + 1
+        if self._buckets is not None:
+            self._buckets.add(row, code)
+        if self._stats is not None:
+            self._stats.add_one(row, code, _as_float(result) if row in self._exact else float(self.result[row]))
+
+    def append_batch(self, operation: Operation, operand1, operand2, result):
+        """
+        Append a whole batch of float64 rows with one copy per column.
+
+        Args:
+            operation (Operation): The operation shared by every row.
+            operand1 (np.ndarray): The first operands.
+            operand2 (np.ndarray): The second operands.
+            result (np.ndarray): The results.
+        """
+        count = len(result)
+        self._reserve(count)
+        start, end = self.size, self.size + count
+        self.operand1[start:end] = operand1
+        self.operand2[start:end] = operand2
+        self.result[start:end] = result
+        code = self.code_for(operation)
+        self.codes[start:end] = code
+        self.kinds[start:end] = 0
+        self.size = end
+        self._blocks.append((start, end))
+        if self._buckets is not None:
+            self._buckets.add(start, code, count)
+        if self._stats is not None:
+            self._stats.add(start, code, self.result[start:end])
+
+    def extend(self, codes, operand1, operand2, result, kinds=0):
+        """
+        Append many float64 rows at once, each with its own operation code.
+
+        Unlike append_batch the rows stay separate entries, so undo removes them one at a time.
+
+        Args:
+            codes (np.ndarray): The operation code of every row, from code_for.
+            operand1 (np.ndarray): The first operands.
+            operand2 (np.ndarray): The second operands.
+            result (np.ndarray): The results.
+            kinds (np.ndarray or int): The kinds flags of every row, such as OPERAND1_INT; by default
+                every value is a float.
+        """
+        count = len(codes)
+        self._reserve(count)
+        start, end = self.size, self.size + count
+        self.operand1[start:end] = operand1
+        self.operand2[start:end] = operand2
+        self.result[start:end] = result
+        self.codes[start:end] = codes
+        self.kinds[start:end] = kinds
+        self.size = end
+        if self._buckets is not None:
+            self._buckets.add(start, self.codes[start:end])
+        if self._stats is not None:
+            self._stats.add(start, self.codes[start:end], self.result[start:end])
+
+    def get(self, row: int) -> Calculation:
+        """
+        Build a Calculation object for one stored row.
+
+        Args:
+            row (int): The row index, which must be in range.
+
+        Returns:
+            Calculation: A new Calculation with the stored operands and result, or an
+            ExpressionCalculation for a row recorded from an expression.
+        """
+        kinds = int(self.kinds[row])
+        expression = self._expressions.get(row)
+        if expression is None:
+            calculation = Calculation(self.operations[self.codes[row]], 0, 0)
+        else:
+            calculation = ExpressionCalculation(self.operations[self.codes[row]], 0, 0, expression)
+        exact = self._exact.get(row)
+        if exact is not None:
+            calculation.operand1, calculation.operand2, result = exact
+        else:
+            operand1, operand2, result = float(self.operand1[row]), float(self.operand2[row]), float(self.result[row])
+            calculation.operand1 = int(operand1) if kinds & OPERAND1_INT else operand1
+            calculation.operand2 = int(operand2) if kinds & OPERAND2_INT else operand2
+            if kinds & RESULT_NONE:
+                result = None
+            elif kinds & RESULT_INT:
+                result = int(result)
+        calculation.set_result(result)
+        return calculation
+
+    def export_column(self, name: str) -> np.ndarray:
+        """
+        Return a copy of the stored values of one operand or result column.
+
+        The column comes back as int64 when every value in it was an int, and as an
+        object array when some values could not be held in float64.
+
+        Args:
+            name (str): One of "operand1", "operand2" or "result".
+
+        Returns:
+            np.ndarray: The column values for every stored row.
+        """
+        flag, position = {"operand1": (OPERAND1_INT, 0), "operand2": (OPERAND2_INT, 1), "result": (RESULT_INT, 2)}[name]
+        values = getattr(self, name)[:self.size]
+        if self._exact:
+            values = values.astype(object)
+            for row, exact in self._exact.items():
+                values[row] = exact[position]
+            return values
+        if self.size and np.all(self.kinds[:self.size] & flag):
+            return values.astype(np.int64)
+        return values.copy()
+
+    def result_values(self) -> np.ndarray:
+        """
+        Return the result of every stored row as float64, for vectorized passes over the column.
+
+        Results kept in the exact-value table come back as their nearest float, or NaN
+        when they are complex or too large for one. Rows without a result are NaN.
+
+        Returns:
+            np.ndarray: The results, sharing memory with the column when no row is kept exactly.
+        """
+        return self._results(0, self.size)
+
+    def operation_names(self) -> np.ndarray:
+        """Return the operation class name of every stored row."""
+        names = np.array([operation.__class__.__name__ for operation in self.operations] or [""], dtype=object)
+        return names[self.codes[:self.size]]
+
+    def pop(self) -> Union[Calculation, CalculationBatch]:
+        """
+        Remove the most recent entry. A batch is removed as a whole.
+
+        Returns:
+            Calculation or CalculationBatch: The removed calculation or batch.
+        """
+        if self._blocks and self._blocks[-1][1] == self.size:
+            start, end = self._blocks.pop()
+            batch = CalculationBatch(self.operations[self.codes[start]], self.operand1[start:end].copy(),
+                                     self.operand2[start:end].copy(), self.result[start:end].copy())
+            self._truncate(start)
+            return batch
+        calculation = self.get(self.size - 1)
+        self._truncate(self.size - 1)
+        return calculation
+
+    def remove_last(self, count: int):
+        """
+        Remove the last rows, whatever entries they belong to.
+
+        Used when replaying a journal onto a base file that does not keep batch
+        boundaries, where an undone batch is a number of rows rather than one entry.
+
+        Args:
+            count (int): The number of rows to remove.
+        """
+        size = max(self.size - count, 0)
+        while self._blocks and self._blocks[-1][1] > size:
+            self._blocks.pop()
+        self._truncate(size)
+
+    def restore(self, entry: Union[Calculation, CalculationBatch]):
+        """
+        Put back the entry most recently removed by pop, in constant time.
+
+        pop leaves the column values in place, so they are reused rather than written
+        again. Only valid while nothing else has been appended since that pop.
+
+        Args:
+            entry (Calculation or CalculationBatch): The entry pop returned.
+        """
+        if isinstance(entry, CalculationBatch):
+            start, self.size = self.size, self.size + len(entry.result)
+            self._blocks.append((start, self.size))
+            if self._buckets is not None:
+                self._buckets.add(start, int(self.codes[start]), self.size - start)
+            if self._stats is not None:
+                self._stats.add(start, int(self.codes[start]), self.result[start:self.size])
+            return
+        row = self.size
+        exact = (entry.operand1, entry.operand2, entry.result)
+        if not all(value is None or _is_exact(value) for value in exact):
+            self._own_side_tables()
+            self._exact[row] = exact
+        if isinstance(entry, ExpressionCalculation):
+            self._own_side_tables()
+            self._expressions[row] = entry.expression
+        self.size = row + 1
+        if self._buckets is not None:
+            self._buckets.add(row, int(self.codes[row]))
+        if self._stats is not None:
+            self._stats.add_one(row, int(self.codes[row]), self._results(row, row + 1)[0])
+
+    def _results(self, start: int, stop: int) -> np.ndarray:
+        """Return the results of some rows as floats, including those kept in the exact-value table."""
+        values = self.result[start:stop]
+        rows = range(start, stop) if stop - start < len(self._exact) else list(self._exact)
+        rows = [row for row in rows if start <= row < stop and row in self._exact]
+        if rows:
+            values = values.copy()
+            for row in rows:
+                values[row - start] = _as_float(self._exact[row][2])
+        return values
+
+    def _truncate(self, size: int):
+        """Drop every row from `size` onwards."""
+        if self._stats is not None and size < self.size:
+            if self.size - size == 1:
+                self._stats.remove_one(size, int(self.codes[size]), self._results(size, self.size)[0])
+            else:
+                self._stats.remove(size, self.codes[size:self.size], self._results(size, self.size))
+        for name in ("_exact", "_expressions"):
+            side_table = getattr(self, name)
+            if not side_table:
+                continue
+            # Look up the dropped rows when there are fewer of them than entries, so undo stays O(1)
+            dropped = (range(size, self.size) if self.size - size < len(side_table) else list(side_table))
+            dropped = [row for row in dropped if row >= size and row in side_table]
+            if dropped:
+                self._own_side_tables()
+                side_table = getattr(self, name)
+                for row in dropped:
+                    del side_table[row]
+        if self._buckets is not None:
+            self._buckets.truncate(size)
+            self._result_index.truncate(size)
+        self.size = size
+
+    def clear(self):
+        """Remove every row and release the column memory."""
+        self._reset(_INITIAL_CAPACITY)
+
+    def select(self, operation: Operation = None, min_result=None, max_result=None, operand=None) -> np.ndarray:
+        """
+        Return the rows that match every given condition, in history order.
+
+        The first query builds an index of the rows of each operation and a sorted
+        index on the result column, which are then kept up to date as rows are added
+        and removed. Each query starts from whichever of the two gives fewer candidate
+        rows, so selective queries take time proportional to their matches rather than
+        to the history.
+
+        Args:
+            operation (Operation, optional): Only rows of this operation.
+            min_result (float, optional): Only rows whose result is at least this.
+            max_result (float, optional): Only rows whose result is at most this.
+            operand (float, optional): Only rows where either operand equals this.
+
+        Returns:
+            np.ndarray: The matching row numbers.
+        """
+        size = self.size
+        if self._buckets is None:
+            self._buckets, self._result_index = OperationBuckets(self.codes[:size]), SortedIndex()
+        code = None if operation is None else self._codes_by_type.get(type(operation), -1)
+        if code == -1:
+            return np.empty(0, dtype=np.int64)
+        ranged = min_result is not None or max_result is not None
+        low = -np.inf if min_result is None else min_result
+        high = np.inf if max_result is None else max_result
+        if code is not None and (not ranged or self._buckets.count(code) <= self._result_index.count(low, high)):
+            rows = self._buckets.rows(code).copy()
+            if ranged:
+                values = self.result[rows]
+                rows = rows[(values >= low) & (values <= high)]
+        elif ranged:
+            rows = self._result_index.select(self.result, size, low, high)
+            if code is not None:
+                rows = rows[self.codes[rows] == code]
+        else:
+            rows = np.arange(size)
+        if operand is not None:
+            rows = rows[(self.operand1[rows] == operand) | (self.operand2[rows] == operand)]
+        if (ranged or operand is not None) and self._exact:
+            # Values kept in the side table are NaN in the columns, so check them here
+            extra = [row for row, (operand1, operand2, result) in self._exact.items()
+                     if row < size and (code is None or self.codes[row] == code)
+                     and (not ranged or (result is not None and low <= result <= high))
+                     and (operand is None or operand in (operand1, operand2))]
+            if extra:
+                rows = np.union1d(rows, extra)
+        return rows
+
+    def statistics(self, operation: Operation = None) -> dict:
+        """
+        Summarize the results of one operation, or of every row.
+
+        The first call builds the aggregates in one pass over the columns. They are
+        then kept up to date as rows are added and removed, so later calls take time
+        independent of the number of rows.
+
+        Args:
+            operation (Operation, optional): Only rows of this operation.
+
+        Returns:
+            dict: count, sum, mean, min, max, p50, p95 and p99 of the results, as from HistoryStats.summary.
+        """
+        if self._stats is None:
+            self._stats = HistoryStats()
+            self._stats.add(0, self.codes[:self.size], self._results(0, self.size))
+        if operation is None:
+            return self._stats.summary()
+        return self._stats.summary(self._codes_by_type.get(type(operation), -1))
+
+    def view(self) -> "HistoryView":
+        """Return a lazy sequence view over the stored rows."""
+        return HistoryView(self)
+
+
+class HistoryView(Sequence):
+    """Read-only sequence over a ColumnarStore that builds Calculation objects only when accessed."""
+
+    def __init__(self, store: ColumnarStore, start: int = 0, stop: Union[int, None] = None):
+        """
+        Initialize a view over a range of rows.
+
+        Args:
+            store (ColumnarStore): The store to read from.
+            start (int): The first row of the view.
+            stop (int, optional): The end of the view, or None to follow the store as it grows.
+        """
+        self._store = store
+        self._start = start
+        self._stop = stop
+
+    def __len__(self) -> int:
+        """Return the number of calculations in the view."""
+        stop = self._store.size if self._stop is None else min(self._stop, self._store.size)
+        return max(stop - self._start, 0)
+
+    def __getitem__(self, index):
+        """
+        Return one Calculation, or a narrower view for a slice.
+
+        Args:
+            index (int or slice): The position in the view.
+
+        Returns:
+            Calculation or HistoryView: The calculation at that position, or a view of the slice.
+        """
+        length = len(self)
+        if isinstance(index, slice):
+            start, stop, step = index.indices(length)
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            return HistoryView(self._store, self._start + start, self._start + max(stop, start))
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("history index out of range")
+        return self._store.get(self._start + index)
+
+    def __repr__(self) -> str:
+        """Provide a string representation listing the calculations in the view."""
+        return repr(list(self))
+
+
+class RowsView(Sequence):
+    """Read-only sequence over chosen rows of a ColumnarStore, such as query matches, built only when accessed."""
+
+    def __init__(self, store: ColumnarStore, rows: np.ndarray):
+        """
+        Initialize a view over some rows.
+
+        Args:
+            store (ColumnarStore): The store to read from, usually a snapshot.
+            rows (np.ndarray): The row numbers, in the order they are listed.
+        """
+        self._store = store
+        self._rows = rows
+
+    @property
+    def rows(self) -> np.ndarray:
+        """Return the row numbers in the view."""
+        return self._rows
+
+    def __len__(self) -> int:
+        """Return the number of calculations in the view."""
+        return len(self._rows)
+
+    def __getitem__(self, index):
+        """
+        Return one Calculation, or a narrower view for a slice.
+
+        Args:
+            index (int or slice): The position in the view.
+
+        Returns:
+            Calculation or RowsView: The calculation at that position, or a view of the slice.
+        """
+        if isinstance(index, slice):
+            return RowsView(self._store, self._rows[index])
+        return self._store.get(int(self._rows[index]))
+
+    def __repr__(self) -> str:
+        """Provide a string representation listing the calculations in the view."""
+        return repr(list(self))
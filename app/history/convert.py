@@ -0,0 +1,68 @@
+# app/history/convert.py
+
+import argparse
+import sys
+from app.history import read_csv_store, write_csv_store
+from app.history.binary import open_binary, write_binary
+from app.history.columnar import HistoryFileError
+
+
+def csv_to_binary(source: str, destination: str) -> int:
+    """
+    Convert a CSV history file to the binary format.
+
+    Args:
+        source (str): The CSV history file to read.
+        destination (str): The binary history file to write.
+
+    Returns:
+        int: The number of calculations converted.
+    """
+    store = read_csv_store(source, allow_empty=True)
+    write_binary(store, destination)
+    return store.size
+
+
+def binary_to_csv(source: str, destination: str) -> int:
+    """
+    Convert a binary history file to CSV.
+
+    Args:
+        source (str): The binary history file to read.
+        destination (str): The CSV history file to write.
+
+    Returns:
+        int: The number of calculations converted.
+    """
+    store = open_binary(source)
+    write_csv_store(store, destination)
+    return store.size
+
+
+def main(argv=None) -> int:
+    """
+    Convert history files between CSV and the binary format from the command line.
+
+    Args:
+        argv (list, optional): Command-line arguments, without the program name.
+
+    Returns:
+        int: The process exit status.
+    """
+    parser = argparse.ArgumentParser(description="Convert calculator history files between CSV and binary.")
+    parser.add_argument("direction", choices=["to-binary", "to-csv"], help="The format to convert to.")
+    parser.add_argument("source", help="The history file to read.")
+    parser.add_argument("destination", help="The history file to write.")
+    options = parser.parse_args(argv)
+    convert = csv_to_binary if options.direction == "to-binary" else binary_to_csv
+    try:
+        count = convert(options.source, options.destination)
+    except (HistoryFileError, OSError) as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        return 1
+    print(f"Converted {count} calculations from {options.source} to {options.destination}.")
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main())
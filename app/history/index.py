@@ -0,0 +1,141 @@
+# app/history/index.py
+
+import numpy as np
+
+_INITIAL_CAPACITY = 16
+
+# Rows appended since the last merge are scanned directly until there are this many,
+# or one sixty-fourth of the indexed rows if that is more, and then merged in
+_MIN_UNMERGED_ROWS = 4096
+
+
+class OperationBuckets:
+    """The rows of each operation code, in history order, kept up to date as rows are added and removed."""
+
+    def __init__(self, codes: np.ndarray):
+        """
+        Build the buckets for existing rows.
+
+        Args:
+            codes (np.ndarray): The operation code of every stored row.
+        """
+        order = np.argsort(codes, kind="stable")  # Stable, so each bucket stays in row order
+        bounds = np.searchsorted(codes[order], np.arange(int(codes.max(initial=0)) + 2))
+        self._rows = [order[bounds[code]:bounds[code + 1]].astype(np.int64) for code in range(len(bounds) - 1)]
+        self._counts = [len(rows) for rows in self._rows]
+
+    def _reserve(self, code: int, extra: int):
+        """Make room for `extra` more rows in one bucket, growing it geometrically."""
+        while code >= len(self._rows):
+            self._rows.append(np.empty(0, dtype=np.int64))
+            self._counts.append(0)
+        rows, needed = self._rows[code], self._counts[code] + extra
+        if needed > len(rows):
+            grown = np.empty(max(needed, 2 * len(rows), _INITIAL_CAPACITY), dtype=np.int64)
+            grown[:self._counts[code]] = rows[:self._counts[code]]
+            self._rows[code] = grown
+
+    def add(self, start: int, codes, count: int = 1):
+        """
+        Record rows added at the end of the history.
+
+        Args:
+            start (int): The first new row.
+            codes (int or np.ndarray): One code shared by every new row, or the code of each new row.
+            count (int): The number of new rows when they share one code.
+        """
+        if np.isscalar(codes):  # A single row or a batch: one bucket, no sorting
+            self._append(int(codes), np.arange(start, start + count))
+            return
+        for code in np.unique(codes):
+            self._append(int(code), start + np.flatnonzero(codes == code))
+
+    def _append(self, code: int, rows: np.ndarray):
+        """Append rows, which come after every row already in the bucket, to one bucket."""
+        self._reserve(code, len(rows))
+        count = self._counts[code]
+        self._rows[code][count:count + len(rows)] = rows
+        self._counts[code] = count + len(rows)
+
+    def truncate(self, size: int):
+        """Forget every row from `size` onwards, in logarithmic time per bucket."""
+        for code, count in enumerate(self._counts):
+            if count and self._rows[code][count - 1] >= size:
+                self._counts[code] = int(np.searchsorted(self._rows[code][:count], size))
+
+    def rows(self, code: int) -> np.ndarray:
+        """Return the rows with an operation code, in history order."""
+        return self._rows[code][:self._counts[code]] if code < len(self._rows) else np.empty(0, dtype=np.int64)
+
+    def count(self, code: int) -> int:
+        """Return the number of rows with an operation code."""
+        return self._counts[code] if code < len(self._counts) else 0
+
+
+class SortedIndex:
+    """
+    Rows ordered by the value of one float64 column, for range queries in logarithmic time.
+
+    New rows are not inserted one by one. Rows past the indexed ones are scanned
+    directly, and merged into the sorted arrays in one pass once there are enough of
+    them, so appending costs nothing. Removing rows only lowers the indexed bound;
+    entries past it are ignored until the next merge drops them.
+    """
+
+    def __init__(self):
+        """Start with no rows indexed."""
+        self._keys = np.empty(0, dtype=np.float64)
+        self._rows = np.empty(0, dtype=np.int64)
+        self._indexed = 0  # Rows below this are in the sorted arrays
+        self._stale = False  # True when the sorted arrays hold rows at or past _indexed
+
+    def truncate(self, size: int):
+        """Forget every row from `size` onwards."""
+        if size < self._indexed:
+            self._indexed = size
+            self._stale = True
+
+    def _merge(self, column: np.ndarray, size: int):
+        """Fold the rows past the indexed ones into the sorted arrays."""
+        keys, rows = self._keys, self._rows
+        if self._stale:
+            keep = rows < self._indexed
+            keys, rows = keys[keep], rows[keep]
+            self._stale = False
+        new_rows = np.arange(self._indexed, size)
+        new_keys = column[self._indexed:size]
+        known = ~np.isnan(new_keys)  # Rows without a numeric value never match a range
+        new_rows, new_keys = new_rows[known], new_keys[known]
+        order = np.argsort(new_keys, kind="stable")
+        new_rows, new_keys = new_rows[order], new_keys[order]
+        positions = np.searchsorted(keys, new_keys, side="right")
+        self._keys = np.insert(keys, positions, new_keys)
+        self._rows = np.insert(rows, positions, new_rows)
+        self._indexed = size
+
+    def count(self, low: float, high: float) -> int:
+        """Return an upper bound on the rows with a value in [low, high], in logarithmic time."""
+        return int(np.searchsorted(self._keys, high, side="right") - np.searchsorted(self._keys, low, side="left"))
+
+    def select(self, column: np.ndarray, size: int, low: float, high: float) -> np.ndarray:
+        """
+        Return the rows below `size` whose value is in [low, high], in history order.
+
+        Args:
+            column (np.ndarray): The indexed column, as currently stored.
+            size (int): The number of rows in use.
+            low (float): The smallest value to include.
+            high (float): The largest value to include.
+
+        Returns:
+            np.ndarray: The matching rows.
+        """
+        if size - self._indexed > max(_MIN_UNMERGED_ROWS, self._indexed // 64):
+            self._merge(column, size)
+        start, stop = np.searchsorted(self._keys, low, side="left"), np.searchsorted(self._keys, high, side="right")
+        rows = self._rows[start:stop]
+        if self._stale:
+            rows = rows[rows < self._indexed]
+        tail = column[self._indexed:size]
+        tail_rows = self._indexed + np.flatnonzero((tail >= low) & (tail <= high))
+        return np.sort(np.concatenate((rows, tail_rows)))
@@ -0,0 +1,193 @@
+# app/history/journal.py
+
+import logging
+import os
+from fractions import Fraction
+from typing import Iterator, List, Tuple
+
+# Initialize the logger for this module
+logger = logging.getLogger(__name__)
+
+# Record kinds, one per history mutation
+ADD = "A"
+BATCH = "B"  # One row of a batch; the rows of one batch share an LSN
+UNDO = "U"  # With the number of rows removed, since a compacted base keeps no batch boundaries
+CLEAR = "C"
+
+FSYNC_POLICIES = ("always", "never")
+
+# First line of a compacted base file, recording the last journal LSN folded into it
+BASE_LSN_PREFIX = "# lsn="
+
+
+def format_number(value) -> str:
+    """Format a value so parse_number gives back the same value and type."""
+    if value is None:
+        return ""
+    if type(value) is Fraction:
+        return f"{value.numerator}/{value.denominator}"  # Always with the denominator, so 2/1 stays a Fraction
+    try:
+        return repr(value)
+    except ValueError:  # An int with more decimal digits than Python converts to text
+        return hex(value)
+
+
+def parse_number(text: str):
+    """Parse a number written by format_number, keeping ints as ints, fractions as Fractions and complex values."""
+    if not text:
+        return None
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    if "/" in text:
+        return Fraction(text)
+    if "x" in text:
+        return int(text, 16)
+    if "j" in text:  # repr of a complex value, such as a fractional power of a negative number
+        return complex(text)
+    return float(text)
+
+
+def read_base_lsn(path: str) -> int:
+    """
+    Return the LSN recorded at the top of a base history file, or 0 if it has none.
+
+    Args:
+        path (str): The base history file.
+
+    Returns:
+        int: The last journal LSN already folded into the base file.
+    """
+    try:
+        with open(path, encoding="utf-8") as base:
+            first_line = base.readline()
+    except FileNotFoundError:
+        return 0
+    return int(first_line[len(BASE_LSN_PREFIX):]) if first_line.startswith(BASE_LSN_PREFIX) else 0
+
+
+class Journal:
+    """Append-only log of history mutations stored next to the base history file."""
+
+    def __init__(self, base_path: str, fsync: str = "never"):
+        """
+        Initialize a journal for a base history file.
+
+        Args:
+            base_path (str): The base history file the journal belongs to.
+            fsync (str): "always" to fsync after every append, or "never" to leave flushing to the OS.
+
+        Raises:
+            ValueError: If the fsync policy is not recognized.
+        """
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown journal fsync policy {fsync!r}. Expected one of {', '.join(FSYNC_POLICIES)}.")
+        self.path = f"{base_path}.journal"
+        self.compacting_path = f"{base_path}.journal.compacting"
+        self.fsync = fsync
+
+    @property
+    def size(self) -> int:
+        """Return the current size of the journal file in bytes."""
+        try:
+            return os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
+
+    def append(self, lines: List[str]):
+        """
+        Append formatted records to the journal in a single write.
+
+        Args:
+            lines (List[str]): Newline-terminated records from the history.
+        """
+        with open(self.path, "a", encoding="utf-8") as journal:
+            journal.write("".join(lines))
+            journal.flush()
+            if self.fsync == "always":
+                os.fsync(journal.fileno())
+
+    def repair(self):
+        """Cut off a torn final record left by a crash, so later appends start on a fresh line."""
+        try:
+            with open(self.path, "rb+") as journal:
+                data = journal.read()
+                end = data.rfind(b"\n") + 1
+                if end < len(data):
+                    logger.warning("Removing incomplete journal record from %s.", self.path)
+                    journal.truncate(end)
+        except FileNotFoundError:
+            pass
+
+    def rotate(self):
+        """
+        Move the current journal aside for compaction so new records start a fresh file.
+
+        A segment left by a compaction that failed is not yet in the base file, so the
+        journal is appended to it rather than replacing it. A crash before the journal is
+        then removed leaves its records in both files, and records reads them once.
+        """
+        if not os.path.exists(self.path):
+            return
+        if not os.path.exists(self.compacting_path):
+            os.replace(self.path, self.compacting_path)
+            return
+        with open(self.path, "rb") as journal, open(self.compacting_path, "ab") as segment:
+            segment.write(journal.read())
+            segment.flush()
+            if self.fsync == "always":
+                os.fsync(segment.fileno())
+        os.remove(self.path)
+
+    def records(self, after_lsn: int) -> Iterator[Tuple[int, str, List[str]]]:
+        """
+        Yield the records newer than an LSN, from the segment being compacted and then the journal.
+
+        A final line without a newline is a torn write from a crash and is skipped
+        (see repair). Journal records already folded into the segment are skipped too
+        (see rotate).
+
+        Args:
+            after_lsn (int): Records at or below this LSN are already in the base file.
+
+        Yields:
+            tuple: The record LSN, its kind and its remaining fields.
+        """
+        last_lsn = after_lsn
+        for path in (self.compacting_path, self.path):
+            if not os.path.exists(path):
+                continue
+            after_lsn = last_lsn  # The rows of a batch share an LSN, so only a later file's records are compared
+            with open(path, encoding="utf-8") as journal:
+                for line in journal:
+                    if not line.endswith("\n"):
+                        logger.warning("Skipping incomplete journal record in %s.", path)
+                        break
+                    lsn, kind, *fields = line.rstrip("\n").split(",")
+                    if int(lsn) > after_lsn:
+                        last_lsn = int(lsn)
+                        yield last_lsn, kind, fields
+
+    def finish_compaction(self, base_path: str, write):
+        """
+        Atomically replace the base file with compacted contents and drop the folded segment.
+
+        The writer records the last folded LSN inside the base file itself, so a crash at
+        any point leaves either the old base plus segment or the new base, which replays correctly.
+
+        Args:
+            base_path (str): The base history file.
+            write (Callable[[str], None]): Writes the full compacted history, with its LSN, to the path it is given.
+        """
+        temporary_path = f"{base_path}.compacted"
+        write(temporary_path)
+        if self.fsync == "always":
+            descriptor = os.open(temporary_path, os.O_RDONLY)
+            try:
+                os.fsync(descriptor)
+            finally:
+                os.close(descriptor)
+        os.replace(temporary_path, base_path)
+        if os.path.exists(self.compacting_path):
+            os.remove(self.compacting_path)
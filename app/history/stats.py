@@ -0,0 +1,386 @@
+# app/history/stats.py
+
+import math
+import numpy as np
+
+RELATIVE_ACCURACY = 0.01  # Quantiles are within 1% of a value actually in the history
+MAX_BINS = 2048  # Bins per sign in a sketch; the smallest magnitudes are merged beyond this
+MIN_MAGNITUDE = 1e-9  # Smaller magnitudes are counted as zero
+QUANTILES = (0.50, 0.95, 0.99)
+
+_INITIAL_CAPACITY = 16
+
+
+class CompensatedSum:
+    """
+    A running float sum with Neumaier's compensation.
+
+    The error stays within about twice the float epsilon times the sum of the
+    terms' magnitudes, however many terms there are, where a plain running sum's
+    error grows with their number. The bound is relative to the largest terms seen, not
+    to what is left: after adding 1e30-scale terms and subtracting them again, the
+    remaining small terms may have lost most or all of their digits.
+    """
+
+    __slots__ = ("total", "compensation")
+
+    def __init__(self):
+        """Start at zero."""
+        self.total = 0.0
+        self.compensation = 0.0
+
+    def add(self, value: float):
+        """Add one term, keeping the low-order bits lost to rounding in the compensation."""
+        total = self.total + value
+        if abs(self.total) >= abs(value):
+            self.compensation += (self.total - total) + value
+        else:
+            self.compensation += (value - total) + self.total
+        self.total = total
+
+    @property
+    def value(self) -> float:
+        """Return the compensated sum."""
+        return self.total + self.compensation
+
+
+class _Bins:
+    """Counts for consecutive sketch bin indexes, grown as needed and collapsed from the low end."""
+
+    def __init__(self):
+        """Start with no bins."""
+        self.offset = 0  # Bin index of counts[0]
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.floor = None  # Lower indexes were collapsed into this one
+
+    def _cover(self, low: int, high: int):
+        """Make sure bins low to high exist."""
+        if not len(self.counts):
+            self.offset, self.counts = low, np.zeros(high - low + 1, dtype=np.int64)
+            return
+        end = self.offset + len(self.counts) - 1
+        if low >= self.offset and high <= end:
+            return
+        new_low, new_high = min(low, self.offset), max(high, end)
+        grown = np.zeros(new_high - new_low + 1, dtype=np.int64)
+        grown[self.offset - new_low:self.offset - new_low + len(self.counts)] = self.counts
+        self.offset, self.counts = new_low, grown
+
+    def _collapse(self, max_bins: int):
+        """Merge the lowest bins so at most max_bins remain; later values below the floor go to it as well."""
+        extra = len(self.counts) - max_bins
+        if extra > 0:
+            self.counts[extra] += self.counts[:extra].sum()
+            self.counts = self.counts[extra:].copy()
+            self.offset += extra
+            self.floor = self.offset
+
+    def add(self, indexes: np.ndarray, counts: np.ndarray, max_bins: int):
+        """Add counts, which may be negative, to some bins."""
+        if self.floor is not None:
+            indexes = np.maximum(indexes, self.floor)
+        self._cover(int(indexes.min()), int(indexes.max()))
+        np.add.at(self.counts, indexes - self.offset, counts)
+        self._collapse(max_bins)
+
+    def add_one(self, index: int, count: int, max_bins: int):
+        """Add a count, which may be negative, to one bin."""
+        if self.floor is not None and index < self.floor:
+            index = self.floor
+        self._cover(index, index)
+        self.counts[index - self.offset] += count
+        self._collapse(max_bins)
+
+class QuantileSketch:
+    """
+    Approximate quantiles with a bounded relative error, in bounded memory.
+
+    Values are counted in logarithmically sized bins, as in DDSketch: a value x falls in
+    bin ceil(log(|x|) / log(gamma)), and every value in a bin is within the relative
+    accuracy of the bin's representative value. Counts can be decremented, so values
+    are removed exactly, and two sketches merge by adding their counts.
+    """
+
+    def __init__(self, relative_accuracy: float = RELATIVE_ACCURACY, max_bins: int = MAX_BINS):
+        """
+        Initialize an empty sketch.
+
+        Args:
+            relative_accuracy (float): The relative error allowed in a quantile.
+            max_bins (int): The bins kept for each sign of value.
+        """
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.max_bins = max_bins
+        self.zero = 0
+        self._positive = _Bins()
+        self._negative = _Bins()
+
+    @property
+    def count(self) -> int:
+        """Return the number of values in the sketch."""
+        return int(self.zero + self._positive.counts.sum() + self._negative.counts.sum())
+
+    def _index(self, magnitude: float) -> int:
+        """Return the bin of one magnitude of at least MIN_MAGNITUDE."""
+        return math.ceil(math.log(magnitude) / self._log_gamma)
+
+    def add(self, values: np.ndarray, weight: int = 1):
+        """
+        Add values to the sketch, or remove them with a weight of -1.
+
+        Args:
+            values (np.ndarray): The values, all finite.
+            weight (int): 1 to add the values, -1 to remove values added before.
+        """
+        magnitudes = np.abs(values)
+        self.zero += weight * int(np.count_nonzero(magnitudes < MIN_MAGNITUDE))
+        for bins, chosen in ((self._positive, values >= MIN_MAGNITUDE), (self._negative, values <= -MIN_MAGNITUDE)):
+            if chosen.any():
+                indexes = np.ceil(np.log(magnitudes[chosen]) / self._log_gamma).astype(np.int64)
+                indexes, counts = np.unique(indexes, return_counts=True)
+                bins.add(indexes, weight * counts, self.max_bins)
+
+    def add_one(self, value: float, weight: int = 1):
+        """Add one value to the sketch, or remove it with a weight of -1."""
+        if value >= MIN_MAGNITUDE:
+            self._positive.add_one(self._index(value), weight, self.max_bins)
+        elif value <= -MIN_MAGNITUDE:
+            self._negative.add_one(self._index(-value), weight, self.max_bins)
+        else:
+            self.zero += weight
+
+    def merge(self, other: "QuantileSketch"):
+        """Add the counts of another sketch with the same relative accuracy to this one."""
+        self.zero += other.zero
+        for bins, other_bins in ((self._positive, other._positive), (self._negative, other._negative)):
+            used = np.flatnonzero(other_bins.counts)
+            if len(used):
+                bins.add(other_bins.offset + used, other_bins.counts[used], self.max_bins)
+
+    def quantile(self, fraction: float):
+        """
+        Return the approximate value below which the given fraction of values fall.
+
+        Args:
+            fraction (float): The quantile, between 0 and 1.
+
+        Returns:
+            float or None: The quantile, or None if the sketch is empty.
+        """
+        return self.quantiles([fraction])[0]
+
+    def quantiles(self, fractions) -> list:
+        """Return several quantiles, as from quantile, with one pass over the bins."""
+        negative, positive = self._negative, self._positive
+        cumulative = np.cumsum(np.concatenate((negative.counts[::-1], [self.zero], positive.counts)))
+        total = int(cumulative[-1])
+        if not total:
+            return [None] * len(fractions)
+        results = []
+        for fraction in fractions:
+            rank = min(max(1, math.ceil(fraction * total)), total)  # Nearest rank, counting from 1
+            position = int(np.searchsorted(cumulative, rank - 1, side="right"))
+            if position < len(negative.counts):
+                results.append(-self._value(negative.offset + len(negative.counts) - 1 - position))
+            elif position == len(negative.counts):
+                results.append(0.0)
+            else:
+                results.append(self._value(positive.offset + position - len(negative.counts) - 1))
+        return results
+
+    def _value(self, index: int) -> float:
+        """Return the representative magnitude of a bin."""
+        return 2 * self.gamma ** index / (self.gamma + 1)
+
+class _Records:
+    """
+    The rows where the running maximum of a column rises.
+
+    Rows are only ever removed from the end, so the maximum of the rows that remain is
+    the value of the last record before the new end.
+    """
+
+    def __init__(self):
+        """Start with no records."""
+        self._rows = np.empty(_INITIAL_CAPACITY, dtype=np.int64)
+        self._values = np.empty(_INITIAL_CAPACITY, dtype=np.float64)
+        self._count = 0
+
+    @property
+    def value(self):
+        """Return the running maximum, or None if there are no rows."""
+        return float(self._values[self._count - 1]) if self._count else None
+
+    def _append(self, rows, values, count: int):
+        """Append count records, growing the arrays geometrically."""
+        needed = self._count + count
+        if needed > len(self._rows):
+            capacity = max(needed, 2 * len(self._rows))
+            self._rows = np.concatenate((self._rows[:self._count], np.empty(capacity - self._count, np.int64)))
+            self._values = np.concatenate((self._values[:self._count], np.empty(capacity - self._count)))
+        self._rows[self._count:needed] = rows
+        self._values[self._count:needed] = values
+        self._count = needed
+
+    def add(self, rows: np.ndarray, values: np.ndarray):
+        """Record the rows among new ones, in row order, that raise the running maximum."""
+        current = self._values[self._count - 1] if self._count else -np.inf
+        before = np.maximum.accumulate(np.concatenate(([current], values)))[:-1]
+        rising = values > before
+        self._append(rows[rising], values[rising], int(np.count_nonzero(rising)))
+
+    def add_one(self, row: int, value: float):
+        """Record one new row if it raises the running maximum."""
+        if not self._count or value > self._values[self._count - 1]:
+            self._append(row, value, 1)
+
+    def truncate(self, size: int):
+        """Forget the records of rows from `size` onwards."""
+        if self._count and self._rows[self._count - 1] >= size:
+            self._count = int(np.searchsorted(self._rows[:self._count], size))
+
+
+class _OperationStats:
+    """The aggregates of the results of one operation."""
+
+    def __init__(self):
+        """Start with no results."""
+        self.count = 0
+        self.sum = CompensatedSum()
+        self.sketch = QuantileSketch()
+        self.maxima = _Records()
+        self.minima = _Records()  # Of the negated results
+
+    def add(self, rows: np.ndarray, values: np.ndarray):
+        """Add the results of new rows, given in row order."""
+        self.count += len(values)
+        self.sum.add(float(values.sum()))  # Pairwise within the block, compensated between blocks
+        self.sketch.add(values)
+        self.maxima.add(rows, values)
+        self.minima.add(rows, -values)
+
+    def add_one(self, row: int, value: float):
+        """Add the result of one new row."""
+        self.count += 1
+        self.sum.add(value)
+        self.sketch.add_one(value)
+        self.maxima.add_one(row, value)
+        self.minima.add_one(row, -value)
+
+    def remove(self, start: int, values: np.ndarray):
+        """Remove the results of the last rows, from row `start` onwards."""
+        self.count -= len(values)
+        self.sum.add(-float(values.sum()))
+        self.sketch.add(values, -1)
+        self.maxima.truncate(start)
+        self.minima.truncate(start)
+
+    def remove_one(self, row: int, value: float):
+        """Remove the result of the last row."""
+        self.count -= 1
+        self.sum.add(-value)
+        self.sketch.add_one(value, -1)
+        self.maxima.truncate(row)
+        self.minima.truncate(row)
+
+
+class HistoryStats:
+    """
+    Count, sum, mean, extremes and quantiles of the results in a history, per operation code.
+
+    Every aggregate is updated as rows are added and removed, in time proportional to
+    the rows changed, and read in time independent of the number of rows. Results that
+    are None, NaN or infinite are not counted.
+    """
+
+    def __init__(self):
+        """Start with no rows."""
+        self._by_code = {}
+
+    def _for(self, code: int) -> _OperationStats:
+        """Return the aggregates of one operation code, creating them if needed."""
+        stats = self._by_code.get(code)
+        if stats is None:
+            stats = self._by_code[code] = _OperationStats()
+        return stats
+
+    def add(self, start: int, codes, values: np.ndarray):
+        """
+        Add the results of new rows.
+
+        Args:
+            start (int): The first new row.
+            codes (int or np.ndarray): One code shared by every new row, or the code of each new row.
+            values (np.ndarray): The result of each new row, NaN where there is none.
+        """
+        rows = np.arange(start, start + len(values))
+        known = np.isfinite(values)
+        if np.isscalar(codes):
+            if known.any():
+                self._for(int(codes)).add(rows[known], values[known])
+            return
+        for code in np.unique(codes[known]):
+            chosen = known & (codes == code)
+            self._for(int(code)).add(rows[chosen], values[chosen])
+
+    def add_one(self, row: int, code: int, value: float):
+        """Add the result of one new row; a NaN or infinite result is skipped."""
+        if math.isfinite(value):
+            self._for(code).add_one(row, value)
+
+    def remove_one(self, row: int, code: int, value: float):
+        """Remove the result of the last row; a NaN or infinite result was never counted."""
+        if math.isfinite(value):
+            self._by_code[code].remove_one(row, value)
+
+    def remove(self, start: int, codes: np.ndarray, values: np.ndarray):
+        """
+        Remove the results of the last rows.
+
+        Args:
+            start (int): The first row removed; every row after it is removed too.
+            codes (np.ndarray): The code of each removed row.
+            values (np.ndarray): The result of each removed row, NaN where there is none.
+        """
+        known = np.isfinite(values)
+        for code, stats in self._by_code.items():
+            chosen = known & (codes == code)
+            stats.remove(start, values[chosen])
+
+    def summary(self, code: int = None) -> dict:
+        """
+        Return the aggregates of one operation code, or of every row.
+
+        The overall figures are combined from the per-operation ones: counts and sums
+        are added, extremes compared and the quantile sketches merged.
+
+        Args:
+            code (int, optional): The operation code. By default every row is summarized.
+
+        Returns:
+            dict: count, sum, mean, min, max and p50, p95 and p99. Everything but count
+            and sum is None when there are no results.
+        """
+        chosen = self._by_code.values() if code is None else [self._by_code.get(code)]
+        parts = [stats for stats in chosen if stats is not None and stats.count]
+        count = sum(stats.count for stats in parts)
+        total = CompensatedSum()
+        for stats in parts:
+            total.add(stats.sum.total)
+            total.add(stats.sum.compensation)
+        summary = {"count": count, "sum": total.value, "mean": None, "min": None, "max": None}
+        summary.update({f"p{round(fraction * 100)}": None for fraction in QUANTILES})
+        if not count:
+            return summary
+        sketch = parts[0].sketch if len(parts) == 1 else QuantileSketch()
+        if len(parts) > 1:
+            for stats in parts:
+                sketch.merge(stats.sketch)
+        low = min(-stats.minima.value for stats in parts)
+        high = max(stats.maxima.value for stats in parts)
+        summary.update(mean=total.value / count, min=low, max=high)
+        for fraction, value in zip(QUANTILES, sketch.quantiles(QUANTILES)):
+            summary[f"p{round(fraction * 100)}"] = min(max(value, low), high)  # A bin value may pass the exact extremes
+        return summary
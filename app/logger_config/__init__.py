@@ -1,18 +1,121 @@
+import atexit
 import logging
 import os
-from dotenv import load_dotenv
+import queue
+import random
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from app.config import load_config
 
-# Load environment variables from the .env file
-load_dotenv()
+# The running background listener, so setup_logging can be called more than once
+_listener = None
+_queue_handler = None
 
-def setup_logging():
-    """Set up the logging configuration for the application."""
+
+class SamplingFilter(logging.Filter):
+    """Keep only a random fraction of records below WARNING; warnings and errors always pass."""
+
+    def __init__(self, rate: float, sample=random.random):
+        """
+        Initialize the filter.
+
+        Args:
+            rate (float): The fraction of INFO and DEBUG records to keep, between 0 and 1.
+            sample (Callable[[], float]): Returns a uniform number in [0, 1) for each record.
+        """
+        super().__init__()
+        self.rate = rate
+        self._sample = sample
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Return True if the record should be logged."""
+        return record.levelno >= logging.WARNING or self._sample() < self.rate
+
+
+class DeferredQueueHandler(QueueHandler):
+    """Queue handler that leaves message formatting to the listener thread.
+
+    The standard QueueHandler formats every record in the logging thread so it can be
+    pickled; the listener here runs in the same process, so the record is queued as is
+    and the hot path only pays for creating it.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Return the record unchanged for the listener to format."""
+        return record
+
+
+def _log_level(name: str) -> int:
+    """Return the numeric level for a level name such as INFO, or raise ValueError."""
+    level = logging.getLevelName(name.strip().upper())
+    if not isinstance(level, int):
+        raise ValueError(f"Unknown LOG_LEVEL {name!r}. Expected DEBUG, INFO, WARNING, ERROR or CRITICAL.")
+    return level
+
+
+def setup_logging(default_level: str = "INFO", console_level: int = logging.NOTSET) -> QueueListener:
+    """Set up the logging configuration for the application.
+
+    Records are put on an in-memory queue and written by a background listener thread
+    to a size-rotated log file and the console, so logging calls do not wait on disk.
+    The console can be limited to more severe records than the file.
+    Settings come from the environment (or .env):
+
+    - LOG_FILE: The log file (default "default.log").
+    - LOG_LEVEL: The lowest level logged (default default_level).
+    - LOG_SAMPLE_RATE: The fraction of INFO and DEBUG records kept (default 1).
+    - LOG_MAX_BYTES: The size at which the log file is rotated (default 10 MiB, 0 never rotates).
+    - LOG_BACKUP_COUNT: The number of rotated files kept (default 5).
+
+    Calling it again while logging is running returns the running listener.
+
+    Args:
+        default_level (str): The lowest level logged when LOG_LEVEL is not set.
+        console_level (int): The lowest level also written to the console, such as
+            logging.WARNING. By default every record logged is.
+
+    Returns:
+        QueueListener: The background listener.
+    """
+    global _listener, _queue_handler  # pylint: disable=global-statement
+    if _listener is not None:
+        return _listener
+    load_config()
     log_file = os.getenv("LOG_FILE", "default.log")  # Fallback to "default.log" if LOG_FILE is not set
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(log_file),
-            logging.StreamHandler()
-        ]
-    )
+    level = _log_level(os.getenv("LOG_LEVEL", default_level))
+    sample_rate = float(os.getenv("LOG_SAMPLE_RATE", "1"))
+    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+    handlers = [
+        RotatingFileHandler(log_file, maxBytes=int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024))),
+                            backupCount=int(os.getenv("LOG_BACKUP_COUNT", "5")), encoding="utf-8"),
+        logging.StreamHandler()
+    ]
+    handlers[1].setLevel(console_level)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    _queue_handler = DeferredQueueHandler(log_queue)
+    if sample_rate < 1:
+        _queue_handler.addFilter(SamplingFilter(sample_rate))
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(_queue_handler)
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging():
+    """Write every queued record, stop the listener thread and close the log handlers."""
+    global _listener, _queue_handler  # pylint: disable=global-statement
+    if _listener is None:
+        return
+    logging.getLogger().removeHandler(_queue_handler)
+    _listener.stop()  # Processes the records still queued before returning
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = _queue_handler = None
+
+
+# Flush queued records when the interpreter exits
+atexit.register(shutdown_logging)
@@ -0,0 +1,353 @@
+# app/metrics/__init__.py
+
+import atexit
+import logging
+import os
+import threading
+from bisect import bisect_left
+from app.config import load_config
+
+# Initialize the logger for this module
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the latency histogram buckets, in seconds; slower calls fall in a last, unbounded bucket
+LATENCY_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Histogram name -> (label name, help text)
+HISTOGRAMS = {
+    "calculator_command_seconds": ("command", "Time to execute one calculator command."),
+    "calculator_operation_seconds": ("operation", "Time spent in Operation.calculate for one uncached calculation."),
+    "calculator_history_seconds": ("action", "Time to save or load the history."),
+}
+
+# The running background exporter, so start_metrics_export can be called more than once
+_exporter = None
+
+
+class Histogram:
+    """Counts of observations per fixed bucket, with their sum."""
+
+    __slots__ = ("counts", "total")
+
+    def __init__(self, size: int):
+        """
+        Initialize an empty histogram.
+
+        Args:
+            size (int): The number of buckets, including the unbounded last one.
+        """
+        self.counts = [0] * size
+        self.total = 0.0
+
+
+class _Shard:
+    """The histograms and error counts recorded by one thread."""
+
+    __slots__ = ("thread", "histograms", "errors")
+
+    def __init__(self, thread: threading.Thread):
+        self.thread = thread
+        self.histograms = {}  # (histogram name, label value) -> Histogram
+        self.errors = {}  # (command, exception type name) -> count
+
+
+class Metrics:
+    """
+    Process-wide counters and latency histograms, cheap enough to leave on.
+
+    Each thread records into its own shard, so recording takes no lock: one dict
+    lookup and a binary search over the bucket bounds. Reading the metrics adds the
+    shards up, and the shards of threads that have ended are folded into one. Counts
+    per command are the histogram counts, so they cost nothing extra; errors are
+    counted by command and exception type.
+    """
+
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS):
+        """
+        Initialize empty metrics.
+
+        Args:
+            buckets (tuple): The ascending upper bounds of the latency buckets, in seconds.
+        """
+        self.buckets = tuple(buckets)
+        self._local = threading.local()
+        self._shards = []  # Shards of running threads, and of ended ones not folded yet
+        self._retired = _Shard(None)  # Everything recorded by threads that have ended
+        self._lock = threading.Lock()  # Taken to add, fold or read shards, never to record
+
+    def _shard(self) -> _Shard:
+        """Return the calling thread's shard, creating it on the thread's first record."""
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = _Shard(threading.current_thread())
+            self._local.histograms = shard.histograms  # One lookup less when recording
+            with self._lock:
+                self._fold_ended()
+                self._shards.append(shard)
+            return shard
+
+    def _fold_ended(self):
+        """Fold the shards of threads that have ended into the retired shard; call with the lock held."""
+        running = []
+        for shard in self._shards:
+            if shard.thread.is_alive():
+                running.append(shard)
+            else:
+                _merge(self._retired, shard.histograms, shard.errors)
+        self._shards = running
+
+    def observe(self, name: str, label: str, seconds: float):
+        """
+        Record one timed call.
+
+        Args:
+            name (str): A histogram name from HISTOGRAMS.
+            label (str): The value of its label, such as the command.
+            seconds (float): The time the call took.
+        """
+        try:
+            histograms = self._local.histograms
+        except AttributeError:
+            histograms = self._shard().histograms
+        histogram = histograms.get((name, label))
+        if histogram is None:
+            histogram = histograms[(name, label)] = Histogram(len(self.buckets) + 1)
+        histogram.counts[bisect_left(self.buckets, seconds)] += 1
+        histogram.total += seconds
+
+    def count_error(self, command: str, error_type: str):
+        """
+        Count one failed command.
+
+        Args:
+            command (str): The command, or the history action, that failed.
+            error_type (str): The exception class name, such as 'ZeroDivisionError'.
+        """
+        errors = self._shard().errors
+        errors[(command, error_type)] = errors.get((command, error_type), 0) + 1
+
+    def reset(self):
+        """Forget every observation and error."""
+        with self._lock:
+            for shard in self._shards + [self._retired]:
+                shard.histograms.clear()
+                shard.errors.clear()
+
+    def snapshot(self) -> tuple:
+        """
+        Return the histograms and error counts added up over every thread.
+
+        A thread that is recording at the same time may have its latest call only
+        partly counted.
+
+        Returns:
+            tuple: {(name, label): (bucket counts, sum)} and {(command, error type): count}.
+        """
+        total = _Shard(None)
+        with self._lock:
+            self._fold_ended()
+            for shard in self._shards + [self._retired]:
+                _merge(total, dict(shard.histograms), dict(shard.errors))  # Copied in one step, as others add keys
+        return ({key: (histogram.counts, histogram.total) for key, histogram in total.histograms.items()},
+                total.errors)
+
+    def describe(self) -> str:
+        """
+        Summarize the commands in one line each for the REPL.
+
+        Percentiles are the upper bounds of the buckets that hold them.
+
+        Returns:
+            str: Calls, errors, mean and p50/p95/p99 latency per command and history action.
+        """
+        histograms, errors = self.snapshot()
+        failed = {}
+        for (command, _), count in errors.items():
+            failed[command] = failed.get(command, 0) + count
+        lines = []
+        for name, prefix in (("calculator_command_seconds", ""), ("calculator_history_seconds", "history ")):
+            for (histogram_name, label), (counts, total) in sorted(histograms.items()):
+                if histogram_name != name:
+                    continue
+                calls = sum(counts)
+                percentiles = ", ".join(f"p{q} <= {_format_seconds(_quantile(counts, self.buckets, q / 100))}"
+                                        for q in (50, 95, 99))
+                lines.append(f"{prefix}{label}: {calls} calls, {failed.get(label, 0)} errors, "
+                             f"mean {_format_seconds(total / calls)}, {percentiles}")
+        if not lines:
+            return "No commands measured yet."
+        by_type = ", ".join(f"{command} {error_type} {count}"
+                            for (command, error_type), count in sorted(errors.items()))
+        return "\n".join(lines + ([f"errors: {by_type}"] if errors else []))
+
+    def prometheus(self) -> str:
+        """
+        Return every metric in the Prometheus text exposition format.
+
+        Returns:
+            str: The histograms, a calculator_commands_total counter per command and
+            a calculator_errors_total counter per command and exception type.
+        """
+        histograms, errors = self.snapshot()
+        bounds = [_format_bound(bound) for bound in self.buckets] + ["+Inf"]
+        lines = []
+        for name, (label_name, help_text) in HISTOGRAMS.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+            for (histogram_name, label), (counts, total) in sorted(histograms.items()):
+                if histogram_name != name:
+                    continue
+                labels = f'{label_name}="{_escape(label)}"'
+                cumulative = 0
+                for bound, count in zip(bounds, counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines += [f"{name}_sum{{{labels}}} {total!r}", f"{name}_count{{{labels}}} {cumulative}"]
+        lines += ["# HELP calculator_commands_total Calculator commands executed.",
+                  "# TYPE calculator_commands_total counter"]
+        lines += [f'calculator_commands_total{{command="{_escape(label)}"}} {sum(counts)}'
+                  for (name, label), (counts, _) in sorted(histograms.items()) if name == "calculator_command_seconds"]
+        lines += ["# HELP calculator_errors_total Failed commands by exception type.",
+                  "# TYPE calculator_errors_total counter"]
+        lines += [f'calculator_errors_total{{command="{_escape(command)}",type="{_escape(error_type)}"}} {count}'
+                  for (command, error_type), count in sorted(errors.items())]
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        """
+        Write the Prometheus text format to a file, replacing it in one step.
+
+        Args:
+            path (str): The file, for example one read by the node exporter's textfile collector.
+        """
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as metrics_file:
+            metrics_file.write(self.prometheus())
+        os.replace(temporary_path, path)
+
+
+def _merge(target: _Shard, histograms: dict, errors: dict):
+    """Add histograms and error counts to a shard."""
+    for key, histogram in histograms.items():
+        merged = target.histograms.get(key)
+        if merged is None:
+            merged = target.histograms[key] = Histogram(len(histogram.counts))
+        merged.counts = [a + b for a, b in zip(merged.counts, histogram.counts)]
+        merged.total += histogram.total
+    for key, count in errors.items():
+        target.errors[key] = target.errors.get(key, 0) + count
+
+
+def _quantile(counts: list, bounds: tuple, q: float) -> float:
+    """Return the upper bound of the bucket that holds the q-th quantile, or inf for the unbounded bucket."""
+    rank = q * sum(counts)
+    seen = 0
+    for bound, count in zip(bounds, counts):
+        seen += count
+        if seen >= rank:
+            return bound
+    return float("inf")
+
+
+def _format_seconds(seconds: float) -> str:
+    """Return a latency in the most readable unit, such as '25 us' or '1.5 s'."""
+    if seconds == float("inf"):
+        return "inf"
+    for unit, scale in (("s", 1), ("ms", 1e-3)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3g} {unit}"
+    return f"{seconds / 1e-6:.3g} us"
+
+
+def _format_bound(bound: float) -> str:
+    """Return a bucket bound as Prometheus writes it, such as '0.005' or '1.0'."""
+    return repr(float(bound))
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the Prometheus text format."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# The metrics shared by every Calculator and History in the process
+METRICS = Metrics()
+
+
+class MetricsExporter:
+    """Background thread that writes the metrics to a Prometheus text file at a fixed interval."""
+
+    def __init__(self, metrics: Metrics, path: str, interval: float):
+        """
+        Initialize the exporter without starting it.
+
+        Args:
+            metrics (Metrics): The metrics to write.
+            path (str): The file to write.
+            interval (float): Seconds between writes.
+        """
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-export", daemon=True)
+
+    def start(self):
+        """Start writing in the background."""
+        self._thread.start()
+
+    def stop(self):
+        """Stop the thread and write the final values."""
+        self._stopped.set()
+        self._thread.join()
+        self.write()
+
+    def write(self):
+        """Write the file once, logging instead of raising if it cannot be written."""
+        try:
+            self.metrics.write_prometheus(self.path)
+        except OSError as e:
+            logger.error(f"Could not write metrics to {self.path}: {str(e)}")
+
+    def _run(self):
+        """Write the file every interval until stopped."""
+        while not self._stopped.wait(self.interval):
+            self.write()
+
+
+def start_metrics_export():
+    """Start writing METRICS to METRICS_FILE every METRICS_INTERVAL seconds (default 15).
+
+    Nothing is written when METRICS_FILE is not set. Calling it again while an
+    exporter is running returns the running exporter.
+
+    Returns:
+        MetricsExporter or None: The running exporter, if any.
+    """
+    global _exporter  # pylint: disable=global-statement
+    if _exporter is not None:
+        return _exporter
+    load_config()
+    path = os.getenv("METRICS_FILE", "")
+    if not path:
+        return None
+    interval = float(os.getenv("METRICS_INTERVAL", "15"))
+    if interval <= 0:
+        raise ValueError(f"METRICS_INTERVAL must be positive, not {interval:g}.")
+    _exporter = MetricsExporter(METRICS, path, interval)
+    _exporter.start()
+    logger.info("Writing metrics to %s every %g s.", path, interval)
+    return _exporter
+
+
+def stop_metrics_export():
+    """Stop the running exporter, if any, after writing the final values."""
+    global _exporter  # pylint: disable=global-statement
+    if _exporter is None:
+        return
+    _exporter.stop()
+    _exporter = None
+
+
+# Write the final values when the interpreter exits
+atexit.register(stop_metrics_export)
@@ -1,9 +1,17 @@
 from abc import ABC, abstractmethod
+from fractions import Fraction
 from typing import Union
+import numpy as np
+
+# Scalar operand types every operation accepts; ints and Fractions are kept exact
+NUMBER_TYPES = (int, float, Fraction)
 
 class Operation(ABC):
     """Abstract base class for a calculator with a general abstract calculate method."""
 
+    command = None  # The calculator command for the operation; by default the lowercased class name
+    arity = 2  # The number of operands the command takes
+
     def _validate_inputs(self, a: Union[int, float], b: Union[int, float]) -> None:
         """
         Validate input types for calculation.
@@ -13,10 +21,38 @@ class Operation(ABC):
             b (Union[int, float]): The second input.
 
         Raises:
-            TypeError: If either a or b is not a number (int or float).
+            TypeError: If either a or b is not a number (int, float or Fraction).
+        """
+        if not all(isinstance(arg, NUMBER_TYPES) for arg in (a, b)):
+            raise TypeError(f"Invalid types: a is {type(a).__name__}, b is {type(b).__name__}. "
+                            "Expected int, float or Fraction.")
+
+    def _validate_batch_inputs(self, a, b):
         """
-        if not all(isinstance(arg, (int, float)) for arg in (a, b)):
-            raise TypeError(f"Invalid types: a is {type(a).__name__}, b is {type(b).__name__}. Expected int or float.")
+        Validate and convert whole operand arrays for a batch calculation.
+
+        The check runs once per batch instead of once per operand pair.
+
+        Args:
+            a (array-like): The first operands.
+            b (array-like): The second operands, or a single number applied to every first operand.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Both operands as float64 arrays of the same shape.
+
+        Raises:
+            TypeError: If either array does not hold numbers.
+            ValueError: If the arrays cannot be paired element by element.
+        """
+        a = np.asarray(a)
+        b = np.asarray(b)
+        if a.dtype.kind not in "biuf" or b.dtype.kind not in "biuf":
+            raise TypeError(f"Invalid types: a is {a.dtype}, b is {b.dtype}. Expected numeric arrays.")
+        try:
+            a, b = np.broadcast_arrays(a.astype(np.float64, copy=False), b.astype(np.float64, copy=False))
+        except ValueError as e:
+            raise ValueError(f"Operand arrays have mismatched shapes {a.shape} and {b.shape}.") from e
+        return a, b
 
     @abstractmethod
     def calculate(self, a: Union[int, float], b: Union[int, float]) -> float:
@@ -32,3 +68,18 @@ class Operation(ABC):
             float: The result of the calculation.
         """
         pass  # pragma: no cover
+
+    @abstractmethod
+    def calculate_batch(self, a, b) -> np.ndarray:
+        """
+        Abstract method to perform the calculation on whole arrays of operands.
+        Subclasses must implement this method with a NumPy kernel.
+
+        Args:
+            a (array-like): The first numbers.
+            b (array-like): The second numbers.
+
+        Returns:
+            np.ndarray: The float64 results. Entries without a defined result are NaN.
+        """
+        pass  # pragma: no cover
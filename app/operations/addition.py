@@ -2,10 +2,13 @@
 
 from app.operations import Operation
 from typing import Union
+import numpy as np
 
 class Addition(Operation):
     """Class to perform addition of two numbers."""
 
+    command = "add"
+
     def calculate(self, a: Union[int, float], b: Union[int, float]) -> float:
         """
         Add two numbers.
@@ -19,3 +22,17 @@ class Addition(Operation):
         """
         self._validate_inputs(a, b)  # Validate inputs
         return a + b
+
+    def calculate_batch(self, a, b) -> np.ndarray:
+        """
+        Add two arrays of numbers element by element.
+
+        Args:
+            a (array-like): The first numbers.
+            b (array-like): The second numbers.
+
+        Returns:
+            np.ndarray: The element-wise sums.
+        """
+        a, b = self._validate_batch_inputs(a, b)  # Validate the whole batch once
+        return a + b
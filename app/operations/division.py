@@ -2,10 +2,13 @@
 
 from app.operations import Operation
 from typing import Union
+import numpy as np
 
 class Division(Operation):
     """Class to perform division of two numbers."""
 
+    command = "divide"
+
     def calculate(self, a: Union[int, float], b: Union[int, float]) -> float:
         """
         Divide the first number by the second.
@@ -24,3 +27,20 @@ class Division(Operation):
         if b == 0:
             raise ValueError("Cannot divide by zero")
         return a / b
+
+    def calculate_batch(self, a, b) -> np.ndarray:
+        """
+        Divide an array of numerators by an array of denominators element by element.
+
+        Args:
+            a (array-like): The numerators.
+            b (array-like): The denominators.
+
+        Returns:
+            np.ndarray: The element-wise quotients. Entries with a zero denominator are NaN
+            instead of raising.
+        """
+        a, b = self._validate_batch_inputs(a, b)  # Validate the whole batch once
+        result = np.full(a.shape, np.nan)
+        np.divide(a, b, out=result, where=b != 0)  # Mask out the zero denominators
+        return result
@@ -1,12 +1,28 @@
 # app/operations/modulus.py
 
-class Modulus:
+from app.operations import NUMBER_TYPES, Operation
+import numpy as np
+
+class Modulus(Operation):
     """Class for the modulus operation (remainder of division)."""
+
+    command = "modulus"
     
     def calculate(self, a, b):
         """Calculate the modulus of a divided by b (a % b)."""
-        if not isinstance(a, (int, float)) or not isinstance(b, (int, float)):
+        if not isinstance(a, NUMBER_TYPES) or not isinstance(b, NUMBER_TYPES):
             raise TypeError("Both operands must be numbers.")
         if b == 0:
             raise ValueError("Cannot divide by zero.")
         return a % b
+
+    def calculate_batch(self, a, b) -> np.ndarray:
+        """
+        Calculate a % b element by element, with the sign of the divisor like Python's %.
+
+        Entries with a zero divisor are NaN instead of raising.
+        """
+        a, b = self._validate_batch_inputs(a, b)  # Validate the whole batch once
+        result = np.full(a.shape, np.nan)
+        np.mod(a, b, out=result, where=b != 0)  # Mask out the zero divisors
+        return result
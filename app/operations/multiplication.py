@@ -2,10 +2,13 @@
 
 from app.operations import Operation
 from typing import Union
+import numpy as np
 
 class Multiplication(Operation):
     """Class to perform multiplication of two numbers."""
 
+    command = "multiply"
+
     def calculate(self, a: Union[int, float], b: Union[int, float]) -> float:
         """
         Multiply two numbers.
@@ -19,3 +22,17 @@ class Multiplication(Operation):
         """
         self._validate_inputs(a, b)  # Validate inputs
         return a * b
+
+    def calculate_batch(self, a, b) -> np.ndarray:
+        """
+        Multiply two arrays of numbers element by element.
+
+        Args:
+            a (array-like): The first numbers.
+            b (array-like): The second numbers.
+
+        Returns:
+            np.ndarray: The element-wise products.
+        """
+        a, b = self._validate_batch_inputs(a, b)  # Validate the whole batch once
+        return a * b
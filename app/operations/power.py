@@ -1,10 +1,125 @@
 # app/operations/power.py
 
-class Power:
+import logging
+import math
+import operator
+import os
+from fractions import Fraction
+from app.operations import NUMBER_TYPES, Operation
+import numpy as np
+
+# Initialize the logger for this module
+logger = logging.getLogger(__name__)
+
+
+def result_bits(a, b: int) -> float:
+    """
+    Estimate the number of bits in the exact result of a ** b for an int exponent.
+
+    Args:
+        a (int or Fraction): The base.
+        b (int): The exponent.
+
+    Returns:
+        float: About |b| * log2(|a|), using the larger of the numerator and
+        denominator of a Fraction; 0 when |a| is 0 or 1.
+    """
+    if type(a) is Fraction:
+        a = max(abs(a.numerator), a.denominator)
+    a = abs(a)
+    return abs(b) * math.log2(a) if a > 1 else 0.0
+
+
+class PowerLimits:
+    """Result sizes at which Power moves a calculation to a worker process or refuses it, and the worker's limits."""
+
+    __slots__ = ("inline_bits", "max_bits", "timeout", "memory_bytes")
+
+    def __init__(self, inline_bits: int = 1_000_000, max_bits: int = 100_000_000, timeout: float = 5.0,
+                 memory_bytes: int = 256 * 2 ** 20):
+        """
+        Initialize the limits.
+
+        Args:
+            inline_bits (int): Exact results up to this many bits are calculated in the calling thread.
+            max_bits (int): Exact results over this many bits are refused without calculating.
+            timeout (float): Seconds a worker process may take before it is stopped.
+            memory_bytes (int): Memory a worker process may allocate, 0 for no limit.
+        """
+        self.inline_bits = inline_bits
+        self.max_bits = max_bits
+        self.timeout = timeout
+        self.memory_bytes = memory_bytes
+
+    @classmethod
+    def from_environment(cls) -> "PowerLimits":
+        """Read the limits from POWER_INLINE_BITS, POWER_MAX_BITS, POWER_TIMEOUT (seconds) and POWER_MEMORY_MB."""
+        from app.config import load_config  # pylint: disable=import-outside-toplevel  # Only for a large exponent
+        load_config()
+        return cls(int(os.getenv("POWER_INLINE_BITS", "1000000")), int(os.getenv("POWER_MAX_BITS", "100000000")),
+                   float(os.getenv("POWER_TIMEOUT", "5")), int(float(os.getenv("POWER_MEMORY_MB", "256")) * 2 ** 20))
+
+
+class Power(Operation):
     """Class for the power operation (exponentiation)."""
-    
+
+    command = "power"
+
+    def __init__(self, limits: PowerLimits = None):
+        """
+        Initialize the operation.
+
+        Args:
+            limits (PowerLimits, optional): The cost limits. By default they are read
+                from the environment the first time an exponent is large.
+        """
+        self.limits = limits
+
     def calculate(self, a, b):
-        """Calculate a raised to the power of b (a^b)."""
-        if not isinstance(a, (int, float)) or not isinstance(b, (int, float)):
+        """
+        Calculate a raised to the power of b (a^b).
+
+        An exact result that would be very large is estimated from the sizes of a and b
+        first: a moderately large one is calculated in a worker process with a time and
+        memory limit, and a huge one is refused. Every exact base with a whole exponent is
+        estimated, since a large base grows past the limits even with a small exponent.
+
+        Raises:
+            TypeError: If either operand is not a number.
+            ValueError: If the result would have more bits than the limit.
+            TimeoutError, MemoryError: If a worker process ran out of time or memory.
+        """
+        if not isinstance(a, NUMBER_TYPES) or not isinstance(b, NUMBER_TYPES):
             raise TypeError("Both operands must be numbers.")
+        # A whole Fraction exponent, such as 3000000/1, gives an exact result like an int one
+        exponent = b.numerator if type(b) is Fraction and b.denominator == 1 else b
+        # An int to a negative int power is a float, so it cannot grow past the limits
+        if type(exponent) is int and type(a) is not float and not (type(a) is type(b) is int and b < 0):
+            limits = self.limits or self._load_limits()
+            bits = result_bits(a, exponent)
+            if bits > limits.max_bits:
+                raise ValueError(f"The result would have about {bits:.3g} bits, more than the limit of "
+                                 f"{limits.max_bits}.")
+            if bits > limits.inline_bits:
+                logger.info("Calculating a power of about %.3g bits in a worker process.", bits)
+                from app.worker import run_isolated  # pylint: disable=import-outside-toplevel  # Rarely needed
+                return run_isolated(operator.pow, (a, b), limits.timeout, limits.memory_bytes)
         return a ** b
+
+    def _load_limits(self) -> PowerLimits:
+        """Read the limits from the environment once."""
+        self.limits = PowerLimits.from_environment()
+        return self.limits
+
+    def calculate_batch(self, a, b) -> np.ndarray:
+        """
+        Raise each number in a to the matching power in b.
+
+        Entries that have no real result (zero to a negative power, or a negative
+        base with a fractional exponent) are NaN instead of raising.
+        """
+        a, b = self._validate_batch_inputs(a, b)  # Validate the whole batch once
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            result = np.power(a, b)
+        result[(a == 0) & (b < 0)] = np.nan  # Python raises ZeroDivisionError here
+        return result
@@ -0,0 +1,85 @@
+# app/operations/powmod.py
+
+from fractions import Fraction
+from app.operations import NUMBER_TYPES, Operation
+import numpy as np
+
+
+def _is_whole(value) -> bool:
+    """Return True if a number has no fractional part."""
+    if isinstance(value, float):
+        return value.is_integer()
+    if isinstance(value, Fraction):
+        return value.denominator == 1
+    return True
+
+
+class PowMod(Operation):
+    """Class for modular exponentiation, (a ^ b) mod m, without building a ^ b."""
+
+    command = "powmod"
+    arity = 3
+
+    def calculate(self, a, b, m=None):
+        """
+        Calculate a raised to the power of b, modulo m, with Python's three-argument pow.
+
+        The work grows with the number of bits in b rather than with the size of a ^ b,
+        so exponents of thousands of bits take microseconds. Whole-number floats and
+        Fractions are converted to int first, so the result is always an exact int.
+        A negative exponent gives the power of the modular inverse of a.
+
+        Args:
+            a (int): The base.
+            b (int): The exponent.
+            m (int): The modulus.
+
+        Returns:
+            int: (a ^ b) mod m, with the sign of m like Python's %.
+
+        Raises:
+            TypeError: If an operand is missing or not a number.
+            ValueError: If an operand is not a whole number, m is zero, or b is negative
+                and a has no inverse modulo m.
+        """
+        if m is None:
+            raise TypeError("powmod takes three operands.")
+        if not all(isinstance(arg, NUMBER_TYPES) for arg in (a, b, m)):
+            raise TypeError("All operands must be numbers.")
+        if not all(_is_whole(arg) for arg in (a, b, m)):
+            raise ValueError("powmod needs whole numbers.")
+        if m == 0:
+            raise ValueError("Cannot divide by zero.")
+        try:
+            return pow(int(a), int(b), int(m))
+        except ValueError as e:
+            raise ValueError(f"{a} has no inverse modulo {m}.") from e
+
+    def calculate_batch(self, a, b, m=None) -> np.ndarray:
+        """
+        Calculate (a ^ b) mod m element by element.
+
+        Rows are reduced with Python's pow one at a time on exact ints, since the
+        intermediate products of a modular square-and-multiply do not fit in float64.
+        Entries that have no result (a fractional operand, a zero modulus or an
+        inverse that does not exist) are NaN instead of raising.
+
+        Raises:
+            TypeError: If the moduli are missing or an array does not hold numbers.
+        """
+        if m is None:
+            raise TypeError("powmod takes three operands.")
+        a, b = self._validate_batch_inputs(a, b)  # Validate the whole batch once
+        m, _ = self._validate_batch_inputs(m, 0)
+        try:
+            a, b, m = np.broadcast_arrays(a, b, m)
+        except ValueError as e:
+            raise ValueError(f"Operand arrays have mismatched shapes {a.shape} and {m.shape}.") from e
+        result = np.full(a.shape, np.nan)
+        usable = (m != 0) & np.all([np.isfinite(x) & (x == np.floor(x)) for x in (a, b, m)], axis=0)
+        for index in np.flatnonzero(usable):
+            try:
+                result.flat[index] = pow(int(a.flat[index]), int(b.flat[index]), int(m.flat[index]))
+            except ValueError:  # No inverse for a negative exponent
+                pass
+        return result
@@ -0,0 +1,182 @@
+# app/operations/registry.py
+
+import importlib
+import logging
+import pkgutil
+import threading
+import app.operations
+from app.operations import Operation
+
+# Initialize the logger for this module
+logger = logging.getLogger(__name__)
+
+# Installed distributions add operations by declaring entry points in this group, e.g.
+#   [project.entry-points."calculator.operations"]
+#   hypot = "calc_geometry.operations:Hypotenuse"
+# The entry point name is the command and the object is an Operation subclass.
+ENTRY_POINT_GROUP = "calculator.operations"
+
+
+class OperationTable(dict):
+    """
+    A dict of operation singletons that loads a plugin operation the first time its key is used.
+
+    Loaded operations are ordinary dict entries, so looking them up costs the same as
+    in a plain dict. Only a key that is not loaded yet goes through the registry.
+    """
+
+    def __init__(self, registry: "OperationRegistry", key: str):
+        """
+        Initialize an empty table.
+
+        Args:
+            registry (OperationRegistry): The registry that loads missing operations.
+            key (str): 'command' to key operations by command, or 'class_name' to key
+                them by class name, the form used in saved history files.
+        """
+        super().__init__()
+        self._registry = registry
+        self._key = key
+
+    def __missing__(self, key):
+        """Load a registered plugin operation, or raise KeyError if the key is unknown."""
+        operation = self._registry.load(key, self._key)
+        if operation is None:
+            raise KeyError(key)
+        return operation
+
+    def __contains__(self, key) -> bool:
+        """Return True if the key is loaded or registered, without loading it."""
+        return dict.__contains__(self, key) or self._registry.is_registered(key, self._key)
+
+    def get(self, key, default=None):
+        """Return the operation for a key, loading it if needed, or the default if the key is unknown."""
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def names(self) -> list:
+        """Return every key, including those of plugin operations not loaded yet."""
+        return self._registry.names(self._key)
+
+
+class OperationRegistry:
+    """
+    The one table of operations, shared by the calculator, expressions, batches and the history loaders.
+
+    Built-in operations are found by importing each module of the app.operations
+    package once. Plugin operations are found through entry points the first time a
+    name is not among the built-ins, and a plugin module is imported only when its
+    operation is first used.
+    """
+
+    def __init__(self, group: str = ENTRY_POINT_GROUP):
+        """
+        Initialize an empty registry.
+
+        Args:
+            group (str): The entry point group to search for plugin operations.
+        """
+        self.group = group
+        self.by_command = OperationTable(self, "command")
+        self.by_class_name = OperationTable(self, "class_name")
+        self._pending = None  # Command -> entry point of plugins not loaded yet, once searched
+        self._pending_classes = {}  # Class name -> command of plugins not loaded yet
+        self._lock = threading.Lock()
+
+    def register(self, operation: Operation, command: str = None):
+        """
+        Add an operation singleton under its command and class name.
+
+        Args:
+            operation (Operation): The operation.
+            command (str, optional): The command; by default the class's command attribute.
+        """
+        command = command or type(operation).command or type(operation).__name__.lower()
+        dict.__setitem__(self.by_command, command, operation)
+        dict.__setitem__(self.by_class_name, type(operation).__name__, operation)
+
+    def discover_builtins(self, package=app.operations):
+        """Import every module of a package and register the Operation subclasses defined there."""
+        for module_info in pkgutil.iter_modules(package.__path__):
+            if module_info.name == "registry":
+                continue
+            module = importlib.import_module(f"{package.__name__}.{module_info.name}")
+            for cls in vars(module).values():
+                if (isinstance(cls, type) and issubclass(cls, Operation) and cls.__module__ == module.__name__
+                        and not cls.__abstractmethods__):
+                    self.register(cls())
+
+    def _plugins(self) -> dict:
+        """Search the entry points once and return the plugin operations not loaded yet."""
+        if self._pending is None:
+            from importlib.metadata import entry_points  # pylint: disable=import-outside-toplevel  # Only on a miss
+            self._pending = {}
+            for entry_point in entry_points(group=self.group):
+                if dict.__contains__(self.by_command, entry_point.name):
+                    logger.warning("Plugin operation %s is already registered; ignoring %s.",
+                                   entry_point.name, entry_point.value)
+                    continue
+                self._pending[entry_point.name] = entry_point
+                self._pending_classes[entry_point.attr] = entry_point.name
+        return self._pending
+
+    def _pending_keys(self, kind: str) -> dict:
+        """Return the plugin operations not loaded yet, keyed by 'command' or by 'class_name'."""
+        plugins = self._plugins()
+        return plugins if kind == "command" else self._pending_classes
+
+    def is_registered(self, key: str, kind: str) -> bool:
+        """Return True if a plugin operation not loaded yet is registered under the key."""
+        with self._lock:
+            return key in self._pending_keys(kind)
+
+    def names(self, kind: str) -> list:
+        """Return the keys of every operation, loaded or not, for 'command' or 'class_name'."""
+        with self._lock:
+            table = self.by_command if kind == "command" else self.by_class_name
+            return list(dict.keys(table)) + list(self._pending_keys(kind))
+
+    def load(self, key: str, kind: str):
+        """
+        Import and register the plugin operation with a command or class name.
+
+        Args:
+            key (str): The command or class name.
+            kind (str): 'command' or 'class_name'.
+
+        Returns:
+            Operation or None: The operation, or None if nothing usable is registered under the key.
+        """
+        with self._lock:
+            loaded = dict.get(self.by_command if kind == "command" else self.by_class_name, key)
+            if loaded is not None:  # Another thread loaded it while this one waited
+                return loaded
+            plugins = self._plugins()
+            command = key if kind == "command" else self._pending_classes.get(key)
+            entry_point = plugins.pop(command, None)
+            if entry_point is None:
+                return None
+            self._pending_classes.pop(entry_point.attr, None)
+            try:
+                cls = entry_point.load()
+                if not (isinstance(cls, type) and issubclass(cls, Operation)):
+                    raise TypeError(f"{entry_point.value} is not an Operation subclass")
+                operation = cls()
+            except Exception as e:  # A broken plugin must not stop the calculator
+                logger.error(f"Could not load plugin operation {command}: {str(e)}")
+                return None
+            self.register(operation, command)
+            logger.info("Loaded plugin operation %s from %s.", command, entry_point.value)
+            return operation
+
+
+REGISTRY = OperationRegistry()
+REGISTRY.discover_builtins()
+
+# Operations hold no per-calculation state, so one shared instance of each serves every Calculator and History
+OPERATIONS = REGISTRY.by_command
+
+# The same singletons keyed by class name, the form used in saved history files
+OPERATIONS_BY_NAME = REGISTRY.by_class_name
@@ -2,10 +2,13 @@
 
 from app.operations import Operation
 from typing import Union
+import numpy as np
 
 class Subtraction(Operation):
     """Class to perform subtraction of two numbers."""
 
+    command = "subtract"
+
     def calculate(self, a: Union[int, float], b: Union[int, float]) -> float:
         """
         Subtract the second number from the first.
@@ -19,3 +22,17 @@ class Subtraction(Operation):
         """
         self._validate_inputs(a, b)  # Validate inputs
         return a - b
+
+    def calculate_batch(self, a, b) -> np.ndarray:
+        """
+        Subtract the second array of numbers from the first, element by element.
+
+        Args:
+            a (array-like): The first numbers.
+            b (array-like): The second numbers.
+
+        Returns:
+            np.ndarray: The element-wise differences.
+        """
+        a, b = self._validate_batch_inputs(a, b)  # Validate the whole batch once
+        return a - b
@@ -0,0 +1,214 @@
+# app/profiling/__init__.py
+
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from app.config import env_flag, load_config
+from app.metrics import METRICS
+
+# Initialize the logger for this module
+logger = logging.getLogger(__name__)
+
+# Tags every file written by this process, so the dumps of one session sort together
+_session = None
+
+
+def session_tag() -> str:
+    """Return the tag of this process's session: its start time and process id, such as 20260101-120000-4242."""
+    global _session  # pylint: disable=global-statement
+    if _session is None:
+        _session = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+    return _session
+
+
+def _command_count() -> int:
+    """Return the number of commands METRICS has measured in this process."""
+    histograms, _ = METRICS.snapshot()
+    return sum(sum(counts) for (name, _), (counts, _) in histograms.items() if name == "calculator_command_seconds")
+
+
+class Capture(ABC):
+    """
+    Base class for a profiler that can be started and stopped while the calculator runs.
+
+    Nothing is hooked in while a capture is stopped, so commands run exactly as they
+    would without it. Each stop writes one file named after the session, the capture
+    number and the number of commands it covered.
+    """
+
+    kind = ""  # Names the capture in messages and file names
+    suffix = ""  # File extension of the dumps
+
+    def __init__(self, directory: str = None):
+        """
+        Initialize a stopped capture.
+
+        Args:
+            directory (str, optional): Where dumps are written. By default PROFILE_DIR,
+                or 'profiles' if that is not set.
+        """
+        self.directory = directory
+        self.active = False
+        self.captures = 0  # Dumps written so far
+        self._started_at = 0  # Command count when started
+
+    def start(self) -> str:
+        """
+        Start capturing.
+
+        Returns:
+            str: A confirmation, or an error message if it is already running or cannot start.
+        """
+        if self.active:
+            return f"Error: {self.kind.capitalize()} is already running."
+        try:
+            self._begin()
+        except RuntimeError as e:
+            logger.error(f"Could not start {self.kind}: {str(e)}")
+            return f"Error: {str(e)}"
+        self._started_at = _command_count()
+        self.active = True
+        logger.info("%s started.", self.kind.capitalize())
+        return f"{self.kind.capitalize()} started."
+
+    def stop(self) -> str:
+        """
+        Stop capturing and write the dump.
+
+        Returns:
+            str: The file written, or an error message if it is not running.
+        """
+        if not self.active:
+            return f"Error: {self.kind.capitalize()} is not running."
+        self.active = False
+        commands = max(_command_count() - self._started_at, 0)  # The start command counts; this one does not
+        self.captures += 1
+        directory = self.directory or _directory()
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{session_tag()}-{self.kind.replace(' ', '-')}-{self.captures}-"
+                                       f"{commands}-commands{self.suffix}")
+        self._end(path, commands)
+        logger.info("%s of %d commands written to %s.", self.kind.capitalize(), commands, path)
+        return f"{self.kind.capitalize()} of {commands} commands written to {path}."
+
+    def status(self) -> str:
+        """Return whether the capture is running and how many commands it has covered."""
+        if not self.active:
+            return f"{self.kind.capitalize()} is off."
+        return f"{self.kind.capitalize()} is running ({_command_count() - self._started_at} commands so far)."
+
+    @abstractmethod
+    def _begin(self):
+        """Hook the capture in, or raise RuntimeError if it cannot be."""
+        pass  # pragma: no cover
+
+    @abstractmethod
+    def _end(self, path: str, commands: int):
+        """Unhook the capture and write it to path."""
+        pass  # pragma: no cover
+
+
+class CommandProfiler(Capture):
+    """
+    cProfile for the calculator while it runs, dumped as a .prof file for pstats or snakeviz.
+
+    The profiler covers the thread that starts it, which for the prompt and streaming
+    modes is the thread that runs the command loop and every execute_command.
+    """
+
+    kind = "profiling"
+    suffix = ".prof"
+
+    def __init__(self, directory: str = None):
+        """Initialize a stopped profiler writing to directory, as for Capture."""
+        super().__init__(directory)
+        self._profile = None
+
+    def _begin(self):
+        """Enable a new cProfile profiler."""
+        import cProfile  # pylint: disable=import-outside-toplevel  # Loaded only when profiling starts
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+
+    def _end(self, path: str, commands: int):
+        """Disable the profiler and write its statistics."""
+        self._profile.disable()
+        self._profile.dump_stats(path)
+        self._profile = None
+
+
+class AllocationTracer(Capture):
+    """
+    tracemalloc for the calculator while it runs, dumped as a report of the top allocation sites.
+
+    The report lists the source lines that hold the most memory allocated since the
+    tracer started and not yet freed, with the current and peak traced sizes.
+    """
+
+    kind = "allocation tracing"
+    suffix = ".txt"
+
+    def __init__(self, directory: str = None, top: int = None):
+        """
+        Initialize a stopped tracer.
+
+        Args:
+            directory (str, optional): Where reports are written, as for Capture.
+            top (int, optional): Allocation sites listed in each report. By default
+                TRACE_MEM_TOP, or 20 if that is not set.
+        """
+        super().__init__(directory)
+        self.top = top
+
+    def _begin(self):
+        """Start tracemalloc, unless something else in the process is already using it."""
+        import tracemalloc  # pylint: disable=import-outside-toplevel  # Loaded only when tracing starts
+        if tracemalloc.is_tracing():
+            raise RuntimeError("tracemalloc is already tracing in this process.")
+        tracemalloc.start()
+
+    def _end(self, path: str, commands: int):
+        """Take a snapshot, stop tracemalloc and write the top allocation sites."""
+        import tracemalloc  # pylint: disable=import-outside-toplevel
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__),
+                                           tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                                           tracemalloc.Filter(False, "<unknown>")])
+        top = self.top or int(os.getenv("TRACE_MEM_TOP", "20"))
+        lines = [f"# Session {session_tag()}, allocation trace {self.captures}, {commands} commands",
+                 f"# Traced memory: {current / 1024:.1f} KiB now, {peak / 1024:.1f} KiB at peak",
+                 f"# Top {top} allocation sites still holding memory:"]
+        for rank, stat in enumerate(snapshot.statistics("lineno")[:top], 1):
+            frame = stat.traceback[0]
+            lines.append(f"{rank}. {frame.filename}:{frame.lineno}: {stat.size / 1024:.1f} KiB in {stat.count} blocks")
+        with open(path, "w", encoding="utf-8") as report:
+            report.write("\n".join(lines) + "\n")
+
+
+def _directory() -> str:
+    """Return the dump directory from PROFILE_DIR (default 'profiles')."""
+    load_config()
+    return os.getenv("PROFILE_DIR", "profiles")
+
+
+# The captures shared by every Calculator in the process
+PROFILER = CommandProfiler()
+ALLOCATION_TRACER = AllocationTracer()
+
+
+def start_from_environment():
+    """Start profiling when PROFILE is true and allocation tracing when TRACE_MEM is true."""
+    load_config()
+    for capture, name in ((PROFILER, "PROFILE"), (ALLOCATION_TRACER, "TRACE_MEM")):
+        if env_flag(name) and not capture.active:
+            capture.start()
+
+
+def stop_all():
+    """Stop every running capture and write its dump."""
+    for capture in (PROFILER, ALLOCATION_TRACER):
+        if capture.active:
+            capture.stop()
@@ -0,0 +1,205 @@
+# app/server/__init__.py
+
+import asyncio
+import logging
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from fractions import Fraction
+from app.cache import ResultCache
+from app.calculation import format_result
+from app.calculator import Calculator, default_cache
+from app.history import History
+
+# Initialize the logger for this module
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONNECTIONS = 1024
+MAX_LINE_BYTES = 64 * 1024
+LISTEN_BACKLOG = 4096  # Connections the kernel queues before accept; capped by net.core.somaxconn
+COMMAND_THREADS = 32  # Commands running at once, so a slow power in one session does not hold up the others
+# Commands whose cost is bounded by the line length, run on the event loop to skip the thread hop
+INLINE_COMMANDS = frozenset(('add', 'subtract', 'multiply', 'divide', 'modulus'))
+GOODBYE = "Exiting the calculator. Goodbye!"
+
+
+def format_reply(output) -> str:
+    """
+    Format one calculator output as a single newline-terminated reply line.
+
+    Lists, such as the history, are joined with "; " and embedded newlines, such as
+    in the help text, are escaped as "\\n", so every request gets exactly one line.
+
+    Args:
+        output: The output of Calculator.execute_command.
+
+    Returns:
+        str: The reply line.
+    """
+    if isinstance(output, Sequence) and not isinstance(output, str):
+        output = "; ".join(map(str, output))
+    elif isinstance(output, (int, Fraction)):
+        output = format_result(output)
+    return str(output).replace("\n", "\\n") + "\n"
+
+
+class CalculatorServer:
+    """Line-protocol calculator server with one session per connection.
+
+    Each session has its own history, kept in memory only, so one client never sees,
+    undoes or overwrites another's calculations; save and load reply with an error.
+    Sessions share the operations and the result cache.
+
+    Commands run on a thread pool, so one that takes long or waits, such as a large
+    power in a worker process, does not delay the replies to other connections. Only
+    the basic arithmetic commands, which are quick for any operands that fit in a
+    line, run directly on the event loop.
+    """
+
+    def __init__(self, max_connections: int = DEFAULT_MAX_CONNECTIONS, cache: ResultCache = None):
+        """
+        Initialize the server.
+
+        Args:
+            max_connections (int): Connections served at once. Further connections are
+                accepted but wait, unread, until a session ends.
+            cache (ResultCache, optional): The result cache shared by every session. By
+                default one is built by default_cache.
+
+        Raises:
+            ValueError: If max_connections is less than 1.
+        """
+        if max_connections < 1:
+            raise ValueError("max_connections must be at least 1.")
+        self.max_connections = max_connections
+        self.cache = cache if cache is not None else default_cache()
+        self.active = 0
+        self.served = 0
+        self._slots = None
+        self._server = None
+        self._sessions = set()  # Tasks serving a connection, cancelled by close
+        self._executor = ThreadPoolExecutor(COMMAND_THREADS, thread_name_prefix="calculator-command")
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Serve one connection: read command lines and write one reply line for each.
+
+        Replies are written in request order as each command completes, so a client may
+        pipeline any number of commands without waiting. The reply buffer is drained
+        before the next line is read, so a client that stops reading is not buffered
+        without bound.
+
+        Args:
+            reader (asyncio.StreamReader): The connection input.
+            writer (asyncio.StreamWriter): The connection output.
+        """
+        session = asyncio.current_task()
+        self._sessions.add(session)
+        try:
+            async with self._slots:
+                self.active += 1
+                calculator = Calculator(cache=self.cache, history=History(persistent=False))
+                try:
+                    await self._serve(calculator, reader, writer)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    logger.debug("Client disconnected.")
+                finally:
+                    self.active -= 1
+                    self.served += 1
+        except asyncio.CancelledError:  # Ended by close; asyncio logs a traceback for a cancelled session task
+            logger.debug("Session closed by server shutdown.")
+        finally:
+            self._sessions.discard(session)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:  # pragma: no cover - depends on how the peer went away
+                pass
+
+    async def _serve(self, calculator: Calculator, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Run the request loop of one session until exit, end of input or an oversized line."""
+        while True:
+            try:
+                line = await reader.readline()
+            except ValueError:  # The line is longer than the stream limit
+                writer.write(format_reply("Error: Line too long.").encode("utf-8"))
+                await writer.drain()
+                return
+            if not line:
+                return
+            text = line.decode("utf-8", errors="replace").strip()
+            if not text or text.startswith("#"):
+                continue
+            if text.split()[0].lower() in ['exit', 'quit']:
+                writer.write(format_reply(GOODBYE).encode("utf-8"))
+                await writer.drain()
+                return
+            if text.split()[0] in INLINE_COMMANDS:
+                output = calculator.execute_line(text)
+            else:
+                output = await asyncio.get_running_loop().run_in_executor(self._executor, calculator.execute_line,
+                                                                          text)
+            writer.write(format_reply(output).encode("utf-8"))
+            await writer.drain()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0, path: str = None):
+        """
+        Start listening on a TCP port or, if a path is given, a Unix socket.
+
+        Args:
+            host (str): The TCP host to bind.
+            port (int): The TCP port to bind; 0 picks a free port.
+            path (str, optional): A Unix socket path to listen on instead of TCP.
+
+        Returns:
+            asyncio.AbstractServer: The listening server.
+        """
+        self._slots = asyncio.Semaphore(self.max_connections)
+        if path:
+            self._server = await asyncio.start_unix_server(self.handle, path=path, limit=MAX_LINE_BYTES,
+                                                           backlog=LISTEN_BACKLOG)
+        else:
+            self._server = await asyncio.start_server(self.handle, host, port, limit=MAX_LINE_BYTES,
+                                                      backlog=LISTEN_BACKLOG)
+        logger.info("Calculator server listening on %s.", self.address)
+        return self._server
+
+    @property
+    def address(self):
+        """Return the bound (host, port) pair, or the socket path, of the first listening socket."""
+        return self._server.sockets[0].getsockname()
+
+    async def serve_forever(self):
+        """Serve connections until cancelled."""
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        """Stop listening, end every open session, wait for the sockets to close and release the command threads."""
+        self._server.close()
+        for session in self._sessions:
+            session.cancel()
+        await asyncio.gather(*self._sessions, return_exceptions=True)
+        await self._server.wait_closed()
+        self._executor.shutdown(wait=False)
+
+
+def run_server(host: str = "127.0.0.1", port: int = 7878, path: str = None,
+               max_connections: int = DEFAULT_MAX_CONNECTIONS):  # pragma: no cover - runs until interrupted
+    """
+    Run a calculator server until interrupted.
+
+    Args:
+        host (str): The TCP host to bind.
+        port (int): The TCP port to bind.
+        path (str, optional): A Unix socket path to listen on instead of TCP.
+        max_connections (int): Connections served at once.
+    """
+    async def serve():
+        server = CalculatorServer(max_connections)
+        await server.start(host, port, path)
+        await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        logger.info("Calculator server stopped.")
@@ -0,0 +1,149 @@
+# app/server/loadtest.py
+
+import argparse
+import asyncio
+import logging
+import math
+import time
+from typing import Dict, List
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+# Initialize the logger for this module
+logger = logging.getLogger(__name__)
+
+
+def raise_open_file_limit(needed: int) -> int:
+    """
+    Raise the soft limit on open files towards the hard limit so that many connections can be opened.
+
+    Args:
+        needed (int): The number of file descriptors wanted.
+
+    Returns:
+        int: The soft limit now in effect, or 0 if it cannot be read on this platform.
+    """
+    if resource is None:  # pragma: no cover - not available on Windows
+        return 0
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft != resource.RLIM_INFINITY and soft < needed:
+        soft = needed if hard == resource.RLIM_INFINITY else min(needed, hard)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+    return soft
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Return the nearest-rank percentile of already sorted values, or 0.0 if there are none."""
+    if not sorted_values:
+        return 0.0
+    rank = min(max(1, math.ceil(fraction * len(sorted_values))), len(sorted_values))
+    return sorted_values[rank - 1]
+
+
+async def _client(open_connection, requests: int, pipeline_depth: int, latencies: List[float], errors: List[str]):
+    """Send requests on one connection, keeping up to pipeline_depth in flight, and time each reply."""
+    try:
+        reader, writer = await open_connection()
+    except OSError as e:
+        errors.append(f"Could not connect: {str(e)}")
+        return
+    sent_at = []
+    try:
+        sent = received = 0
+        while received < requests:
+            while sent < requests and sent - received < pipeline_depth:
+                writer.write(f"add {sent} {received}\n".encode("utf-8"))
+                sent_at.append(time.perf_counter())
+                sent += 1
+            await writer.drain()
+            reply = await reader.readline()
+            if not reply:
+                errors.append("Connection closed early.")
+                return
+            latencies.append(time.perf_counter() - sent_at[received])
+            if reply.startswith(b"Error"):
+                errors.append(reply.decode("utf-8").strip())
+            received += 1
+    except OSError as e:
+        errors.append(f"Connection failed: {str(e)}")
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:  # pragma: no cover - depends on how the server went away
+            pass
+
+
+async def load_test(host: str = "127.0.0.1", port: int = 7878, path: str = None, connections: int = 1000,
+                    requests: int = 10, pipeline_depth: int = 1) -> Dict[str, float]:
+    """
+    Open many concurrent connections to a calculator server and measure throughput and latency.
+
+    Each connection sends "add" requests, keeping up to pipeline_depth unanswered at once.
+    Latency is measured from sending a request to reading its reply.
+
+    Args:
+        host (str): The server host.
+        port (int): The server TCP port.
+        path (str, optional): A Unix socket path to connect to instead of TCP.
+        connections (int): The number of concurrent connections.
+        requests (int): The requests sent on each connection.
+        pipeline_depth (int): The requests each connection may have in flight.
+
+    Returns:
+        dict: The requests completed, errors, elapsed seconds, requests per second, and
+        p50, p99 and maximum latency in milliseconds.
+
+    Raises:
+        ValueError: If connections, requests or pipeline_depth is less than 1.
+    """
+    if min(connections, requests, pipeline_depth) < 1:
+        raise ValueError("Connections, requests and pipeline depth must be at least 1.")
+    raise_open_file_limit(connections + 64)
+    if path:
+        def open_connection():
+            return asyncio.open_unix_connection(path)
+    else:
+        def open_connection():
+            return asyncio.open_connection(host, port)
+    latencies, errors = [], []
+    started = time.perf_counter()
+    await asyncio.gather(*(_client(open_connection, requests, pipeline_depth, latencies, errors)
+                           for _ in range(connections)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    report = {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "seconds": elapsed,
+        "rps": len(latencies) / elapsed if elapsed > 0 else float("inf"),
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": (latencies[-1] if latencies else 0.0) * 1000,
+    }
+    logger.info("Load test finished: %d requests in %.3f s.", report["requests"], elapsed)
+    return report
+
+
+def main(argv=None):  # pragma: no cover - command-line wrapper around load_test
+    """Run a load test from the command line and print the report."""
+    parser = argparse.ArgumentParser(description="Load-test a running calculator server.")
+    parser.add_argument("--host", default="127.0.0.1", help="Server host (default: 127.0.0.1).")
+    parser.add_argument("--port", type=int, default=7878, help="Server TCP port (default: 7878).")
+    parser.add_argument("--unix-socket", help="Connect to this Unix socket instead of TCP.")
+    parser.add_argument("--connections", type=int, default=1000, help="Concurrent connections (default: 1000).")
+    parser.add_argument("--requests", type=int, default=10, help="Requests per connection (default: 10).")
+    parser.add_argument("--pipeline", type=int, default=1, help="Requests in flight per connection (default: 1).")
+    options = parser.parse_args(argv)
+    report = asyncio.run(load_test(options.host, options.port, options.unix_socket, options.connections,
+                                   options.requests, options.pipeline))
+    print(f"{report['requests']} requests, {report['errors']} errors in {report['seconds']:.3f} s: "
+          f"{report['rps']:,.0f} requests/s, p50 {report['p50_ms']:.2f} ms, p99 {report['p99_ms']:.2f} ms, "
+          f"max {report['max_ms']:.2f} ms")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,94 @@
+# app/worker/__init__.py
+
+import logging
+import multiprocessing
+import os
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+# Initialize the logger for this module
+logger = logging.getLogger(__name__)
+
+
+def _mapped_bytes() -> int:
+    """Return the address space this process already maps, or 0 where it cannot be read."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as statm:
+            return int(statm.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:  # pragma: no cover - /proc is Linux only
+        return 0
+
+
+def _work(sender, function, args: tuple, memory_bytes: int):
+    """
+    Run a function in the worker process and send back (True, result) or (False, exception).
+
+    The memory limit caps the address space at what the worker maps when it starts
+    plus memory_bytes, so a forked worker is not charged for its parent's memory.
+    """
+    if memory_bytes and resource is not None:
+        limit = _mapped_bytes() + memory_bytes
+        hard = resource.getrlimit(resource.RLIMIT_AS)[1]
+        if hard != resource.RLIM_INFINITY:
+            limit = min(limit, hard)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    try:
+        reply = (True, function(*args))
+    except Exception as e:  # Every failure goes back to the caller, who raises it
+        reply = (False, e)
+    try:
+        sender.send(reply)
+    except MemoryError:  # The result was too large to send back within the limit
+        sender.send((False, MemoryError()))
+    sender.close()
+
+
+def run_isolated(function, args: tuple, timeout: float, memory_bytes: int = 0):
+    """
+    Call function(*args) in a new worker process with a wall-clock and a memory limit.
+
+    Only the calling thread waits, without holding the GIL, so other threads of a
+    shared Calculator carry on. A worker that runs out of time is killed.
+
+    Args:
+        function (Callable): A picklable function, such as operator.pow.
+        args (tuple): Its picklable arguments.
+        timeout (float): Seconds to wait for the result.
+        memory_bytes (int): Memory the worker may allocate beyond what it starts with; 0 for no limit.
+
+    Returns:
+        The function's result.
+
+    Raises:
+        TimeoutError: If the worker did not finish in time.
+        MemoryError: If the worker needed more memory than allowed.
+        RuntimeError: If the worker exited without a result.
+        Exception: Any other exception the function raised.
+    """
+    context = multiprocessing.get_context()
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_work, args=(sender, function, args, memory_bytes), daemon=True)
+    process.start()
+    sender.close()  # Only the worker writes, so a worker that dies leaves the pipe at end of file
+    try:
+        if not receiver.poll(timeout):
+            logger.warning("Worker process %d did not finish within %g s and was killed.", process.pid, timeout)
+            raise TimeoutError(f"The calculation did not finish within {timeout:g} s and was stopped.")
+        try:
+            succeeded, value = receiver.recv()
+        except EOFError:
+            process.join()
+            raise RuntimeError(f"The worker process exited with code {process.exitcode}.") from None
+    finally:
+        receiver.close()
+        if process.is_alive():
+            process.kill()
+        process.join()
+    if succeeded:
+        return value
+    if isinstance(value, MemoryError):
+        raise MemoryError(f"The calculation needed more than {memory_bytes / 2 ** 20:g} MB and was stopped.")
+    raise value
@@ -1,11 +1,20 @@
 # main.py
 
+import argparse
+import csv
+import json
 import logging
+import sys
+import time
+from collections.abc import Sequence
+from fractions import Fraction
 from app.logger_config import setup_logging  # Import the logging setup function
-from app.calculator import Calculator
-
-# Set up logging configuration
-setup_logging()
+from app.batch import DEFAULT_CHUNK_SIZE, run_batch_job
+from app.calculation import format_result
+from app.calculator import Calculator, parse_arguments, split_command
+from app.metrics import start_metrics_export, stop_metrics_export
+from app.profiling import start_from_environment as start_profiling, stop_all as stop_profiling
+from app.server import DEFAULT_MAX_CONNECTIONS, run_server
 
 # Create a logger specific to this module
 logger = logging.getLogger(__name__)
@@ -22,7 +31,244 @@ def center_text(text, width=50):
     """
     return text.center(width)
 
-def main():
+def centered_lines(items, width=50):
+    """Yield each item centered and newline-terminated, formatting it only when it is consumed.
+
+    Args:
+        items (Iterable): The items to format, such as a HistoryView.
+        width (int): The width within which each item is centered.
+
+    Yields:
+        str: One centered line per item.
+    """
+    for item in items:
+        yield center_text(str(item), width) + "\n"
+
+def parse_args(argv):
+    """Parse command-line options.
+
+    Args:
+        argv (list): The command-line arguments, without the program name.
+
+    Returns:
+        argparse.Namespace: The parsed options.
+    """
+    parser = argparse.ArgumentParser(description="Interactive calculator with a streaming batch mode.")
+    parser.add_argument("--stream", action="store_true",
+                        help="Read commands without prompts and write one result per line.")
+    parser.add_argument("--interactive", action="store_true",
+                        help="Always use the interactive prompt, even when stdin is not a terminal.")
+    parser.add_argument("-i", "--input", help="Read commands from this file instead of stdin (implies --stream).")
+    parser.add_argument("-o", "--output", help="Write results to this file instead of stdout.")
+    parser.add_argument("--format", choices=["plain", "csv", "jsonl"], default="plain",
+                        help="Result format in streaming mode (default: plain).")
+    parser.add_argument("--workers", type=int,
+                        help="Run the input as a parallel batch job of operation rows with this many worker "
+                             "processes (0 uses every CPU).")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f"Rows sent to a worker at a time in a batch job (default: {DEFAULT_CHUNK_SIZE}).")
+    parser.add_argument("--serve", action="store_true",
+                        help="Run a line-protocol server with one calculator session per connection.")
+    parser.add_argument("--host", default="127.0.0.1", help="Server host (default: 127.0.0.1).")
+    parser.add_argument("--port", type=int, default=7878, help="Server TCP port (default: 7878).")
+    parser.add_argument("--unix-socket", help="Listen on this Unix socket instead of TCP.")
+    parser.add_argument("--max-connections", type=int, default=DEFAULT_MAX_CONNECTIONS,
+                        help=f"Connections served at once; more wait in the backlog (default: {DEFAULT_MAX_CONNECTIONS}).")
+    return parser.parse_args(argv)
+
+def read_commands(lines):
+    """Yield (line number, command, args) for every non-blank, non-comment line.
+
+    Args:
+        lines (Iterable[str]): The raw input lines.
+
+    Yields:
+        tuple: The 1-based line number, the command line text and its parts from split_command.
+    """
+    for line_number, line in enumerate(lines, 1):
+        text = line.strip()
+        if text and not text.startswith("#"):
+            yield line_number, text, split_command(text)
+
+def run_commands(calculator, commands):
+    """Yield (line number, command line, output) for each command, stopping at exit/quit.
+
+    Args:
+        calculator (Calculator): The calculator that executes the commands.
+        commands (Iterable[tuple]): Parsed commands from read_commands.
+
+    Yields:
+        tuple: The line number, the command line text and the calculator output.
+    """
+    for line_number, text, parts in commands:
+        command = parts[0]
+        if command.lower() in ['exit', 'quit']:
+            return
+        try:
+            args = parse_arguments(calculator, command, parts[1:])
+        except ValueError:
+            yield line_number, text, "Error: Invalid input."
+            continue
+        yield line_number, text, calculator.execute_command(command, *args)
+
+def _split_output(output):
+    """Return (result, error) text for one calculator output."""
+    if isinstance(output, str):
+        if output.startswith("Error"):
+            return "", output
+        return output, ""
+    if isinstance(output, Sequence):
+        return "; ".join(map(str, output)), ""
+    if isinstance(output, Fraction):  # Written as text, such as 3/4, since JSON has no fractions
+        return format_result(output), ""
+    if isinstance(output, int):
+        text = format_result(output)
+        return (text if "e" in text else output), ""  # An int too long for decimal text is approximated
+    return output, ""
+
+class _LineBuffer:
+    """Minimal file-like target that lets csv.writer format one row at a time."""
+
+    def __init__(self):
+        self._parts = []
+
+    def write(self, text):
+        """Collect written text."""
+        self._parts.append(text)
+
+    def pop(self):
+        """Return and forget everything written so far."""
+        text = "".join(self._parts)
+        self._parts.clear()
+        return text
+
+def format_results(results, output_format):
+    """Yield one output line per result in the chosen format.
+
+    Args:
+        results (Iterable[tuple]): Results from run_commands.
+        output_format (str): One of "plain", "csv" or "jsonl".
+
+    Yields:
+        str: A newline-terminated output line.
+    """
+    if output_format == "csv":
+        buffer = _LineBuffer()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(["line", "command", "result", "error"])
+        yield buffer.pop()
+        for line_number, text, output in results:
+            writer.writerow([line_number, text, *_split_output(output)])
+            yield buffer.pop()
+    elif output_format == "jsonl":
+        for line_number, text, output in results:
+            result, error = _split_output(output)
+            record = {"line": line_number, "command": text}
+            if error:
+                record["error"] = error
+            else:
+                record["result"] = result
+            yield json.dumps(record) + "\n"
+    else:
+        for _, _, output in results:
+            result, error = _split_output(output)
+            yield str(error or result).replace("\n", "\\n") + "\n"
+
+def write_buffered(lines, out, chunk_lines=4096):
+    """Write lines to out in chunks instead of one write per line.
+
+    Args:
+        lines (Iterable[str]): The lines to write.
+        out (TextIO): The destination stream.
+        chunk_lines (int): The number of lines collected before each write.
+
+    Returns:
+        int: The number of lines written.
+    """
+    count = 0
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= chunk_lines:
+            out.write("".join(chunk))
+            count += len(chunk)
+            chunk.clear()
+    out.write("".join(chunk))
+    return count + len(chunk)
+
+def run_stream(options, stdin, stdout, stderr):
+    """Run the non-interactive streaming pipeline: read, execute, format and write.
+
+    Args:
+        options (argparse.Namespace): The parsed command-line options.
+        stdin (TextIO): The command source when no input file is given.
+        stdout (TextIO): The result destination when no output file is given.
+        stderr (TextIO): Where the throughput report is written.
+
+    Returns:
+        int: The number of commands executed.
+    """
+    calculator = Calculator()
+    source = open(options.input, encoding="utf-8") if options.input else stdin
+    target = open(options.output, "w", encoding="utf-8", buffering=1 << 20) if options.output else stdout
+    started = time.perf_counter()
+    try:
+        if options.workers is None:
+            results = run_commands(calculator, read_commands(source))
+        else:  # Rows are evaluated out of process, so only operation commands are accepted
+            results = ((line_number, text, output) for line_number, text, _, _, output
+                       in run_batch_job(source, options.workers, options.chunk_size))
+        written = write_buffered(format_results(results, options.format), target)
+    finally:
+        if options.input:
+            source.close()
+        if options.output:
+            target.close()
+        else:
+            target.flush()
+    elapsed = time.perf_counter() - started
+    processed = written - 1 if options.format == "csv" else written  # Exclude the CSV header
+    rate = processed / elapsed if elapsed > 0 else float("inf")
+    stderr.write(f"Processed {processed} commands in {elapsed:.3f} s ({rate:,.0f} commands/s).\n")
+    logger.info("Streaming session processed %d commands in %.3f s.", processed, elapsed)
+    return processed
+
+def main(argv=None):
+    """Entry point for the calculator.
+
+    Runs the interactive loop by default. When command-line arguments are given,
+    --serve runs the network server, and streaming mode is chosen by --stream or
+    --input, or when stdin is not a terminal (unless --interactive is passed).
+    Metrics are written to METRICS_FILE while it runs, if that is set, and the
+    whole run is profiled when PROFILE or TRACE_MEM is set.
+
+    Args:
+        argv (list, optional): Command-line arguments, without the program name.
+    """
+    options = parse_args(argv) if argv is not None else None
+    stream = options is not None and not options.serve and bool(
+        options.stream or options.input or (not options.interactive and not sys.stdin.isatty()))
+    # Logging is configured here, by the entry point, rather than on import. A stream logs only
+    # problems unless LOG_LEVEL says otherwise, and never writes records for each command to stderr:
+    # three INFO records per command cost several times more than the command.
+    if stream:
+        setup_logging("WARNING", logging.WARNING)
+    else:
+        setup_logging()
+    start_metrics_export()  # Writes METRICS_FILE in the background when it is set
+    start_profiling()  # Profiles the whole run when PROFILE or TRACE_MEM is set
+    try:
+        if options is not None and options.serve:
+            run_server(options.host, options.port, options.unix_socket, options.max_connections)
+        elif stream:
+            run_stream(options, sys.stdin, sys.stdout, sys.stderr)
+        else:
+            interactive()
+    finally:
+        stop_profiling()  # Writes the dumps of captures still running
+        stop_metrics_export()  # Writes the final values
+
+def interactive():
     """Main interactive loop for the calculator.
 
     This function handles user input, executes calculator commands,
@@ -46,24 +292,23 @@ def main():
             logger.info("Calculator session ended by user.")  # Log session end
             break
 
-        parts = user_input.split()
+        parts = split_command(user_input)
         command = parts[0]
 
         try:
-            args = list(map(float, parts[1:]))  # Convert arguments to float
+            args = parse_arguments(calculator, command, parts[1:])
             output = calculator.execute_command(command, *args)
 
             # Display output to user
-            if isinstance(output, (int, float)):  # For numeric results
+            if isinstance(output, (int, float, Fraction)):  # For numeric results
                 print("\n" + "=" * 50)
                 print()  # Add spacing above the result
-                print(center_text(f"Result: {output}", 50))
+                print(center_text(f"Result: {format_result(output)}", 50))
                 print()  # Add spacing below the result
                 print("=" * 50 + "\n")  # Bottom border
-            elif isinstance(output, list):  # For list results (e.g., history)
+            elif isinstance(output, Sequence) and not isinstance(output, str):  # For list results (e.g., history)
                 print("\n" + "=" * 50)
-                for line in output:
-                    print(center_text(str(line), 50))  # Print each history item centered
+                write_buffered(centered_lines(output, 50), sys.stdout)  # Each history item centered, written in chunks
                 print("=" * 50 + "\n")
             else:  # For error/help messages as strings
                 print("\n" + "=" * 50)
@@ -71,11 +316,11 @@ def main():
                 print("=" * 50 + "\n")
 
         except ValueError:
-            logger.error("Invalid input - could not parse arguments to float.")
+            logger.error("Invalid input - could not parse arguments as numbers.")
             print("\n" + "=" * 50)
             print(center_text("Error: Invalid input.", 50))
             print(center_text("Please ensure you provide numbers as arguments.", 50))
             print("=" * 50 + "\n")
 
 if __name__ == "__main__":  # pragma: no cover
-    main()
+    main(sys.argv[1:])
@@ -0,0 +1,144 @@
+"""
+Shared pytest configuration: a small offline benchmark harness with JSON baselines,
+and a temporary history file.
+
+Benchmarks call the `bench` fixture, which times a callable and compares the best
+time per call with the stored baseline, failing when it is slower than allowed.
+
+Tests that create a History or Calculator use the `history_file` fixture, which points
+HISTORY_FILENAME at a file in a temporary directory so they never touch the real one.
+Its name comes from the `history_filename` fixture, which a module or test can override.
+
+Options:
+    --benchmark-baseline PATH  Baseline file (default .benchmarks/baseline.json, or BENCHMARK_BASELINE).
+    --benchmark-save           Write this run's results to the baseline file instead of comparing.
+    --benchmark-threshold X    Allowed slowdown as a fraction of the baseline (default 0.5, or BENCHMARK_THRESHOLD).
+"""
+import json
+import os
+import time
+import pytest
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".benchmarks",
+                                "baseline.json")
+
+
+def pytest_addoption(parser):
+    """Register the benchmark options."""
+    group = parser.getgroup("benchmark")
+    group.addoption("--benchmark-baseline", default=os.getenv("BENCHMARK_BASELINE", DEFAULT_BASELINE),
+                    help="JSON file holding the benchmark baseline.")
+    group.addoption("--benchmark-save", action="store_true", help="Save this run's benchmark results as the baseline.")
+    group.addoption("--benchmark-threshold", type=float, default=float(os.getenv("BENCHMARK_THRESHOLD", "0.5")),
+                    help="Allowed slowdown against the baseline, as a fraction (0.5 allows 50%% slower).")
+
+
+class BenchmarkSession:
+    """Results of every benchmark in the run and the baseline they are compared with."""
+
+    def __init__(self, baseline_path: str, save: bool, threshold: float):
+        """
+        Initialize the session and read the baseline if there is one.
+
+        Args:
+            baseline_path (str): The JSON baseline file.
+            save (bool): Save results to the baseline at the end of the run instead of comparing.
+            threshold (float): Allowed slowdown as a fraction of the baseline time.
+        """
+        self.baseline_path = baseline_path
+        self.save = save
+        self.threshold = threshold
+        self.results = {}
+        self.baseline = {}
+        if not save and os.path.exists(baseline_path):
+            with open(baseline_path, encoding="utf-8") as baseline:
+                self.baseline = json.load(baseline)
+
+    def record(self, name: str, seconds: float, number: int):
+        """
+        Record a result and check it against the baseline.
+
+        Args:
+            name (str): The benchmark name, unique within the suite.
+            seconds (float): The best time per call.
+            number (int): The calls per timed run.
+
+        Raises:
+            pytest.fail.Exception: If the result is slower than the baseline allows.
+        """
+        self.results[name] = {"seconds": seconds, "number": number}
+        expected = self.baseline.get(name)
+        if expected and seconds > expected["seconds"] * (1 + self.threshold):
+            pytest.fail(f"Benchmark {name} regressed: {seconds * 1e6:.2f} us per call against a baseline of "
+                        f"{expected['seconds'] * 1e6:.2f} us (threshold {self.threshold:.0%}).")
+
+    def write(self):
+        """Write the results to the baseline file, keeping entries for benchmarks that did not run."""
+        baseline = {}
+        if os.path.exists(self.baseline_path):
+            with open(self.baseline_path, encoding="utf-8") as existing:
+                baseline = json.load(existing)
+        baseline.update(self.results)
+        os.makedirs(os.path.dirname(self.baseline_path) or ".", exist_ok=True)
+        with open(self.baseline_path, "w", encoding="utf-8") as target:
+            json.dump(baseline, target, indent=2, sort_keys=True)
+
+
+def pytest_configure(config):
+    """Create the benchmark session for this run."""
+    config.benchmark_session = BenchmarkSession(config.getoption("--benchmark-baseline"),
+                                                config.getoption("--benchmark-save"),
+                                                config.getoption("--benchmark-threshold"))
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    """List the benchmark results and save them if asked to."""
+    session = config.benchmark_session
+    if not session.results:
+        return
+    terminalreporter.section("benchmarks")
+    for name, result in sorted(session.results.items()):
+        expected = session.baseline.get(name)
+        change = f" ({result['seconds'] / expected['seconds'] - 1:+.0%} vs baseline)" if expected else ""
+        terminalreporter.write_line(f"{name}: {result['seconds'] * 1e6:,.2f} us per call{change}")
+    if session.save:
+        session.write()
+        terminalreporter.write_line(f"Saved benchmark baseline to {session.baseline_path}.")
+
+
+@pytest.fixture
+def bench(request):
+    """
+    Time a callable and record the best time per call against the baseline.
+
+    Usage: bench(name, func, number=1, repeat=3, setup=None). When setup is given it runs
+    untimed before each timed run and its return value is passed to func.
+    """
+    session = request.config.benchmark_session
+
+    def run(name, func, number=1, repeat=3, setup=None):
+        best = float("inf")
+        for _ in range(repeat):
+            state = setup() if setup else None
+            started = time.perf_counter()
+            for _ in range(number):
+                func(state) if setup else func()  # pylint: disable=expression-not-assigned
+            best = min(best, time.perf_counter() - started)
+        session.record(name, best / number, number)
+        return best / number
+
+    return run
+
+
+@pytest.fixture
+def history_filename():
+    """Name of the history file in the temporary directory."""
+    return "history.csv"
+
+
+@pytest.fixture
+def history_file(tmp_path, monkeypatch, history_filename):
+    """Point HISTORY_FILENAME at a file in a temporary directory and return its path."""
+    path = tmp_path / history_filename
+    monkeypatch.setenv("HISTORY_FILENAME", str(path))
+    return path
@@ -0,0 +1,72 @@
+"""
+Tests for the parallel batch job runner in app.batch.
+
+Fixtures:
+    history: Provides a History writing to a temporary file.
+"""
+# pylint: disable=redefined-outer-name
+from fractions import Fraction
+import pytest
+from app.batch import available_cpus, evaluate_row, run_batch_job
+from app.history import History
+
+ROWS = ["add 1 2", "", "# comment", "foo 1 2", "divide 1 0", "multiply,3,4", "power 2", "subtract x 1",
+        "power 2 100", "modulus 7 4", "powmod 4 13 497", "add 1/2 1/3", "add 0.5 1"]
+
+EXPECTED = [
+    (1, "add 1 2", "add", (1, 2), 3),
+    (4, "foo 1 2", "foo", None, "Error: Unknown command."),
+    (5, "divide 1 0", "divide", (1, 0), "Error: Cannot divide by zero"),
+    (6, "multiply,3,4", "multiply", (3, 4), 12),
+    (7, "power 2", "power", None, "Error: Invalid number of arguments. Please provide two numbers."),
+    (8, "subtract x 1", "subtract", None, "Error: Invalid input."),
+    (9, "power 2 100", "power", (2, 100), 2 ** 100),  # Exact, as at the prompt
+    (10, "modulus 7 4", "modulus", (7, 4), 3),
+    (11, "powmod 4 13 497", "powmod", (4, 13, 497), 445),
+    (12, "add 1/2 1/3", "add", (Fraction(1, 2), Fraction(1, 3)), Fraction(5, 6)),
+    (13, "add 0.5 1", "add", (0.5, 1), 1.5),
+]
+
+
+@pytest.fixture
+def history(history_file):  # pylint: disable=unused-argument
+    """Fixture to provide a History writing to a temporary file."""
+    return History()
+
+
+def test_evaluate_row():
+    """Test that a single row gives its command, operands and result."""
+    assert evaluate_row("power 2 10") == ("power", (2, 10), 1024)
+
+
+@pytest.mark.parametrize("workers, chunk_size", [(1, 3), (2, 2), (2, 100)])
+def test_results_in_input_order(workers, chunk_size):
+    """Test that results come back in input order, with an error result per bad row, however the rows are split."""
+    assert list(run_batch_job(ROWS, workers=workers, chunk_size=chunk_size)) == EXPECTED
+
+
+def test_merge_into_history(history):
+    """Test that successful rows are added to history in input order."""
+    rows = [f"add {i} 1" for i in range(50)] + ["divide 1 0", "powmod 4 13 497"]
+    for _ in run_batch_job(rows, workers=2, chunk_size=7, history=history):
+        pass
+    entries = history.get_history()
+    assert len(entries) == 51
+    assert [calc.operand1 for calc in entries][:50] == list(range(50))
+    assert repr(entries[49]) == "49 addition 1 = 50"
+    assert repr(entries[50]) == "powmod 4 13 497 = 445"  # Recorded as the calculator records it
+
+
+def test_all_cpus_and_early_stop():
+    """Test that workers=0 uses every CPU and that stopping early shuts the pool down."""
+    assert available_cpus() >= 1
+    job = run_batch_job((f"add {i} {i}" for i in range(1000)), workers=0, chunk_size=10)
+    assert next(job)[4] == 0
+    job.close()
+
+
+@pytest.mark.parametrize("workers, chunk_size", [(-1, 10), (1, 0)])
+def test_invalid_settings(workers, chunk_size):
+    """Test that a negative worker count or an empty chunk size is rejected."""
+    with pytest.raises(ValueError, match="Workers must be at least 0"):
+        list(run_batch_job(ROWS, workers=workers, chunk_size=chunk_size))
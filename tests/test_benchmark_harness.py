@@ -0,0 +1,63 @@
+"""Unit tests for the benchmark baseline harness in tests/conftest.py."""
+import json
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+import pytest
+from tests.conftest import BenchmarkSession, pytest_terminal_summary
+
+
+def write_baseline(path, results):
+    """Write a baseline file with the given results."""
+    path.write_text(json.dumps(results), encoding="utf-8")
+
+
+def test_record_within_threshold(tmp_path):
+    """Test that a result within the threshold of its baseline passes."""
+    path = tmp_path / "baseline.json"
+    write_baseline(path, {"op": {"seconds": 1.0, "number": 1}})
+    session = BenchmarkSession(str(path), save=False, threshold=0.5)
+    session.record("op", 1.4, 1)
+    session.record("new", 9.0, 1)  # No baseline yet, so nothing to compare
+    assert set(session.results) == {"op", "new"}
+
+
+def test_record_regression_fails(tmp_path):
+    """Test that a result slower than the threshold allows fails the benchmark."""
+    path = tmp_path / "baseline.json"
+    write_baseline(path, {"op": {"seconds": 1e-6, "number": 1}})
+    session = BenchmarkSession(str(path), save=False, threshold=0.25)
+    with pytest.raises(pytest.fail.Exception, match=r"Benchmark op regressed: 2.00 us per call .* 1.00 us \(threshold 25%\)"):
+        session.record("op", 2e-6, 1)
+
+
+def test_save_merges_baseline(tmp_path):
+    """Test that saving keeps baseline entries for benchmarks that did not run."""
+    path = tmp_path / "nested" / "baseline.json"
+    session = BenchmarkSession(str(path), save=True, threshold=0.5)
+    session.record("a", 1.0, 1)
+    session.write()
+    session = BenchmarkSession(str(path), save=True, threshold=0.5)
+    assert session.baseline == {}  # Saving runs do not compare
+    session.record("b", 2.0, 3)
+    session.write()
+    assert json.loads(path.read_text(encoding="utf-8")) == {"a": {"seconds": 1.0, "number": 1},
+                                                             "b": {"seconds": 2.0, "number": 3}}
+
+
+def test_terminal_summary(tmp_path):
+    """Test that the summary lists results with their change against the baseline and saves when asked."""
+    path = tmp_path / "baseline.json"
+    write_baseline(path, {"op": {"seconds": 2e-6, "number": 1}})
+    reporter = MagicMock()
+    session = BenchmarkSession(str(path), save=False, threshold=0.5)
+    pytest_terminal_summary(reporter, SimpleNamespace(benchmark_session=session))
+    reporter.section.assert_not_called()  # Nothing ran
+
+    session.record("op", 2.5e-6, 1)
+    pytest_terminal_summary(reporter, SimpleNamespace(benchmark_session=session))
+    reporter.write_line.assert_called_with("op: 2.50 us per call (+25% vs baseline)")
+
+    session.save = True
+    pytest_terminal_summary(reporter, SimpleNamespace(benchmark_session=session))
+    reporter.write_line.assert_called_with(f"Saved benchmark baseline to {path}.")
+    assert json.loads(path.read_text(encoding="utf-8"))["op"]["seconds"] == 2.5e-6
@@ -0,0 +1,572 @@
+"""
+Benchmarks for the calculator's memory use and throughput.
+
+These run with the rest of the suite at a small size. Set BENCHMARK_SIZE to run
+them at production scale, e.g. BENCHMARK_SIZE=10000000 pytest tests/test_benchmarks.py -s
+"""
+import os
+import subprocess
+import sys
+import threading
+import time
+import logging
+import tracemalloc
+import numpy as np
+import pandas as pd
+import pytest
+from app.batch import available_cpus, run_batch_job
+from app.cache import MISSING, ResultCache, cache_key
+from app.calculation import Calculation, CalculationBatch
+from app.calculator import Calculator
+from app.history import History
+from app.logger_config import setup_logging, shutdown_logging
+from app.history.columnar import ColumnarStore
+from app.operations.addition import Addition
+from app.operations.power import PowerLimits
+from app.operations.registry import OPERATIONS
+
+BENCHMARK_SIZE = int(os.getenv("BENCHMARK_SIZE", "100000"))
+
+# Import time budget for main.py, in milliseconds
+STARTUP_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", "400"))
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def bytes_per_entry(build):
+    """Return the traced bytes per entry still allocated by the object that build() returns."""
+    tracemalloc.start()
+    try:
+        kept = build()
+        allocated, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert len(kept) == BENCHMARK_SIZE
+    return allocated / BENCHMARK_SIZE
+
+
+def build_calculations():
+    """Build BENCHMARK_SIZE distinct executed calculations."""
+    addition = Addition()
+    for i in range(BENCHMARK_SIZE):
+        calculation = Calculation(addition, i + 0.5, 1.5)
+        calculation.execute()
+        yield calculation
+
+
+@pytest.mark.slow
+def test_history_memory_per_entry():
+    """Compare bytes per entry of a list of Calculation objects with the columnar store."""
+    def build_list():
+        return list(build_calculations())
+
+    def build_store():
+        store = ColumnarStore()
+        for calculation in build_calculations():
+            store.append(calculation)
+        return store
+
+    list_bytes = bytes_per_entry(build_list)
+    store_bytes = bytes_per_entry(build_store)
+    print(f"\nhistory memory at {BENCHMARK_SIZE} entries: list {list_bytes:.1f} B/entry, "
+          f"columnar {store_bytes:.1f} B/entry")
+    assert store_bytes <= 2 * 26 + 1  # 26 bytes per row, at most doubled by geometric growth
+    assert store_bytes * 3 < list_bytes
+
+
+@pytest.mark.slow
+def test_history_load_throughput(history_file):
+    """Time History.load on a BENCHMARK_SIZE-row file with every operation."""
+    path = history_file
+    rng = np.random.default_rng(0)
+    names = np.array(["Addition", "Subtraction", "Multiplication", "Division", "Power", "Modulus"])
+    pd.DataFrame({
+        "operand1": rng.random(BENCHMARK_SIZE),
+        "operation": names[rng.integers(0, len(names), BENCHMARK_SIZE)],
+        "operand2": rng.random(BENCHMARK_SIZE),
+        "result": rng.random(BENCHMARK_SIZE),
+    }).to_csv(path, index=False)
+    history = History()
+
+    started = time.perf_counter()
+    assert history.load() == f"History loaded from {path}."
+    elapsed = time.perf_counter() - started
+
+    print(f"\nhistory load: {BENCHMARK_SIZE} rows in {elapsed:.2f} s ({BENCHMARK_SIZE / elapsed:,.0f} rows/s)")
+    assert len(history.get_history()) == BENCHMARK_SIZE
+    assert elapsed < 1 + BENCHMARK_SIZE / 1_000_000  # 10M rows load in about ten seconds at worst
+
+
+@pytest.mark.slow
+def test_cache_speedup_on_zipf_stream():
+    """Compare operation dispatch with and without the result cache on a Zipf-skewed stream of power commands."""
+    count = min(BENCHMARK_SIZE, 50000)
+    ranks = np.random.default_rng(0).zipf(1.2, count) % 2000
+    commands = [(7, 2000 + int(rank)) for rank in ranks]  # Big-int powers, the slow path worth caching
+    power = OPERATIONS['power']
+
+    def run(cache):
+        started = time.perf_counter()
+        for a, b in commands:
+            key = cache_key('power', a, b)
+            result = cache.get(key)
+            if result is MISSING:
+                cache.put(key, power.calculate(a, b))
+        return time.perf_counter() - started
+
+    uncached = run(ResultCache(maxsize=0))
+    cache = ResultCache(maxsize=1024)
+    cached = run(cache)
+    stats = cache.stats()
+    print(f"\ncache on {count} Zipf-skewed power commands: uncached {uncached:.3f} s, cached {cached:.3f} s "
+          f"({uncached / cached:.1f}x), hit rate {stats['hit_rate']:.1%}, {stats['evictions']} evictions")
+    assert stats["hit_rate"] > 0.7
+    assert cached * 1.3 < uncached
+
+
+def test_cached_hits_recorded_like_fresh_calculations():
+    """Check that a Zipf stream through execute_command records every command, hit or miss."""
+    ranks = np.random.default_rng(1).zipf(1.2, 500) % 50
+    calculator = Calculator(cache=ResultCache(maxsize=16))
+    for rank in ranks:
+        assert calculator.execute_command('power', 3, int(rank)) == 3 ** int(rank)
+    assert calculator.cache.hits > 0
+    assert [calc.operand2 for calc in calculator.history.get_history()] == [int(rank) for rank in ranks]
+
+
+@pytest.mark.slow
+def test_logging_overhead(tmp_path, monkeypatch):
+    """Compare execute_command throughput with INFO logging on and with logging off."""
+    count = min(BENCHMARK_SIZE, 5000)
+    calculator = Calculator(cache=ResultCache(maxsize=0))
+    root_level = logging.getLogger().level
+    monkeypatch.setenv("LOG_FILE", str(tmp_path / "benchmark.log"))
+
+    def run(level):
+        shutdown_logging()
+        monkeypatch.setenv("LOG_LEVEL", level)
+        setup_logging()
+        started = time.perf_counter()
+        for i in range(count):
+            calculator.execute_command('multiply', i, 3)
+        elapsed = time.perf_counter() - started
+        shutdown_logging()  # Not timed: the listener thread drains the queue off the hot path
+        return elapsed
+
+    try:
+        logged = run("INFO")
+        silent = run("CRITICAL")
+    finally:
+        logging.getLogger().setLevel(root_level)
+    print(f"\nexecute_command x{count}: logging on {count / logged:,.0f} commands/s, "
+          f"logging off {count / silent:,.0f} commands/s")
+    assert (tmp_path / "benchmark.log").stat().st_size > 0
+    assert silent < logged
+
+
+@pytest.mark.slow
+def test_history_append_contention(history_file):  # pylint: disable=unused-argument
+    """Compare add_calculation throughput from one thread and from several threads sharing one History."""
+    count = min(BENCHMARK_SIZE, 50000)
+    logging.disable(logging.INFO)
+
+    def add_all(history, calculations):
+        for calculation in calculations:
+            history.add_calculation(calculation)
+
+    def run(threads):
+        history = History()
+        per_thread = count // threads
+        workers = [threading.Thread(target=add_all, args=(history, [Calculation(Addition(), thread, i)
+                                                                     for i in range(per_thread)]))
+                   for thread in range(threads)]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+        assert len(history.get_history()) == per_thread * threads
+        return per_thread * threads / elapsed
+
+    try:
+        single = run(1)
+        contended = run(4)
+    finally:
+        logging.disable(logging.NOTSET)
+    print(f"\nadd_calculation x{count}: 1 thread {single:,.0f}/s, 4 threads {contended:,.0f}/s")
+    assert contended > single / 2
+
+
+@pytest.mark.slow
+def test_undo_redo_step_cost(history_file):  # pylint: disable=unused-argument
+    """Check that undo and redo steps cost the same on a small and on a BENCHMARK_SIZE history."""
+    steps = 2000
+    logging.disable(logging.INFO)
+
+    def per_step(size):
+        history = History()
+        values = np.arange(size, dtype=np.float64)
+        history.add_batch(CalculationBatch(Addition(), values, values, values * 2))
+        for i in range(steps):
+            history.add_calculation(Calculation(Addition(), i, i))
+        history.checkpoint("full")
+        started = time.perf_counter()
+        history.undo(steps)
+        history.redo(steps)
+        history.rollback("full")
+        history.undo()
+        elapsed = time.perf_counter() - started
+        assert len(history.get_history()) == size + steps
+        return elapsed / (2 * steps)
+
+    try:
+        small = min(per_step(1000) for _ in range(3))
+        large = min(per_step(BENCHMARK_SIZE) for _ in range(3))
+    finally:
+        logging.disable(logging.NOTSET)
+    print(f"\nundo/redo step: {small * 1e6:.2f} us at 1000 entries, {large * 1e6:.2f} us at {BENCHMARK_SIZE} entries")
+    assert large < small * 3
+
+
+@pytest.mark.slow
+def test_append_after_snapshot_and_undo(history_file):  # pylint: disable=unused-argument
+    """Check that reading the history, undoing and appending again costs the same on 1000 and BENCHMARK_SIZE entries."""
+    cycles = 1000
+    logging.disable(logging.INFO)
+
+    def per_cycle(size):
+        history = History()
+        values = np.arange(size, dtype=np.float64)
+        history.add_batch(CalculationBatch(Addition(), values, values, values * 2))
+        history.add_calculation(Calculation(Addition(), 0, 0))
+        started = time.perf_counter()
+        for i in range(cycles):
+            len(history.get_history())  # A snapshot of every row, released at once
+            history.undo()
+            history.add_calculation(Calculation(Addition(), i, i))
+        elapsed = time.perf_counter() - started
+        assert len(history.get_history()) == size + 1
+        return elapsed / cycles
+
+    try:
+        small = min(per_cycle(1000) for _ in range(3))
+        large = min(per_cycle(BENCHMARK_SIZE) for _ in range(3))
+    finally:
+        logging.disable(logging.NOTSET)
+    print(f"\nsnapshot, undo, append: {small * 1e6:.2f} us at 1000 entries, "
+          f"{large * 1e6:.2f} us at {BENCHMARK_SIZE} entries")
+    assert large < small * 3
+
+
+@pytest.mark.slow
+def test_history_tail_is_constant_time(history_file):  # pylint: disable=unused-argument
+    """Check that 'history tail 20' costs the same on 20 entries and on BENCHMARK_SIZE entries."""
+    logging.disable(logging.INFO)
+
+    def per_call(size):
+        calculator = Calculator()
+        values = np.arange(size, dtype=np.float64)
+        calculator.history.add_batch(CalculationBatch(Addition(), values, values, values * 2))
+        started = time.perf_counter()
+        for _ in range(200):
+            lines = [str(calc) for calc in calculator.execute_command('history', 'tail', '20')]
+        assert len(lines) == 20
+        return (time.perf_counter() - started) / 200
+
+    try:
+        small = min(per_call(20) for _ in range(3))
+        large = min(per_call(BENCHMARK_SIZE) for _ in range(3))
+    finally:
+        logging.disable(logging.NOTSET)
+    print(f"\nhistory tail 20: {small * 1e6:.1f} us at 20 entries, {large * 1e6:.1f} us at {BENCHMARK_SIZE} entries")
+    assert large < small * 3
+
+
+@pytest.mark.slow
+def test_indexed_query_against_linear_scan(history_file):  # pylint: disable=unused-argument
+    """Compare History.query with a vectorized linear scan at BENCHMARK_SIZE and ten times that many entries."""
+    rng = np.random.default_rng(1)
+    logging.disable(logging.INFO)
+
+    def timings(size):
+        history = History()
+        for operation in (OPERATIONS['add'], OPERATIONS['multiply']):
+            values = rng.random(size // 2)
+            history.add_batch(CalculationBatch(operation, values, values, values * 1000))
+        history.query()  # Build the indexes once, as the first query of a session does
+        store = history._store  # pylint: disable=protected-access
+        code = store.code_for(OPERATIONS['multiply'])
+        indexed = scanned = float("inf")
+        for i in range(20):
+            history.add_calculation(Calculation(OPERATIONS['multiply'], i, 1))  # The indexes follow new entries
+            low = rng.random() * 990
+            started = time.perf_counter()
+            matches = history.query(OPERATIONS['multiply'], low, low + 1)
+            indexed = min(indexed, time.perf_counter() - started)
+            started = time.perf_counter()
+            result = store.result[:store.size]
+            expected = np.flatnonzero((store.codes[:store.size] == code) & (result >= low) & (result <= low + 1))
+            scanned = min(scanned, time.perf_counter() - started)
+            assert np.array_equal(matches.rows, expected)
+        return indexed, scanned
+
+    try:
+        results = {size: timings(size) for size in (BENCHMARK_SIZE, 10 * BENCHMARK_SIZE)}
+    finally:
+        logging.disable(logging.NOTSET)
+    for size, (indexed, scanned) in results.items():
+        print(f"\nquery at {size} entries: indexed {indexed * 1e6:.1f} us, linear scan {scanned * 1e6:.1f} us")
+    indexed, scanned = results[10 * BENCHMARK_SIZE]
+    # At the smaller size a scan takes about as long as the Python work of a query, and under coverage
+    # tracing the query is often the slower of the two, so only the larger size is compared
+    assert indexed < scanned
+
+
+@pytest.mark.slow
+def test_stats_are_constant_time(history_file):  # pylint: disable=unused-argument
+    """Check that History.stats costs the same on 1000 entries and on BENCHMARK_SIZE entries while entries change."""
+    rng = np.random.default_rng(2)
+    logging.disable(logging.INFO)
+
+    def per_call(size):
+        history = History()
+        values = rng.lognormal(0, 1, size)
+        history.add_batch(CalculationBatch(OPERATIONS['add'], values, values, values))
+        history.stats()  # The first call builds the aggregates
+        started = time.perf_counter()
+        for i in range(200):
+            history.add_calculation(Calculation(OPERATIONS['multiply'], i, 2))
+            history.undo()
+            summary = history.stats()
+        elapsed = (time.perf_counter() - started) / 200
+        assert summary["count"] == size and summary["sum"] == pytest.approx(values.sum())
+        assert summary["p99"] == pytest.approx(np.percentile(values, 99), rel=0.02)
+        return elapsed
+
+    try:
+        small = min(per_call(1000) for _ in range(3))
+        large = min(per_call(BENCHMARK_SIZE) for _ in range(3))
+    finally:
+        logging.disable(logging.NOTSET)
+    print(f"\nadd, undo and stats: {small * 1e6:.1f} us at 1000 entries, {large * 1e6:.1f} us at {BENCHMARK_SIZE}")
+    assert large < small * 3
+
+
+@pytest.mark.slow
+def test_plugin_operations_do_not_slow_dispatch(history_file, tmp_path, monkeypatch):  # pylint: disable=unused-argument
+    """Check that fifty plugin operations cost nothing until used and then dispatch like a built-in."""
+    import importlib.metadata  # pylint: disable=import-outside-toplevel
+    import app.calculator  # pylint: disable=import-outside-toplevel
+    from app.operations.registry import ENTRY_POINT_GROUP, OperationRegistry  # pylint: disable=import-outside-toplevel
+    declared = []
+    for i in range(50):
+        (tmp_path / f"calc_bench_plugin{i}.py").write_text(
+            "from app.operations.addition import Addition\n"
+            f"class Domain{i}(Addition):\n    command = 'domain{i}'\n", encoding="utf-8")
+        declared.append(importlib.metadata.EntryPoint(f"domain{i}", f"calc_bench_plugin{i}:Domain{i}",
+                                                      ENTRY_POINT_GROUP))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(importlib.metadata, "entry_points", lambda group: declared)
+    logging.disable(logging.INFO)
+    try:
+        registry = OperationRegistry()
+        registry.discover_builtins()
+        monkeypatch.setattr(app.calculator, "OPERATIONS", registry.by_command)
+        calculator = Calculator(cache=ResultCache(0))
+        calculator.execute_command('domain7', 1, 2)  # Searches the entry points and imports one plugin
+        loaded = [name for name in sys.modules if name.startswith("calc_bench_plugin")]
+
+        def per_call(command):
+            started = time.perf_counter()
+            for i in range(20000):
+                calculator.execute_command(command, i, 2)
+            return (time.perf_counter() - started) / 20000
+
+        builtin = min(per_call('add') for _ in range(3))
+        plugin = min(per_call('domain7') for _ in range(3))
+    finally:
+        logging.disable(logging.NOTSET)
+        for name in [name for name in sys.modules if name.startswith("calc_bench_plugin")]:
+            del sys.modules[name]
+    print(f"\ndispatch: built-in {builtin * 1e6:.2f} us, plugin {plugin * 1e6:.2f} us per command")
+    assert loaded == ["calc_bench_plugin7"]
+    assert plugin < builtin * 1.5
+
+
+@pytest.mark.slow
+def test_powmod_against_power_then_modulus(history_file):  # pylint: disable=unused-argument
+    """Compare powmod with a 2048-bit exponent to power followed by modulus with a much smaller exponent."""
+    rng = np.random.default_rng(0)
+    exponent = int.from_bytes(rng.bytes(256), "big") | 1 << 2047  # 2048 bits, an RSA-size exponent
+    modulus = int.from_bytes(rng.bytes(32), "big") | 1  # 256 bits
+    logging.disable(logging.INFO)
+    try:
+        calculator = Calculator(cache=ResultCache(0))
+        started = time.perf_counter()
+        for _ in range(20):
+            fused = calculator.execute_command('powmod', 7, exponent, modulus)
+        fused_time = (time.perf_counter() - started) / 20
+        started = time.perf_counter()
+        power = calculator.execute_command('power', 7, 1_000_000)  # 2.8 million bits before reducing
+        naive = calculator.execute_command('modulus', power, modulus)
+        naive_time = time.perf_counter() - started
+    finally:
+        logging.disable(logging.NOTSET)
+    print(f"\npowmod: 2048-bit exponent in {fused_time * 1e6:.0f} us; "
+          f"power then modulus: 20-bit exponent in {naive_time * 1e6:.0f} us")
+    assert fused == pow(7, exponent, modulus) and naive == pow(7, 1_000_000, modulus)
+    assert fused_time * 5 < naive_time
+
+
+@pytest.mark.slow
+def test_expensive_power_does_not_block_cheap_commands(history_file, monkeypatch):  # pylint: disable=unused-argument
+    """Check that a power sent to a worker leaves a shared calculator answering, and cheap powers pay nothing."""
+    power = OPERATIONS['power']
+    monkeypatch.setattr(power, "limits", PowerLimits(inline_bits=1_000_000, max_bits=10 ** 9, timeout=60))
+    logging.disable(logging.INFO)
+    try:
+        calculator = Calculator(cache=ResultCache(0))
+
+        def per_call(command, b):
+            started = time.perf_counter()
+            for i in range(20000):
+                calculator.execute_command(command, i, b)
+            return (time.perf_counter() - started) / 20000
+
+        add = min(per_call('add', 2) for _ in range(3))
+        cheap = min(per_call('power', 2) for _ in range(3))
+        results = []
+        worker = threading.Thread(target=lambda: results.append(calculator.execute_command('power', 3, 3_000_000)))
+        started = time.perf_counter()
+        worker.start()
+        answered = 0
+        while worker.is_alive():
+            calculator.execute_command('add', answered, 1)
+            answered += 1
+        offloaded = time.perf_counter() - started
+        started = time.perf_counter()
+        refused = calculator.execute_command('power', 10, 10 ** 9)
+        refused_time = time.perf_counter() - started
+    finally:
+        logging.disable(logging.NOTSET)
+    print(f"\npower: add {add * 1e6:.2f} us, power 2 {cheap * 1e6:.2f} us; {answered} adds answered during a "
+          f"{offloaded:.2f} s worker power; refusal in {refused_time * 1e6:.0f} us")
+    assert not isinstance(results[0], str), results[0]
+    assert results[0] % 10 ** 9 == pow(3, 3_000_000, 10 ** 9)
+    assert refused.startswith("Error: The result would have about")
+    assert cheap < add * 1.5 and refused_time < 0.01
+    assert answered > 100
+
+
+class NoMetrics:
+    """Stand-in for METRICS that records nothing, to measure what recording costs."""
+
+    def observe(self, name, label, seconds):
+        """Ignore a timed call."""
+
+    def count_error(self, command, error_type):
+        """Ignore a failure."""
+
+
+@pytest.mark.slow
+def test_metrics_overhead(history_file, monkeypatch):  # pylint: disable=unused-argument
+    """Check that timing every command and calculation adds little to a cheap command."""
+    import app.calculator  # pylint: disable=import-outside-toplevel
+    from app.metrics import METRICS  # pylint: disable=import-outside-toplevel
+    logging.disable(logging.INFO)
+    try:
+        calculator = Calculator(cache=ResultCache(0))
+
+        def per_call(metrics):
+            monkeypatch.setattr(app.calculator, "METRICS", metrics)
+            started = time.perf_counter()
+            for i in range(20000):
+                calculator.execute_command('add', i, 2)
+            return (time.perf_counter() - started) / 20000
+
+        runs = [(per_call(NoMetrics()), per_call(METRICS)) for _ in range(5)]  # Interleaved against drift
+        without = min(run[0] for run in runs)
+        measured = min(run[1] for run in runs)
+    finally:
+        logging.disable(logging.NOTSET)
+    print(f"\nmetrics: add {without * 1e6:.2f} us without, {measured * 1e6:.2f} us with "
+          f"({measured / without - 1:+.0%})")
+    assert measured < without * 1.5
+
+
+@pytest.mark.slow
+def test_map_over_history(history_file):  # pylint: disable=unused-argument
+    """Check that applying an operation to 10 * BENCHMARK_SIZE stored results takes well under a second."""
+    size = 10 * BENCHMARK_SIZE
+    logging.disable(logging.INFO)
+    try:
+        calculator = Calculator(cache=ResultCache(0))
+        values = np.random.default_rng(3).random(size) * 1000
+        calculator.history.add_batch(CalculationBatch(OPERATIONS['add'], values, np.zeros(size), values))
+        started = time.perf_counter()
+        for i in range(1000):
+            calculator.execute_command('multiply', i, 3)
+        per_command = (time.perf_counter() - started) / 1000
+        timings = {}
+        for line in ("map multiply 3", "map modulus 7 result>=500"):
+            started = time.perf_counter()
+            reply = calculator.execute_line(line)
+            timings[line] = time.perf_counter() - started
+            assert reply.startswith("Added "), reply
+            calculator.execute_command('undo')
+    finally:
+        logging.disable(logging.NOTSET)
+    for line, elapsed in timings.items():
+        print(f"\n{line} over {size + 1000} results: {elapsed * 1000:.1f} ms, "
+              f"about {per_command * size:.1f} s as one command per entry")
+    assert max(timings.values()) < 0.5 * size / 1_000_000 + 0.05
+
+
+def import_times(args, stdin="", env=None):
+    """Run Python with -X importtime and return {module: cumulative microseconds}."""
+    completed = subprocess.run([sys.executable, "-X", "importtime", *args], input=stdin, capture_output=True,
+                               text=True, cwd=PROJECT_ROOT, env={**os.environ, **(env or {})}, check=True)
+    times = {}
+    for line in completed.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, module = line[len("import time:"):].split("|")
+            if cumulative.strip().isdigit():
+                times[module.strip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.slow
+def test_startup_import_budget():
+    """Check that importing main stays within STARTUP_BUDGET_MS and loads neither pandas nor dotenv."""
+    times = import_times(["-c", "import main"])
+    print(f"\nimport main: {times['main'] / 1000:.1f} ms (budget {STARTUP_BUDGET_MS:.0f} ms)")
+    assert "pandas" not in times
+    assert "dotenv" not in times  # Configuration is loaded on first use, not on import
+    assert times["main"] / 1000 < STARTUP_BUDGET_MS
+
+
+@pytest.mark.slow
+def test_single_command_does_not_load_pandas(tmp_path):
+    """Check that a one-off calculation never imports pandas, since it neither saves nor loads a CSV."""
+    times = import_times(["main.py", "--stream"], "add 1 2\n",
+                         {"HISTORY_FILENAME": str(tmp_path / "history.csv"), "LOG_FILE": str(tmp_path / "app.log")})
+    assert "pandas" not in times
+    assert (tmp_path / "history.csv").read_text(encoding="utf-8") == "operand1,operation,operand2,result\n"
+
+
+@pytest.mark.slow
+def test_batch_job_scaling():
+    """Measure batch job throughput from one worker up to every available CPU."""
+    count = min(BENCHMARK_SIZE, 200000)
+    rows = [f"power {i % 97 + 1.5} {i % 13}" for i in range(count)]
+    cpus = available_cpus()
+    worker_counts = sorted({1, *(2 ** k for k in range(1, cpus.bit_length()) if 2 ** k < cpus), cpus})
+    rates = {}
+    for workers in worker_counts:
+        started = time.perf_counter()
+        assert sum(1 for _ in run_batch_job(rows, workers=workers, chunk_size=5000)) == count
+        rates[workers] = count / (time.perf_counter() - started)
+        print(f"\nbatch job, {workers} workers: {rates[workers]:,.0f} rows/s ({rates[workers] / rates[1]:.2f}x)")
+    if cpus < 2:
+        pytest.skip("Scaling needs at least two CPUs.")
+    assert rates[2] > 1.6 * rates[1]  # Near-linear: at least 80% efficiency on two cores
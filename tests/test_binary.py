@@ -0,0 +1,183 @@
+"""
+Tests for the binary history format in app.history.binary, its use by History,
+and the conversion tools in app.history.convert.
+
+Fixtures:
+    history_filename: Names the temporary history file history.bin for conftest's history_file.
+    binary_env: Points HISTORY_FILENAME at a temporary file and selects the binary format.
+"""
+# pylint: disable=redefined-outer-name
+import os
+import numpy as np
+import pytest
+from app.calculation import Calculation, CalculationBatch
+from app.history import History, read_csv_store
+from app.history.binary import MAGIC, open_binary, read_binary_lsn, write_binary
+from app.history.columnar import ColumnarStore, HistoryFileError
+from app.history.convert import binary_to_csv, csv_to_binary, main
+from app.operations.registry import OPERATIONS
+
+
+def executed(command, a, b):
+    """Build and execute a Calculation for an operation command."""
+    calculation = Calculation(OPERATIONS[command], a, b)
+    calculation.execute()
+    return calculation
+
+
+def sample_store():
+    """Build a store with ints, floats, a batch, an exact big result and a missing result."""
+    store = ColumnarStore()
+    store.append(executed("add", 1, 2))
+    store.append(executed("divide", 1.0, 4.0))
+    store.append_batch(OPERATIONS["modulus"], np.array([7.0, 8.0]), np.array([3.0, 0.0]), np.array([1.0, np.nan]))
+    store.append(executed("power", 3, 80))
+    store.append(Calculation(OPERATIONS["subtract"], 5, 1))
+    return store
+
+
+def entries(view):
+    """Return the calculations of a view as strings."""
+    return [repr(calc) for calc in view]
+
+
+@pytest.fixture
+def history_filename():
+    """Name the temporary history file for the binary format."""
+    return "history.bin"
+
+
+@pytest.fixture
+def binary_env(history_file, monkeypatch):
+    """Select the binary history format with the file in a temporary directory."""
+    monkeypatch.setenv("HISTORY_FORMAT", "binary")
+    return history_file
+
+
+def test_round_trip(tmp_path):
+    """Test that every value and type survives writing and memory-mapping a binary file."""
+    path = str(tmp_path / "history.bin")
+    store = sample_store()
+    write_binary(store, path, lsn=7)
+    opened = open_binary(path)
+    assert entries(opened.view()) == entries(store.view())
+    assert isinstance(opened.result, np.memmap) or isinstance(opened.result.base, np.memmap)
+    assert read_binary_lsn(path) == 7
+
+
+def test_open_is_lazy_and_appends_copy(tmp_path):
+    """Test that an opened file is read in place and only copied when appended to."""
+    path = str(tmp_path / "history.bin")
+    write_binary(sample_store(), path)
+    opened = open_binary(path)
+    assert not opened.result.flags.writeable
+    opened.pop()
+    opened.append(executed("multiply", 2, 3))  # Would write into the mapping without a copy
+    assert opened.result.flags.writeable
+    assert entries(opened.view())[-1] == "2 multiplication 3 = 6"
+    assert entries(open_binary(path).view())[-1] == "5 subtraction 1 = Not calculated"  # File unchanged
+
+
+def test_empty_store(tmp_path):
+    """Test that an empty history round-trips."""
+    path = str(tmp_path / "empty.bin")
+    write_binary(ColumnarStore(), path)
+    opened = open_binary(path)
+    assert len(opened) == 0
+    opened.append(executed("add", 1, 1))
+    assert len(opened) == 1
+
+
+@pytest.mark.parametrize("contents", [
+    b"",                                    # Empty file
+    b"NOTHIST!" + b"\0" * 40,               # Wrong magic
+    MAGIC + b"\x09\0\0\0" + b"\0" * 36,     # Unsupported version
+])
+def test_invalid_files(tmp_path, contents):
+    """Test that files that are not binary history files are rejected."""
+    path = tmp_path / "bad.bin"
+    path.write_bytes(contents)
+    with pytest.raises(HistoryFileError, match="is empty or corrupted"):
+        open_binary(str(path))
+
+
+def test_truncated_file(tmp_path):
+    """Test that a file cut short is rejected instead of read past its end."""
+    path = tmp_path / "history.bin"
+    write_binary(sample_store(), str(path))
+    path.write_bytes(path.read_bytes()[:-40])
+    with pytest.raises(HistoryFileError):
+        open_binary(str(path))
+
+
+def test_unknown_operation(tmp_path):
+    """Test that a file naming an unknown operation is rejected."""
+    store = ColumnarStore()
+    store.append(executed("add", 1, 1))
+    store.operations[0] = type("Root", (), {})()
+    path = str(tmp_path / "history.bin")
+    write_binary(store, path)
+    with pytest.raises(HistoryFileError):
+        open_binary(path)
+
+
+def test_history_binary_save_and_load(binary_env):
+    """Test that History saves and loads the binary format when selected."""
+    history = History()
+    assert open_binary(str(binary_env)).size == 0  # Created empty on startup
+    history.add_calculation(executed("add", 2, 2))
+    history.add_calculation(executed("power", 2, 0.5))
+    assert history.save() == f"History saved to {binary_env}."
+    loaded = History()
+    assert loaded.load() == f"History loaded from {binary_env}."
+    assert entries(loaded.get_history()) == ["2 addition 2 = 4", f"2 power 0.5 = {2 ** 0.5}"]
+
+
+def test_history_binary_load_error(binary_env):
+    """Test that History reports a corrupted binary file."""
+    history = History()
+    binary_env.write_bytes(b"garbage")
+    assert history.load() == f"Error: {binary_env} is empty or corrupted."
+
+
+def test_history_binary_journal(binary_env, monkeypatch):
+    """Test that journal mode compacts into and replays from a binary base file."""
+    monkeypatch.setenv("HISTORY_JOURNAL", "true")
+    history = History()
+    history.add_calculation(executed("add", 1, 1))
+    history.add_batch(CalculationBatch(OPERATIONS["add"], np.ones(2), np.ones(2), np.full(2, 2.0)))
+    history.compact(wait=True)
+    assert read_binary_lsn(str(binary_env)) == 2
+    history.add_calculation(executed("add", 3, 3))
+    history.save()
+    assert entries(History().get_history()) == \
+        ["1 addition 1 = 2", "1.0 addition 1.0 = 2.0", "1.0 addition 1.0 = 2.0", "3 addition 3 = 6"]
+
+
+def test_unknown_history_format(history_file, monkeypatch):  # pylint: disable=unused-argument
+    """Test that an unknown HISTORY_FORMAT is rejected."""
+    monkeypatch.setenv("HISTORY_FORMAT", "xml")
+    with pytest.raises(ValueError, match="Unknown history format 'xml'"):
+        History()
+
+
+def test_conversion_round_trip(tmp_path):
+    """Test converting CSV to binary and back."""
+    csv_path, binary_path, back_path = (str(tmp_path / name) for name in ("a.csv", "b.bin", "c.csv"))
+    with open(csv_path, "w", encoding="utf-8") as source:
+        source.write("operand1,operation,operand2,result\n1,Addition,2,3\n2,Power,10,1024\n7,Modulus,3,1\n")
+    assert csv_to_binary(csv_path, binary_path) == 3
+    assert binary_to_csv(binary_path, back_path) == 3
+    assert entries(read_csv_store(back_path).view()) == entries(read_csv_store(csv_path).view())
+
+
+def test_convert_cli(tmp_path, capsys):
+    """Test the conversion command line, including its error path."""
+    csv_path, binary_path = str(tmp_path / "a.csv"), str(tmp_path / "b.bin")
+    with open(csv_path, "w", encoding="utf-8") as source:
+        source.write("operand1,operation,operand2,result\n1,Addition,2,3\n")
+    assert main(["to-binary", csv_path, binary_path]) == 0
+    assert capsys.readouterr().out == f"Converted 1 calculations from {csv_path} to {binary_path}.\n"
+    assert main(["to-csv", csv_path, str(tmp_path / "x.csv")]) == 1  # A CSV is not a binary file
+    assert "is empty or corrupted" in capsys.readouterr().err
+    assert os.path.exists(binary_path)
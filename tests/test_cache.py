@@ -0,0 +1,106 @@
+"""Unit tests for the ResultCache class and cache_key."""
+from fractions import Fraction
+import pytest
+from app.cache import MISSING, ResultCache, cache_key, result_bytes
+from app.calculator import Calculator
+
+
+class FakeClock:
+    """A clock that only moves when told to."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_hit_and_miss_counters():
+    """Test that lookups are counted as hits and misses."""
+    cache = ResultCache(maxsize=4)
+    assert cache.get("a") is MISSING
+    cache.put("a", None)  # None is a valid cached value
+    assert cache.get("a") is None
+    assert cache.stats() == {"size": 1, "maxsize": 4, "ttl": 0, "hits": 1, "misses": 1,
+                             "evictions": 0, "expirations": 0, "hit_rate": 0.5}
+
+
+def test_least_recently_used_is_evicted():
+    """Test that a full cache evicts the entry used longest ago."""
+    cache = ResultCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")  # "b" is now the least recently used
+    cache.put("c", 3)
+    assert cache.get("b") is MISSING
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.evictions == 1
+    assert len(cache) == 2
+
+
+def test_ttl_expiry():
+    """Test that entries older than the TTL are dropped on lookup."""
+    clock = FakeClock()
+    cache = ResultCache(maxsize=2, ttl=10, clock=clock)
+    cache.put("a", 1)
+    clock.now = 9.5
+    assert cache.get("a") == 1
+    clock.now = 10
+    assert cache.get("a") is MISSING
+    assert (cache.expirations, cache.misses, len(cache)) == (1, 1, 0)
+
+
+def test_disabled_cache():
+    """Test that a cache of size 0 stores nothing."""
+    cache = ResultCache(maxsize=0)
+    cache.put("a", 1)
+    assert cache.get("a") is MISSING
+    assert not cache.enabled
+    assert cache.describe() == "Result cache is disabled."
+
+
+def test_clear_and_describe():
+    """Test that clear empties the cache and resets the counters shown by describe."""
+    cache = ResultCache(maxsize=8, ttl=30)
+    cache.put("a", 1)
+    cache.get("a")
+    cache.get("b")
+    assert cache.describe() == ("Result cache: 1 of 8 entries, TTL 30 s, 1 hits, 1 misses, "
+                                "0 evictions, 0 expirations (50.0% hit rate).")
+    cache.clear()
+    assert cache.describe() == ("Result cache: 0 of 8 entries, TTL 30 s, 0 hits, 0 misses, "
+                                "0 evictions, 0 expirations (0.0% hit rate).")
+
+
+def test_large_results_are_not_cached():
+    """Test that exact results over max_result_bytes are not stored, so a few huge powers cannot fill memory."""
+    cache = ResultCache(maxsize=8, max_result_bytes=64)
+    for key, result in [("int", 2 ** 600), ("fraction", Fraction(3 ** 300, 2 ** 200)), ("small", 2 ** 500),
+                        ("float", 1e300)]:
+        cache.put(key, result)
+    assert [cache.get(key) is MISSING for key in ("int", "fraction", "small", "float")] == [True, True, False, False]
+    assert (result_bytes(2 ** 600), result_bytes(Fraction(1, 2 ** 64)), result_bytes(1.5)) == (75, 8, 0)
+
+
+def test_calculator_skips_caching_huge_powers(history_file):  # pylint: disable=unused-argument
+    """Test that an exact power larger than the default limit is calculated again rather than cached."""
+    calculator = Calculator(cache=ResultCache(16))
+    for _ in range(2):
+        assert calculator.execute_command('power', 10, 200_000) == 10 ** 200_000  # About 83 KB
+    assert (calculator.cache.misses, len(calculator.cache)) == (2, 0)
+
+
+def test_negative_settings():
+    """Test that a negative size or TTL is rejected."""
+    with pytest.raises(ValueError, match="must not be negative"):
+        ResultCache(maxsize=-1)
+
+
+@pytest.mark.parametrize("first, second", [
+    ((2, 3), (2.0, 3)),       # Equal values of different types give different result types
+    ((0.0, 1), (-0.0, 1)),    # Signed zeros compare equal but can give different results
+])
+def test_cache_key_distinguishes(first, second):
+    """Test that operands which compare equal but can give different results get different keys."""
+    assert cache_key("power", *first) != cache_key("power", *second)
+    assert cache_key("power", *first) == cache_key("power", *first)
@@ -0,0 +1,82 @@
+"""
+Tests for the Calculation and CalculationBatch classes in the app.calculation module.
+
+Includes a tracemalloc check that keeps Calculation records compact.
+"""
+import tracemalloc
+from fractions import Fraction
+import numpy as np
+import pytest
+from app.calculation import Calculation, CalculationBatch, ExpressionCalculation, format_result
+from app.operations.registry import OPERATIONS, OPERATIONS_BY_NAME
+
+# Upper bound for one Calculation record: 64 bytes of header and slots, plus tracing slack
+MAX_CALCULATION_BYTES = 72
+
+
+def test_execute_and_repr():
+    """Test that a calculation stores its result and describes itself."""
+    calculation = Calculation(OPERATIONS['add'], 2, 3)
+    assert repr(calculation) == "2 addition 3 = Not calculated"
+    assert calculation.execute() == 5
+    assert repr(calculation) == "2 addition 3 = 5"
+
+
+@pytest.mark.parametrize("value, expected", [
+    pytest.param(3 ** 3_000_000, "5.809771e+1431363", id="3**3000000"),
+    pytest.param(-(10 ** 5000), "-1.000000e+5000", id="-10**5000"),
+    pytest.param(Fraction(1, 7 ** 6000), "2.580833e-5071", id="1/7**6000"),
+    (Fraction(-3, 4), "-3/4"),
+    (12, "12"),
+    (0.5, "0.5"),
+])
+def test_format_result(value, expected):
+    """Test that numbers too long for decimal text are approximated and others written as str writes them."""
+    assert format_result(value) == expected
+
+
+def test_repr_of_huge_result():
+    """Test that a calculation with a huge exact result can still describe itself."""
+    calculation = Calculation(OPERATIONS['power'], 3, 3_000_000)
+    calculation.set_result(3 ** 3_000_000)
+    assert repr(calculation) == "3 power 3000000 = 5.809771e+1431363"
+    expression = ExpressionCalculation(OPERATIONS['power'], 10, 5000, "10 ^ 5000")
+    expression.set_result(10 ** 5000)
+    assert repr(expression) == "10 ^ 5000 = 1.000000e+5000"
+
+
+def test_calculation_has_no_instance_dict():
+    """Test that Calculation uses slots instead of a per-instance __dict__."""
+    calculation = Calculation(OPERATIONS['add'], 2, 3)
+    assert not hasattr(calculation, "__dict__")
+    with pytest.raises(AttributeError):
+        calculation.note = "extra"  # pylint: disable=assigning-non-slot
+
+
+def test_calculation_bytes_per_record():
+    """Test that each Calculation record stays under the memory budget."""
+    count = 10000
+    operands = [float(i) for i in range(count)]  # Allocated before tracing starts
+    records = [None] * count
+    tracemalloc.start()
+    try:
+        for i, operand in enumerate(operands):
+            records[i] = Calculation(OPERATIONS['add'], operand, operand)
+        allocated, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert allocated / count <= MAX_CALCULATION_BYTES
+
+
+def test_batch_len_and_repr():
+    """Test that a batch reports its size and operation."""
+    batch = CalculationBatch(OPERATIONS['multiply'], np.ones(4), np.ones(4), np.ones(4))
+    assert len(batch) == 4
+    assert repr(batch) == "batch of 4 multiplication calculations"
+
+
+def test_registry_singletons():
+    """Test that the registry exposes one shared instance per operation under both keys."""
+    assert len(OPERATIONS) == len(OPERATIONS_BY_NAME) == 7
+    for operation in OPERATIONS.values():
+        assert OPERATIONS_BY_NAME[operation.__class__.__name__] is operation
@@ -1,7 +1,11 @@
 """Unit tests for the Calculator class."""
 # pylint: disable=redefined-outer-name
+from fractions import Fraction
+import numpy as np
 import pytest
-from app.calculator import Calculator
+from app.cache import ResultCache
+from app.calculator import Calculator, parse_operand
+from app.metrics import METRICS
 
 @pytest.fixture
 def calculator():
@@ -16,6 +20,10 @@ def calculator():
     ("divide", (1, 0), "Error: Cannot divide by zero"),  # Negative test
     ("power", (2, 3), 8),                        # Positive test for power
     ("modulus", (10, 3), 1),                     # Positive test for modulus
+    ("powmod", (3, 80, 7), 3 ** 80 % 7),          # Positive test for powmod
+    ("powmod", (3, 2, 0), "Error: Cannot divide by zero."),  # Negative test for powmod
+    ("power", (10, 100_000_000), "Error: The result would have about 3.32e+08 bits, more than the limit of "
+                                 "100000000."),  # Refused without calculating
     ("unknown", (1, 2), "Error: Unknown command.")  # Negative test
 ])
 def test_execute_command(calculator, command, args, expected_output):
@@ -37,16 +45,44 @@ def test_show_help(calculator):
         "- divide: Divide the first number by the second\n"
         "- power: Raise the first number to the power of the second\n"
         "- modulus: Find the remainder when the first number is divided by the second\n"
+        "- powmod: Raise the first number to the power of the second, modulo the third\n"
+        "  Whole numbers such as 12 stay exact, 3/4 is a fraction and 0.5 is a float\n"
         "\n"
         "History Commands:\n"
-        "- undo: Undo the last calculation\n"
+        "- undo [n]: Undo the last calculation, or the last n entries\n"
+        "- redo [n]: Redo the last undone entry, or the last n\n"
+        "- checkpoint [name]: Name the current history, or list the checkpoints\n"
+        "- rollback <name>: Return the history to a checkpoint\n"
         "- clear: Clear the calculation history\n"
         "- history: Read the calculation history\n"
+        "- history tail <count>: Read the last entries\n"
+        "- history page <offset> <limit>: Read <limit> entries after skipping <offset>\n"
+        "- history range <first> <last>: Read entries <first> to <last>, counting from 1\n"
+        "- query [operation] [result>=x] [result<=x] [operand=x]: Find matching entries\n"
+        "- stats [operation]: Show the count, sum, mean, min, max and p50/p95/p99 of results\n"
+        "- map <operation> <operand> [result>=x] [result<=x]: Apply an operation to the results as one batch\n"
         "\n"
         "File Commands:\n"
         "- save: Save the current history to a file\n"
         "- load: Load history from a file\n"
         "\n"
+        "Expression Commands:\n"
+        "- eval <expression>: Evaluate an expression such as 3 + 4 * 2 ^ 2\n"
+        "  (a line that does not start with a letter is evaluated as an expression)\n"
+        "\n"
+        "Cache Commands:\n"
+        "- cache: Show result cache statistics\n"
+        "- cache clear: Clear the result cache\n"
+        "\n"
+        "Metrics Commands:\n"
+        "- metrics: Show calls, errors and latency percentiles per command\n"
+        "- metrics prometheus: Show the metrics in Prometheus text format\n"
+        "- metrics reset: Forget the metrics collected so far\n"
+        "\n"
+        "Profiling Commands:\n"
+        "- profile [start|stop]: Profile the commands with cProfile and write a .prof file\n"
+        "- trace-mem [start|stop]: Trace allocations with tracemalloc and write the top sites\n"
+        "\n"
         "General Commands:\n"
         "- help: Display this help message\n"
         "- exit/quit: Exit the calculator"
@@ -69,3 +105,265 @@ def test_invalid_argument_count(calculator):
 
     result = calculator.execute_command('add')  # No arguments
     assert result == "Error: Invalid number of arguments. Please provide two numbers."
+
+    result = calculator.execute_command('powmod', 2, 3)  # powmod takes a modulus too
+    assert result == "Error: Invalid number of arguments. Please provide three numbers."
+    assert calculator.execute_command('add', 1, 2, 3) == "Error: Invalid number of arguments. Please provide two numbers."
+
+
+def test_type_error_keeps_its_message(calculator):
+    """Test that a TypeError raised inside a command is reported as it is, not as a wrong argument count."""
+    assert calculator.execute_command('add', 'x', 2) == \
+        "Error: Invalid types: a is str, b is int. Expected int, float or Fraction."
+
+@pytest.mark.parametrize("word, expected", [
+    ("12", 12),
+    ("-7", -7),
+    ("123456789012345678901234567890", 123456789012345678901234567890),  # Beyond float64 precision
+    ("3/4", Fraction(3, 4)),
+    ("-6/4", Fraction(-3, 2)),
+    ("0.5", 0.5),
+    ("1e3", 1000.0),
+    ("2.0", 2.0),
+])
+def test_parse_operand(word, expected):
+    """Test that whole numbers become ints, fractions become Fractions and everything else a float."""
+    value = parse_operand(word)
+    assert value == expected and type(value) is type(expected)
+
+@pytest.mark.parametrize("word", ["x", "1/0", "1/x", ""])
+def test_parse_operand_invalid(word):
+    """Test that words that are not numbers raise ValueError."""
+    with pytest.raises(ValueError):
+        parse_operand(word)
+
+@pytest.mark.parametrize("line, expected", [
+    ("power 3 80", 3 ** 80),                      # Too large for a float64 to hold exactly
+    ("power 10 400", 10 ** 400),                  # Would overflow a float64
+    ("add 1/2 1/3", Fraction(5, 6)),
+    ("multiply 0.5 3", 1.5),
+    ("powmod 7 65537 2147483647", pow(7, 65537, 2147483647)),
+    ("divide 1/0 2", "Error: Invalid input."),
+])
+def test_exact_command_lines(calculator, line, expected):
+    """Test that typed integer and fraction operands give exact results."""
+    result = calculator.execute_line(line)
+    assert result == expected and type(result) is type(expected)
+
+def test_powmod_recorded_and_cached(calculator):
+    """Test that powmod is recorded with all three operands and served from the cache when repeated."""
+    assert calculator.execute_line("powmod 4 13 497") == 445
+    assert calculator.execute_line("powmod 4 13 497") == 445
+    assert calculator.execute_line("powmod 4 13 496") == 4 ** 13 % 496
+    assert (calculator.cache.hits, calculator.cache.misses) == (1, 2)
+    assert [repr(calc) for calc in calculator.history.get_history()][:2] == ["powmod 4 13 497 = 445"] * 2
+    assert calculator.execute_batch('powmod', [4], [13]) == "Error: powmod takes three operands."
+
+def test_execute_batch(calculator):
+    """Test that execute_batch computes every pair and records the batch as one undo step."""
+    result = calculator.execute_batch('divide', [8, 1, 9], [2, 0, 3])
+    np.testing.assert_array_equal(result[[0, 2]], [4, 3])
+    assert np.isnan(result[1])  # Division by zero gives NaN instead of an error
+    history = calculator.history.get_history()
+    assert len(history) == 3
+    assert repr(history[2]) == "9.0 division 3.0 = 3.0"
+    assert calculator.history.undo() == "Undone: batch of 3 division calculations"
+    assert len(calculator.history.get_history()) == 0
+    assert len(history) == 3  # The earlier snapshot is unaffected
+
+def test_execute_batch_copies_operands(calculator):
+    """Test that the recorded batch does not change when the caller's arrays do."""
+    a = np.array([1.0, 2.0])
+    calculator.execute_batch('add', a, 1)
+    a[0] = 100.0
+    assert [calc.operand1 for calc in calculator.history.get_history()] == [1.0, 2.0]
+    assert [calc.operand2 for calc in calculator.history.get_history()] == [1.0, 1.0]
+
+@pytest.mark.parametrize("command, a, b, expected_output", [
+    ("unknown", [1], [2], "Error: Unknown command."),
+    ("help", [1], [2], "Error: help is not an operation command."),
+    ("add", [1, 2], [1, 2, 3], "Error: Operand arrays have mismatched shapes (2,) and (3,)."),
+])
+def test_execute_batch_errors(calculator, command, a, b, expected_output):
+    """Test that execute_batch returns error messages and records nothing on failure."""
+    assert calculator.execute_batch(command, a, b) == expected_output
+    assert len(calculator.history.get_history()) == 0
+
+def test_cached_result_recorded_in_history(calculator):
+    """Test that a repeated calculation is served from the cache and still recorded in history."""
+    assert calculator.execute_command('power', 2, 10) == 1024
+    assert calculator.execute_command('power', 2, 10) == 1024
+    assert calculator.execute_command('power', 2.0, 10) == 1024.0
+    assert (calculator.cache.hits, calculator.cache.misses) == (1, 2)
+    assert [repr(calc) for calc in calculator.history.get_history()] == \
+        ["2 power 10 = 1024", "2 power 10 = 1024", "2.0 power 10 = 1024.0"]
+
+def test_errors_are_not_cached(calculator):
+    """Test that a failing calculation is neither cached nor recorded."""
+    assert calculator.execute_command('divide', 1, 0) == "Error: Cannot divide by zero"
+    assert calculator.execute_command('divide', 1, 0) == "Error: Cannot divide by zero"
+    assert len(calculator.cache) == 0
+    assert len(calculator.history.get_history()) == 0
+
+def test_cache_settings_from_environment(monkeypatch):
+    """Test that the cache size and TTL are read from the environment."""
+    monkeypatch.setenv("CALCULATOR_CACHE_SIZE", "0")
+    monkeypatch.setenv("CALCULATOR_CACHE_TTL", "5")
+    calculator = Calculator()
+    assert (calculator.cache.maxsize, calculator.cache.ttl) == (0, 5.0)
+    assert calculator.execute_command('add', 1, 2) == 3
+    assert calculator.execute_command('add', 1, 2) == 3
+    assert calculator.cache.hits == 0
+    assert calculator.execute_command('cache') == "Result cache is disabled."
+
+def test_cache_command():
+    """Test the cache command's summary, clear and unknown actions."""
+    calculator = Calculator(cache=ResultCache(maxsize=2))
+    calculator.execute_command('add', 1, 2)
+    calculator.execute_command('add', 1, 2)
+    assert calculator.execute_command('cache') == ("Result cache: 1 of 2 entries, 1 hits, 1 misses, "
+                                                   "0 evictions, 0 expirations (50.0% hit rate).")
+    assert calculator.execute_command('cache', 'clear') == "Result cache cleared."
+    assert len(calculator.cache) == 0
+    assert calculator.execute_command('cache', 'flush') == \
+        "Error: Unknown cache action 'flush'. Use 'cache' or 'cache clear'."
+
+def test_metrics_command(calculator, tmp_path, monkeypatch):
+    """Test that commands, uncached calculations, history saves and loads and their errors are measured."""
+    METRICS.reset()
+    calculator.execute_command('add', 1, 2)
+    calculator.execute_command('add', 1, 2)  # Served from the cache, so calculated once
+    calculator.execute_command('divide', 1, 0)
+    calculator.execute_command('add', 1)
+    calculator.execute_command('launch', 1, 2)
+    calculator.execute_command('save')
+    monkeypatch.setattr(calculator.history, "filename", str(tmp_path / "missing.csv"))
+    calculator.execute_command('load')
+    histograms, errors = METRICS.snapshot()
+    assert {key: sum(counts) for key, (counts, _) in histograms.items()} == {
+        ("calculator_command_seconds", "add"): 3,
+        ("calculator_command_seconds", "divide"): 1,
+        ("calculator_command_seconds", "unknown"): 1,
+        ("calculator_command_seconds", "save"): 1,
+        ("calculator_command_seconds", "load"): 1,
+        ("calculator_operation_seconds", "add"): 1,
+        ("calculator_history_seconds", "save"): 1,
+        ("calculator_history_seconds", "load"): 1,
+    }
+    assert errors == {("divide", "ValueError"): 1, ("add", "InvalidArgumentCount"): 1, ("unknown", "UnknownCommand"): 1,
+                      ("load", "FileNotFoundError"): 1}
+    summary = calculator.execute_command('metrics').splitlines()
+    assert summary[0].startswith("add: 3 calls, 1 errors, mean ") and summary[-1].startswith("errors: ")
+    assert 'calculator_commands_total{command="add"} 3' in calculator.execute_command('metrics', 'prometheus')
+    assert calculator.execute_command('metrics', 'reset') == "Metrics reset."
+    histograms, errors = METRICS.snapshot()
+    assert list(histograms) == [("calculator_command_seconds", "metrics")] and errors == {}  # Only the reset itself
+    assert calculator.execute_command('metrics', 'flush') == \
+        "Error: Unknown metrics action 'flush'. Use 'metrics', 'metrics prometheus' or 'metrics reset'."
+
+def test_undo_redo_and_checkpoint_commands(calculator):
+    """Test the undo, redo, checkpoint and rollback commands with their word arguments."""
+    for value in (1, 2, 3):
+        calculator.execute_command('add', value, 0)
+    assert calculator.execute_command('checkpoint', 'three') == "Checkpoint three set at 3 entries."
+    assert calculator.execute_command('undo', '2') == "Undone 2 entries."
+    assert calculator.execute_command('redo') == "Redone: 2 addition 0 = 2"
+    assert calculator.execute_command('undo') == "Undone: 2 addition 0 = 2"
+    assert calculator.execute_command('rollback', 'three') == "Rolled back to checkpoint three (3 entries)."
+    assert len(calculator.history.get_history()) == 3
+    for args in (('x',), ('0',), ('1', '2')):
+        assert calculator.execute_command('undo', *args) == \
+            "Error: The number of steps must be a positive whole number."
+
+@pytest.mark.parametrize("args, expected", [
+    ((), [1, 2, 3, 4, 5]),
+    (('tail', '2'), [4, 5]),
+    (('tail', '0'), []),
+    (('tail', '9'), [1, 2, 3, 4, 5]),
+    (('page', '1', '2'), [2, 3]),
+    (('page', '4', '10'), [5]),
+    (('range', '2', '4'), [2, 3, 4]),
+    (('range', '0', '1'), [1]),
+])
+def test_history_views(calculator, args, expected):
+    """Test the tail, page and range variants of the history command."""
+    for value in range(1, 6):
+        calculator.execute_command('add', value, 0)
+    assert [calc.result for calc in calculator.execute_command('history', *args)] == expected
+
+@pytest.mark.parametrize("args, expected", [
+    (('tail',), "Error: Use 'history', 'history tail <count>', 'history page <offset> <limit>' "
+                "or 'history range <first> <last>'."),
+    (('last', '3'), "Error: Use 'history', 'history tail <count>', 'history page <offset> <limit>' "
+                    "or 'history range <first> <last>'."),
+    (('tail', '-1'), "Error: History positions must be whole numbers."),
+])
+def test_history_view_errors(calculator, args, expected):
+    """Test that malformed history views return an error message."""
+    assert calculator.execute_command('history', *args) == expected
+
+@pytest.mark.parametrize("terms, expected", [
+    (('add',), [1, 2, 5]),
+    (('result>=2',), [2, 4, 5]),
+    (('result>2', 'result<5'), [4]),
+    (('result=5',), [5]),
+    (('result<=4', 'result>=2'), [2, 4]),
+    (('multiply', 'operand=2'), [4]),
+    (('subtract',), []),
+])
+def test_query_command(calculator, terms, expected):
+    """Test that the query command combines an operation with result and operand terms."""
+    for command, a, b in [('add', 1, 0), ('add', 2, 0), ('multiply', 2, 2), ('add', 5, 0)]:
+        calculator.execute_command(command, a, b)
+    assert [calc.result for calc in calculator.execute_line(f"query {' '.join(terms)}")] == expected
+
+@pytest.mark.parametrize("terms", [(), ('add', 'multiply'), ('sqrt',), ('help',), ('result>=x',),
+                                   ('operand>1',), ('operand=1', 'operand=2')])
+def test_query_command_errors(calculator, terms):
+    """Test that malformed queries return the usage message."""
+    assert calculator.execute_command('query', *terms) == (
+        "Error: Use 'query [operation] [result>=<x>] [result<=<x>] [operand=<x>]', for example 'query add result>=10'.")
+
+@pytest.mark.parametrize("line, expected, added", [
+    ("map multiply 2", "Added 3 multiply results to history.", [2, 4, 10]),
+    ("map multiply 1/2 result>=2 result<5", "Added 1 multiply results to history.", [1]),
+    ("map divide 0 result>1", "Added 2 divide results to history, 2 without one.", [None, None]),
+    ("map add 1 result>5", "No results to map.", []),
+])
+def test_map_command(calculator, line, expected, added):
+    """Test that map applies an operation to the stored results within the bounds, as one undo step."""
+    for a in (1, 2, 5):
+        calculator.execute_command('add', a, 0)
+    assert calculator.execute_line(line) == expected
+    stored = [calc.result for calc in calculator.execute_command('history')][3:]
+    assert [None if np.isnan(result) else result for result in stored] == added
+    if added:
+        calculator.execute_command('undo')
+        assert len(calculator.execute_command('history')) == 3
+
+@pytest.mark.parametrize("args", [(), ('multiply',), ('sqrt', '2'), ('help', '2'), ('multiply', 'x'),
+                                  ('multiply', '2', 'operand=1'), ('multiply', '2', 'result>=x')])
+def test_map_command_usage(calculator, args):
+    """Test that malformed map commands return the usage message."""
+    assert calculator.execute_command('map', *args) == (
+        "Error: Use 'map <operation> <operand> [result>=<x>] [result<=<x>]', for example 'map multiply 2'.")
+
+def test_map_command_errors(calculator):
+    """Test that an operation that cannot run over the results in one pass returns its error."""
+    calculator.execute_command('add', 1, 2)
+    assert calculator.execute_line("map powmod 2") == "Error: powmod takes three operands."
+
+def test_stats_command(calculator):
+    """Test the stats command overall, per operation and after an undo."""
+    assert calculator.execute_command('stats') == "No results in history."
+    for command, a, b in [('add', 1, 2), ('multiply', 3, 4), ('add', 5, 5)]:
+        calculator.execute_command(command, a, b)
+    lines = calculator.execute_command('stats').split("\n")
+    assert lines[0].startswith("all: count 3, sum 25, mean 8.33333, min 3, max 12, p50 10")
+    assert lines[1].startswith("add: count 2, sum 13, mean 6.5, min 3, max 10, p50 3")
+    assert lines[2] == "multiply: count 1, sum 12, mean 12, min 12, max 12, p50 12, p95 12, p99 12"
+    calculator.execute_command('undo')
+    assert calculator.execute_command('stats', 'add') == "add: count 1, sum 3, mean 3, min 3, max 3, p50 3, p95 3, p99 3"
+    assert calculator.execute_command('stats', 'modulus') == "No results in history."
+    assert calculator.execute_command('stats', 'help') == (
+        "Error: Unknown operation 'help'. Use 'stats' or 'stats <operation>'.")
@@ -0,0 +1,214 @@
+"""
+Tests for the ColumnarStore and HistoryView classes in the app.history.columnar module.
+
+Fixtures:
+    store: Provides an empty ColumnarStore for each test.
+"""
+# pylint: disable=redefined-outer-name
+import numpy as np
+import pytest
+from app.calculation import Calculation, ExpressionCalculation
+from app.history.columnar import ColumnarStore
+from app.operations.addition import Addition
+from app.operations.division import Division
+from app.operations.power import Power
+
+
+def make_calculation(operation, a, b):
+    """Build and execute a Calculation."""
+    calculation = Calculation(operation, a, b)
+    calculation.execute()
+    return calculation
+
+
+@pytest.fixture
+def store():
+    """Fixture to provide an empty ColumnarStore."""
+    return ColumnarStore(capacity=2)
+
+
+@pytest.mark.parametrize("operation, a, b", [
+    (Addition(), 5, 3),          # Ints stay ints
+    (Division(), 1.0, 4.0),      # Floats stay floats
+    (Power(), 2, -1),            # Int operands with a float result
+    (Power(), 3, 80),            # Result too large for an exact float64
+])
+def test_round_trip(store, operation, a, b):
+    """Test that a stored calculation comes back with the same values and types."""
+    original = make_calculation(operation, a, b)
+    store.append(original)
+    restored = store.get(0)
+    assert restored.operation is operation
+    assert (restored.operand1, restored.operand2, restored.result) == (original.operand1, original.operand2, original.result)
+    assert [type(v) for v in (restored.operand1, restored.operand2, restored.result)] == \
+        [type(v) for v in (original.operand1, original.operand2, original.result)]
+
+
+def test_round_trip_not_calculated(store):
+    """Test that a calculation without a result is stored without one."""
+    store.append(Calculation(Addition(), 1, 2))
+    assert store.get(0).result is None
+
+
+def test_geometric_growth(store):
+    """Test that columns double in capacity while keeping existing rows."""
+    for i in range(9):
+        store.append(make_calculation(Addition(), i, i))
+    assert len(store.result) == 16
+    assert [calc.result for calc in store.view()] == [2 * i for i in range(9)]
+
+
+def test_shared_operation_codes(store):
+    """Test that one code is assigned per operation type."""
+    store.append(make_calculation(Addition(), 1, 2))
+    store.append(make_calculation(Division(), 1, 2))
+    store.append(make_calculation(Addition(), 3, 4))
+    assert store.codes[:3].tolist() == [0, 1, 0]
+    assert store.operation_names().tolist() == ["Addition", "Division", "Addition"]
+
+
+def test_too_many_operations(store):
+    """Test that more than 256 distinct operation types are rejected."""
+    for i in range(256):
+        store.code_for(type(f"Operation{i}", (Addition,), {})())
+    with pytest.raises(ValueError, match="Too many distinct operations"):
+        store.code_for(Division())
+
+
+def test_batch_and_pop(store):
+    """Test that a batch is appended in one block and popped as a whole."""
+    store.append(make_calculation(Addition(), 1, 1))
+    store.append_batch(Division(), np.array([1.0, 4.0, 9.0]), np.array([1.0, 2.0, 3.0]), np.array([1.0, 2.0, 3.0]))
+    assert len(store) == 4
+    batch = store.pop()
+    assert len(batch) == 3
+    assert batch.result.tolist() == [1.0, 2.0, 3.0]
+    assert store.pop().result == 2
+    assert len(store) == 0
+
+
+def test_pop_drops_exact_values(store):
+    """Test that popping a row also forgets its exact values."""
+    store.append(make_calculation(Power(), 3, 80))
+    assert store.pop().result == 3 ** 80
+    store.append(make_calculation(Addition(), 1, 1))
+    assert store.get(0).result == 2
+
+
+def test_export_column(store):
+    """Test that exported columns keep ints, floats and exact values."""
+    store.append(make_calculation(Addition(), 1, 2))
+    assert store.export_column("result").dtype == np.int64
+    store.append(make_calculation(Division(), 1, 2))
+    assert store.export_column("result").tolist() == [3.0, 0.5]
+    store.append(make_calculation(Power(), 3, 80))
+    assert store.export_column("result").tolist() == [3, 0.5, 3 ** 80]
+
+
+def test_clear(store):
+    """Test that clear removes every row and shrinks the columns."""
+    for i in range(10):
+        store.append(make_calculation(Addition(), i, i))
+    store.clear()
+    assert len(store) == 0
+    assert store.nbytes < 16 * 26 + 1
+    assert store.operation_names().tolist() == []
+
+
+def test_view_indexing_and_slicing(store):
+    """Test that views support negative indexes, slices and steps."""
+    for i in range(5):
+        store.append(make_calculation(Addition(), i, 0))
+    view = store.view()
+    assert view[-1].result == 4
+    assert [calc.result for calc in view[1:3]] == [1, 2]
+    assert [calc.result for calc in view[::2]] == [0, 2, 4]
+    assert len(view[4:2]) == 0
+    assert repr(view[3:]) == "[3 addition 0 = 3, 4 addition 0 = 4]"
+    with pytest.raises(IndexError):
+        view[5]  # pylint: disable=pointless-statement
+
+
+def test_view_follows_store(store):
+    """Test that a full view sees later appends and undos."""
+    view = store.view()
+    store.append(make_calculation(Addition(), 1, 1))
+    assert len(view) == 1
+    store.pop()
+    assert len(view) == 0
+
+
+def test_snapshot_is_isolated_from_later_changes(store):
+    """Test that a snapshot keeps its rows through undo, rewrite and side-table changes."""
+    store.append(make_calculation(Addition(), 1, 1))
+    store.append(make_calculation(Power(), 3, 80))  # Kept in the exact side table
+    snapshot = store.snapshot()
+    store.pop()
+    store.pop()
+    store.append(make_calculation(Division(), 8, 2))  # Rewrites row 0 of the shared columns
+    store.append(make_calculation(Power(), 5, 90))
+    assert len(snapshot) == 2
+    assert [repr(calc) for calc in snapshot.view()] == ["1 addition 1 = 2", f"3 power 80 = {3 ** 80}"]
+    assert [repr(calc) for calc in store.view()] == ["8 division 2 = 4.0", f"5 power 90 = {5 ** 90}"]
+
+
+def test_snapshot_shares_columns_until_written(store):
+    """Test that taking a snapshot copies nothing and plain appends after it do not copy either."""
+    store.append(make_calculation(Addition(), 1, 1))
+    snapshot = store.snapshot()
+    assert np.shares_memory(snapshot.result, store.result)
+    store.append(make_calculation(Addition(), 2, 2))
+    assert snapshot.size == 1 and store.size == 2
+    snapshot.append(make_calculation(Addition(), 3, 3))  # A snapshot is read-only, so appending copies it first
+    assert store.get(1).result == 4 and snapshot.get(1).result == 6
+
+
+def test_released_snapshot_lets_rewrites_skip_the_copy(store):
+    """Test that rows a dropped snapshot read are rewritten in place, while a live snapshot still forces a copy."""
+    store.append(make_calculation(Addition(), 1, 1))
+    store.append(make_calculation(Addition(), 2, 2))
+    kept = store.snapshot(1)
+    released = store.snapshot()
+    columns = store.result
+    store.pop()
+    del released
+    store.append(make_calculation(Addition(), 3, 3))  # Row 1 was read only by the released snapshot
+    assert store.result is columns
+    store.pop()
+    store.pop()
+    store.append(make_calculation(Addition(), 4, 4))  # Row 0 is still read by the live snapshot
+    assert store.result is not columns
+    assert kept.get(0).result == 2 and store.get(0).result == 8
+
+
+def test_partial_snapshot_and_prefix_check(store):
+    """Test snapshots of the leading rows and the starts_with prefix check."""
+    store.append(make_calculation(Addition(), 1, 1))
+    store.append(make_calculation(Power(), 3, 80))
+    store.append_batch(Division(), np.array([4.0]), np.array([2.0]), np.array([2.0]))
+    first = store.snapshot(1)
+    assert first.size == 1 and first.exact_values() == {}
+    assert store.starts_with(first) and store.starts_with(store.snapshot()) and store.starts_with(ColumnarStore())
+    assert not first.starts_with(store)
+    other = ColumnarStore()
+    other.append(make_calculation(Division(), 1, 1))
+    assert not store.starts_with(other)
+    other.pop()
+    other.append(make_calculation(Addition(), 1, 1))
+    assert store.starts_with(other)  # Operation codes are compared by operation type, not by number
+
+
+def test_restore_after_pop(store):
+    """Test that restore puts back popped calculations, side-table values and batches unchanged."""
+    store.append(make_calculation(Power(), 3, 80))
+    expression = ExpressionCalculation(Addition(), 1, 2, "1 + 2")
+    expression.execute()
+    store.append(expression)
+    store.append_batch(Division(), np.array([4.0]), np.array([2.0]), np.array([2.0]))
+    before = [repr(calc) for calc in store.view()]
+    popped = [store.pop() for _ in range(3)]
+    assert store.size == 0 and not store.exact_values() and not store.expressions()
+    for entry in reversed(popped):
+        store.restore(entry)
+    assert [repr(calc) for calc in store.view()] == before
+    assert store.pop().__class__.__name__ == "CalculationBatch"  # Still removed as one block
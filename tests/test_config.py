@@ -0,0 +1,21 @@
+"""Unit tests for one-time configuration loading in app.config."""
+from unittest.mock import patch
+import pytest
+import app.config
+from app.config import env_flag, load_config
+
+
+def test_load_config_once(monkeypatch):
+    """Test that the .env file is read on the first call only."""
+    monkeypatch.setattr(app.config, "_loaded", False)
+    with patch("dotenv.load_dotenv") as load_dotenv:
+        load_config()
+        load_config()
+    load_dotenv.assert_called_once_with()
+
+
+@pytest.mark.parametrize("value, expected", [("1", True), (" Yes ", True), ("on", True), ("0", False), ("", False)])
+def test_env_flag(monkeypatch, value, expected):
+    """Test that env_flag accepts the usual spellings of true, ignoring case and spaces."""
+    monkeypatch.setenv("SOME_FLAG", value)
+    assert env_flag("SOME_FLAG") is expected
@@ -0,0 +1,136 @@
+"""
+Tests for the expression evaluator in app.expression and its use by the Calculator
+and History: parsing, the compiled-expression cache, and recording expressions in
+every history format.
+"""
+import re
+import pytest
+from app.calculation import ExpressionCalculation
+from app.calculator import Calculator
+from app.expression import ExpressionError, compile_expression, tokenize
+from app.history import History
+from app.history.binary import open_binary, write_binary
+from app.history.columnar import ColumnarStore
+from app.operations.registry import OPERATIONS
+
+
+@pytest.mark.parametrize("source, expected", [
+    ("3 + 4 * 2 ^ 2", 19),      # Precedence: ^ before * before +
+    ("(3 + 4) * 2", 14),        # Parentheses
+    ("2 ^ 3 ^ 2", 512),         # ^ is right-associative
+    ("10 - 4 - 3", 3),          # - is left-associative
+    ("-2 ^ 2", -4),             # Unary minus binds looser than ^
+    ("2 ^ -1", 0.5),            # Unary minus in an exponent
+    ("-(1 + 2) * 3", -9),       # Unary minus on a parenthesized expression
+    ("7 % 3 - -1", 2),          # Modulus and a negative literal
+    ("1.5e2 / .5", 300.0),      # Float and exponent literals
+])
+def test_evaluate(source, expected):
+    """Test that expressions follow the usual precedence and associativity."""
+    result = compile_expression(source).evaluate().result
+    assert result == expected
+    assert type(result) is type(expected)
+
+
+@pytest.mark.parametrize("source, message", [
+    ("", "Empty expression."),
+    ("5", "Expression has no operation to calculate."),
+    ("3 +", "Unexpected end of expression."),
+    ("(1 + 2", "Missing ')' for '(' at position 1."),
+    ("1 $ 2", "Unexpected character '$' at position 3."),
+    ("1 2", "Unexpected '2' at position 3."),
+    ("* 3", "Unexpected '*' at position 1."),
+])
+def test_parse_errors(source, message):
+    """Test that invalid expressions are reported with the position of the problem."""
+    with pytest.raises(ExpressionError, match=f"^{re.escape(message)}$"):
+        compile_expression(source)
+
+
+def test_tokenize():
+    """Test that numbers keep their type and symbols their position."""
+    assert tokenize("12 + 1.5*(2)") == [("number", 12, 0), ("symbol", "+", 3), ("number", 1.5, 5), ("symbol", "*", 8),
+                                        ("symbol", "(", 9), ("number", 2, 10), ("symbol", ")", 11)]
+
+
+def test_compiled_expressions_are_cached():
+    """Test that the same source text is parsed only once."""
+    compile_expression.cache_clear()
+    first = compile_expression("1 + 2 * 3")
+    assert compile_expression("1 + 2 * 3") is first
+    assert compile_expression.cache_info().hits == 1
+    assert first.program == (1, 2, 3, OPERATIONS['multiply'], OPERATIONS['add'])
+
+
+def test_evaluation_records_last_step():
+    """Test that the evaluated record holds the final operation and its operands."""
+    calculation = compile_expression(" 3 + 4 * 2 ^ 2 ").evaluate()
+    assert isinstance(calculation, ExpressionCalculation)
+    assert (calculation.operation, calculation.operand1, calculation.operand2) == (OPERATIONS['add'], 3, 16)
+    assert repr(calculation) == "3 + 4 * 2 ^ 2 = 19"
+
+
+def test_calculator_eval(history_file):  # pylint: disable=unused-argument
+    """Test that the eval command records one history entry per expression and reports errors."""
+    calculator = Calculator()
+    assert calculator.execute_command('eval', '3', '+', '4', '*', '2') == 11
+    assert calculator.evaluate("1 / (2 - 2)") == "Error: Cannot divide by zero"
+    assert calculator.evaluate("2 +") == "Error: Unexpected end of expression."
+    assert [repr(calc) for calc in calculator.history.get_history()] == ["3 + 4 * 2 = 11"]
+    assert calculator.execute_command('undo') == "Undone: 3 + 4 * 2 = 11"
+
+
+def test_expressions_saved_to_csv(history_file):
+    """Test that expression text survives a CSV save and load, next to plain calculations."""
+    calculator = Calculator()
+    calculator.evaluate("(1 + 2) * 3")
+    calculator.execute_command('add', 1, 2)
+    calculator.evaluate("2 ^ 10")
+    calculator.execute_command('save')
+    assert history_file.read_text(encoding="utf-8").splitlines()[0] == "operand1,operation,operand2,result,kinds,expression"
+    loaded = History()
+    loaded.load()
+    entries = [repr(calc) for calc in loaded.get_history()]
+    assert entries == ["(1 + 2) * 3 = 9", "1 addition 2 = 3", "2 ^ 10 = 1024"]  # The kinds column keeps ints
+
+
+@pytest.mark.parametrize("history_filename", ["history.bin"])
+def test_expressions_in_binary_and_journal(history_file, monkeypatch):
+    """Test that expression text survives the binary format and journal replay."""
+    monkeypatch.setenv("HISTORY_FORMAT", "binary")
+    monkeypatch.setenv("HISTORY_JOURNAL", "true")
+    history = History()
+    history.add_calculation(compile_expression("6 / 4").evaluate())
+    history.compact(wait=True)
+    history.add_calculation(compile_expression("-(2 + 3)").evaluate())
+    history.save()
+    replayed = History()
+    assert [repr(calc) for calc in replayed.get_history()] == ["6 / 4 = 1.5", "-(2 + 3) = -5"]
+    assert open_binary(str(history_file)).expressions() == {0: "6 / 4"}
+
+
+def test_store_drops_expression_on_pop():
+    """Test that undoing an expression row also drops its text."""
+    store = ColumnarStore()
+    store.append(compile_expression("1 + 1").evaluate())
+    assert repr(store.pop()) == "1 + 1 = 2"
+    store.append(compile_expression("1 - 1").evaluate())
+    assert store.expressions() == {0: "1 - 1"}
+    assert store.copy().expressions() == {0: "1 - 1"}
+
+
+def test_binary_version_1_still_readable(tmp_path):
+    """Test that a version 1 binary file, whose trailer is only the exact-value table, still opens."""
+    store = ColumnarStore()
+    calculation = compile_expression("3 ^ 80").evaluate()
+    store.append(calculation)
+    path = tmp_path / "history.bin"
+    write_binary(store, str(path))
+    data = bytearray(path.read_bytes())
+    trailer_start = data.rindex(b'{"exact"')
+    old_trailer = b'{"0": ["3", "80", "' + str(3 ** 80).encode() + b'"]}'
+    data[8:12] = (1).to_bytes(4, "little")
+    data[32:40] = len(old_trailer).to_bytes(8, "little")
+    path.write_bytes(bytes(data[:trailer_start]) + old_trailer)
+    restored = open_binary(str(path)).get(0)
+    assert (restored.operand1, restored.operand2, restored.result) == (3, 80, 3 ** 80)
@@ -9,13 +9,22 @@ Fixtures:
     history: Provides a fresh instance of the History class for each test.
 """
 # pylint: disable=redefined-outer-name
+import json
+import logging
 import os
+from fractions import Fraction
+import threading
+import tracemalloc
 from unittest.mock import patch, MagicMock
 import pytest
+import numpy as np
 import pandas as pd
 from app.history import History
-from app.calculation import Calculation
+from app.history.columnar import ColumnarStore
+from app.calculator import Calculator
+from app.calculation import Calculation, CalculationBatch
 from app.operations.addition import Addition
+from app.operations.registry import OPERATIONS
 
 # Sample data for testing purposes
 sample_calculation = Calculation(Addition(), 5, 3)
@@ -26,9 +35,10 @@ HISTORY_FILE_PATH = "history.csv"
 
 # Function to ensure the history file is clean before each test
 def clean_history_file():
-    """Remove the history file if it exists to ensure a clean slate for each test."""
-    if os.path.exists(HISTORY_FILE_PATH):
-        os.remove(HISTORY_FILE_PATH)
+    """Remove the history and checkpoint files if they exist to ensure a clean slate for each test."""
+    for path in (HISTORY_FILE_PATH, f"{HISTORY_FILE_PATH}.checkpoints"):
+        if os.path.exists(path):
+            os.remove(path)
 
 
 @pytest.fixture
@@ -111,10 +121,9 @@ def test_load_history_success(history_fixture):
     """Test case for loading the history successfully."""
     with patch("os.path.exists", return_value=True):
         with patch(
-            "pandas.read_csv", 
-            return_value=MagicMock(empty=False,
-               iterrows=MagicMock(return_value=[(0, {"operand1": 5,
-                    "operation": "Addition", "operand2": 3, "result": 8})]))):
+            "pandas.read_csv",
+            return_value=pd.DataFrame({"operand1": [5], "operation": ["Addition"],
+                                       "operand2": [3], "result": [8]})):
             history_fixture.load()
             assert len(history_fixture.get_history()) == 1  # One calculation should be loaded
 
@@ -130,9 +139,8 @@ def test_load_exception_handling(history_fixture):
 def test_load_unknown_operation(history_fixture):
     """Test case for handling unknown operations during load."""
     # Mock the pandas read_csv method to return a row with an unknown operation
-    with patch("pandas.read_csv", return_value=MagicMock(empty=False,
-        iterrows=MagicMock(return_value=[(0, {"operand1": 5,
-            "operation": "UnknownOperation", "operand2": 3, "result": 8})]))):
+    with patch("pandas.read_csv", return_value=pd.DataFrame({"operand1": [5],
+            "operation": ["UnknownOperation"], "operand2": [3], "result": [8]})):
 
         # Catch the log output
         with patch('app.history.logger') as mock_logger:
@@ -152,6 +160,14 @@ def test_undo_no_history(history_fixture):
     undo_msg = history_fixture.undo()
     assert undo_msg == "No history to undo."  # Ensure the correct message is returned
 
+
+def test_undo_and_redo_with_nothing_to_do_log_warnings(history_fixture, caplog):
+    """Test the warnings logged for an undo or redo with nothing to undo or redo."""
+    with caplog.at_level(logging.WARNING, logger="app.history"):
+        history_fixture.undo()
+        history_fixture.redo()
+    assert caplog.messages == ["Attempted to undo with nothing to undo.", "Attempted to redo with nothing to redo."]
+
 # Test case to ensure the correct handling of ValueError during history loading
 def test_load_history_invalid_data():
     """Prepare mock data for an invalid CSV (non-numeric values)"""
@@ -172,11 +188,441 @@ def test_load_history_invalid_data():
         # Capture the output from the load method
         result = history.load()
 
-        # Check if the appropriate error message is returned
-        assert result == "Error: Invalid data in history.csv."
+        # Check that every invalid row is reported at once
+        assert result == "Error: Invalid data in history.csv at lines 2, 3, 4."
 
-        # Additionally, we can check that logging occurred
+        # Additionally, we can check that a single error was logged for all rows
         with patch('app.history.logger.error') as mock_error:
             history.load()
-            expected_error_message = "Error processing row: could not convert string to float: 'a'"
-            mock_error.assert_called_with(expected_error_message)
+            expected_error_message = "Error processing rows at lines 2, 3, 4: invalid numeric data."
+            mock_error.assert_called_once_with(expected_error_message)
+
+
+def test_add_batch_undo_and_save(history_fixture):
+    """Test that a batch is one undo step and is saved as one row per calculation."""
+    batch = CalculationBatch(Addition(), np.array([1.0, 2.0]), np.array([3.0, 4.0]), np.array([4.0, 6.0]))
+    history_fixture.add_calculation(sample_calculation)
+    history_fixture.add_batch(batch)
+    history_fixture.add_calculation(sample_calculation)
+    history_fixture.save()
+
+    saved = pd.read_csv(history_fixture.filename)
+    assert saved["result"].tolist() == [8, 4, 6, 8]
+    assert saved["operation"].tolist() == ["Addition"] * 4
+
+    history_fixture.undo()
+    assert history_fixture.undo() == f"Undone: {batch}"
+    assert len(history_fixture.get_history()) == 1
+    assert history_fixture.redo() == f"Redone: {batch}"
+    assert len(history_fixture.get_history()) == 3
+
+
+def test_history_bytes_per_stored_calculation(history_fixture):
+    """Test that each calculation stored in History stays under the memory budget."""
+    count = 10000
+    calculations = [Calculation(Addition(), float(i), 1.5) for i in range(count)]
+    for calculation in calculations:
+        calculation.execute()
+    with patch("app.history.logger.info", lambda *args: None):  # Keep log records out of the measurement
+        tracemalloc.start()
+        try:
+            for calculation in calculations:
+                history_fixture.add_calculation(calculation)
+            allocated, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    assert allocated / count <= 64  # 26 bytes of columns per row, at most doubled by growth
+
+
+def test_history_shares_operation_singletons(history_fixture):
+    """Test that loaded calculations use the same operation instances as the calculator."""
+    calculator = Calculator()
+    calculator.execute_command("power", 2, 3)
+    calculator.history.filename = history_fixture.filename
+    calculator.history.save()
+    history_fixture.load()
+    assert history_fixture.get_history()[0].operation is calculator.commands["power"]
+
+
+def test_load_every_operation(history_fixture):
+    """Test that every operation, including power and modulus, round-trips through save and load."""
+    calculator = Calculator()
+    for command in ("add", "subtract", "multiply", "divide", "power", "modulus"):
+        calculator.execute_command(command, 7, 2)
+    calculator.history.filename = history_fixture.filename
+    calculator.history.save()
+    assert history_fixture.load() == f"History loaded from {history_fixture.filename}."
+    assert [repr(calc) for calc in history_fixture.get_history()] == [
+        "7 addition 2 = 9", "7 subtraction 2 = 5", "7 multiplication 2 = 14",
+        "7 division 2 = 3.5", "7 power 2 = 49", "7 modulus 2 = 1"]
+    assert history_fixture.undo() == "Undone: load"  # Undo brings back the history from before the load
+    assert len(history_fixture.get_history()) == 0
+
+
+def test_load_reports_every_bad_row(history_fixture):
+    """Test that all invalid rows are found in one pass and the history is left unchanged."""
+    history_fixture.add_calculation(sample_calculation)
+    rows = pd.DataFrame({"operand1": ["x"] * 12 + [1], "operation": ["Addition"] * 12 + [None],
+                         "operand2": [1] * 13, "result": [2] * 13})
+    with patch("pandas.read_csv", return_value=rows):
+        assert history_fixture.load() == \
+            "Error: Invalid data in history.csv at lines 2, 3, 4, 5, 6, 7, 8, 9, 10, 11 and 3 more."
+    assert list(map(repr, history_fixture.get_history())) == [repr(sample_calculation)]
+
+
+def test_load_several_unknown_operations(history_fixture):
+    """Test that every unknown operation name is reported together."""
+    rows = pd.DataFrame({"operand1": [1, 2, 3], "operation": ["Root", "Addition", "Log"],
+                         "operand2": [1, 2, 3], "result": [1, 2, 3]})
+    with patch("pandas.read_csv", return_value=rows):
+        assert history_fixture.load() == "Error: Operations Root, Log not recognized."
+
+
+def test_concurrent_use(history_fixture):
+    """Stress one History from many threads: appends, undos, clears, loads and snapshots."""
+    adders, per_thread = 4, 2000
+    errors = []
+
+    def add(thread):
+        for i in range(per_thread):
+            calculation = Calculation(Addition(), thread, i)
+            calculation.set_result(thread + i)
+            history_fixture.add_calculation(calculation)
+
+    def check_snapshots():
+        for _ in range(50):
+            snapshot = history_fixture.get_history()
+            entries = list(snapshot)
+            if len(entries) != len(snapshot) or any(calc.result != calc.operand1 + calc.operand2 for calc in entries):
+                errors.append(entries)
+
+    def undo_and_reload():
+        for _ in range(20):
+            history_fixture.undo()
+            history_fixture.save()
+            assert history_fixture.load().startswith("History loaded")
+
+    threads = [threading.Thread(target=add, args=(thread,)) for thread in range(adders)]
+    threads += [threading.Thread(target=check_snapshots), threading.Thread(target=undo_and_reload)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert len(history_fixture.get_history()) <= adders * per_thread
+
+    history_fixture.clear()
+    threads = [threading.Thread(target=add, args=(thread,)) for thread in range(adders)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    entries = list(history_fixture.get_history())
+    assert len(entries) == adders * per_thread
+    assert sorted((calc.operand1, calc.operand2) for calc in entries) == [
+        (thread, i) for thread in range(adders) for i in range(per_thread)]
+
+
+def test_snapshot_survives_clear_and_load(history_fixture):
+    """Test that clear and load swap in a new history without changing earlier snapshots."""
+    history_fixture.add_calculation(sample_calculation)
+    history_fixture.save()
+    snapshot = history_fixture.get_history()
+    history_fixture.clear()
+    assert len(history_fixture.get_history()) == 0
+    history_fixture.load()
+    history_fixture.add_calculation(sample_calculation)
+    assert len(snapshot) == 1 and len(history_fixture.get_history()) == 2
+
+
+def add_numbers(history, *values):
+    """Add one 'value + 0' calculation per value."""
+    for value in values:
+        calculation = Calculation(Addition(), value, 0)
+        calculation.set_result(value)
+        history.add_calculation(calculation)
+
+
+def results(history):
+    """Return the stored results in order."""
+    return [calc.result for calc in history.get_history()]
+
+
+def saved_checkpoints(history):
+    """Return the checkpoint sizes in the checkpoint file."""
+    with open(history.checkpoint_path, encoding="utf-8") as checkpoint_file:
+        return json.load(checkpoint_file)
+
+
+def test_undo_and_redo_many_steps(history_fixture):
+    """Test undo N and redo N, and that a new calculation discards what could be redone."""
+    add_numbers(history_fixture, 1, 2, 3, 4)
+    assert history_fixture.undo(3) == "Undone 3 entries."
+    assert results(history_fixture) == [1]
+    assert history_fixture.redo() == "Redone: 2 addition 0 = 2"
+    assert history_fixture.redo(5) == "Redone 2 entries."
+    assert results(history_fixture) == [1, 2, 3, 4]
+    assert history_fixture.redo() == "Nothing to redo."
+    assert history_fixture.undo(10) == "Undone 4 entries."
+    add_numbers(history_fixture, 9)
+    assert history_fixture.redo() == "Nothing to redo."
+    with pytest.raises(ValueError):
+        history_fixture.undo(0)
+    with pytest.raises(ValueError):
+        history_fixture.redo(0)
+
+
+def test_undo_clear_and_load(history_fixture):
+    """Test that clear and load can be undone and redone as single steps."""
+    add_numbers(history_fixture, 1, 2)
+    history_fixture.save()
+    history_fixture.clear()
+    add_numbers(history_fixture, 5)
+    assert history_fixture.undo(2) == "Undone 2 entries."
+    assert results(history_fixture) == [1, 2]
+    assert history_fixture.redo() == "Redone: clear"
+    assert results(history_fixture) == []
+    history_fixture.load()
+    assert results(history_fixture) == [1, 2]
+    assert history_fixture.undo() == "Undone: load"
+    assert results(history_fixture) == []
+    assert history_fixture.undo() == "Undone: clear"
+    assert results(history_fixture) == [1, 2]
+
+
+def test_checkpoints_and_rollback(history_fixture):
+    """Test naming checkpoints, rolling back to them, and undoing a rollback."""
+    assert history_fixture.checkpoint() == "No checkpoints."
+    add_numbers(history_fixture, 1, 2)
+    assert history_fixture.checkpoint("before") == "Checkpoint before set at 2 entries."
+    add_numbers(history_fixture, 3)
+    history_fixture.undo(3)
+    add_numbers(history_fixture, 7)  # Overwrites rows the checkpoint still holds
+    assert history_fixture.checkpoint() == "Checkpoints: before (2 entries)"
+    assert history_fixture.rollback("before") == "Rolled back to checkpoint before (2 entries)."
+    assert results(history_fixture) == [1, 2]
+    add_numbers(history_fixture, 4)
+    assert history_fixture.rollback("before") == "Rolled back to checkpoint before (2 entries)."
+    assert results(history_fixture) == [1, 2]  # The checkpoint is unchanged by work after a rollback
+    assert history_fixture.undo() == "Undone: rollback to before"
+    assert results(history_fixture) == [1, 2, 4]
+    assert history_fixture.rollback("missing") == "Error: Unknown checkpoint 'missing'."
+
+
+def test_checkpoints_survive_save_and_load(history_fixture):
+    """Test that checkpoints still at the start of the saved history are restored by load."""
+    add_numbers(history_fixture, 1, 2)
+    history_fixture.checkpoint("kept")
+    history_fixture.undo()
+    add_numbers(history_fixture, 5)
+    history_fixture.checkpoint("current")
+    history_fixture.rollback("kept")
+    history_fixture.checkpoint("stale")  # [1, 2] is no longer a prefix of the saved [1, 5]
+    history_fixture.undo()
+    history_fixture.save()
+
+    restarted = History()
+    assert restarted.load() == f"History loaded from {restarted.filename}."
+    assert restarted.checkpoint() == "Checkpoints: current (2 entries)"
+    add_numbers(restarted, 8)
+    restarted.rollback("current")
+    assert results(restarted) == [1, 5]
+
+    with open(restarted.checkpoint_path, "w", encoding="utf-8") as checkpoint_file:
+        checkpoint_file.write("not json")
+    assert History().load() == f"History loaded from {restarted.filename}."  # An unreadable file is ignored
+    os.remove(restarted.checkpoint_path)
+
+
+def test_checkpoints_follow_undo_redo_and_swaps(history_fixture):
+    """Test that a checkpoint is saved while its rows lead the history, through undo, redo, clear and rollback."""
+    add_numbers(history_fixture, 1, 2)
+    history_fixture.checkpoint("two")
+    history_fixture.undo()
+    history_fixture.redo()  # Brings back the same row, so the checkpoint is still a prefix
+    history_fixture.save()
+    assert saved_checkpoints(history_fixture) == {"two": 2}
+    history_fixture.clear()
+    history_fixture.save()
+    assert saved_checkpoints(history_fixture) == {}
+    history_fixture.undo()  # Brings back the history the checkpoint is a prefix of
+    history_fixture.save()
+    assert saved_checkpoints(history_fixture) == {"two": 2}
+    history_fixture.undo()
+    add_numbers(history_fixture, 9)  # Replaces the undone row for good
+    history_fixture.checkpoint("nine")
+    history_fixture.rollback("two")
+    history_fixture.save()
+    assert saved_checkpoints(history_fixture) == {"two": 2}
+    history_fixture.undo()
+    history_fixture.save()
+    assert saved_checkpoints(history_fixture) == {"nine": 2}
+
+
+def test_journal_save_writes_only_changed_checkpoints(history_file, monkeypatch):  # pylint: disable=unused-argument
+    """Test that a journal save takes no snapshot and writes the checkpoint file only when the checkpoints change."""
+    monkeypatch.setenv("HISTORY_JOURNAL", "true")
+    history = History()
+    add_numbers(history, 1)
+    history.checkpoint("one")
+    with patch("app.history.json.dump", wraps=json.dump) as dump:
+        with patch.object(ColumnarStore, "snapshot") as snapshot, \
+                patch.object(ColumnarStore, "starts_with") as starts_with:
+            history.save()
+            add_numbers(history, 2)
+            history.save()
+        assert dump.call_count == 1 and not snapshot.called and not starts_with.called
+        history.checkpoint("two")
+        history.save()
+        assert dump.call_count == 2
+    assert saved_checkpoints(history) == {"one": 1, "two": 2}
+
+
+def test_get_history_slices(history_fixture):
+    """Test that get_history takes slice positions and returns a snapshot of just those entries."""
+    add_numbers(history_fixture, 1, 2, 3, 4)
+    assert [calc.result for calc in history_fixture.get_history(-2)] == [3, 4]
+    assert [calc.result for calc in history_fixture.get_history(1, 3)] == [2, 3]
+    assert [calc.result for calc in history_fixture.get_history(stop=1)] == [1]
+    tail = history_fixture.get_history(-1)
+    history_fixture.undo()
+    assert [calc.result for calc in tail] == [4]
+
+
+def test_query_follows_undo_and_redo(history_fixture):
+    """Test that queries see adds, undo, redo and clear, and return a snapshot of their matches."""
+    add_numbers(history_fixture, 1, 5, 9)
+    matches = history_fixture.query(min_result=4)
+    assert [calc.result for calc in matches] == [5, 9]
+    history_fixture.undo()
+    add_numbers(history_fixture, 2)
+    assert [calc.result for calc in matches] == [5, 9]  # Taken before the undo
+    assert [calc.result for calc in history_fixture.query(min_result=4)] == [5]
+    history_fixture.undo()
+    history_fixture.redo()
+    assert [calc.result for calc in history_fixture.query(Addition(), max_result=2)] == [1, 2]
+    history_fixture.clear()
+    assert len(history_fixture.query(Addition())) == 0
+
+
+def test_stats_follow_undo_clear_and_load(history_fixture):
+    """Test that statistics follow adds, undo, redo, clear, rollback and load."""
+    add_numbers(history_fixture, 1, 5, 9)
+    assert history_fixture.stats()["max"] == 9 and history_fixture.stats()["sum"] == 15
+    history_fixture.checkpoint("three")
+    history_fixture.undo(2)
+    assert history_fixture.stats()["max"] == 1 and history_fixture.stats(Addition())["count"] == 1
+    history_fixture.redo()
+    assert history_fixture.stats()["sum"] == 6
+    history_fixture.save()
+    history_fixture.clear()
+    assert history_fixture.stats()["count"] == 0
+    history_fixture.undo()
+    assert history_fixture.stats()["sum"] == 6
+    history_fixture.rollback("three")
+    assert history_fixture.stats()["mean"] == 5
+    history_fixture.load()
+    assert history_fixture.stats()["max"] == 5
+
+
+# Floats that need all 17 significant digits, which a fast text parser can read back 1 ulp off
+FULL_PRECISION = [11.087988226897037, 0.1 + 0.2, 1 / 3, 2 / 3 * 1e-300, 5e-324, 1.7976931348623157e308]
+
+
+def test_floats_round_trip_through_csv(history_fixture):
+    """Test that saving and loading a CSV history gives back every float bit for bit."""
+    for value in FULL_PRECISION:
+        calculation = Calculation(Addition(), value, 0.0)
+        calculation.execute()
+        history_fixture.add_calculation(calculation)
+    history_fixture.save()
+    history_fixture.load()
+    assert [calc.operand1 for calc in history_fixture.get_history()] == FULL_PRECISION
+
+
+def test_apply_adds_one_batch(history_fixture):
+    """Test that apply runs an operation over the stored results, honours the filter and is one undo step."""
+    add_numbers(history_fixture, 1, 5, 9, 10 ** 400, Fraction(7, 4))  # The huge result has no float, so it is skipped
+    batch = history_fixture.apply(OPERATIONS['multiply'], 2)
+    assert batch.operand1.tolist() == [1, 5, 9, 1.75] and batch.result.tolist() == [2, 10, 18, 3.5]
+    assert results(history_fixture)[5:] == [2, 10, 18, 3.5]
+    assert history_fixture.undo() == f"Undone: {batch}"
+    batch = history_fixture.apply(OPERATIONS['modulus'], 0, where=lambda values: values > 4)
+    assert batch.operand1.tolist() == [5, 9] and np.isnan(batch.result).all()  # Operation semantics: NaN, no raise
+    assert len(history_fixture.get_history()) == 7
+    assert len(history_fixture.apply(OPERATIONS['add'], 1, where=lambda values: values > 100)) == 0
+    assert len(history_fixture.get_history()) == 7  # Nothing selected, nothing added
+
+
+def test_apply_errors(history_fixture):
+    """Test that apply reports operations it cannot run in one pass and filters of the wrong shape."""
+    add_numbers(history_fixture, 1, 2)
+    with pytest.raises(TypeError, match="powmod takes three operands"):
+        history_fixture.apply(OPERATIONS['powmod'], 2)
+    with pytest.raises(ValueError, match="mask of shape"):
+        history_fixture.apply(OPERATIONS['add'], 1, where=lambda values: values[:1] > 0)
+    assert len(history_fixture.get_history()) == 2
+
+
+def values(history):
+    """Return the operands and result of every entry with their types."""
+    return [(calc.operand1, type(calc.operand1), calc.operand2, type(calc.operand2), calc.result, type(calc.result))
+            for calc in history.get_history()]
+
+
+@pytest.mark.parametrize("history_filename", ["history"])
+@pytest.mark.parametrize("history_format, journal", [("csv", False), ("binary", False), ("csv", True)])
+def test_exact_values_survive_save_and_load(history_file, monkeypatch, history_format,  # pylint: disable=unused-argument
+                                            journal):
+    """Test that ints, big ints, fractions, powmod entries and missing results come back exactly."""
+    monkeypatch.setenv("HISTORY_FORMAT", history_format)
+    monkeypatch.setenv("HISTORY_JOURNAL", "true" if journal else "false")
+    calculator = Calculator()
+    for line in ("add 1 2", "power 3 80", "add 1/2 1/3", "multiply 0.5 3", "powmod 7 65537 2147483647",
+                 "power 2 20000", "divide 2/1 1"):  # 2 ** 20000 has too many digits to write in decimal
+        calculator.execute_line(line)
+    calculator.history.add_calculation(Calculation(Addition(), 4, 5))  # Never executed, so no result
+    expected = values(calculator.history)
+    assert calculator.history.save().startswith("History saved")
+
+    loaded = History()
+    if not journal:
+        assert loaded.load() == f"History loaded from {loaded.filename}."
+    assert values(loaded) == expected
+    assert repr(loaded.get_history()[4]) == f"powmod 7 65537 2147483647 = {pow(7, 65537, 2147483647)}"
+    assert loaded.query(min_result=3 ** 79).rows.tolist() == [1, 5]
+    assert loaded.stats(Addition())["count"] == 2
+
+
+@pytest.mark.parametrize("history_format", ["csv", "binary"])
+def test_complex_results_survive_save_and_load(history_file, monkeypatch, history_format):
+    """Test that a complex result, which no float column can hold, is saved exactly and loads back."""
+    monkeypatch.setenv("HISTORY_FORMAT", history_format)
+    calculator = Calculator()
+    calculator.execute_line("add 1 2")
+    assert calculator.execute_line("power -8 0.5") == (-8) ** 0.5
+    assert calculator.history.save() == f"History saved to {history_file}."
+    if history_format == "csv":
+        saved = pd.read_csv(history_file)
+        assert saved["result"].isna().tolist() == [False, True]  # No readable approximation
+        assert saved["exact"][1] == f"-8 0.5 {(-8) ** 0.5!r}"
+    loaded = History()
+    assert loaded.load() == f"History loaded from {history_file}."
+    assert [calc.result for calc in loaded.get_history()] == [3, (-8) ** 0.5]
+
+
+def test_exact_csv_columns(history_file):
+    """Test the kinds and exact columns of a CSV file and that bad values in them are reported."""
+    path = history_file
+    calculator = Calculator()
+    calculator.execute_line("power 3 80")
+    calculator.execute_line("add 1/2 1/4")
+    calculator.history.save()
+    saved = pd.read_csv(path)
+    assert saved["result"].tolist() == [3.0 ** 80, 0.75]  # Readable approximations
+    assert saved["exact"].tolist() == [f"3 80 {3 ** 80}", "1/2 1/4 3/4"]
+    assert saved["kinds"].tolist() == [7, 0]
+
+    path.write_text("operand1,operation,operand2,result,kinds,exact\n1,Addition,2,3,7,\n1,Addition,2,3,99,\n"
+                    "1,Addition,2,3,,\n1,Addition,2,3,0,1 2\n1,Addition,2,3,0,1/0 1 1\n", encoding="utf-8")
+    assert History().load() == f"Error: Invalid data in {path} at lines 3, 4, 5, 6."
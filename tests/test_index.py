@@ -0,0 +1,133 @@
+"""
+Tests for the query indexes in the app.history.index module and ColumnarStore.select.
+
+The indexes are checked against a linear scan of the same store after every kind of
+change: single appends, batches, mixed-operation extends, undo, redo and clear.
+"""
+# pylint: disable=redefined-outer-name
+import numpy as np
+import pytest
+from app.calculation import Calculation
+from app.history import index
+from app.history.columnar import ColumnarStore, RowsView
+from app.history.index import OperationBuckets, SortedIndex
+from app.operations.addition import Addition
+from app.operations.multiplication import Multiplication
+from app.operations.power import Power
+from app.operations.subtraction import Subtraction
+
+OPERATIONS = [Addition(), Subtraction(), Multiplication()]
+
+
+def scan(store, operation=None, min_result=None, max_result=None, operand=None):
+    """Return the rows select should find, by checking every row in Python."""
+    rows = []
+    for row in range(store.size):
+        calculation = store.get(row)
+        if operation is not None and type(calculation.operation) is not type(operation):
+            continue
+        if (min_result is not None or max_result is not None) and calculation.result is None:
+            continue
+        if min_result is not None and calculation.result < min_result:
+            continue
+        if max_result is not None and calculation.result > max_result:
+            continue
+        if operand is not None and operand not in (calculation.operand1, calculation.operand2):
+            continue
+        rows.append(row)
+    return rows
+
+
+def check_queries(store):
+    """Check a spread of queries against the linear scan."""
+    for operation in [None, *OPERATIONS, Power()]:
+        for bounds in [(None, None), (10, None), (None, 10), (5, 25), (30, 30), (100, 0)]:
+            for operand in [None, 3.0]:
+                expected = scan(store, operation, *bounds, operand)
+                assert store.select(operation, *bounds, operand).tolist() == expected
+
+
+@pytest.fixture
+def small_merges(monkeypatch):
+    """Fixture to merge new rows into the sorted index after only a few appends."""
+    monkeypatch.setattr(index, "_MIN_UNMERGED_ROWS", 4)
+
+
+def test_select_tracks_every_change(small_merges):
+    """Test that queries stay exact while rows are appended, undone, redone and cleared."""
+    rng = np.random.default_rng(7)
+    store = ColumnarStore(capacity=2)
+    store.select()  # Build the indexes on the empty store, so every later change goes through them
+    for step in range(300):
+        action = rng.integers(6)
+        if action == 0 and store.size:
+            entry = store.pop()
+            if rng.integers(2):
+                store.restore(entry)
+        elif action == 1:
+            count = int(rng.integers(1, 6))
+            values = rng.integers(0, 20, count).astype(np.float64)
+            store.append_batch(OPERATIONS[step % 3], values, values, values * 2)
+        elif action == 2:
+            codes = np.array([store.code_for(OPERATIONS[code]) for code in rng.integers(0, 3, 4)], dtype=np.uint8)
+            values = rng.integers(0, 20, 4).astype(np.float64)
+            store.extend(codes, values, values + 1, values * 3)
+        else:
+            a, b = (int(value) for value in rng.integers(0, 10, 2))
+            calculation = Calculation(OPERATIONS[int(rng.integers(3))], a, b)
+            calculation.execute()
+            store.append(calculation)
+        if step % 10 == 0:
+            check_queries(store)
+    check_queries(store)
+    store.clear()
+    assert store.select().tolist() == []
+
+
+def test_select_builds_indexes_for_existing_rows(small_merges):
+    """Test that the first query indexes rows stored before it, including exact-value rows."""
+    store = ColumnarStore()
+    for operation, a, b in [(Addition(), 1, 2), (Power(), 3, 80), (Subtraction(), 3, 3), (Power(), 2, 3),
+                            (Addition(), 3, 40)]:
+        calculation = Calculation(operation, a, b)
+        calculation.execute()
+        store.append(calculation)
+    assert store.select(Power()).tolist() == [1, 3]
+    assert store.select(min_result=3 ** 79).tolist() == [1]  # The result only the side table holds exactly
+    assert store.select(operand=3).tolist() == [1, 2, 3, 4]
+    assert store.select(Power(), operand=80).tolist() == [1]
+    assert store.select(Multiplication()).tolist() == []
+    check_queries(store)
+
+
+def test_rows_view_reads_matches_lazily():
+    """Test that a RowsView lists the chosen rows and slices to a narrower view."""
+    store = ColumnarStore()
+    store.append_batch(Addition(), np.arange(5.0), np.zeros(5), np.arange(5.0))
+    view = RowsView(store, store.select(min_result=1, max_result=3))
+    assert len(view) == 3 and view[0].result == 1.0 and view[-1].result == 3.0
+    assert isinstance(view[1:], RowsView) and view[1:].rows.tolist() == [2, 3]
+    assert repr(view[:1]) == repr([store.get(1)])
+
+
+def test_operation_buckets():
+    """Test that buckets keep rows in order and truncate per bucket."""
+    buckets = OperationBuckets(np.array([1, 0, 1], dtype=np.uint8))
+    buckets.add(3, 4, count=2)
+    buckets.add(5, np.array([0, 4], dtype=np.uint8))
+    assert buckets.rows(4).tolist() == [3, 4, 6] and buckets.rows(1).tolist() == [0, 2]
+    assert buckets.count(3) == 0 and buckets.rows(9).tolist() == [] and buckets.count(9) == 0
+    buckets.truncate(4)
+    assert buckets.rows(4).tolist() == [3] and buckets.rows(0).tolist() == [1]
+
+
+def test_sorted_index_skips_truncated_rows(small_merges):
+    """Test that rows removed after a merge are ignored and then dropped by the next merge."""
+    column = np.array([5.0, 1.0, np.nan, 3.0, 9.0, 7.0, 2.0, 8.0])
+    sorted_index = SortedIndex()
+    assert sorted_index.select(column, 8, 2, 8).tolist() == [0, 3, 5, 6, 7]
+    assert sorted_index.count(2, 8) == 5
+    sorted_index.truncate(4)
+    assert sorted_index.select(column, 4, 2, 8).tolist() == [0, 3]
+    column[4:] = [4.0, 4.0, 4.0, 4.0]
+    assert sorted_index.select(column, 8, 4, 4).tolist() == [4, 5, 6, 7]  # Merged again, stale rows dropped
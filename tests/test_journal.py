@@ -0,0 +1,326 @@
+"""
+Tests for journal mode in the app.history module and the Journal class in app.history.journal.
+
+Fixtures:
+    journal_env: Points HISTORY_FILENAME at a temporary file and enables journal mode.
+"""
+# pylint: disable=redefined-outer-name
+import os
+from fractions import Fraction
+from unittest.mock import patch
+import numpy as np
+import pytest
+from app.calculation import Calculation, CalculationBatch
+from app.calculator import Calculator
+from app.history import History, write_csv_store
+from app.history.journal import Journal, format_number, parse_number, read_base_lsn
+from app.operations.registry import OPERATIONS
+
+
+def executed(command, a, b):
+    """Build and execute a Calculation for an operation command."""
+    calculation = Calculation(OPERATIONS[command], a, b)
+    calculation.execute()
+    return calculation
+
+
+def entries(history):
+    """Return the history as a list of strings."""
+    return [repr(calc) for calc in history.get_history()]
+
+
+@pytest.fixture
+def journal_env(history_file, monkeypatch):
+    """Enable journal mode with the history file in a temporary directory."""
+    monkeypatch.setenv("HISTORY_JOURNAL", "true")
+    return history_file
+
+
+def test_save_appends_only_new_records(journal_env):
+    """Test that each save appends just the changes since the previous save."""
+    history = History()
+    base_before = journal_env.read_text(encoding="utf-8")
+    history.add_calculation(executed("add", 1, 2))
+    assert history.save() == f"History saved to {journal_env}."
+    first_size = history.journal.size
+    history.add_calculation(executed("multiply", 2.5, 2))
+    history.save()
+    history.save()  # Nothing new to write
+    with open(history.journal.path, encoding="utf-8") as journal:
+        assert journal.read().splitlines() == ["1,A,Addition,1,2,3", "2,A,Multiplication,2.5,2,5.0"]
+    assert history.journal.size > first_size
+    assert journal_env.read_text(encoding="utf-8") == base_before  # The base file is untouched
+
+
+def test_startup_replays_journal(journal_env):
+    """Test that a new History replays adds, undos, clears and batches with exact types."""
+    history = History()
+    history.add_calculation(executed("power", 2, 3))
+    history.clear()
+    history.add_calculation(executed("add", 1, 2))
+    history.add_calculation(executed("divide", 1, 4))
+    history.undo()
+    history.add_batch(CalculationBatch(OPERATIONS["divide"], np.array([1.0, 2.0]), np.array([0.0, 4.0]),
+                                       np.array([np.nan, 0.5])))
+    history.add_calculation(executed("power", 3, 80))
+    history.save()
+
+    restarted = History()
+    assert entries(restarted) == ["1 addition 2 = 3", "1.0 division 0.0 = nan", "2.0 division 4.0 = 0.5",
+                                  f"3 power 80 = {3 ** 80}"]
+    restarted.undo()
+    assert restarted.undo() == "Undone: batch of 2 division calculations"  # Batches replay as one block
+
+
+def test_complex_result_is_journaled_and_replayed(journal_env):  # pylint: disable=unused-argument
+    """Test that a complex result is stored, left out of the statistics and map, and replayed from the journal."""
+    calculator = Calculator()
+    calculator.execute_line("add 1 2")
+    assert calculator.history.stats()["count"] == 1  # Built now, so the next append updates them in place
+    assert calculator.execute_line("power -8 0.5") == (-8) ** 0.5
+    assert calculator.history.stats()["sum"] == 3.0
+    assert calculator.execute_line("map multiply 2") == "Added 1 multiply results to history."
+    calculator.history.save()
+    with open(calculator.history.journal.path, encoding="utf-8") as journal:
+        assert journal.read().splitlines()[1] == f"2,A,Power,-8,0.5,{(-8) ** 0.5!r}"
+
+    restarted = History()
+    assert entries(restarted) == entries(calculator.history)
+    assert restarted.stats()["count"] == 2
+
+
+def test_load_discards_unsaved_changes(journal_env):
+    """Test that load restores the saved state, dropping records that were never saved."""
+    history = History()
+    history.add_calculation(executed("add", 1, 2))
+    history.save()
+    history.add_calculation(executed("add", 3, 4))
+    assert history.load() == f"History loaded from {journal_env}."
+    assert entries(history) == ["1 addition 2 = 3"]
+    history.add_calculation(executed("add", 5, 6))
+    history.save()
+    assert entries(History()) == ["1 addition 2 = 3", "5 addition 6 = 11"]
+
+
+def test_compact_folds_journal_into_base(journal_env):
+    """Test that compaction rewrites the base file with its LSN and starts an empty journal."""
+    history = History()
+    for i in range(3):
+        history.add_calculation(executed("add", i, i))
+    history.undo()
+    assert history.compact(wait=True) == f"History compaction of {journal_env} started."
+    assert read_base_lsn(str(journal_env)) == 4
+    assert not os.path.exists(history.journal.path)
+    assert not os.path.exists(history.journal.compacting_path)
+
+    history.add_calculation(executed("subtract", 9, 1))
+    history.save()
+    assert entries(History()) == ["0 addition 0 = 0", "1 addition 1 = 2", "9 subtraction 1 = 8"]
+
+
+def test_compaction_keeps_full_precision(journal_env):
+    """Test that floats folded into a compacted CSV base come back bit for bit after a restart."""
+    values = [11.087988226897037, 0.1 + 0.2, 1 / 3, 2 / 3 * 1e-300]
+    history = History()
+    history.add_batch(CalculationBatch(OPERATIONS["add"], np.array(values), np.zeros(4), np.array(values)))
+    history.save()
+    history.compact(wait=True)
+    assert [calc.result for calc in History().get_history()] == values
+
+
+def test_save_starts_compaction_past_threshold(journal_env, monkeypatch):
+    """Test that save compacts in the background once the journal is large enough."""
+    monkeypatch.setenv("HISTORY_JOURNAL_COMPACT_BYTES", "1")
+    history = History()
+    history.add_calculation(executed("add", 1, 1))
+    history.save()
+    history.wait_for_compaction()
+    assert read_base_lsn(str(journal_env)) == 1
+    assert history.journal.size == 0
+
+
+@pytest.mark.parametrize("base_replaced", [False, True])
+def test_crash_during_compaction_replays_once(journal_env, base_replaced):
+    """Test that a compaction interrupted before or after replacing the base loses and repeats nothing."""
+    history = History()
+    history.add_calculation(executed("add", 1, 1))
+    history.add_calculation(executed("add", 2, 2))
+    history.save()
+    snapshot = history._store.copy()  # pylint: disable=protected-access
+    history.journal.rotate()
+    if base_replaced:  # Crash between replacing the base and removing the segment
+        with patch("os.remove"):
+            history.journal.finish_compaction(str(journal_env), lambda path: write_csv_store(snapshot, path, 2))
+    history.add_calculation(executed("add", 3, 3))
+    history.save()
+    assert entries(History()) == ["1 addition 1 = 2", "2 addition 2 = 4", "3 addition 3 = 6"]
+
+
+def test_torn_record_is_repaired(journal_env):
+    """Test that a partial last record from a crash is dropped and later appends stay readable."""
+    history = History()
+    history.add_calculation(executed("add", 1, 1))
+    history.save()
+    with open(history.journal.path, "a", encoding="utf-8") as journal:
+        journal.write("2,A,Addi")
+    with patch("app.history.journal.logger") as mock_logger:
+        assert [record[0] for record in history.journal.records(0)] == [1]
+        mock_logger.warning.assert_called_once()
+    restarted = History()
+    restarted.add_calculation(executed("add", 5, 5))
+    restarted.save()
+    assert entries(History()) == ["1 addition 1 = 2", "5 addition 5 = 10"]
+
+
+def test_fsync_always(journal_env, monkeypatch):
+    """Test that the always policy fsyncs every append and compaction."""
+    monkeypatch.setenv("HISTORY_JOURNAL_FSYNC", "always")
+    history = History()
+    history.add_calculation(executed("add", 1, 1))
+    with patch("os.fsync") as mock_fsync:
+        history.save()
+        history.compact(wait=True)
+    assert mock_fsync.call_count == 2
+
+
+def test_invalid_fsync_policy(journal_env, monkeypatch):
+    """Test that an unknown fsync policy is rejected."""
+    monkeypatch.setenv("HISTORY_JOURNAL_FSYNC", "sometimes")
+    with pytest.raises(ValueError, match="Unknown journal fsync policy 'sometimes'"):
+        History()
+
+
+def test_compaction_failure_keeps_segment(journal_env):
+    """Test that a failed compaction is logged and the journal segment still replays."""
+    history = History()
+    history.add_calculation(executed("add", 1, 1))
+    with patch.object(Journal, "finish_compaction", side_effect=OSError("disk full")), \
+            patch("app.history.logger") as mock_logger:
+        history.compact(wait=True)
+    mock_logger.error.assert_called_with("History compaction failed: disk full")
+    assert entries(History()) == ["1 addition 1 = 2"]
+
+
+def test_rotation_keeps_segment_of_failed_compaction(journal_env, monkeypatch):
+    """Test that compacting again after a failed compaction adds to its segment instead of replacing it."""
+    monkeypatch.setenv("HISTORY_JOURNAL_FSYNC", "always")
+    history = History()
+    with patch.object(Journal, "finish_compaction", side_effect=OSError("disk full")), patch("os.fsync") as fsync:
+        history.add_calculation(executed("add", 1, 1))
+        history.compact(wait=True)
+        history.add_calculation(executed("add", 2, 2))
+        history.compact(wait=True)  # Fails too, so the base file still has neither entry
+    assert fsync.call_count == 3  # Two appends and the journal folded into the segment
+    assert not os.path.exists(history.journal.path)
+    assert entries(History()) == ["1 addition 1 = 2", "2 addition 2 = 4"]
+    history.compact(wait=True)
+    assert not os.path.exists(history.journal.compacting_path)
+    assert entries(History()) == ["1 addition 1 = 2", "2 addition 2 = 4"]
+
+
+def test_records_folded_into_segment_are_read_once(tmp_path):
+    """Test that journal records also in the segment, left by a crash while rotating, are replayed once."""
+    journal = Journal(str(tmp_path / "history.csv"))
+    segment = "1,A,Addition,1,1,2\n2,B,Addition,1.0,1.0,2.0\n2,B,Addition,2.0,2.0,4.0\n"
+    with open(journal.compacting_path, "w", encoding="utf-8") as compacting:
+        compacting.write(segment)
+    with open(journal.path, "w", encoding="utf-8") as current:
+        current.write(segment + "3,U,1\n")
+    assert [(lsn, kind) for lsn, kind, _ in journal.records(0)] == [(1, "A"), (2, "B"), (2, "B"), (3, "U")]
+    assert [lsn for lsn, _, _ in journal.records(1)] == [2, 2, 3]
+
+
+def test_compact_without_journal(history_file):  # pylint: disable=unused-argument
+    """Test that compact reports an error outside journal mode."""
+    assert History().compact() == "Error: History journal is not enabled."
+
+
+def test_journal_helpers_without_files(tmp_path):
+    """Test that the journal helpers treat missing files as empty."""
+    journal = Journal(str(tmp_path / "missing.csv"))
+    journal.repair()
+    journal.rotate()
+    assert journal.size == 0
+    assert not list(journal.records(0))
+    assert read_base_lsn(str(tmp_path / "missing.csv")) == 0
+
+
+@pytest.mark.parametrize("value, text", [
+    (None, ""),
+    (5, "5"),
+    (-2.5, "-2.5"),
+    (3 ** 80, str(3 ** 80)),
+    (Fraction(-3, 4), "-3/4"),
+    (Fraction(2, 1), "2/1"),  # A whole Fraction stays a Fraction
+    ((-8) ** 0.5, repr((-8) ** 0.5)),  # A complex result
+    pytest.param(-(2 ** 20000), f"-{hex(2 ** 20000)}", id="too-many-digits-for-decimal-text"),
+])
+def test_number_round_trip(value, text):
+    """Test that format_number and parse_number keep the value and type of every kind of operand."""
+    assert format_number(value) == text
+    parsed = parse_number(text)
+    assert parsed == value and type(parsed) is type(value)
+
+
+def test_replay_trailing_batch_and_missing_result(journal_env):
+    """Test replay of a calculation without a result and of a batch as the last record."""
+    history = History()
+    history.add_calculation(Calculation(OPERATIONS["add"], 1, 2))
+    history.add_batch(CalculationBatch(OPERATIONS["add"], np.array([1.0]), np.array([2.0]), np.array([3.0])))
+    history.save()
+    assert entries(History()) == ["1 addition 2 = Not calculated", "1.0 addition 2.0 = 3.0"]
+
+
+@pytest.mark.parametrize("history_format", ["csv", "binary"])
+def test_undo_of_compacted_batch_survives_restart(journal_env, monkeypatch, history_format):
+    """Test that undoing a batch folded into the base, which keeps no batch boundaries, replays as the whole batch."""
+    monkeypatch.setenv("HISTORY_FORMAT", history_format)
+    history = History()
+    history.add_calculation(executed("add", 1, 2))
+    history.add_batch(CalculationBatch(OPERATIONS["add"], np.ones(3), np.ones(3), np.full(3, 2.0)))
+    history.save()
+    history.compact(wait=True)
+    history.add_batch(CalculationBatch(OPERATIONS["add"], np.ones(2), np.ones(2), np.full(2, 2.0)))
+    assert history.undo(2) == "Undone 2 entries."
+    history.save()
+    with open(history.journal.path, encoding="utf-8") as journal:
+        assert [line for line in journal.read().splitlines() if ",U," in line] == ["4,U,2", "5,U,3"]
+    assert entries(History()) == entries(history) == ["1 addition 2 = 3"]
+
+
+def test_replay_undo_without_row_count(journal_env):
+    """Test that an undo record written before undo records carried a row count removes the last entry."""
+    history = History()
+    history.add_batch(CalculationBatch(OPERATIONS["add"], np.ones(2), np.ones(2), np.full(2, 2.0)))
+    history.add_calculation(executed("add", 1, 2))
+    history.save()
+    with open(history.journal.path, "a", encoding="utf-8") as journal:
+        journal.write("4,U\n5,U\n")
+    assert entries(History()) == []
+
+
+def test_undone_clear_rewrites_base_on_save(journal_env):
+    """Test that undoing a clear, which no journal record expresses, is saved by rewriting the base file."""
+    history = History()
+    history.add_calculation(executed("add", 1, 2))
+    history.save()
+    history.clear()
+    history.save()
+    history.undo()
+    history.add_calculation(executed("add", 3, 4))
+    history.save()
+    history.wait_for_compaction()
+    assert entries(History()) == ["1 addition 2 = 3", "3 addition 4 = 7"]  # Read back from the CSV base
+    assert read_base_lsn(str(journal_env)) == 3
+
+
+def test_redo_is_journaled(journal_env):
+    """Test that a redone calculation is recorded again, so a restart replays it."""
+    history = History()
+    history.add_calculation(executed("power", 3, 80))
+    history.undo()
+    history.redo()
+    history.save()
+    with open(history.journal.path, encoding="utf-8") as journal:
+        assert [line.split(",")[1] for line in journal.read().splitlines()] == ["A", "U", "A"]
+    assert entries(History()) == [f"3 power 80 = {3 ** 80}"]
@@ -0,0 +1,95 @@
+"""Unit tests for the queue-based logging pipeline in app.logger_config."""
+# pylint: disable=redefined-outer-name
+import logging
+from unittest.mock import patch
+import pytest
+from app.calculation import Calculation
+from app.calculator import Calculator
+from app.logger_config import SamplingFilter, setup_logging, shutdown_logging
+
+
+@pytest.fixture
+def log_settings(tmp_path, monkeypatch):
+    """Stop the running pipeline and point a fresh one at a temporary log file."""
+    root = logging.getLogger()
+    level = root.level
+    shutdown_logging()
+    monkeypatch.setenv("LOG_FILE", str(tmp_path / "app.log"))
+    yield tmp_path / "app.log"
+    shutdown_logging()
+    root.setLevel(level)
+
+
+def test_records_written_by_listener(log_settings):
+    """Test that records reach the log file once the listener is stopped."""
+    listener = setup_logging()
+    assert setup_logging() is listener  # Already running
+    logging.getLogger("app.test").info("Calculation %s = %s", "1 + 1", 2)
+    shutdown_logging()
+    assert "INFO - Calculation 1 + 1 = 2" in log_settings.read_text(encoding="utf-8")
+    shutdown_logging()  # Stopping twice is harmless
+
+
+def test_level_from_environment(log_settings, monkeypatch):
+    """Test that LOG_LEVEL drops lower records before they are formatted."""
+    monkeypatch.setenv("LOG_LEVEL", "warning")
+    setup_logging()
+    with patch.object(Calculation, "__repr__", side_effect=AssertionError("formatted")) as calculation_repr:
+        assert Calculator().execute_command('add', 1, 2) == 3
+    calculation_repr.assert_not_called()  # Lazy formatting: disabled levels never build the message
+    logging.getLogger("app.test").warning("kept")
+    shutdown_logging()
+    assert log_settings.read_text(encoding="utf-8").splitlines()[-1].endswith("WARNING - kept")
+
+
+def test_console_level(log_settings, capsys):
+    """Test that the console can be limited to warnings while the file keeps every record."""
+    setup_logging("INFO", logging.WARNING)
+    logger = logging.getLogger("app.test")
+    logger.info("file only")
+    logger.warning("both")
+    shutdown_logging()
+    console = capsys.readouterr().err
+    assert "both" in console and "file only" not in console
+    text = log_settings.read_text(encoding="utf-8")
+    assert "file only" in text and "both" in text
+
+
+def test_unknown_level(log_settings, monkeypatch):
+    """Test that an unknown LOG_LEVEL is rejected."""
+    monkeypatch.setenv("LOG_LEVEL", "LOUD")
+    with pytest.raises(ValueError, match="Unknown LOG_LEVEL 'LOUD'"):
+        setup_logging()
+
+
+def test_sampling(log_settings, monkeypatch):
+    """Test that LOG_SAMPLE_RATE thins out INFO records but keeps every warning."""
+    monkeypatch.setenv("LOG_SAMPLE_RATE", "0")
+    setup_logging()
+    logger = logging.getLogger("app.test")
+    logger.info("dropped")
+    logger.warning("kept")
+    shutdown_logging()
+    text = log_settings.read_text(encoding="utf-8")
+    assert "dropped" not in text and "kept" in text
+
+
+def test_sampling_filter_rate():
+    """Test that the filter keeps the requested fraction of INFO records."""
+    samples = iter([0.1, 0.6, 0.4, 0.9])
+    sampling = SamplingFilter(0.5, sample=lambda: next(samples))
+    record = logging.LogRecord("app", logging.INFO, __file__, 1, "message", None, None)
+    assert [sampling.filter(record) for _ in range(4)] == [True, False, True, False]
+
+
+def test_rotation(log_settings, monkeypatch):
+    """Test that the log file is rotated by size and old files are capped."""
+    monkeypatch.setenv("LOG_MAX_BYTES", "500")
+    monkeypatch.setenv("LOG_BACKUP_COUNT", "2")
+    setup_logging()
+    for i in range(100):
+        logging.getLogger("app.test").warning("record %d", i)
+    shutdown_logging()
+    rotated = sorted(path.name for path in log_settings.parent.iterdir())
+    assert rotated == ["app.log", "app.log.1", "app.log.2"]
+    assert "record 99" in log_settings.read_text(encoding="utf-8")
@@ -2,9 +2,13 @@
 
 """Tests for the main module and its functions."""
 
+import csv
+import json
+import logging
 from io import StringIO
 from unittest.mock import patch
-from main import main, center_text
+import pytest
+from main import main, center_text, write_buffered
 from app.calculator import Calculator
 
 def test_center_text():
@@ -25,7 +29,7 @@ def test_main_negative(mock_stdout):
     output = mock_stdout.getvalue()
 
     # Checking for expected outputs in sequence
-    assert "Result: 3.0" in output  # Expected result of 'add 1 2'
+    assert "Result: 3" in output  # Expected result of 'add 1 2'
     assert "Error: Cannot divide by zero" in output  # Expected error for division by zero
     assert "Error: Invalid input." in output  # Expected error for unknown command
     assert "Exiting the calculator. Goodbye!" in output  # Final exit message
@@ -50,3 +54,147 @@ def test_main_with_history(mock_stdout):
         assert item.center(50) in output  # The history item should be printed centered
 
     assert "Exiting the calculator. Goodbye!" in output  # Ensure the exit message is printed
+
+@patch('sys.stdout', new_callable=StringIO)
+def test_main_history_tail(mock_stdout):
+    """Test that 'history tail' prints only the last entries."""
+    inputs = iter(['add 1 1', 'add 2 2', 'add 3 3', 'history tail 2', 'exit'])
+    with patch('builtins.input', side_effect=lambda _: next(inputs)):
+        main()
+    output = mock_stdout.getvalue()
+    assert "1 addition 1 = 2".center(50) not in output
+    assert "2 addition 2 = 4".center(50) + "\n" + "3 addition 3 = 6".center(50) in output
+
+def run_main(argv, stdin_text):
+    """Run main() with the given arguments and stdin, returning (stdout, stderr)."""
+    stdin, stdout, stderr = StringIO(stdin_text), StringIO(), StringIO()
+    with patch('sys.stdin', stdin), patch('sys.stdout', stdout), patch('sys.stderr', stderr):
+        main(argv)
+    return stdout.getvalue(), stderr.getvalue()
+
+STREAM_INPUT = "add 1 2\n\n# a comment\ndivide 1 0\nadd x 2\nhistory\nhelp\nexit\nadd 5 5\n"
+
+def test_stream_plain():
+    """Test that streaming mode writes one plain line per command and stops at exit."""
+    output, report = run_main(["--stream"], STREAM_INPUT)
+    lines = output.splitlines()
+    assert lines[:4] == ["3", "Error: Cannot divide by zero", "Error: Invalid input.", "1 addition 2 = 3"]
+    assert lines[4].startswith("Available commands:\\n")  # Multi-line text stays on one line
+    assert len(lines) == 5
+    assert report.startswith("Processed 5 commands in ")
+
+def test_stream_detected_from_non_tty_stdin():
+    """Test that a non-terminal stdin selects streaming mode without a flag."""
+    output, _ = run_main(["--format", "jsonl"], "multiply 2 4\nsubtract 1 x\n")
+    assert [json.loads(line) for line in output.splitlines()] == [
+        {"line": 1, "command": "multiply 2 4", "result": 8.0},
+        {"line": 2, "command": "subtract 1 x", "error": "Error: Invalid input."},
+    ]
+
+def test_stream_exact_results():
+    """Test that fraction results are written as text, big integers in full and huge ones approximated."""
+    output, _ = run_main(["--format", "jsonl"], "add 1/2 1/3\npower 3 80\npower 10 5000\n")
+    assert [json.loads(line)["result"] for line in output.splitlines()] == ["5/6", 3 ** 80, "1.000000e+5000"]
+
+@patch('sys.stdout', new_callable=StringIO)
+def test_main_fraction_result(mock_stdout):
+    """Test that the interactive prompt shows fraction and huge integer results like any other number."""
+    inputs = iter(['divide 1/2 3', 'power 10 5000', 'exit'])
+    with patch('builtins.input', side_effect=lambda _: next(inputs)):
+        main()
+    assert "Result: 1/6" in mock_stdout.getvalue()
+    assert "Result: 1.000000e+5000" in mock_stdout.getvalue()
+
+def test_stream_csv_file_to_file(tmp_path):
+    """Test reading commands from a file and writing CSV results to a file."""
+    source = tmp_path / "commands.txt"
+    target = tmp_path / "results.csv"
+    source.write_text("power 2 3\nundo\nundo\n", encoding="utf-8")
+    _, report = run_main(["--input", str(source), "--output", str(target), "--format", "csv"], "")
+    with open(target, encoding="utf-8", newline="") as results:
+        rows = list(csv.reader(results))
+    assert rows == [
+        ["line", "command", "result", "error"],
+        ["1", "power 2 3", "8", ""],
+        ["2", "undo", "Undone: 2 power 3 = 8", ""],
+        ["3", "undo", "No history to undo.", ""],
+    ]
+    assert report.startswith("Processed 3 commands in ")
+
+def test_stream_text_command_arguments():
+    """Test that non-operation commands receive their words as typed."""
+    output, _ = run_main(["--stream"], "add 1 2\nadd 1 2\ncache clear\ncache\n")
+    assert output.splitlines()[2:] == [
+        "Result cache cleared.",
+        "Result cache: 0 of 1024 entries, 0 hits, 0 misses, 0 evictions, 0 expirations (0.0% hit rate).",
+    ]
+
+def test_stream_writes_metrics_file(tmp_path, monkeypatch):
+    """Test that METRICS_FILE is written when the session ends."""
+    path = tmp_path / "calculator.prom"
+    monkeypatch.setenv("METRICS_FILE", str(path))
+    output, _ = run_main(["--stream"], "add 1 2\nmetrics\n")
+    assert output.splitlines()[1].startswith("add: ")
+    assert 'calculator_commands_total{command="metrics"}' in path.read_text(encoding="utf-8")
+
+def test_stream_profiles_from_environment(tmp_path, monkeypatch):
+    """Test that PROFILE and TRACE_MEM capture the whole session and write their dumps when it ends."""
+    monkeypatch.setenv("PROFILE", "true")
+    monkeypatch.setenv("TRACE_MEM", "true")
+    monkeypatch.setenv("PROFILE_DIR", str(tmp_path))
+    output, _ = run_main(["--stream"], "add 1 2\nprofile\n")
+    assert output.splitlines()[1].startswith("Profiling is running (")
+    assert sorted(path.suffix for path in tmp_path.iterdir()) == [".prof", ".txt"]
+
+def test_stream_expressions():
+    """Test that lines not starting with a command word are evaluated as expressions."""
+    output, _ = run_main(["--stream"], "3 + 4 * 2 ^ 2\n-(1 + 1)\n(2\neval 2 ^ 3\n")
+    assert output.splitlines() == ["19", "-2", "Error: Missing ')' for '(' at position 1.", "8"]
+
+def test_stream_parallel_batch_job(tmp_path):
+    """Test that --workers runs the input as a parallel batch job with per-row errors."""
+    source = tmp_path / "rows.txt"
+    source.write_text("add 1 2\nhistory\ndivide 4 2\n", encoding="utf-8")
+    output, report = run_main(["--input", str(source), "--workers", "2", "--chunk-size", "1"], "")
+    assert output.splitlines() == ["3", "Error: Unknown command.", "2.0"]  # As without --workers
+    assert report.startswith("Processed 3 commands in ")
+
+@pytest.mark.parametrize("output_format", ["plain", "jsonl"])
+def test_parallel_batch_job_matches_stream(tmp_path, output_format):
+    """Test that --workers gives the same exact results and operand counts as the normal streaming path."""
+    source = tmp_path / "rows.txt"
+    source.write_text("power 2 100\npowmod 4 13 497\nadd 1/2 1/3\npower 10 5000\npowmod 4 13\n", encoding="utf-8")
+    expected, _ = run_main(["--input", str(source), "--format", output_format], "")
+    output, _ = run_main(["--input", str(source), "--workers", "2", "--format", output_format], "")
+    assert output == expected
+    assert "1267650600228229401496703205376" in output
+
+def test_stream_logs_only_problems():
+    """Test that streaming mode logs warnings and errors only, so no records are written for each command."""
+    with patch("main.setup_logging") as setup_logging:
+        run_main(["--stream"], "add 1 2\n")
+    setup_logging.assert_called_once_with("WARNING", logging.WARNING)
+    with patch("main.setup_logging") as setup_logging, patch('builtins.input', side_effect=['exit']):
+        run_main(["--interactive"], "")
+    setup_logging.assert_called_once_with()
+
+def test_serve_option():
+    """Test that --serve starts the server with the given address and connection limit."""
+    with patch("main.run_server") as run_server:
+        main(["--serve", "--port", "9000", "--max-connections", "8"])
+    run_server.assert_called_once_with("127.0.0.1", 9000, None, 8)
+
+def test_interactive_flag_overrides_detection():
+    """Test that --interactive keeps the prompt even when stdin is not a terminal."""
+    inputs = iter(['exit'])
+    with patch('builtins.input', side_effect=lambda _: next(inputs)):
+        output, _ = run_main(["--interactive"], "")
+    assert "Welcome to the Interactive Calculator!" in output
+
+def test_write_buffered_chunks():
+    """Test that lines are written in chunks rather than one write per line."""
+    out = StringIO()
+    with patch.object(out, 'write', wraps=out.write) as write:
+        assert write_buffered((f"{i}\n" for i in range(10)), out, chunk_lines=4) == 10
+    assert write.call_count == 3
+    assert out.getvalue() == "".join(f"{i}\n" for i in range(10))
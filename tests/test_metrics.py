@@ -0,0 +1,159 @@
+"""
+Tests for the metrics in the app.metrics module.
+
+Fixtures:
+    metrics: A Metrics with three latency buckets.
+"""
+# pylint: disable=redefined-outer-name
+import threading
+import pytest
+import app.metrics
+from app.metrics import METRICS, Metrics, MetricsExporter, start_metrics_export, stop_metrics_export
+
+PROMETHEUS_TEXT = """# HELP calculator_command_seconds Time to execute one calculator command.
+# TYPE calculator_command_seconds histogram
+calculator_command_seconds_bucket{command="add",le="0.001"} 2
+calculator_command_seconds_bucket{command="add",le="0.01"} 3
+calculator_command_seconds_bucket{command="add",le="+Inf"} 4
+calculator_command_seconds_sum{command="add"} 2.0065
+calculator_command_seconds_count{command="add"} 4
+calculator_command_seconds_bucket{command="say \\"hi\\"",le="0.001"} 1
+calculator_command_seconds_bucket{command="say \\"hi\\"",le="0.01"} 1
+calculator_command_seconds_bucket{command="say \\"hi\\"",le="+Inf"} 1
+calculator_command_seconds_sum{command="say \\"hi\\""} 0.0001
+calculator_command_seconds_count{command="say \\"hi\\""} 1
+# HELP calculator_operation_seconds Time spent in Operation.calculate for one uncached calculation.
+# TYPE calculator_operation_seconds histogram
+# HELP calculator_history_seconds Time to save or load the history.
+# TYPE calculator_history_seconds histogram
+calculator_history_seconds_bucket{action="save",le="0.001"} 0
+calculator_history_seconds_bucket{action="save",le="0.01"} 1
+calculator_history_seconds_bucket{action="save",le="+Inf"} 1
+calculator_history_seconds_sum{action="save"} 0.005
+calculator_history_seconds_count{action="save"} 1
+# HELP calculator_commands_total Calculator commands executed.
+# TYPE calculator_commands_total counter
+calculator_commands_total{command="add"} 4
+calculator_commands_total{command="say \\"hi\\""} 1
+# HELP calculator_errors_total Failed commands by exception type.
+# TYPE calculator_errors_total counter
+calculator_errors_total{command="add",type="TypeError"} 2
+"""
+
+
+@pytest.fixture
+def metrics():
+    """Fixture that provides empty metrics with buckets up to 1 ms, 10 ms and beyond."""
+    return Metrics(buckets=(0.001, 0.01))
+
+
+def record_sample(metrics):
+    """Record a few commands, a history save and two errors."""
+    for seconds in (0.0005, 0.001, 0.005, 2.0):  # A bound belongs to its own bucket, as with Prometheus' le
+        metrics.observe("calculator_command_seconds", "add", seconds)
+    metrics.observe("calculator_command_seconds", 'say "hi"', 0.0001)
+    metrics.observe("calculator_history_seconds", "save", 0.005)
+    metrics.count_error("add", "TypeError")
+    metrics.count_error("add", "TypeError")
+
+
+def test_snapshot_counts_buckets(metrics):
+    """Test that observations are counted in the first bucket whose bound is not below them."""
+    record_sample(metrics)
+    histograms, errors = metrics.snapshot()
+    assert histograms[("calculator_command_seconds", "add")] == ([2, 1, 1], pytest.approx(2.0065))
+    assert errors == {("add", "TypeError"): 2}
+
+
+def test_prometheus_format(metrics):
+    """Test the Prometheus text exposition, with cumulative buckets and escaped label values."""
+    record_sample(metrics)
+    assert metrics.prometheus() == PROMETHEUS_TEXT
+
+
+def test_describe(metrics):
+    """Test the one-line summaries shown by the metrics command."""
+    assert metrics.describe() == "No commands measured yet."
+    record_sample(metrics)
+    assert metrics.describe().splitlines() == [
+        "add: 4 calls, 2 errors, mean 502 ms, p50 <= 1 ms, p95 <= inf, p99 <= inf",
+        'say "hi": 1 calls, 0 errors, mean 100 us, p50 <= 1 ms, p95 <= 1 ms, p99 <= 1 ms',
+        "history save: 1 calls, 0 errors, mean 5 ms, p50 <= 10 ms, p95 <= 10 ms, p99 <= 10 ms",
+        "errors: add TypeError 2",
+    ]
+
+
+def test_reset(metrics):
+    """Test that reset forgets every observation and error."""
+    record_sample(metrics)
+    metrics.reset()
+    assert metrics.snapshot() == ({}, {})
+    assert metrics.describe() == "No commands measured yet."
+
+
+def test_threads_are_added_up(metrics):
+    """Test that each thread records separately and the shards of ended threads are folded together."""
+    def record():
+        for _ in range(1000):
+            metrics.observe("calculator_command_seconds", "add", 0.002)
+        metrics.count_error("divide", "ZeroDivisionError")
+
+    threads = [threading.Thread(target=record) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    record()
+    histograms, errors = metrics.snapshot()
+    assert histograms[("calculator_command_seconds", "add")] == ([0, 5000, 0], pytest.approx(10.0))
+    assert errors == {("divide", "ZeroDivisionError"): 5}
+    assert len(metrics._shards) == 1  # pylint: disable=protected-access  # Only this thread is still running
+    assert metrics.snapshot() == (histograms, errors)
+
+
+def test_exporter_writes_periodically(metrics, tmp_path):
+    """Test that the exporter writes the file in the background and once more when stopped."""
+    path = tmp_path / "calculator.prom"
+    record_sample(metrics)
+    exporter = MetricsExporter(metrics, str(path), 0.01)
+    exporter.start()
+    written = threading.Event()
+    while not written.wait(0.01):
+        if path.exists():
+            written.set()
+    metrics.count_error("add", "ValueError")
+    exporter.stop()
+    assert path.read_text(encoding="utf-8") == metrics.prometheus()
+    assert 'type="ValueError"' in path.read_text(encoding="utf-8")
+
+
+def test_exporter_logs_write_errors(metrics, tmp_path, caplog):
+    """Test that a file that cannot be written is logged instead of stopping the exporter."""
+    exporter = MetricsExporter(metrics, str(tmp_path / "missing" / "calculator.prom"), 60)
+    exporter.write()
+    assert "Could not write metrics to" in caplog.text
+
+
+def test_start_metrics_export(monkeypatch, tmp_path):
+    """Test that export starts only when METRICS_FILE is set, and only once."""
+    monkeypatch.delenv("METRICS_FILE", raising=False)
+    assert start_metrics_export() is None
+    path = tmp_path / "calculator.prom"
+    monkeypatch.setenv("METRICS_FILE", str(path))
+    monkeypatch.setenv("METRICS_INTERVAL", "30")
+    exporter = start_metrics_export()
+    try:
+        assert (exporter.metrics, exporter.path, exporter.interval) == (METRICS, str(path), 30)
+        assert start_metrics_export() is exporter
+    finally:
+        stop_metrics_export()
+    assert app.metrics._exporter is None and path.exists()  # pylint: disable=protected-access
+    stop_metrics_export()  # Nothing to stop
+
+
+def test_start_metrics_export_rejects_bad_interval(monkeypatch, tmp_path):
+    """Test that a METRICS_INTERVAL that is not positive is refused."""
+    monkeypatch.setenv("METRICS_FILE", str(tmp_path / "calculator.prom"))
+    monkeypatch.setenv("METRICS_INTERVAL", "0")
+    with pytest.raises(ValueError, match="METRICS_INTERVAL must be positive"):
+        start_metrics_export()
@@ -0,0 +1,125 @@
+"""
+Microbenchmarks with regression baselines, using the bench and history_file fixtures from conftest.py.
+
+History benchmarks run at every size in BENCHMARK_SIZES, a comma-separated list
+(default "1000,10000"). For the full range, and to record a baseline:
+
+    BENCHMARK_SIZES=1000,10000,100000,1000000,10000000 pytest tests/test_microbenchmarks.py --benchmark-save
+
+Later runs fail when a benchmark is slower than the baseline by more than --benchmark-threshold.
+"""
+# pylint: disable=redefined-outer-name
+import logging
+import os
+import numpy as np
+import pytest
+from app.cache import ResultCache
+from app.calculation import Calculation, CalculationBatch
+from app.calculator import Calculator
+from app.history import History
+from app.logger_config import shutdown_logging
+from app.operations.registry import OPERATIONS
+
+BENCHMARK_SIZES = [int(size) for size in os.getenv("BENCHMARK_SIZES", "1000,10000").split(",")]
+
+pytestmark = pytest.mark.slow
+
+
+def size_id(size: int) -> str:
+    """Return a short id such as 1e4 for a size."""
+    return f"{size:.0e}".replace("e+0", "e")
+
+
+@pytest.fixture(autouse=True)
+def quiet_logging():
+    """Stop any logging pipeline left by earlier tests, so results do not depend on test order."""
+    root = logging.getLogger()
+    level = root.level
+    shutdown_logging()
+    root.setLevel(logging.WARNING)
+    yield
+    root.setLevel(level)
+
+
+def filled_history(size: int) -> History:
+    """Return a History holding size addition rows."""
+    history = History()
+    values = np.arange(size, dtype=np.float64)
+    history.add_batch(CalculationBatch(OPERATIONS['add'], values, values, values * 2))
+    return history
+
+
+@pytest.mark.parametrize("command", list(OPERATIONS))
+def test_operation_calculate(bench, command):
+    """Time one scalar Operation.calculate call for each operation."""
+    calculate = OPERATIONS[command].calculate
+    operands = (7, 25, 11) if OPERATIONS[command].arity == 3 else (7.5, 2.5)  # powmod takes whole numbers
+    bench(f"operation.calculate[{command}]", lambda: calculate(*operands), number=20000)
+
+
+@pytest.mark.parametrize("command", list(OPERATIONS))
+def test_execute_operation_command(bench, history_file, command):  # pylint: disable=unused-argument
+    """Time execute_command dispatch for each operation command, with distinct operands so the cache misses."""
+    calculator = Calculator(cache=ResultCache(maxsize=0))
+    operands = iter(range(1, 10 ** 9))
+    extra = (3, 11)[:OPERATIONS[command].arity - 1]
+    bench(f"calculator.execute_command[{command}]",
+          lambda: calculator.execute_command(command, next(operands), *extra), number=5000)
+
+
+@pytest.mark.parametrize("command", ["history", "help", "undo"])
+def test_execute_history_command(bench, history_file, command):  # pylint: disable=unused-argument
+    """Time execute_command dispatch for history and general commands."""
+    calculator = Calculator()
+    for i in range(5000):
+        calculator.execute_command('add', i, 1)
+    bench(f"calculator.execute_command[{command}]", lambda: calculator.execute_command(command), number=5000,
+          repeat=1)
+
+
+@pytest.mark.parametrize("size", BENCHMARK_SIZES, ids=size_id)
+def test_history_add_calculation(bench, history_file, size):  # pylint: disable=unused-argument
+    """Time adding size calculations one at a time."""
+    calculations = [Calculation(OPERATIONS['add'], i, 1) for i in range(size)]
+    for calculation in calculations:
+        calculation.execute()
+
+    def add_all(history):
+        for calculation in calculations:
+            history.add_calculation(calculation)
+
+    bench(f"history.add_calculation[{size_id(size)}]", add_all, setup=History)
+
+
+@pytest.mark.parametrize("size", BENCHMARK_SIZES, ids=size_id)
+def test_history_save(bench, history_file, size):  # pylint: disable=unused-argument
+    """Time saving a history of size rows to CSV."""
+    history = filled_history(size)
+    bench(f"history.save[{size_id(size)}]", history.save)
+
+
+@pytest.mark.parametrize("size", BENCHMARK_SIZES, ids=size_id)
+def test_history_load(bench, history_file, size):  # pylint: disable=unused-argument
+    """Time loading a CSV history of size rows."""
+    filled_history(size).save()
+    history = History()
+    bench(f"history.load[{size_id(size)}]", history.load)
+    assert len(history.get_history()) == size
+
+
+@pytest.mark.parametrize("size", BENCHMARK_SIZES, ids=size_id)
+def test_history_undo(bench, history_file, size):  # pylint: disable=unused-argument
+    """Time undoing every row of a history of size rows, one at a time."""
+    def appended():  # Row by row, so each undo removes one row; undoing a load would restore it in one step
+        history = History()
+        for i in range(size):
+            calculation = Calculation(OPERATIONS['add'], float(i), float(i))
+            calculation.set_result(2.0 * i)
+            history.add_calculation(calculation)
+        return history
+
+    def undo_all(history):
+        for _ in range(size):
+            history.undo()
+
+    bench(f"history.undo[{size_id(size)}]", undo_all, setup=appended)
@@ -1,16 +1,20 @@
 """
-Tests for arithmetic operations (addition, subtraction, multiplication, division, power, modulus)
+Tests for arithmetic operations (addition, subtraction, multiplication, division, power, modulus, powmod)
 with valid and invalid inputs, including division by zero and type errors. 
 Uses pytest fixtures and parameterization.
 """
 # pylint: disable=redefined-outer-name
+import time
+from fractions import Fraction
+import numpy as np
 import pytest
 from app.operations.addition import Addition
 from app.operations.subtraction import Subtraction
 from app.operations.multiplication import Multiplication
 from app.operations.division import Division
-from app.operations.power import Power
+from app.operations.power import Power, PowerLimits, result_bits
 from app.operations.modulus import Modulus
+from app.operations.powmod import PowMod
 
 @pytest.fixture
 def addition_fixture():
@@ -42,6 +46,11 @@ def modulus_fixture():
     """Fixture that provides an instance of the Modulus class."""
     return Modulus()
 
+@pytest.fixture
+def powmod_fixture():
+    """Fixture that provides an instance of the PowMod class."""
+    return PowMod()
+
 # Addition Tests
 @pytest.mark.parametrize("a, b, expected", [
     (3, 5, 8),      # Test case: 3 + 5 should return 8
@@ -109,6 +118,66 @@ def test_power_invalid(power_fixture, a, b):
     with pytest.raises(TypeError, match="Both operands must be numbers."):
         power_fixture.calculate(a, b)
 
+@pytest.mark.parametrize("a, b, expected", [
+    (2, 1000, 1000),
+    (-2, 1000, 1000),
+    (1, 10 ** 9, 0),
+    (0, 10 ** 9, 0),
+    (Fraction(1, 4), -500, 1000),
+    (Fraction(-8, 3), 100, 300),
+])
+def test_power_result_bits(a, b, expected):
+    """Test that the estimated size of a power is |b| * log2(|a|), from the larger part of a Fraction."""
+    assert result_bits(a, b) == pytest.approx(expected)
+
+@pytest.fixture
+def guarded_power():
+    """Fixture that provides a Power with small limits, so a worker is used for modest results."""
+    return Power(PowerLimits(inline_bits=10_000, max_bits=1_000_000, timeout=10, memory_bytes=0))
+
+@pytest.mark.parametrize("a, b", [
+    (3, 20_000),                # About 32,000 bits: calculated in a worker process
+    (Fraction(2, 3), -20_000),  # A Fraction grows with a negative exponent too
+    (3, 6_000),                 # Under the inline limit
+    (3, Fraction(20_000, 1)),   # A whole Fraction exponent is estimated like an int
+    (3 ** 3_000, 8),            # About 38,000 bits from a large base and a small exponent
+    (10, -100_000),             # An int to a negative power is a float and never estimated
+    (2.0, 1000.0),              # Floats are never estimated
+])
+def test_power_guard_results(guarded_power, a, b):
+    """Test that guarded powers give the same exact results wherever they are calculated."""
+    assert guarded_power.calculate(a, b) == a ** b
+
+@pytest.mark.parametrize("a, b, bits", [
+    (10, 100_000_000, "3.32e\\+08"),
+    (10, Fraction(100_000_000, 1), "3.32e\\+08"),
+    (3 ** 20_000, 64, "2.03e\\+06"),
+], ids=["int exponent", "whole fraction exponent", "large base"])
+def test_power_guard_refuses_huge_results(guarded_power, a, b, bits):
+    """Test that a result over the limit is refused at once, whatever makes it large."""
+    started = time.perf_counter()
+    with pytest.raises(ValueError, match=f"about {bits} bits, more than the limit of 1000000"):
+        guarded_power.calculate(a, b)
+    assert time.perf_counter() - started < 0.1
+
+def test_power_guard_timeout():
+    """Test that a worker that takes too long is stopped with a TimeoutError."""
+    power = Power(PowerLimits(inline_bits=10_000, max_bits=10 ** 9, timeout=0.2, memory_bytes=0))
+    with pytest.raises(TimeoutError, match="did not finish within 0.2 s"):
+        power.calculate(3, 100_000_000)
+
+def test_power_limits_from_environment(monkeypatch):
+    """Test that the default limits are read from the environment on the first large exponent."""
+    for name, value in [("POWER_INLINE_BITS", "100"), ("POWER_MAX_BITS", "1000"), ("POWER_TIMEOUT", "2.5"),
+                        ("POWER_MEMORY_MB", "0.5")]:
+        monkeypatch.setenv(name, value)
+    power = Power()
+    assert power.calculate(2.0, 10) == 1024 and power.limits is None  # Float powers never read them
+    with pytest.raises(ValueError, match="more than the limit of 1000"):
+        power.calculate(2, 2000)
+    limits = power.limits
+    assert (limits.inline_bits, limits.max_bits, limits.timeout, limits.memory_bytes) == (100, 1000, 2.5, 2 ** 19)
+
 # Modulus Tests
 @pytest.mark.parametrize("a, b, expected", [
     (10, 3, 1),      # Test case: 10 % 3 should return 1
@@ -125,6 +194,46 @@ def test_modulus_by_zero(modulus_fixture):
     with pytest.raises(ValueError):
         modulus_fixture.calculate(5, 0)
 
+# Exact Tests
+@pytest.mark.parametrize("operation_fixture, a, b, expected", [
+    ("addition_fixture", Fraction(1, 2), Fraction(1, 3), Fraction(5, 6)),
+    ("division_fixture", Fraction(3, 4), 3, Fraction(1, 4)),
+    ("power_fixture", Fraction(2, 3), 2, Fraction(4, 9)),
+    ("power_fixture", 3, 80, 147808829414345923316083210206383297601),  # Beyond float64 precision
+    ("modulus_fixture", Fraction(7, 2), 2, Fraction(3, 2)),
+])
+def test_exact_operands(request, operation_fixture, a, b, expected):
+    """Test that int and Fraction operands give exact results of the same type."""
+    result = request.getfixturevalue(operation_fixture).calculate(a, b)
+    assert result == expected and type(result) is type(expected)
+
+# PowMod Tests
+@pytest.mark.parametrize("a, b, m, expected", [
+    (3, 80, 7, 3 ** 80 % 7),
+    (2, 10, -1000, 2 ** 10 % -1000),  # The sign of the modulus, like %
+    (3, -1, 7, 5),                    # A negative exponent uses the modular inverse
+    (3.0, Fraction(4), 5, 1),         # Whole-number floats and Fractions take the exact int path
+    (7, 2 ** 2048 + 1, 2 ** 2048 - 159, pow(7, 2 ** 2048 + 1, 2 ** 2048 - 159)),
+])
+def test_powmod(powmod_fixture, a, b, m, expected):
+    """Test modular exponentiation gives exact ints, including cryptographic sizes."""
+    result = powmod_fixture.calculate(a, b, m)
+    assert result == expected and type(result) is int
+
+@pytest.mark.parametrize("args, error, message", [
+    ((2, 3), TypeError, "powmod takes three operands."),
+    ((2, "x", 3), TypeError, "All operands must be numbers."),
+    ((2.5, 1, 3), ValueError, "powmod needs whole numbers."),
+    ((float("inf"), 1, 3), ValueError, "powmod needs whole numbers."),
+    ((Fraction(1, 2), 1, 3), ValueError, "powmod needs whole numbers."),
+    ((2, 3, 0), ValueError, "Cannot divide by zero."),
+    ((2, -1, 4), ValueError, "2 has no inverse modulo 4."),
+])
+def test_powmod_invalid(powmod_fixture, args, error, message):
+    """Test that powmod rejects missing, non-numeric and fractional operands, a zero modulus and missing inverses."""
+    with pytest.raises(error, match=message):
+        powmod_fixture.calculate(*args)
+
 # Invalid Input Tests
 @pytest.mark.parametrize("a, b", [
     (5, 'x'),      # Invalid input type: string instead of number
@@ -175,3 +284,61 @@ def test_modulus_invalid(modulus_fixture, a, b):
     """Test that modulus raises TypeError for invalid inputs."""
     with pytest.raises(TypeError):
         modulus_fixture.calculate(a, b)
+
+# Batch Tests
+@pytest.mark.parametrize("operation_fixture, a, b, expected", [
+    ("addition_fixture", [1, 2, 3], [4, 5, 6], [5, 7, 9]),
+    ("subtraction_fixture", [5, 3, 0], [3, 5, 1], [2, -2, -1]),
+    ("multiplication_fixture", [2, -1, 0], [4, 10, 5], [8, -10, 0]),
+    ("division_fixture", [10, 5, 0], [2, 2, 1], [5, 2.5, 0]),
+    ("power_fixture", [2, 5, 10], [3, 0, -2], [8, 1, 0.01]),
+    ("modulus_fixture", [10, -7, 20], [3, 3, 6], [1, 2, 2]),
+])
+def test_calculate_batch(request, operation_fixture, a, b, expected):
+    """Test that every batch kernel matches the scalar operation element by element."""
+    operation = request.getfixturevalue(operation_fixture)
+    result = operation.calculate_batch(np.array(a), np.array(b))
+    np.testing.assert_allclose(result, expected)
+    np.testing.assert_allclose(result, [operation.calculate(x, y) for x, y in zip(a, b)])
+
+def test_calculate_batch_broadcasts_scalar(addition_fixture):
+    """Test that a single second operand is applied to every first operand."""
+    np.testing.assert_array_equal(addition_fixture.calculate_batch([1, 2, 3], 10), [11, 12, 13])
+
+@pytest.mark.parametrize("operation_fixture", ["division_fixture", "modulus_fixture"])
+def test_calculate_batch_by_zero(request, operation_fixture):
+    """Test that a zero divisor gives NaN for that entry instead of raising."""
+    operation = request.getfixturevalue(operation_fixture)
+    result = operation.calculate_batch([6, 7, 8], [3, 0, 5])
+    assert np.isnan(result[1])
+    np.testing.assert_allclose(result[[0, 2]], [operation.calculate(6, 3), operation.calculate(8, 5)])
+
+def test_power_batch_undefined(power_fixture):
+    """Test that power entries without a real result are NaN."""
+    result = power_fixture.calculate_batch([0, -8, 4], [-1, 0.5, 0.5])
+    assert np.isnan(result[0])
+    assert np.isnan(result[1])
+    assert result[2] == 2
+
+@pytest.mark.parametrize("a, b", [
+    (["x", "y"], [1, 2]),     # Invalid input type: strings instead of numbers
+    ([1, 2], [None, 4]),      # Invalid input type: None
+])
+def test_calculate_batch_invalid(addition_fixture, a, b):
+    """Test that a batch with non-numeric operands raises TypeError."""
+    with pytest.raises(TypeError):
+        addition_fixture.calculate_batch(np.array(a), np.array(b))
+
+def test_powmod_batch(powmod_fixture):
+    """Test that batch powmod matches the scalar operation and gives NaN where there is no result."""
+    result = powmod_fixture.calculate_batch([2, 3, 2.5, 2, 3], [10, 2, 1, -1, 80], [1000, 0, 3, 4, 7])
+    np.testing.assert_array_equal(result, [24, np.nan, np.nan, np.nan, 3 ** 80 % 7])
+    with pytest.raises(TypeError, match="three operands"):
+        powmod_fixture.calculate_batch([1], [2])
+    with pytest.raises(ValueError, match="mismatched shapes"):
+        powmod_fixture.calculate_batch([1, 2], [2, 3], [5, 6, 7])
+
+def test_calculate_batch_mismatched_shapes(addition_fixture):
+    """Test that operand arrays that cannot be paired raise ValueError."""
+    with pytest.raises(ValueError, match="mismatched shapes"):
+        addition_fixture.calculate_batch([1, 2, 3], [1, 2])
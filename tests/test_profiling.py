@@ -0,0 +1,103 @@
+"""
+Tests for the on-demand profilers in the app.profiling module.
+
+Fixtures:
+    profile_dir: Points PROFILE_DIR at a temporary directory and stops any capture left running.
+"""
+# pylint: disable=redefined-outer-name
+import pstats
+import sys
+import tracemalloc
+import pytest
+from app.calculator import Calculator
+from app.profiling import (ALLOCATION_TRACER, PROFILER, AllocationTracer, CommandProfiler, session_tag,
+                           start_from_environment, stop_all)
+
+
+@pytest.fixture
+def profile_dir(tmp_path, monkeypatch):
+    """Fixture that writes dumps to a temporary directory."""
+    monkeypatch.setenv("PROFILE_DIR", str(tmp_path / "profiles"))
+    yield tmp_path / "profiles"
+    stop_all()
+
+
+def test_profiler_writes_prof_file(tmp_path):
+    """Test that a stopped profiler writes a pstats file tagged with the session and command count."""
+    calculator = Calculator()
+    profiler = CommandProfiler(str(tmp_path))
+    assert profiler.status() == "Profiling is off."
+    assert profiler.start() == "Profiling started."
+    assert profiler.start() == "Error: Profiling is already running."
+    for i in range(3):
+        calculator.execute_command('multiply', i, 7)
+    assert profiler.status() == "Profiling is running (3 commands so far)."
+    path = tmp_path / f"{session_tag()}-profiling-1-3-commands.prof"
+    assert profiler.stop() == f"Profiling of 3 commands written to {path}."
+    assert sys.getprofile() is None  # Nothing is left hooked in once stopped
+    stats = pstats.Stats(str(path))
+    assert any(function == "execute_command" for _, _, function in stats.stats)
+    assert profiler.stop() == "Error: Profiling is not running."
+
+
+def test_allocation_tracer_report(tmp_path):
+    """Test that a stopped tracer writes the top allocation sites, tagged with the session and command count."""
+    calculator = Calculator()
+    tracer = AllocationTracer(str(tmp_path), top=3)
+    assert tracer.start() == "Allocation tracing started."
+    kept = [calculator.execute_command('add', i, 0.5) for i in range(100)]
+    path = tmp_path / f"{session_tag()}-allocation-tracing-1-100-commands.txt"
+    assert tracer.stop() == f"Allocation tracing of 100 commands written to {path}."
+    assert not tracemalloc.is_tracing()
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert lines[0] == f"# Session {session_tag()}, allocation trace 1, 100 commands"
+    assert lines[1].startswith("# Traced memory: ") and lines[2] == "# Top 3 allocation sites still holding memory:"
+    assert len(lines) == 6 and lines[3].startswith("1. ") and " KiB in " in lines[3]
+    assert len(kept) == 100
+
+
+def test_allocation_tracer_needs_tracemalloc(tmp_path):
+    """Test that the tracer refuses to start while something else is using tracemalloc."""
+    tracer = AllocationTracer(str(tmp_path))
+    tracemalloc.start()
+    try:
+        assert tracer.start() == "Error: tracemalloc is already tracing in this process."
+    finally:
+        tracemalloc.stop()
+    assert not tracer.active
+
+
+def test_start_from_environment(profile_dir, monkeypatch):
+    """Test that PROFILE and TRACE_MEM start the shared captures and stop_all writes both dumps."""
+    monkeypatch.setenv("PROFILE", "true")
+    monkeypatch.setenv("TRACE_MEM", "1")
+    monkeypatch.setenv("TRACE_MEM_TOP", "2")
+    start_from_environment()
+    assert PROFILER.active and ALLOCATION_TRACER.active
+    start_from_environment()  # Already running
+    stop_all()
+    assert not PROFILER.active and not ALLOCATION_TRACER.active
+    assert sorted(path.suffix for path in profile_dir.iterdir()) == [".prof", ".txt"]
+    report = next(profile_dir.glob("*.txt")).read_text(encoding="utf-8")
+    assert "# Top 2 allocation sites" in report
+
+
+def test_environment_off_by_default(monkeypatch):
+    """Test that nothing starts unless asked to."""
+    monkeypatch.delenv("PROFILE", raising=False)
+    monkeypatch.setenv("TRACE_MEM", "no")
+    start_from_environment()
+    assert not PROFILER.active and not ALLOCATION_TRACER.active
+
+
+@pytest.mark.parametrize("command", ["profile", "trace-mem"])
+def test_profiling_commands(profile_dir, command):
+    """Test the profile and trace-mem commands' status, start, stop and unknown actions."""
+    calculator = Calculator()
+    assert calculator.execute_command(command).endswith(" is off.")
+    assert calculator.execute_command(command, 'start').endswith(" started.")
+    calculator.execute_command('add', 1, 2)
+    assert calculator.execute_command(command).endswith("running (2 commands so far).")  # Counting the start
+    assert f" of 3 commands written to {profile_dir}" in calculator.execute_line(f"{command} stop")
+    assert calculator.execute_command(command, 'pause') == \
+        f"Error: Unknown {command} action 'pause'. Use '{command}', '{command} start' or '{command} stop'."
@@ -0,0 +1,139 @@
+"""
+Tests for the operation registry in the app.operations.registry module.
+
+Plugin operations are declared through fake entry points that point at modules written
+to a temporary directory, so the tests can check exactly when a plugin is imported.
+
+Fixtures:
+    plugins: Writes plugin modules and declares their entry points.
+"""
+# pylint: disable=redefined-outer-name
+import importlib.metadata
+import sys
+import pytest
+import app.calculator
+import app.history
+from app.calculator import Calculator
+from app.history import History
+from app.operations import Operation
+from app.operations.addition import Addition
+from app.operations.registry import ENTRY_POINT_GROUP, OperationRegistry
+
+PLUGIN_SOURCE = '''
+import numpy as np
+from app.operations import Operation
+
+
+class Hypotenuse(Operation):
+    """Length of the hypotenuse of a right triangle."""
+
+    def calculate(self, a, b):
+        return (a * a + b * b) ** 0.5
+
+    def calculate_batch(self, a, b):
+        a, b = self._validate_batch_inputs(a, b)
+        return np.hypot(a, b)
+
+
+class NotAnOperation:
+    pass
+'''
+
+
+@pytest.fixture
+def plugins(tmp_path, monkeypatch):
+    """Fixture to declare plugin entry points backed by a module that is not imported yet."""
+    (tmp_path / "calc_plugin_geometry.py").write_text(PLUGIN_SOURCE, encoding="utf-8")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    declared = [
+        importlib.metadata.EntryPoint("hypot", "calc_plugin_geometry:Hypotenuse", ENTRY_POINT_GROUP),
+        importlib.metadata.EntryPoint("broken", "calc_plugin_geometry:NotAnOperation", ENTRY_POINT_GROUP),
+        importlib.metadata.EntryPoint("missing", "calc_plugin_missing:Anything", ENTRY_POINT_GROUP),
+        importlib.metadata.EntryPoint("add", "calc_plugin_geometry:Hypotenuse", ENTRY_POINT_GROUP),
+    ]
+    searches = []
+
+    def entry_points(group):
+        searches.append(group)
+        return [entry_point for entry_point in declared if entry_point.group == group]
+
+    monkeypatch.setattr(importlib.metadata, "entry_points", entry_points)
+    yield searches
+    sys.modules.pop("calc_plugin_geometry", None)
+
+
+def make_registry():
+    """Build a registry with the built-in operations."""
+    registry = OperationRegistry()
+    registry.discover_builtins()
+    return registry
+
+
+def test_builtins_are_discovered():
+    """Test that every Operation subclass in app.operations is registered under its command and class name."""
+    registry = make_registry()
+    assert sorted(registry.by_command) == ['add', 'divide', 'modulus', 'multiply', 'power', 'powmod', 'subtract']
+    assert sorted(registry.by_class_name) == ['Addition', 'Division', 'Modulus', 'Multiplication', 'PowMod', 'Power',
+                                              'Subtraction']
+    assert all(isinstance(operation, Operation) for operation in registry.by_command.values())
+    assert registry.by_command['power'] is registry.by_class_name['Power']
+
+
+def test_plugins_load_on_first_use(plugins):
+    """Test that entry points are searched on the first miss and a plugin module is imported only when used."""
+    registry = make_registry()
+    assert registry.by_command['add'].__class__ is Addition and plugins == []  # Built-ins never search
+    assert 'hypot' in registry.by_command and 'Hypotenuse' in registry.by_class_name
+    assert plugins == [ENTRY_POINT_GROUP] and "calc_plugin_geometry" not in sys.modules
+    hypot = registry.by_command['hypot']
+    assert "calc_plugin_geometry" in sys.modules and hypot.calculate(3, 4) == 5.0
+    assert registry.by_class_name['Hypotenuse'] is hypot and registry.by_command.get('hypot') is hypot
+    assert registry.by_command.names().count('hypot') == 1 and plugins == [ENTRY_POINT_GROUP]
+
+
+def test_plugin_found_by_class_name(plugins):
+    """Test that a history loader looking up a plugin class name loads the plugin."""
+    registry = make_registry()
+    assert 'Hypotenuse' in registry.by_class_name.names()
+    assert registry.by_class_name['Hypotenuse'] is registry.by_command['hypot']
+    assert registry.load('Hypotenuse', 'class_name') is registry.by_command['hypot']  # Already loaded
+
+
+@pytest.mark.parametrize("command", ["broken", "missing", "nothing"])
+def test_unusable_plugins_are_unknown(plugins, command, caplog):
+    """Test that plugins that fail to load, and names nobody registered, are unknown commands."""
+    registry = make_registry()
+    assert registry.by_command.get(command) is None
+    with pytest.raises(KeyError):
+        registry.by_command[command]  # pylint: disable=pointless-statement
+    if command != "nothing":
+        assert f"Could not load plugin operation {command}" in caplog.text
+
+
+def test_plugin_cannot_replace_builtin(plugins, caplog):
+    """Test that a plugin declaring a built-in command is ignored."""
+    registry = make_registry()
+    assert 'hypot' in registry.by_command
+    assert isinstance(registry.by_command['add'], Addition)
+    assert "Plugin operation add is already registered" in caplog.text
+
+
+def test_calculator_and_history_use_plugins(history_file, plugins, monkeypatch):  # pylint: disable=unused-argument
+    """Test that the calculator dispatches a plugin command and the history loader reads its rows back."""
+    registry = make_registry()
+    monkeypatch.setattr(app.calculator, "OPERATIONS", registry.by_command)
+    monkeypatch.setattr(app.history, "operation_map", registry.by_class_name)
+    calculator = Calculator()
+    assert 'hypot' not in calculator.commands and "calc_plugin_geometry" not in sys.modules
+    assert "- hypot: Operation from app.operations or a plugin" in calculator.show_help()
+    assert calculator.execute_line("hypot 3 4") == 5.0
+    assert calculator.execute_line("stats hypot") == "hypot: count 1, sum 5, mean 5, min 5, max 5, p50 5, p95 5, p99 5"
+    assert [calc.result for calc in calculator.execute_line("query hypot")] == [5.0]
+    calculator.history.save()
+    sys.modules.pop("calc_plugin_geometry")
+    restarted = make_registry()
+    monkeypatch.setattr(app.history, "operation_map", restarted.by_class_name)
+    history = History()
+    assert history.load() == f"History loaded from {history.filename}."
+    assert [repr(calc) for calc in history.get_history()] == ["3 hypotenuse 4 = 5.0"]
+
@@ -0,0 +1,318 @@
+# tests/test_server.py
+
+"""Tests for the asyncio line-protocol server and its load-test client."""
+
+import asyncio
+import threading
+import pytest
+import app.server
+from app.cache import ResultCache
+from app.calculator import Calculator
+from app.server import MAX_LINE_BYTES, CalculatorServer, format_reply
+from app.server.loadtest import load_test, percentile, raise_open_file_limit
+
+
+async def _start(**kwargs):
+    """Start a server on a free local port."""
+    server = CalculatorServer(**kwargs)
+    await server.start("127.0.0.1", 0)
+    return server
+
+
+async def _exchange(server, lines):
+    """Send all lines at once on a new connection and read one reply per line."""
+    reader, writer = await asyncio.open_connection(*server.address)
+    writer.write("".join(f"{line}\n" for line in lines).encode("utf-8"))
+    await writer.drain()
+    replies = [(await reader.readline()).decode("utf-8").rstrip("\n") for _ in lines]
+    writer.close()
+    await writer.wait_closed()
+    return replies
+
+
+def test_format_reply():
+    """Test that every output becomes exactly one reply line."""
+    assert format_reply(3.0) == "3.0\n"
+    assert format_reply(10 ** 5000) == "1.000000e+5000\n"
+    assert format_reply(["a", "b"]) == "a; b\n"
+    assert format_reply("one\ntwo") == "one\\ntwo\n"
+
+
+def test_pipelined_commands():
+    """Test that pipelined commands are answered in order, including expressions and bad input."""
+    async def scenario():
+        server = await _start()
+        replies = await _exchange(server, ["add 1 2", "# comment", "3 * (2 + 1)", "multiply 2 x", "divide 1 0",
+                                           "history", "exit"])
+        await server.close()
+        return replies
+
+    replies = asyncio.run(scenario())
+    assert replies[:4] == ["3", "9", "Error: Invalid input.", "Error: Cannot divide by zero"]
+    assert replies[4] == "1 addition 2 = 3; 3 * (2 + 1) = 9"
+    assert replies[5] == "Exiting the calculator. Goodbye!"
+    assert replies[6] == ""  # The server closes the connection after exit
+
+
+def test_sessions_are_isolated_and_share_cache():
+    """Test that each connection has its own history while the result cache is shared."""
+    cache = ResultCache(16)
+
+    async def scenario():
+        server = await _start(cache=cache)
+        first = await _exchange(server, ["add 1 2", "history"])
+        second = await _exchange(server, ["add 1 2", "subtract 5 1", "history"])
+        await server.close()
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first[1] == "1 addition 2 = 3"
+    assert second[2] == "1 addition 2 = 3; 5 subtraction 1 = 4"
+    assert cache.hits == 1
+
+
+def test_sessions_never_share_the_history_file(history_file, monkeypatch):
+    """Test that open sessions cannot read, undo or save over each other's history, even in journal mode."""
+    monkeypatch.setenv("HISTORY_JOURNAL", "true")
+
+    async def ask(reader, writer, line):
+        writer.write(f"{line}\n".encode("utf-8"))
+        await writer.drain()
+        return (await reader.readline()).decode("utf-8").rstrip("\n")
+
+    async def scenario():
+        server = await _start()
+        first = await asyncio.open_connection(*server.address)
+        second = await asyncio.open_connection(*server.address)
+        replies = [await ask(*first, "add 1 2"), await ask(*second, "multiply 2 3"), await ask(*second, "history"),
+                   await ask(*first, "undo"), await ask(*second, "history"), await ask(*second, "save"),
+                   await ask(*first, "load")]
+        for _, writer in (first, second):
+            writer.close()
+            await writer.wait_closed()
+        await server.close()
+        return replies
+
+    replies = asyncio.run(scenario())
+    assert replies[2] == "2 multiplication 3 = 6"
+    assert replies[3] == "Undone: 1 addition 2 = 3"
+    assert replies[4] == "2 multiplication 3 = 6"
+    assert replies[5] == replies[6] == "Error: This history is kept in memory only and cannot be saved or loaded."
+    assert list(history_file.parent.iterdir()) == []  # Neither the history file nor a journal was written
+
+
+def test_close_ends_open_sessions(caplog):
+    """Test that closing the server ends connected sessions without asyncio logging their cancellation."""
+    async def scenario():
+        server = await _start()
+        reader, writer = await asyncio.open_connection(*server.address)
+        writer.write(b"add 1 2\n")
+        await writer.drain()
+        reply = await reader.readline()
+        await server.close()
+        closed = await asyncio.wait_for(reader.readline(), 5)  # The server closes the connection
+        writer.close()
+        return server, reply, closed
+
+    with caplog.at_level("ERROR", logger="asyncio"):
+        server, reply, closed = asyncio.run(scenario())
+    assert (reply, closed) == (b"3\n", b"")
+    assert server.served == 1 and server.active == 0
+    assert not caplog.records
+
+
+def test_slow_command_does_not_block_other_sessions(monkeypatch):
+    """Test that a command that waits, such as a power in a worker process, leaves other connections answered."""
+    release = threading.Event()
+
+    class WaitingCalculator(Calculator):
+        """Calculator whose 'wait' command blocks its thread until released."""
+
+        def execute_line(self, text):
+            """Block on 'wait', otherwise execute the line."""
+            if text == "wait":
+                return "released" if release.wait(10) else "timed out"
+            return super().execute_line(text)
+
+    monkeypatch.setattr(app.server, "Calculator", WaitingCalculator)
+
+    async def scenario():
+        server = await _start()
+        waiting = asyncio.ensure_future(_exchange(server, ["wait"]))
+        other = await asyncio.wait_for(_exchange(server, ["add 1 2"]), 5)
+        release.set()
+        replies = other + await waiting
+        await server.close()
+        return replies
+
+    assert asyncio.run(scenario()) == ["3", "released"]
+
+
+def test_connection_limit_queues_clients():
+    """Test that a connection beyond the limit waits until a session ends."""
+    async def scenario():
+        server = await _start(max_connections=1)
+        reader, writer = await asyncio.open_connection(*server.address)
+        writer.write(b"add 1 1\n")
+        assert await reader.readline() == b"2\n"
+        waiting = asyncio.ensure_future(_exchange(server, ["add 2 2"]))
+        await asyncio.sleep(0.05)
+        assert not waiting.done() and server.active == 1
+        writer.close()
+        await writer.wait_closed()
+        replies = await asyncio.wait_for(waiting, 5)
+        await server.close()
+        return replies
+
+    assert asyncio.run(scenario()) == ["4"]
+
+
+def test_oversized_line_closes_connection():
+    """Test that a line longer than the limit gets an error reply and the connection is closed."""
+    async def scenario():
+        server = await _start()
+        reader, writer = await asyncio.open_connection(*server.address)
+        writer.write(b"1" * (MAX_LINE_BYTES + 1) + b"\n")
+        replies = [await reader.readline(), await reader.readline()]
+        writer.close()
+        await writer.wait_closed()
+        await server.close()
+        return replies
+
+    assert asyncio.run(scenario()) == [b"Error: Line too long.\n", b""]
+
+
+def test_unix_socket_load_test(tmp_path):
+    """Test the load-test client against a server on a Unix socket, with pipelining."""
+    path = str(tmp_path / "calculator.sock")
+
+    async def scenario():
+        server = CalculatorServer(max_connections=50)
+        await server.start(path=path)
+        report = await load_test(path=path, connections=100, requests=20, pipeline_depth=4)
+        await server.close()
+        return report
+
+    report = asyncio.run(scenario())
+    assert report["requests"] == 2000 and report["errors"] == 0
+    assert report["rps"] > 0 and 0 < report["p50_ms"] <= report["p99_ms"] <= report["max_ms"]
+
+
+def test_tcp_load_test():
+    """Test the load-test client over TCP with one request in flight per connection."""
+    async def scenario():
+        server = await _start(cache=ResultCache(0))
+        report = await load_test(port=server.address[1], connections=20, requests=5)
+        await server.close()
+        return report
+
+    report = asyncio.run(scenario())
+    assert report["requests"] == 100 and report["errors"] == 0
+
+
+def test_load_test_without_server(tmp_path):
+    """Test that connections that cannot be opened are counted as errors."""
+    report = asyncio.run(load_test(path=str(tmp_path / "missing.sock"), connections=3, requests=1))
+    assert report["requests"] == 0 and report["errors"] == 3 and report["p99_ms"] == 0.0
+
+
+def test_load_test_reports_errors():
+    """Test that error replies and closed connections are counted as errors."""
+    async def reply_with_error(reader, writer):
+        await reader.readline()
+        writer.write(b"Error: nope\n")
+        await writer.drain()
+        writer.close()
+
+    async def scenario():
+        server = await asyncio.start_server(reply_with_error, "127.0.0.1", 0)
+        report = await load_test(port=server.sockets[0].getsockname()[1], connections=2, requests=2)
+        server.close()
+        await server.wait_closed()
+        return report
+
+    report = asyncio.run(scenario())
+    assert report["requests"] == 2 and report["errors"] == 4
+
+
+def test_load_test_reports_reset_connections():
+    """Test that a connection reset by the server is counted as an error."""
+    async def reset(reader, writer):
+        writer.transport.abort()
+
+    async def scenario():
+        server = await asyncio.start_server(reset, "127.0.0.1", 0)
+        report = await load_test(port=server.sockets[0].getsockname()[1], connections=2, requests=2)
+        server.close()
+        await server.wait_closed()
+        return report
+
+    report = asyncio.run(scenario())
+    assert report["requests"] == 0 and report["errors"] == 2
+
+
+def test_client_disconnect_ends_session():
+    """Test that a session ends quietly when the client connection is lost."""
+    class LostReader:
+        async def readline(self):
+            raise ConnectionResetError("Connection lost")
+
+    class Writer:
+        closed = False
+
+        def close(self):
+            self.closed = True
+
+        async def wait_closed(self):
+            pass
+
+    async def scenario():
+        server = CalculatorServer()
+        server._slots = asyncio.Semaphore(1)
+        writer = Writer()
+        await server.handle(LostReader(), writer)
+        return server, writer
+
+    server, writer = asyncio.run(scenario())
+    assert writer.closed and server.served == 1 and server.active == 0
+
+
+def test_serve_forever_until_cancelled():
+    """Test that serve_forever answers connections until its task is cancelled."""
+    async def scenario():
+        server = await _start()
+        serving = asyncio.ensure_future(server.serve_forever())
+        replies = await _exchange(server, ["power 2 10"])
+        serving.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await serving
+        return replies
+
+    assert asyncio.run(scenario()) == ["1024"]
+
+
+def test_invalid_settings():
+    """Test that impossible server and load-test settings are rejected."""
+    with pytest.raises(ValueError):
+        CalculatorServer(max_connections=0)
+    with pytest.raises(ValueError):
+        asyncio.run(load_test(connections=0))
+
+
+def test_helpers():
+    """Test the percentile and open-file limit helpers."""
+    assert percentile([], 0.99) == 0.0
+    assert percentile([1.0, 2.0, 3.0, 4.0], 0.5) == 2.0
+    assert percentile(list(range(1, 101)), 0.99) == 99
+    assert raise_open_file_limit(64) >= 64
+
+
+def test_open_file_limit_is_raised(monkeypatch):
+    """Test that a low soft limit is raised, but never past the hard limit."""
+    from app.server import loadtest
+    limits = []
+    monkeypatch.setattr(loadtest.resource, "getrlimit", lambda _: (256, 1024))
+    monkeypatch.setattr(loadtest.resource, "setrlimit", lambda _, value: limits.append(value))
+    assert raise_open_file_limit(5000) == 1024
+    assert raise_open_file_limit(512) == 512
+    assert limits == [(1024, 1024), (512, 1024)]
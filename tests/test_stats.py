@@ -0,0 +1,144 @@
+"""
+Tests for the incrementally maintained statistics in the app.history.stats module.
+
+The aggregates are checked against values computed from scratch after rows are added
+and removed, and the quantile sketch against exact percentiles.
+"""
+import math
+import numpy as np
+import pytest
+from app.calculation import Calculation
+from app.history.columnar import ColumnarStore
+from app.history.stats import CompensatedSum, HistoryStats, QuantileSketch, RELATIVE_ACCURACY
+from app.operations.addition import Addition
+from app.operations.multiplication import Multiplication
+from app.operations.power import Power
+
+
+def exact_percentile(values, fraction):
+    """Return the nearest-rank percentile of some values."""
+    ordered = np.sort(values)
+    return ordered[min(max(1, math.ceil(fraction * len(ordered))), len(ordered)) - 1]
+
+
+def test_compensated_sum_keeps_small_terms():
+    """Test that small terms survive next to a large one, and that subtracting it back leaves them exactly."""
+    total = CompensatedSum()
+    total.add(1e16)
+    for _ in range(10):
+        total.add(1.0)
+    assert total.value == 1e16 + 10
+    total.add(-1e16)
+    assert total.value == 10.0
+
+
+@pytest.mark.parametrize("values", [
+    np.random.default_rng(1).lognormal(0, 2, 10000),
+    np.random.default_rng(2).normal(0, 100, 10000),  # Both signs
+    np.concatenate((np.zeros(100), -np.arange(1.0, 101.0))),  # Zeros and negatives
+])
+def test_sketch_quantiles_are_within_relative_accuracy(values):
+    """Test that sketch quantiles are within the relative accuracy of the exact percentile."""
+    sketch = QuantileSketch()
+    sketch.add(values)
+    assert sketch.count == len(values)
+    for fraction in (0.01, 0.5, 0.95, 0.99, 1.0):
+        exact = exact_percentile(values, fraction)
+        assert abs(sketch.quantile(fraction) - exact) <= RELATIVE_ACCURACY * abs(exact) + 1e-12
+
+
+def test_sketch_removal_and_merge():
+    """Test that removing values undoes adding them and that merged sketches match one built from everything."""
+    rng = np.random.default_rng(3)
+    first, second = rng.normal(50, 10, 1000), rng.normal(-5, 3, 1000)
+    whole, merged, part = QuantileSketch(), QuantileSketch(), QuantileSketch()
+    whole.add(np.concatenate((first, second)))
+    part.add(second)
+    for value in first:
+        merged.add_one(value)
+    merged.merge(part)
+    assert [merged.quantile(f) for f in (0.1, 0.5, 0.9)] == [whole.quantile(f) for f in (0.1, 0.5, 0.9)]
+    merged.add(second, -1)
+    merged.add_one(0.0)
+    merged.add_one(0.0, -1)
+    only_first = QuantileSketch()
+    only_first.add(first)
+    assert merged.count == 1000 and merged.quantile(0.5) == only_first.quantile(0.5)
+    merged.add(first, -1)
+    assert merged.count == 0 and merged.quantile(0.5) is None
+
+
+def test_sketch_memory_is_bounded():
+    """Test that a sketch over a huge range keeps at most max_bins bins and still answers high quantiles."""
+    sketch = QuantileSketch(max_bins=64)
+    values = np.logspace(-8, 2, 5000)  # About 1150 bins at 1% accuracy
+    sketch.add(values)
+    sketch.add_one(1e-7)  # Below the collapsed bins: counted in the lowest one
+    sketch.add_one(1e-7, -1)
+    assert len(sketch._positive.counts) <= 64  # pylint: disable=protected-access
+    assert abs(sketch.quantile(0.99) - exact_percentile(values, 0.99)) <= 0.01 * exact_percentile(values, 0.99)
+    sketch.add(values, -1)
+    assert sketch.count == 0
+
+
+def test_history_stats_per_operation():
+    """Test the overall and per-code summaries, including removing a block and missing results."""
+    stats = HistoryStats()
+    stats.add(0, 0, np.array([1.0, 2.0, 3.0]))
+    stats.add(3, np.array([1, 0, 1], dtype=np.uint8), np.array([10.0, np.nan, -4.0]))
+    stats.add_one(6, 1, math.nan)
+    assert stats.summary(0) == {"count": 3, "sum": 6.0, "mean": 2.0, "min": 1.0, "max": 3.0,
+                                "p50": pytest.approx(2.0, rel=0.01), "p95": pytest.approx(3.0, rel=0.01),
+                                "p99": pytest.approx(3.0, rel=0.01)}
+    overall = stats.summary()
+    assert (overall["count"], overall["sum"], overall["min"], overall["max"]) == (5, 12.0, -4.0, 10.0)
+    stats.remove_one(6, 1, math.nan)
+    stats.remove(4, np.array([0, 1], dtype=np.uint8), np.array([np.nan, -4.0]))
+    assert stats.summary(1)["min"] == 10.0 and stats.summary()["count"] == 4
+    stats.add(4, 2, np.arange(100.0))  # A rising run: every row is a new maximum
+    stats.remove(54, np.full(50, 2, dtype=np.uint8), np.arange(50.0, 100.0))
+    assert stats.summary(2)["max"] == 49.0
+    assert stats.summary(7) == {"count": 0, "sum": 0.0, "mean": None, "min": None, "max": None,
+                                "p50": None, "p95": None, "p99": None}
+
+
+def recomputed(store, operation=None):
+    """Summarize the results of a store from scratch."""
+    values = [calc.result for calc in (store.get(row) for row in range(store.size))
+              if (operation is None or type(calc.operation) is type(operation)) and calc.result is not None]
+    values = np.array([float(value) for value in values if value < 1e308])
+    if not len(values):
+        return 0, 0.0, None, None
+    return len(values), math.fsum(values), values.min(), values.max()
+
+
+def test_store_statistics_follow_every_change():
+    """Test that store statistics match a recomputation while rows are appended, undone and redone."""
+    rng = np.random.default_rng(5)
+    store = ColumnarStore(capacity=2)
+    assert store.statistics()["count"] == 0
+    operations = [Addition(), Multiplication(), Power()]
+    for step in range(400):
+        action = rng.integers(5)
+        if action == 0 and store.size:
+            entry = store.pop()
+            if rng.integers(2):
+                store.restore(entry)
+        elif action == 1:
+            values = rng.normal(0, 1e6, int(rng.integers(1, 5)))
+            store.append_batch(operations[step % 2], values, values, values * 3)
+        elif action == 2:
+            codes = np.array([store.code_for(operations[code]) for code in rng.integers(0, 2, 3)], dtype=np.uint8)
+            values = rng.normal(0, 10, 3)
+            store.extend(codes, values, values, values + 0.5)
+        else:
+            calculation = Calculation(operations[int(rng.integers(3))], int(rng.integers(2, 9)),
+                                      int(rng.choice([2, 3, 400])))  # Some powers only fit the exact-value table
+            calculation.execute()
+            store.append(calculation)
+        if step % 25 == 0:
+            for operation in (None, *operations):
+                summary = store.statistics(operation)
+                count, total, low, high = recomputed(store, operation)
+                assert (summary["count"], summary["min"], summary["max"]) == (count, low, high)
+                assert summary["sum"] == pytest.approx(total, rel=1e-12, abs=1e-6)
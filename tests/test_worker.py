@@ -0,0 +1,110 @@
+"""
+Tests for running calculations in an isolated worker process with app.worker.run_isolated.
+
+The worker body, _work, is also run in this process so that its memory-limit setup
+can be checked without limiting the test process itself.
+"""
+import multiprocessing
+import operator
+import os
+import time
+import pytest
+import app.worker
+from app.worker import _mapped_bytes, _work, run_isolated
+
+
+def test_result_comes_back():
+    """Test that a worker returns the function's result, including a big int."""
+    assert run_isolated(operator.pow, (3, 100_000), timeout=10) == 3 ** 100_000
+
+
+@pytest.mark.parametrize("function, args, error, message", [
+    (operator.truediv, (1, 0), ZeroDivisionError, "division by zero"),
+    (bytearray, (512 * 2 ** 20,), MemoryError, "The calculation needed more than 64 MB and was stopped."),
+    (os._exit, (3,), RuntimeError, "The worker process exited with code 3."),
+])
+def test_failures_are_raised(function, args, error, message):
+    """Test that exceptions, running out of memory and a worker that dies are raised in the caller."""
+    with pytest.raises(error, match=message):
+        run_isolated(function, args, timeout=10, memory_bytes=64 * 2 ** 20)
+
+
+def test_timeout_stops_the_worker():
+    """Test that a worker still running at the timeout is killed and a TimeoutError raised promptly."""
+    started = time.perf_counter()
+    with pytest.raises(TimeoutError, match="did not finish within 0.3 s"):
+        run_isolated(time.sleep, (30,), timeout=0.3)
+    assert time.perf_counter() - started < 5
+    assert not multiprocessing.active_children()
+
+
+class FakeResource:
+    """Stands in for the resource module and records the limit that would be set."""
+
+    RLIMIT_AS = 9
+    RLIM_INFINITY = -1
+
+    def __init__(self, hard):
+        self.hard = hard
+        self.limits = []
+
+    def getrlimit(self, _):
+        """Return the current soft and hard limits."""
+        return (self.hard, self.hard)
+
+    def setrlimit(self, kind, limits):
+        """Record the limits instead of applying them."""
+        self.limits.append((kind, limits))
+
+
+class Sender:
+    """Collects what the worker sends, failing the first send if asked to."""
+
+    def __init__(self, fail_first=False):
+        self.sent = []
+        self.fail_first = fail_first
+        self.closed = False
+
+    def send(self, reply):
+        """Record a reply, or raise MemoryError for the first one."""
+        if self.fail_first:
+            self.fail_first = False
+            raise MemoryError()
+        self.sent.append(reply)
+
+    def close(self):
+        """Record that the pipe was closed."""
+        self.closed = True
+
+
+@pytest.mark.parametrize("hard, expected", [(-1, 6000), (4000, 4000)])
+def test_work_limits_address_space(monkeypatch, hard, expected):
+    """Test that the worker caps its address space at its current size plus the allowance, within the hard limit."""
+    fake = FakeResource(hard)
+    monkeypatch.setattr(app.worker, "resource", fake)
+    monkeypatch.setattr(app.worker, "_mapped_bytes", lambda: 5000)
+    sender = Sender()
+    _work(sender, operator.add, (1, 2), 1000)
+    assert fake.limits == [(fake.RLIMIT_AS, (expected, hard))]
+    assert sender.sent == [(True, 3)] and sender.closed
+
+
+def test_work_reports_a_result_too_large_to_send():
+    """Test that a result that cannot be sent back is reported as running out of memory."""
+    sender = Sender(fail_first=True)
+    _work(sender, operator.add, (1, 2), 0)
+    (succeeded, error), = sender.sent
+    assert not succeeded and isinstance(error, MemoryError)
+
+
+def test_work_sends_back_exceptions():
+    """Test that an exception raised by the function is sent back instead of a result."""
+    sender = Sender()
+    _work(sender, operator.truediv, (1, 0), 0)
+    (succeeded, error), = sender.sent
+    assert not succeeded and isinstance(error, ZeroDivisionError) and sender.closed
+
+
+def test_mapped_bytes():
+    """Test that the current address space can be read."""
+    assert _mapped_bytes() > 0